@@ -5,6 +5,7 @@
 - 回测引擎
 - 数据加载
 - 策略回测
+- 参数优化
 - 性能分析
 - 结果可视化
 """
@@ -12,6 +13,7 @@
 from .engine import *
 from .data_feed import *
 from .strategy_backtest import *
+from .optimization import *
 from .performance import *
 from .visualization import *
 
@@ -19,6 +21,7 @@ __all__ = [
     'engine',
     'data_feed',
     'strategy_backtest',
+    'optimization',
     'performance',
     'visualization'
 ]
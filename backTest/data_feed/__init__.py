@@ -4,3 +4,4 @@
 Created on 2025/4/13.
 @author: Air.Zou
 """
+from .shared_feed import SharedArrayFeed, SharedMarketData
@@ -0,0 +1,351 @@
+"""
+共享内存数据源模块
+
+多进程回测时行情数据只在共享内存中保存一份：
+- SharedMarketData 把多只股票的 OHLCV 数据写入一块 multiprocessing.shared_memory，
+  每只股票是一个 (行数 × 7) 的 float64 矩阵，列依次为 datetime、open、high、low、close、volume、openinterest
+- 可以附加预先计算好的指标列（extra_columns），数据源中作为同名的 lines 提供给策略
+- 对象序列化时只传递共享内存名称和布局，子进程反序列化时直接映射同一块内存，不复制数据
+- SharedArrayFeed 是 backtrader 数据源，逐行从共享内存矩阵读取，提供 backtrader 的标准 lines，
+  不需要在每个进程中构造 DataFrame 和 PandasData；按日期截取时只取矩阵的行切片
+
+example:
+    with SharedMarketData.create({'600000.SH': df1, '000001.SZ': df2}) as market:
+        engine = BacktestEngine()
+        for name in market.names:
+            engine.add_data(market.feed(name), name=name)
+        # 或者把 market 作为进程池的 initargs 传给子进程，子进程中同样调用 market.feed(name)
+"""
+
+import gc
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from utils.log_util import logger
+
+# 共享矩阵的列，datetime 为 backtrader 的日期数值（date2num）
+FEED_COLUMNS = ('datetime', 'open', 'high', 'low', 'close', 'volume', 'openinterest')
+# datetime.date(1970, 1, 1).toordinal()，backtrader 的日期数值从公元 1 年开始计数
+EPOCH_ORDINAL = 719163
+NANOSECONDS_PER_DAY = 86400 * 10 ** 9
+
+
+def date2num_array(index: Any) -> np.ndarray:
+    """
+    批量转换为 backtrader 的日期数值，与逐个调用 bt.date2num 的结果一致
+
+    Args:
+        index: 日期序列（无时区）
+
+    Returns:
+        np.ndarray: float64 日期数值
+    """
+    return pd.DatetimeIndex(index).asi8 / NANOSECONDS_PER_DAY + EPOCH_ORDINAL
+
+
+def num2date_array(values: np.ndarray) -> pd.DatetimeIndex:
+    """
+    backtrader 的日期数值批量转换为日期，精确到微秒（与 bt.num2date 一致）
+
+    Args:
+        values: float64 日期数值
+
+    Returns:
+        pd.DatetimeIndex: 日期
+    """
+    micros = np.round((np.asarray(values, dtype=np.float64) - EPOCH_ORDINAL) * (NANOSECONDS_PER_DAY // 1000))
+    return pd.DatetimeIndex(micros.astype(np.int64) * 1000)
+
+
+def frame_to_matrix(frame: pd.DataFrame, extra_columns: Sequence[str] = ()) -> np.ndarray:
+    """
+    行情数据转换为共享矩阵的布局，列名不区分大小写，缺失的列填 NaN
+
+    Args:
+        frame: 以 DatetimeIndex 为索引的行情数据
+        extra_columns: 附加在标准列之后的列，如预先计算的指标
+
+    Returns:
+        np.ndarray: (行数 × (7 + 附加列数)) 的 float64 矩阵
+    """
+    columns = {str(c).lower(): c for c in frame.columns}
+    names = FEED_COLUMNS + tuple(extra_columns)
+    matrix = np.full((len(frame), len(names)), np.nan)
+    matrix[:, 0] = date2num_array(frame.index)
+    for j, name in enumerate(names[1:], start=1):
+        if name in columns:
+            matrix[:, j] = frame[columns[name]].to_numpy(dtype=np.float64)
+    return matrix
+
+
+class SharedArrayFeed(bt.feed.DataBase):
+    """基于 (行数 × 列数) 矩阵的 backtrader 数据源，矩阵可以是共享内存或 memmap 的视图，前 7 列为 FEED_COLUMNS"""
+
+    params = (
+        ('values', None),
+    )
+
+    def start(self):
+        """开始读取"""
+        super().start()
+        self._idx = -1
+        self._extra = [getattr(self.lines, name) for name in self.getlinealiases()[len(FEED_COLUMNS):]]
+
+    def _load(self):
+        self._idx += 1
+        values = self.p.values
+        if self._idx >= len(values):
+            return False
+        row = values[self._idx]
+        lines = self.lines
+        lines.datetime[0] = row[0]
+        lines.open[0] = row[1]
+        lines.high[0] = row[2]
+        lines.low[0] = row[3]
+        lines.close[0] = row[4]
+        lines.volume[0] = row[5]
+        lines.openinterest[0] = row[6]
+        for j, line in enumerate(self._extra, start=len(FEED_COLUMNS)):
+            line[0] = row[j]
+        return True
+
+
+_FEED_CLASSES: Dict[tuple, type] = {}
+
+
+def feed_class(extra_columns: Sequence[str] = ()) -> type:
+    """
+    带附加 lines 的数据源类，同样的附加列复用同一个类
+
+    Args:
+        extra_columns: 附加列名，需要是合法的标识符
+
+    Returns:
+        type: SharedArrayFeed 或其子类
+    """
+    extra_columns = tuple(extra_columns)
+    if not extra_columns:
+        return SharedArrayFeed
+    cls = _FEED_CLASSES.get(extra_columns)
+    if cls is None:
+        invalid = [c for c in extra_columns if not c.isidentifier() or c in FEED_COLUMNS]
+        if invalid:
+            raise ValueError(f"附加列名不能作为 lines 名称: {invalid}")
+        cls = type(SharedArrayFeed)('SharedArrayFeed_' + '_'.join(extra_columns), (SharedArrayFeed,),
+                                    {'lines': extra_columns, '__module__': __name__})
+        _FEED_CLASSES[extra_columns] = cls
+    return cls
+
+
+class SharedMarketData:
+    """共享内存中的多只股票行情数据"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: List[Dict[str, Any]], owner: bool,
+                 extra_columns: Sequence[str] = ()):
+        """
+        初始化，一般通过 create 或 attach 构造
+
+        Args:
+            shm: 共享内存块
+            layout: 每只股票的 {'name', 'offset', 'rows'}，offset 为起始行号
+            owner: 是否由当前对象创建，创建者负责释放共享内存
+            extra_columns: 附加列名
+        """
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.extra_columns = tuple(extra_columns)
+        self.columns = FEED_COLUMNS + self.extra_columns
+        total = sum(item['rows'] for item in layout)
+        self._matrix = np.ndarray((total, len(self.columns)), dtype=np.float64, buffer=shm.buf)
+        self._views = {item['name']: self._matrix[item['offset']:item['offset'] + item['rows']] for item in layout}
+
+    @classmethod
+    def create(cls, frames: Dict[str, pd.DataFrame], extra_columns: Sequence[str] = (),
+               name: Optional[str] = None) -> 'SharedMarketData':
+        """
+        创建共享内存并写入数据
+
+        Args:
+            frames: {数据名称: 以 DatetimeIndex 为索引的行情数据}
+            extra_columns: 附加写入的列，如预先计算的指标，缺失时为 NaN
+            name: 共享内存名称，默认由系统生成
+
+        Returns:
+            SharedMarketData: 共享数据，使用完后需要调用 unlink（或使用 with 语句）
+        """
+        layout, offset = [], 0
+        for key, frame in frames.items():
+            layout.append({'name': key, 'offset': offset, 'rows': len(frame)})
+            offset += len(frame)
+        size = max(offset * (len(FEED_COLUMNS) + len(extra_columns)) * 8, 1)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        market = cls(shm, layout, owner=True, extra_columns=extra_columns)
+        for item, frame in zip(layout, frames.values()):
+            market._views[item['name']][:] = frame_to_matrix(frame, extra_columns)
+        logger.debug(f"创建共享行情数据: {shm.name}, {len(layout)} 只, {size / 1024 ** 2:.1f}MB")
+        return market
+
+    @classmethod
+    def attach(cls, name: str, layout: List[Dict[str, Any]], extra_columns: Sequence[str] = ()) -> 'SharedMarketData':
+        """
+        映射已存在的共享内存，不复制数据
+
+        Args:
+            name: 共享内存名称
+            layout: 数据布局
+            extra_columns: 附加列名
+
+        Returns:
+            SharedMarketData: 共享数据
+        """
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False, extra_columns=extra_columns)
+
+    def __reduce__(self):
+        # 序列化时只传递名称和布局，反序列化时映射同一块共享内存
+        return SharedMarketData.attach, (self.shm.name, self.layout, self.extra_columns)
+
+    @property
+    def names(self) -> List[str]:
+        """数据名称列表"""
+        return [item['name'] for item in self.layout]
+
+    def values(self, name: str) -> np.ndarray:
+        """
+        某只股票的共享矩阵视图
+
+        Args:
+            name: 数据名称
+
+        Returns:
+            np.ndarray: (行数 × 列数) 矩阵，列依次为 columns，与共享内存共用存储
+        """
+        return self._views[name]
+
+    def rows(self, name: str, fromdate: Any = None, todate: Any = None) -> np.ndarray:
+        """
+        按日期截取某只股票的共享矩阵，返回行切片视图
+
+        Args:
+            name: 数据名称
+            fromdate: 开始日期（包含），为空时从第一行开始
+            todate: 结束日期（包含），为空时到最后一行
+
+        Returns:
+            np.ndarray: 矩阵的行切片，与共享内存共用存储
+        """
+        values = self._views[name]
+        start, end = 0, len(values)
+        if fromdate is not None:
+            start = int(np.searchsorted(values[:, 0], date2num_array([fromdate])[0], side='left'))
+        if todate is not None:
+            end = int(np.searchsorted(values[:, 0], date2num_array([todate])[0], side='right'))
+        return values[start:end]
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """
+        某只股票的行情数据，数值与共享内存共用存储
+
+        Args:
+            name: 数据名称
+
+        Returns:
+            pd.DataFrame: 以 datetime 为索引的 OHLCV 数据
+        """
+        values = self._views[name]
+        index = pd.to_datetime(np.rint((values[:, 0] - EPOCH_ORDINAL) * NANOSECONDS_PER_DAY).astype(np.int64))
+        return pd.DataFrame(values[:, 1:], index=index, columns=list(self.columns[1:]), copy=False)
+
+    def feed(self, name: str, timeframe: str = 'days', compression: int = 1, fromdate: Any = None,
+             todate: Any = None, **kwargs) -> SharedArrayFeed:
+        """
+        构造 backtrader 数据源，附加列作为同名的 lines
+
+        Args:
+            name: 数据名称
+            timeframe: 时间周期，如 'days'、'weeks'、'months'、'minutes'
+            compression: 压缩周期
+            fromdate: 开始日期（包含），只截取矩阵的行切片，不逐行过滤
+            todate: 结束日期（包含）
+            **kwargs: 其他数据源参数
+
+        Returns:
+            SharedArrayFeed: 数据源
+        """
+        return feed_class(self.extra_columns)(values=self.rows(name, fromdate, todate), name=name,
+                                              timeframe=getattr(bt.TimeFrame, timeframe.capitalize()),
+                                              compression=compression, **kwargs)
+
+    def feeds(self, names: Optional[Sequence[str]] = None, **kwargs) -> Dict[str, SharedArrayFeed]:
+        """
+        批量构造数据源
+
+        Args:
+            names: 数据名称列表，默认全部
+            **kwargs: 传给 feed 的参数
+
+        Returns:
+            Dict[str, SharedArrayFeed]: {数据名称: 数据源}
+        """
+        return {name: self.feed(name, **kwargs) for name in (names or self.names)}
+
+    def close(self) -> None:
+        """解除当前进程的映射"""
+        self._views, self._matrix = {}, None
+        try:
+            self.shm.close()
+        except BufferError:
+            # backtrader 对象之间有循环引用，回收后才会释放对共享内存的引用
+            gc.collect()
+            try:
+                self.shm.close()
+            except BufferError:
+                logger.warning(f"共享行情数据仍被引用，映射将在进程退出时释放: {self.shm.name}")
+
+    def unlink(self) -> None:
+        """解除映射并释放共享内存，只有创建者需要调用"""
+        self.close()
+        if self.owner:
+            self.shm.unlink()
+            logger.debug(f"释放共享行情数据: {self.shm.name}")
+
+    def __enter__(self) -> 'SharedMarketData':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.unlink()
+
+
+if __name__ == '__main__':
+    import time
+
+    from backTest.engine.backtest_engine import BacktestEngine
+
+    class SmaCross(bt.Strategy):
+        def __init__(self):
+            self.crossover = bt.indicators.CrossOver(bt.indicators.SMA(period=5), bt.indicators.SMA(period=20))
+
+        def next(self):
+            if not self.position and self.crossover > 0:
+                self.buy()
+            elif self.position and self.crossover < 0:
+                self.sell()
+
+    np.random.seed(0)
+    dates = pd.date_range('2015-01-01', '2024-12-31', freq='B')
+    price = 100 * (1 + np.random.normal(0.0003, 0.02, len(dates))).cumprod()
+    df = pd.DataFrame({'open': price, 'high': price * 1.01, 'low': price * 0.99, 'close': price,
+                       'volume': 1e6}, index=dates)
+
+    for label in ('PandasData', 'SharedArrayFeed'):
+        with SharedMarketData.create({'demo': df}) as market:
+            engine = BacktestEngine()
+            engine.add_data(df if label == 'PandasData' else market.feed('demo'), name='demo')
+            engine.add_strategy(SmaCross)
+            start = time.perf_counter()
+            result = engine.run()
+            print(f"{label}: {time.perf_counter() - start:.3f}s, final_value={result['final_value']:.4f}")
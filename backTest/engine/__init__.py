@@ -4,3 +4,8 @@
 Created on 2025/4/13.
 @author: Air.Zou
 """
+from .backtest_engine import BacktestEngine
+from .vector_engine import VectorEngine
+from .result_cache import ResultCache
+from .portfolio_engine import PortfolioEngine
+from .fill_model import AShareFillModel
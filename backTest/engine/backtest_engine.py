@@ -5,14 +5,42 @@
 - 回测引擎初始化
 - 数据加载
 - 策略运行
-- 结果分析
+- 回测结果缓存（run(cache=True)），相同的策略、参数、设置和数据直接返回缓存的结果
+- 结果分析，分析器配置（analyzers）：
+    - none：不添加分析器，只返回期末资金和收益
+    - minimal：MinimalAnalyzer，只跟踪资金高水位、回撤和交易数，内存 O(1)，适合参数扫描
+    - standard：EquityRecorder 只记录资金曲线，回测结束后向量化计算与 full 相同的结果
+    - full：backtrader 的六个分析器（默认）
+- A 股规则（fill_model）：整手、T+1、涨跌停不成交、佣金（最低佣金）+ 过户费 + 卖出印花税
 """
 
 import backtrader as bt
+import math
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Union
 import pandas as pd
 
+from backTest.performance.metrics import backtrader_results
+from backTest.engine.fill_model import AShareFillModel
+from backTest.engine.result_cache import ResultCache, data_fingerprint, result_key, strategy_fingerprint
+from backTest.performance.performance_analyzer import EquityRecorder, MinimalAnalyzer
+from utils.log_util import logger
+
+# 分析器配置 {名称: [(分析器类, 名称)]}
+ANALYZER_PROFILES = {
+    'none': [],
+    'minimal': [(MinimalAnalyzer, 'minimal')],
+    'standard': [(EquityRecorder, 'performance')],
+    'full': [
+        (bt.analyzers.SharpeRatio, 'sharpe'),
+        (bt.analyzers.DrawDown, 'drawdown'),
+        (bt.analyzers.TradeAnalyzer, 'trades'),
+        (bt.analyzers.Returns, 'returns'),
+        (bt.analyzers.TimeReturn, 'time_return'),
+        (bt.analyzers.VWR, 'vwr'),
+    ],
+}
+
 class BacktestEngine:
     """回测引擎类"""
 
@@ -21,7 +49,9 @@ class BacktestEngine:
                  commission: float = 0.001,
                  stake: int = 1,
                  slippage: float = 0.0,
-                 margin: float = 1.0):
+                 margin: float = 1.0,
+                 analyzers: str = 'full',
+                 fill_model: Optional[AShareFillModel] = None):
         """
         初始化回测引擎
 
@@ -31,24 +61,37 @@ class BacktestEngine:
             stake: 每次交易数量
             slippage: 滑点
             margin: 保证金比例
+            analyzers: 分析器配置 'none'、'minimal'、'standard'、'full'；不需要逐根 K 线计算的 backtrader 分析器时
+                用 'standard' 只记录资金曲线，回测结束后一次性计算与 'full' 相同的结果
+            fill_model: A 股成交模型，指定时使用 AShareBroker 和 A 股费用，忽略 commission；
+                买入数量向下取整到整手，stake 应为每手股数的整数倍
         """
         self.cerebro = bt.Cerebro()
+        if fill_model is not None:
+            self.cerebro.broker = fill_model.broker()
+            self.cerebro.broker.addcommissioninfo(fill_model.commission_info())
+        else:
+            self.cerebro.broker.setcommission(commission=commission)
         self.cerebro.broker.setcash(initial_cash)
-        self.cerebro.broker.setcommission(commission=commission)
         self.cerebro.addsizer(bt.sizers.FixedSize, stake=stake)
-        self.cerebro.broker.set_slippage_perc(slippage)
-        self.cerebro.broker.set_margin(margin)
+        self.cerebro.broker.set_slippage_perc(slippage, slip_open=True)
+        # backtrader 的 BackBroker 没有 set_margin，保证金只对期货类佣金方案生效，股票回测不使用
+        self.margin = margin
+        self.settings = {'initial_cash': initial_cash, 'commission': commission, 'stake': stake,
+                         'slippage': slippage, 'margin': margin}
+        if fill_model is not None:
+            self.settings['fill_model'] = fill_model.settings()
+        # 最近一次回测的资金曲线，analyzers 为 none 或 minimal 时为 None
+        self.equity = None
+        self.analyzers = analyzers
+        if self.analyzers not in ANALYZER_PROFILES:
+            raise ValueError(f'不支持的分析器配置: {self.analyzers}，可选 {list(ANALYZER_PROFILES)}')
 
-        # 添加默认分析器
-        self.cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
-        self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
-        self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='trades')
-        self.cerebro.addanalyzer(bt.analyzers.Returns, _name='returns')
-        self.cerebro.addanalyzer(bt.analyzers.TimeReturn, _name='time_return')
-        self.cerebro.addanalyzer(bt.analyzers.VWR, _name='vwr')
+        for analyzer, name in ANALYZER_PROFILES[self.analyzers]:
+            self.cerebro.addanalyzer(analyzer, _name=name)
 
     def add_data(self,
-                data: Union[pd.DataFrame, bt.feeds.PandasData],
+                data: Union[pd.DataFrame, bt.feed.DataBase],
                 name: str = None,
                 timeframe: str = 'days',
                 compression: int = 1) -> None:
@@ -56,15 +99,15 @@ class BacktestEngine:
         添加数据到回测引擎
 
         Args:
-            data: 回测数据，可以是DataFrame或PandasData对象
+            data: 回测数据，可以是DataFrame或backtrader数据源（如PandasData、SharedArrayFeed）
             name: 数据名称
-            timeframe: 时间周期
-            compression: 压缩周期
+            timeframe: 时间周期，如 'days'、'weeks'、'months'，仅对DataFrame生效
+            compression: 压缩周期，仅对DataFrame生效
         """
         if isinstance(data, pd.DataFrame):
             data = bt.feeds.PandasData(
                 dataname=data,
-                timeframe=getattr(bt.TimeFrame, timeframe),
+                timeframe=getattr(bt.TimeFrame, timeframe.capitalize()),
                 compression=compression
             )
         self.cerebro.adddata(data, name=name)
@@ -117,50 +160,133 @@ class BacktestEngine:
         """
         self.cerebro.addsizer(sizer, **kwargs)
 
-    def run(self) -> Dict[str, Any]:
+    def run(self, cache: Union[bool, ResultCache] = False) -> Dict[str, Any]:
         """
         运行回测
 
+        Args:
+            cache: 是否使用回测结果缓存，也可以传入 ResultCache 实例
+
         Returns:
             Dict[str, Any]: 回测结果
         """
+        result_cache = ResultCache() if cache is True else cache or None
+        key = self.cache_key() if result_cache is not None else None
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                logger.info(f"命中回测结果缓存: 键={key}")
+                output, self.equity = cached
+                return output
+
         results = self.cerebro.run()
-        return self._process_results(results[0])
+        output = self._process_results(results[0])
+        self.equity = self._equity(results[0])
+        if key is not None:
+            result_cache.put(key, output, self.equity)
+        return output
+
+    def cache_key(self) -> Optional[str]:
+        """
+        回测结果的缓存键：策略类源码、策略参数、分析器配置、资金和手续费等设置、仓位管理器和每个数据源的指纹
+
+        Returns:
+            Optional[str]: 缓存键，有数据源无法确定内容时为 None
+        """
+        feeds = []
+        for data in self.cerebro.datas:
+            fingerprint = data_fingerprint(data)
+            if fingerprint is None:
+                logger.warning(f"数据源无法计算指纹，不使用回测结果缓存: 数据={data._name}, 类型={type(data).__name__}")
+                return None
+            feeds.append([data._name, fingerprint])
+
+        def qualname(cls):
+            return f'{cls.__module__}.{cls.__qualname__}'
+
+        return result_key({
+            'strategies': [[strategy_fingerprint(cls), list(args), kwargs]
+                           for strats in self.cerebro.strats for cls, args, kwargs in strats],
+            'analyzers': self.analyzers,
+            'analyzer_classes': [[qualname(cls), list(args), kwargs] for cls, args, kwargs in self.cerebro.analyzers],
+            'settings': self.settings,
+            'sizers': [[str(idx), qualname(cls), list(args), kwargs]
+                       for idx, (cls, args, kwargs) in self.cerebro.sizers.items()],
+            'data': feeds,
+        })
+
+    @staticmethod
+    def _equity(result: bt.Strategy) -> Optional[pd.Series]:
+        """资金曲线，来自 EquityRecorder 或 TimeReturn"""
+        names = set(result.analyzers.getnames())
+        if 'performance' in names:
+            return result.analyzers.performance.get_analysis()['equity']
+        if 'time_return' in names:
+            returns = pd.Series(result.analyzers.time_return.get_analysis(), dtype=float)
+            return result.broker.startingcash * (1 + returns).cumprod()
+        return None
 
     def _process_results(self,
                         result: bt.Strategy) -> Dict[str, Any]:
         """
-        处理回测结果
+        处理回测结果，按已添加的分析器返回对应的结果
 
         Args:
             result: 策略实例
 
         Returns:
-            Dict[str, Any]: 处理后的结果
-        """
-        # 获取分析器结果
-        sharpe = result.analyzers.sharpe.get_analysis()
-        drawdown = result.analyzers.drawdown.get_analysis()
-        trades = result.analyzers.trades.get_analysis()
-        returns = result.analyzers.returns.get_analysis()
-        time_return = result.analyzers.time_return.get_analysis()
-        vwr = result.analyzers.vwr.get_analysis()
-
-        return {
-            'final_value': result.broker.getvalue(),
-            'return': returns.get('rtot', 0),
-            'annual_return': returns.get('ravg', 0),
-            'sharpe_ratio': sharpe.get('sharperatio', 0),
-            'max_drawdown': drawdown.get('max', {}).get('drawdown', 0),
-            'max_drawdown_len': drawdown.get('max', {}).get('len', 0),
-            'total_trades': trades.get('total', {}).get('total', 0),
-            'won_trades': trades.get('won', {}).get('total', 0),
-            'lost_trades': trades.get('lost', {}).get('total', 0),
-            'win_rate': trades.get('won', {}).get('total', 0) / trades.get('total', {}).get('total', 1),
-            'vwr': vwr.get('vwr', 0),
-            'time_returns': time_return
+            Dict[str, Any]: 处理后的结果，总是包含 final_value 和 return
+        """
+        analyzers = result.analyzers
+        names = set(analyzers.getnames())
+        final_value = result.broker.getvalue()
+        start_value = result.broker.startingcash
+        output = {
+            'final_value': final_value,
+            'return': math.log(final_value / start_value) if final_value > 0 else float('-inf'),
         }
 
+        if 'performance' in names:
+            record = analyzers.performance.get_analysis()
+            output.update(backtrader_results(record['equity'].to_numpy(), record['equity'].index,
+                                             record['initial_value'], record['total_trades'], record['trade_pnl']))
+
+        if 'minimal' in names:
+            minimal = analyzers.minimal.get_analysis()
+            output.update({
+                'max_drawdown': minimal['max_drawdown'],
+                'max_drawdown_len': minimal['max_drawdown_len'],
+                'total_trades': minimal['total_trades'],
+                'won_trades': minimal['won_trades'],
+                'lost_trades': minimal['lost_trades'],
+                'win_rate': minimal['won_trades'] / (minimal['total_trades'] or 1),
+            })
+
+        # backtrader 分析器，按添加的分析器取对应的结果
+        if 'returns' in names:
+            returns = analyzers.returns.get_analysis()
+            output.update({'return': returns.get('rtot', 0), 'annual_return': returns.get('ravg', 0)})
+        if 'sharpe' in names:
+            output['sharpe_ratio'] = analyzers.sharpe.get_analysis().get('sharperatio', 0)
+        if 'drawdown' in names:
+            drawdown = analyzers.drawdown.get_analysis()
+            output.update({'max_drawdown': drawdown.get('max', {}).get('drawdown', 0),
+                           'max_drawdown_len': drawdown.get('max', {}).get('len', 0)})
+        if 'trades' in names:
+            trades = analyzers.trades.get_analysis()
+            output.update({
+                'total_trades': trades.get('total', {}).get('total', 0),
+                'won_trades': trades.get('won', {}).get('total', 0),
+                'lost_trades': trades.get('lost', {}).get('total', 0),
+                # 没有交易时 TradeAnalyzer 的 total 为 0
+                'win_rate': trades.get('won', {}).get('total', 0) / (trades.get('total', {}).get('total', 0) or 1),
+            })
+        if 'vwr' in names:
+            output['vwr'] = analyzers.vwr.get_analysis().get('vwr', 0)
+        if 'time_return' in names:
+            output['time_returns'] = analyzers.time_return.get_analysis()
+        return output
+
     def plot(self, style: str = 'candlestick', volume: bool = True) -> None:
         """
         绘制回测结果图表
@@ -0,0 +1,274 @@
+"""
+A 股成交模型模块
+
+按 A 股交易规则模拟成交，BacktestEngine（backtrader）、PortfolioEngine 和 VectorEngine（矩阵）共用同一组参数和规则：
+- 整手：买入向下取整到 100 股，卖出不足一手的零股只能一次性全部卖出，不能卖空
+- T+1：当天买入的股票当天不能卖出
+- 涨跌停：涨跌停价按前收盘价和涨跌幅限制（主板 10%、创业板/科创板 20%、北交所 30%、主板 ST 5%）计算，
+  ST 股票通过 st_symbols 指定（代码无法判断是否为 ST），四舍五入到分；以涨停价买入、以跌停价卖出的委托不成交，一字板整根 K 线都不成交
+- 费用：佣金（双向，有最低佣金）、过户费（双向）、印花税（仅卖出）
+
+矩阵引擎每天只在开盘成交一次，当天买入的股票最早在下一个交易日开盘卖出，T+1 自然满足；
+backtrader 中止损、止盈等委托可能在买入当天触发，由 AShareBroker 检查可卖数量，不足时委托留到下一根 K 线。
+
+example:
+    model = AShareFillModel(st_symbols=['000004.SZ'])
+    engine = BacktestEngine(initial_cash=1e6, stake=1000, fill_model=model)
+    engine = PortfolioEngine(initial_cash=1e7, fill_model=model)
+    engine = VectorEngine(initial_cash=1e7, fill_model=model)
+"""
+
+from typing import Any, Dict, Optional, Sequence, Union
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from utils.code_symbol import DEFAULT_PRICE_LIMIT, price_limits
+from utils.utils import PRICE_EPSILON, get_limit_prices
+
+LOT_SIZE = 100
+# 佣金、最低佣金、过户费（沪深两市均为成交金额的 0.001%）、印花税（2023-08-28 起卖出 0.05%）
+COMMISSION = 0.00025
+MIN_COMMISSION = 5.0
+TRANSFER_FEE = 0.00001
+STAMP_DUTY = 0.0005
+
+
+class AShareFillModel:
+    """A 股成交模型类"""
+
+    def __init__(self,
+                 commission: float = COMMISSION,
+                 min_commission: float = MIN_COMMISSION,
+                 transfer_fee: float = TRANSFER_FEE,
+                 stamp_duty: float = STAMP_DUTY,
+                 lot_size: int = LOT_SIZE,
+                 limits: Optional[Union[float, Dict[str, float]]] = None,
+                 st_symbols: Optional[Sequence[str]] = None):
+        """
+        初始化成交模型
+
+        Args:
+            commission: 佣金费率（双向）
+            min_commission: 每笔最低佣金
+            transfer_fee: 过户费费率（双向）
+            stamp_duty: 印花税费率（仅卖出）
+            lot_size: 每手股数
+            limits: 涨跌幅限制，统一的比例或 {股票代码: 比例}，默认按代码前缀判断板块
+            st_symbols: ST 股票代码，主板 ST 股票的涨跌幅限制为 5%（limits 中指定的优先）
+        """
+        self.commission = commission
+        self.min_commission = min_commission
+        self.transfer_fee = transfer_fee
+        self.stamp_duty = stamp_duty
+        self.lot_size = lot_size
+        self.limits = limits
+        self.st_symbols = sorted(st_symbols) if st_symbols is not None else None
+
+    def settings(self) -> Dict[str, Any]:
+        """
+        模型参数，用于回测结果缓存的键
+
+        Returns:
+            Dict[str, Any]: 全部参数
+        """
+        return {'commission': self.commission, 'min_commission': self.min_commission,
+                'transfer_fee': self.transfer_fee, 'stamp_duty': self.stamp_duty, 'lot_size': self.lot_size,
+                'limits': self.limits, 'st_symbols': self.st_symbols}
+
+    # ------------------------------------------------------------------ 规则（向量化）
+
+    def price_limits(self, symbols: Sequence[str], is_st: Optional[Sequence[bool]] = None) -> np.ndarray:
+        """
+        每只股票的涨跌幅限制
+
+        Args:
+            symbols: 股票代码
+            is_st: 是否为 ST 股票，默认按 st_symbols 判断
+
+        Returns:
+            np.ndarray: float64 涨跌幅限制
+        """
+        if is_st is None and self.st_symbols is not None:
+            is_st = pd.Index(list(symbols)).isin(self.st_symbols)
+        limits = price_limits(list(symbols), is_st)
+        if isinstance(self.limits, dict):
+            custom = pd.Series(list(symbols)).map(self.limits).to_numpy(dtype=np.float64)
+            limits = np.where(np.isnan(custom), limits, custom)
+        elif self.limits is not None:
+            limits = np.full(len(limits), float(self.limits))
+        return limits
+
+    @staticmethod
+    def limit_prices(prev_close: np.ndarray, limits: np.ndarray) -> tuple:
+        """
+        涨停价和跌停价，四舍五入到分（见 utils.utils.get_limit_prices）
+
+        Args:
+            prev_close: 前收盘价
+            limits: 涨跌幅限制
+
+        Returns:
+            tuple: (涨停价, 跌停价)
+        """
+        return get_limit_prices(prev_close, limits=limits)
+
+    def blocked(self, side: np.ndarray, price: np.ndarray, prev_close: np.ndarray, limits: np.ndarray) -> np.ndarray:
+        """
+        是否因涨跌停无法成交：以涨停价买入、以跌停价卖出，前收盘价缺失时不限制
+
+        Args:
+            side: 买入为正、卖出为负
+            price: 成交价（如开盘价）
+            prev_close: 前收盘价
+            limits: 涨跌幅限制
+
+        Returns:
+            np.ndarray: bool
+        """
+        up, down = self.limit_prices(prev_close, limits)
+        price = np.asarray(price, dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            return ((side > 0) & (price >= up - PRICE_EPSILON)) | ((side < 0) & (price <= down + PRICE_EPSILON))
+
+    def round_targets(self, current: np.ndarray, target: np.ndarray) -> np.ndarray:
+        """
+        目标持仓按整手规则取整：买入数量向下取整到整手，卖出数量向下取整到整手，清仓时可以卖出零股，不能卖空
+
+        Args:
+            current: 当前持仓（股数）
+            target: 目标持仓（股数）
+
+        Returns:
+            np.ndarray: 取整后的目标持仓
+        """
+        current = np.asarray(current, dtype=np.float64)
+        target = np.maximum(np.asarray(target, dtype=np.float64), 0.0)
+        delta = target - current
+        lots = np.floor(np.abs(delta) / self.lot_size + PRICE_EPSILON) * self.lot_size
+        rounded = current + np.sign(delta) * lots
+        return np.where((target == 0) & (current > 0), 0.0, rounded)
+
+    def costs(self, delta: np.ndarray, price: np.ndarray) -> np.ndarray:
+        """
+        交易费用：佣金（有最低佣金）+ 过户费 + 卖出印花税，没有成交的为 0
+
+        Args:
+            delta: 成交股数，买入为正、卖出为负
+            price: 成交价
+
+        Returns:
+            np.ndarray: 每笔的费用
+        """
+        delta = np.asarray(delta, dtype=np.float64)
+        value = np.abs(delta) * np.asarray(price, dtype=np.float64)
+        fee = np.maximum(value * self.commission, self.min_commission) + value * self.transfer_fee
+        fee = fee + np.where(delta < 0, value * self.stamp_duty, 0.0)
+        return np.where(delta != 0, fee, 0.0)
+
+    # ------------------------------------------------------------------ backtrader
+
+    def commission_info(self) -> 'AShareCommission':
+        """backtrader 佣金方案"""
+        return AShareCommission(commission=self.commission, min_commission=self.min_commission,
+                                transfer_fee=self.transfer_fee, stamp_duty=self.stamp_duty)
+
+    def broker(self) -> 'AShareBroker':
+        """backtrader 经纪商"""
+        return AShareBroker(fill_model=self)
+
+
+class AShareCommission(bt.CommInfoBase):
+    """A 股佣金方案：佣金（有最低佣金）+ 过户费 + 卖出印花税"""
+
+    params = (
+        ('stocklike', True),
+        ('commtype', bt.CommInfoBase.COMM_PERC),
+        ('percabs', True),
+        ('commission', COMMISSION),
+        ('min_commission', MIN_COMMISSION),
+        ('transfer_fee', TRANSFER_FEE),
+        ('stamp_duty', STAMP_DUTY),
+    )
+
+    def _getcommission(self, size, price, pseudoexec):
+        value = abs(size) * price
+        fee = max(value * self.p.commission, self.p.min_commission) + value * self.p.transfer_fee
+        if size < 0:
+            fee += value * self.p.stamp_duty
+        return fee
+
+
+class AShareBroker(bt.brokers.BackBroker):
+    """A 股经纪商：整手、不能卖空、T+1、涨跌停不成交"""
+
+    params = (
+        ('fill_model', None),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._model = self.p.fill_model or AShareFillModel()
+        # 每个数据源 (日期数值, 当天买入的股数)
+        self._bought = {}
+        self._limits = {}
+
+    def buy(self, owner, data, size, *args, **kwargs):
+        """买入数量向下取整到整手，不足一手时不下单（与 Strategy.buy 数量为 0 时一样返回 None）"""
+        size = self._model.round_targets(0.0, size).item()
+        if not size:
+            return None
+        return super().buy(owner, data, size, *args, **kwargs)
+
+    def sell(self, owner, data, size, *args, **kwargs):
+        """
+        卖出数量不超过持仓，清仓时可以卖出零股，否则向下取整到整手；
+        没有持仓时（如括号委托的止损单）同样取整，成交时再检查可卖数量
+        """
+        held = self.getposition(data).size
+        size = held if 0 < held <= size else self._model.round_targets(0.0, size).item()
+        if not size:
+            return None
+        return super().sell(owner, data, size, *args, **kwargs)
+
+    def _limit(self, data) -> float:
+        if data not in self._limits:
+            name = getattr(data, '_name', None)
+            self._limits[data] = self._model.price_limits([name]).item() if name else DEFAULT_PRICE_LIMIT
+        return self._limits[data]
+
+    def _blocked(self, order) -> bool:
+        """可卖数量（持仓减去当天买入）不足，或者委托价格处于涨跌停；可卖数量不足的卖空委托不会成交"""
+        data = order.data
+        day = int(data.datetime[0])
+        side = 1.0 if order.isbuy() else -1.0
+        if side < 0:
+            bought_day, qty = self._bought.get(data, (None, 0.0))
+            available = self.getposition(data).size - (qty if bought_day == day else 0.0)
+            if abs(order.executed.remsize) > available + PRICE_EPSILON:
+                return True
+        if len(data) < 2:
+            return False
+
+        if order.exectype == bt.Order.Market:
+            price = data.open[0]
+        elif order.exectype == bt.Order.Close:
+            price = data.close[0]
+        else:
+            # 其他委托在 K 线内成交，一字板时不成交
+            price = data.low[0] if side > 0 else data.high[0]
+        return bool(self._model.blocked(np.array([side]), np.array([price]), np.array([data.close[-1]]),
+                                        np.array([self._limit(data)]))[0])
+
+    def _try_exec(self, order):
+        """不满足 A 股规则时本根 K 线不成交，委托保留到下一根 K 线"""
+        if self._blocked(order):
+            return
+        executed = order.executed.size
+        super()._try_exec(order)
+        if order.isbuy() and order.executed.size != executed:
+            data = order.data
+            day = int(data.datetime[0])
+            bought_day, qty = self._bought.get(data, (None, 0.0))
+            self._bought[data] = (day, (qty if bought_day == day else 0.0) + order.executed.size - executed)
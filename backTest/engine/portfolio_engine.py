@@ -0,0 +1,382 @@
+"""
+组合回测引擎模块
+
+面向全市场（5000+ 只 A 股）、股票池动态变化的组合回测：
+- 行情是 (日期 × 股票) 的矩阵，可以直接使用 PanelStore 的 memmap，不需要整体读入内存，也不逐只添加数据源
+- 调仓日在横截面上计算目标权重（回调函数或目标权重矩阵），只有调仓日才处理全市场的数据
+- 持仓以稀疏数组（列位置 + 股数）保存，每天只对持仓股票估值；持仓和成交记录随持仓数量增长，
+  不随 股票数 × 日期数 增长
+- 股票池变化：universe 为可持有的股票（如指数成分股），不在股票池中的股票不买入、已持有的在下一次调仓时卖出；
+  listed 为上市状态，退市的持仓按最后收盘价清算；开盘价缺失（停牌）的股票当天不成交
+- A 股规则：指定 fill_model（AShareFillModel）时按整手取整、开盘涨停不买入、开盘跌停不卖出，
+  费用按佣金（最低佣金）、过户费和卖出印花税计算；每天只在开盘成交，当天买入的股票不会当天卖出（T+1）
+
+成交规则与 VectorEngine.run_weights 相同：第 t 天收盘后按当天总资产计算目标股数，第 t+1 天开盘成交，
+资金不足的买单不成交（vector_engine.cash_limited）。
+只做多，负权重视为 0。
+
+example:
+    store = PanelStore('daily')
+    members = IndexConstituentStore().members_at('000300.SH', store.dates, store.symbols)
+
+    def rebalance(ctx):
+        momentum = ctx.close[ctx.t] / ctx.close[max(ctx.t - 20, 0)] - 1
+        momentum[~ctx.universe] = np.nan
+        top = np.argsort(-np.nan_to_num(momentum, nan=-np.inf))[:50]
+        return pd.Series(1 / 50, index=ctx.symbols[top])
+
+    engine = PortfolioEngine(initial_cash=1e7)
+    result = engine.run_panel(store, rebalance, start_date='20150101', universe=members, lot_size=100)
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from backTest.engine.fill_model import AShareFillModel
+from backTest.engine.vector_engine import cash_limited
+from backTest.performance.metrics import backtrader_results
+from data.store.panel_store import PanelStore, to_date_ints
+
+
+def _take(ids: np.ndarray, keys: np.ndarray, values: np.ndarray, fill: float) -> np.ndarray:
+    """在升序的 keys 中查找 ids，返回对应的 values，不存在的为 fill"""
+    if not len(keys):
+        return np.full(len(ids), fill, dtype=np.float64)
+    pos = np.minimum(np.searchsorted(keys, ids), len(keys) - 1)
+    return np.where(keys[pos] == ids, values[pos], fill)
+
+
+class PortfolioContext:
+    """调仓回调的上下文，行情矩阵为完整矩阵，使用 close[:t + 1] 等切片访问历史"""
+
+    def __init__(self, t: int, dates: pd.Index, symbols: pd.Index, close: np.ndarray, universe: np.ndarray,
+                 held_ids: np.ndarray, held_qty: np.ndarray, cash: float, equity: float):
+        self.t = t
+        self.date = dates[t]
+        self.dates = dates
+        self.symbols = symbols
+        self.close = close
+        self.universe = universe
+        self.held_ids = held_ids
+        self.held_qty = held_qty
+        self.cash = cash
+        self.equity = equity
+
+    @property
+    def holdings(self) -> pd.Series:
+        """当前持仓 {股票: 股数}"""
+        return pd.Series(self.held_qty, index=self.symbols[self.held_ids])
+
+
+class PortfolioEngine:
+    """组合回测引擎类"""
+
+    def __init__(self,
+                 initial_cash: float = 100000.0,
+                 commission: float = 0.001,
+                 slippage: float = 0.0,
+                 fill_model: Optional[AShareFillModel] = None):
+        """
+        初始化回测引擎
+
+        Args:
+            initial_cash: 初始资金
+            commission: 手续费率（按成交金额）
+            slippage: 滑点比例，买入价上浮、卖出价下浮，不超出当天最高价/最低价
+            fill_model: A 股成交模型，指定时按模型计算费用和每手股数，忽略 commission 和 lot_size
+        """
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.slippage = slippage
+        self.fill_model = fill_model
+
+    # ------------------------------------------------------------------ 运行
+
+    def run(self,
+            close: pd.DataFrame,
+            rebalance: Union[Callable[[PortfolioContext], Any], pd.DataFrame],
+            open_: Optional[pd.DataFrame] = None,
+            high: Optional[pd.DataFrame] = None,
+            low: Optional[pd.DataFrame] = None,
+            universe: Optional[pd.DataFrame] = None,
+            listed: Optional[pd.DataFrame] = None,
+            rebalance_dates: Optional[Sequence] = None,
+            lot_size: int = 1) -> Dict[str, Any]:
+        """
+        运行组合回测
+
+        Args:
+            close: 收盘价矩阵（日期 × 股票）
+            rebalance: 调仓回调 rebalance(ctx) -> 目标权重（Series / dict / 与股票轴等长的数组），
+                或者目标权重矩阵（只包含调仓日的行，缺失的股票目标权重为 0）
+            open_: 开盘价矩阵，默认等于收盘价，缺失表示停牌
+            high: 最高价矩阵，用于限制滑点
+            low: 最低价矩阵，用于限制滑点
+            universe: 股票池掩码（日期 × 股票），默认全部股票
+            listed: 上市状态掩码（日期 × 股票），持仓股票变为 False 时按最后收盘价清算，默认不检查
+            rebalance_dates: 调用回调的日期，默认每天；rebalance 为矩阵时使用矩阵的日期
+            lot_size: 每手股数，目标股数向下取整到整手，指定成交模型时使用模型的每手股数
+
+        Returns:
+            Dict[str, Any]: 回测结果，键与 BacktestEngine._process_results 一致
+        """
+        def align(frame, dtype=np.float64, fill_value=np.nan):
+            if frame is None:
+                return None
+            frame = frame.reindex(index=close.index, columns=close.columns, fill_value=fill_value)
+            return frame.to_numpy(dtype=dtype)
+
+        return self._run(close.index, close.columns, align(open_), close.to_numpy(dtype=np.float64), align(high),
+                         align(low), align(universe, bool, False), align(listed, bool, False), rebalance,
+                         rebalance_dates, lot_size)
+
+    def run_panel(self,
+                  store: PanelStore,
+                  rebalance: Union[Callable[[PortfolioContext], Any], pd.DataFrame],
+                  start_date: Any = None,
+                  end_date: Any = None,
+                  universe: Optional[pd.DataFrame] = None,
+                  listed: Optional[pd.DataFrame] = None,
+                  rebalance_dates: Optional[Sequence] = None,
+                  lot_size: int = 1) -> Dict[str, Any]:
+        """
+        直接在 PanelStore 的 memmap 矩阵上运行组合回测，行情不读入内存
+
+        Args:
+            store: 面板数据存储，需要包含 open、close 字段，high、low 可选
+            rebalance: 调仓回调或目标权重矩阵，见 run
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            universe: 股票池掩码，以面板的日期（整数）为索引、股票代码为列，如 IndexConstituentStore.members_at
+            listed: 上市状态掩码，如 SecurityMaster.listed_mask
+            rebalance_dates: 调用回调的日期
+            lot_size: 每手股数
+
+        Returns:
+            Dict[str, Any]: 回测结果
+        """
+        rows = store.date_slice(start_date, end_date)
+        dates = pd.Index(store.dates[rows])
+        symbols = pd.Index(store.symbols)
+
+        def field(name):
+            return store.field(name)[rows] if name in store.fields else None
+
+        def mask(frame):
+            if frame is None:
+                return None
+            frame = frame.set_axis(to_date_ints(frame.index), axis=0)
+            return frame.reindex(index=dates, columns=symbols, fill_value=False).to_numpy(dtype=bool)
+
+        return self._run(dates, symbols, field('open'), field('close'), field('high'), field('low'), mask(universe),
+                         mask(listed), rebalance, rebalance_dates, lot_size)
+
+    # ------------------------------------------------------------------ 计算
+
+    def _fill_prices(self, open_p: np.ndarray, side: np.ndarray, high_p: Optional[np.ndarray],
+                     low_p: Optional[np.ndarray]) -> np.ndarray:
+        """开盘价加滑点，买入上浮、卖出下浮，不超出最高价/最低价（与 VectorEngine 相同）"""
+        price = open_p * (1 + self.slippage * side)
+        if self.slippage and high_p is not None:
+            price = np.fmin(price, high_p)
+        if self.slippage and low_p is not None:
+            price = np.fmax(price, low_p)
+        return price
+
+    def _costs(self, delta: np.ndarray, price: np.ndarray) -> np.ndarray:
+        """交易费用，指定成交模型时按 A 股费用计算"""
+        if self.fill_model is not None:
+            return self.fill_model.costs(delta, price)
+        return np.abs(delta) * price * self.commission
+
+    @staticmethod
+    def _target_weights(weights: Any, symbols: pd.Index) -> tuple:
+        """目标权重转换为稀疏的 (列位置, 权重)，只保留正权重"""
+        if weights is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if isinstance(weights, dict):
+            weights = pd.Series(weights, dtype=np.float64)
+        if isinstance(weights, pd.Series):
+            ids = symbols.get_indexer(weights.index)
+            values = weights.to_numpy(dtype=np.float64)
+            keep = (ids >= 0) & (values > 0)
+            ids, values = ids[keep], values[keep]
+        else:
+            values = np.asarray(weights, dtype=np.float64)
+            ids = np.flatnonzero(values > 0)
+            values = values[ids]
+        order = np.argsort(ids, kind='stable')
+        return ids[order].astype(np.int64), values[order]
+
+    def _run(self, dates: pd.Index, symbols: pd.Index, open_v: Optional[np.ndarray], close_v: np.ndarray,
+             high_v: Optional[np.ndarray], low_v: Optional[np.ndarray], universe_v: Optional[np.ndarray],
+             listed_v: Optional[np.ndarray], rebalance: Any, rebalance_dates: Optional[Sequence],
+             lot_size: int) -> Dict[str, Any]:
+        open_v = close_v if open_v is None else open_v
+        n_dates = len(dates)
+        if isinstance(rebalance, pd.DataFrame):
+            weight_rows = dict(zip(dates.get_indexer(rebalance.index), range(len(rebalance))))
+            weight_rows.pop(-1, None)
+            weight_values = rebalance.reindex(columns=symbols).to_numpy(dtype=np.float64)
+            rebalance_rows = weight_rows.keys()
+        else:
+            rebalance_rows = range(n_dates) if rebalance_dates is None else dates.get_indexer(rebalance_dates)
+        rebalance_rows = set(int(r) for r in rebalance_rows if r >= 0)
+        model = self.fill_model
+        if model is not None:
+            lot_size = model.lot_size
+            limits = model.price_limits(symbols)
+
+        # 稀疏持仓：列位置（升序）、股数、最后一个有效收盘价、当前交易的累计现金流（用于计算交易盈亏）
+        held_ids = np.zeros(0, dtype=np.int64)
+        held_qty = np.zeros(0)
+        held_mark = np.zeros(0)
+        held_flow = np.zeros(0)
+        cash = self.initial_cash
+        target = None
+
+        equity = np.zeros(n_dates)
+        traded_value = np.zeros(n_dates)
+        trade_pnl = []
+        total_trades = 0
+        trade_log = []
+        position_log = []
+
+        for t in range(n_dates):
+            changed = False
+            # 开盘按上一个调仓日的目标股数调仓
+            if target is not None:
+                target_ids, target_qty = target
+                ids = np.union1d(held_ids, target_ids)
+                cur = _take(ids, held_ids, held_qty, 0.0)
+                mark = _take(ids, held_ids, held_mark, np.nan)
+                flow = _take(ids, held_ids, held_flow, 0.0)
+                tgt = _take(ids, target_ids, target_qty, 0.0)
+
+                open_p = np.asarray(open_v[t][ids], dtype=np.float64)
+                tradable = ~np.isnan(open_p)
+                if listed_v is not None:
+                    tradable &= listed_v[t][ids]
+                if model is not None:
+                    # 整手取整；开盘涨停不买入、开盘跌停不卖出，前收盘价为持仓的最后有效收盘价
+                    tgt = model.round_targets(cur, tgt)
+                    prev_close = np.where(np.isnan(mark), np.asarray(close_v[t - 1][ids], dtype=np.float64), mark)
+                    tradable &= ~model.blocked(np.sign(tgt - cur), open_p, prev_close, limits[ids])
+                new = np.where(tradable, tgt, cur)
+                delta = new - cur
+                trade = delta != 0
+                if trade.any():
+                    fill = self._fill_prices(open_p, np.sign(delta), None if high_v is None else high_v[t][ids],
+                                             None if low_v is None else low_v[t][ids])
+                    fill = np.where(trade, fill, 0.0)
+                    comm = self._costs(delta, fill)
+                    # 资金不足的买单不成交（与 VectorEngine 相同）
+                    accepted = cash_limited(delta, fill, comm, cash)
+                    if not accepted.all():
+                        new = np.where(accepted, new, cur)
+                        delta = new - cur
+                        trade = delta != 0
+                        fill = np.where(trade, fill, 0.0)
+                        comm = np.where(trade, comm, 0.0)
+                    value = np.abs(delta) * fill
+                    cash -= np.sum(delta * fill) + np.sum(comm)
+                    flow += np.where(trade, -delta * fill - comm, 0.0)
+                    traded_value[t] += value.sum()
+                    mark = np.where(np.isnan(mark), fill, mark)
+
+                    opened = (cur == 0) & (new != 0)
+                    closed = (cur != 0) & (new == 0)
+                    total_trades += int(opened.sum())
+                    trade_pnl.extend(flow[closed].tolist())
+                    flow = np.where(closed, 0.0, flow)
+                    trade_log.append((t, ids[trade], delta[trade], fill[trade], comm[trade]))
+
+                    keep = new != 0
+                    held_ids, held_qty, held_mark, held_flow = ids[keep], new[keep], mark[keep], flow[keep]
+                    changed = True
+                target = None
+
+            # 退市的持仓按最后收盘价清算
+            if listed_v is not None and len(held_ids):
+                gone = ~listed_v[t][held_ids]
+                if gone.any():
+                    value = held_qty[gone] * held_mark[gone]
+                    comm = self._costs(-held_qty[gone], held_mark[gone])
+                    cash += value.sum() - comm.sum()
+                    traded_value[t] += np.abs(value).sum()
+                    trade_pnl.extend((held_flow[gone] + value - comm).tolist())
+                    trade_log.append((t, held_ids[gone], -held_qty[gone], held_mark[gone], comm))
+                    keep = ~gone
+                    held_ids, held_qty, held_mark, held_flow = (held_ids[keep], held_qty[keep], held_mark[keep],
+                                                                held_flow[keep])
+                    changed = True
+
+            # 收盘估值，停牌股票使用最后一个有效收盘价
+            if len(held_ids):
+                close_p = np.asarray(close_v[t][held_ids], dtype=np.float64)
+                held_mark = np.where(np.isnan(close_p), held_mark, close_p)
+            equity[t] = cash + np.sum(held_qty * held_mark)
+            if changed:
+                position_log.append((t, held_ids, held_qty))
+
+            # 调仓日按收盘后的总资产计算目标股数，下一个交易日开盘成交
+            if t in rebalance_rows and t + 1 < n_dates:
+                universe = np.ones(len(symbols), dtype=bool) if universe_v is None else universe_v[t]
+                if isinstance(rebalance, pd.DataFrame):
+                    weights = weight_values[weight_rows[t]]
+                    weights = np.where(np.isnan(weights), 0.0, weights)
+                else:
+                    ctx = PortfolioContext(t, dates, symbols, close_v, universe, held_ids, held_qty, cash, equity[t])
+                    weights = rebalance(ctx)
+                ids, w = self._target_weights(weights, symbols)
+                keep = universe[ids]
+                ids, w = ids[keep], w[keep]
+                # 估值价格：当天收盘价，停牌的持仓股票使用最后一个有效收盘价
+                price = np.asarray(close_v[t][ids], dtype=np.float64)
+                price = np.where(np.isnan(price), _take(ids, held_ids, held_mark, np.nan), price)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    shares = np.floor(np.nan_to_num(w * equity[t] / price) / lot_size) * lot_size
+                target = (ids, shares)
+
+        self.equity = pd.Series(equity, index=dates)
+        self.traded_value = pd.Series(traded_value, index=dates)
+        self.trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+        self.trades = self._log_frame(trade_log, dates, symbols, ['qty', 'price', 'commission'])
+        self.positions = self._log_frame(position_log, dates, symbols, ['qty'])
+        return backtrader_results(equity, dates, self.initial_cash, total_trades, self.trade_pnl)
+
+    @staticmethod
+    def _log_frame(log: list, dates: pd.Index, symbols: pd.Index, columns: Sequence[str]) -> pd.DataFrame:
+        """稀疏记录转换为长表：date、symbol 及各列"""
+        if not log:
+            return pd.DataFrame(columns=['date', 'symbol', *columns])
+        rows = np.concatenate([np.full(len(entry[1]), entry[0]) for entry in log])
+        ids = np.concatenate([entry[1] for entry in log])
+        frame = pd.DataFrame({'date': dates[rows], 'symbol': symbols[ids]})
+        for j, column in enumerate(columns, start=2):
+            frame[column] = np.concatenate([entry[j] for entry in log])
+        return frame
+
+
+if __name__ == '__main__':
+    import time
+
+    # 5000 只股票 × 10 年，每 20 个交易日持有 20 日涨幅最高的 50 只股票
+    dates = pd.bdate_range('2015-01-01', periods=2500)
+    symbols = [f'{600000 + i:06d}.SH' for i in range(5000)]
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(10 * np.cumprod(1 + rng.normal(0.0003, 0.02, (len(dates), len(symbols))), axis=0),
+                         index=dates, columns=symbols)
+
+    def rebalance(ctx):
+        momentum = ctx.close[ctx.t] / ctx.close[max(ctx.t - 20, 0)] - 1
+        top = np.argsort(-momentum)[:50]
+        return pd.Series(0.02, index=ctx.symbols[top])
+
+    begin = time.time()
+    engine = PortfolioEngine(initial_cash=1e8)
+    result = engine.run(close, rebalance, rebalance_dates=dates[20::20], lot_size=100)
+    print(f"耗时: {time.time() - begin:.2f}秒, 交易次数: {result['total_trades']}, 期末资金: {result['final_value']:.2f}, "
+          f"持仓记录: {len(engine.positions)}行")
@@ -0,0 +1,215 @@
+"""
+回测结果缓存模块
+
+按内容寻址缓存 BacktestEngine.run 的结果：
+- 键由策略类源码、策略参数、分析器配置、资金和手续费等设置、仓位管理器以及每个数据源的指纹组成，
+  任何一项变化都会得到新的键
+- 回测结果和资金曲线保存在本地缓存目录（与 utils.local_cache 相同的 ./cache/backtest_result.db）；
+  不导入 utils.local_cache，导入回测引擎时不会访问网络
+- 数据源指纹支持 DataFrame 构造的 PandasData 和 SharedArrayFeed，其他数据源无法确定内容，不使用缓存
+
+example:
+    engine = BacktestEngine()
+    engine.add_data(df, name='600000.SH')
+    engine.add_strategy(MyStrategy, fast=5)
+    result = engine.run(cache=True)   # 相同的回测第二次直接从缓存返回
+"""
+
+import hashlib
+import os
+import inspect
+import json
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+from io import StringIO
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from utils.log_util import logger
+
+RESULT_CACHE_TABLE = 'backtest_result'
+# 缓存目录，与 utils.local_cache.DB_PATH 一致
+RESULT_CACHE_DIR = './cache'
+
+
+def strategy_fingerprint(strategy: type) -> str:
+    """
+    策略类的指纹，包含策略类及其非 backtrader 基类的源码，无法获取源码的类（如动态生成的子类）使用类名
+
+    Args:
+        strategy: 策略类
+
+    Returns:
+        str: md5
+    """
+    md5 = hashlib.md5()
+    for cls in strategy.__mro__:
+        if cls.__module__.startswith('backtrader') or cls is object:
+            continue
+        md5.update(f'{cls.__module__}.{cls.__qualname__}'.encode())
+        try:
+            md5.update(inspect.getsource(cls).encode())
+        except (OSError, TypeError):
+            pass
+    return md5.hexdigest()
+
+
+def function_fingerprint(func: Callable) -> str:
+    """
+    函数的指纹，包含函数名和源码，无法获取源码时（如内置函数、functools.partial）使用 repr
+
+    Args:
+        func: 函数
+
+    Returns:
+        str: md5
+    """
+    name = getattr(func, '__qualname__', None)
+    md5 = hashlib.md5(f"{getattr(func, '__module__', '')}.{name or repr(func)}".encode())
+    try:
+        md5.update(inspect.getsource(func).encode())
+    except (OSError, TypeError):
+        pass
+    return md5.hexdigest()
+
+
+def data_fingerprint(feed: bt.feed.DataBase) -> Optional[str]:
+    """
+    数据源的指纹，包含数据内容和数据源参数（日期范围、周期等）
+
+    Args:
+        feed: backtrader 数据源
+
+    Returns:
+        Optional[str]: md5，无法确定数据内容时为 None
+    """
+    dataname = getattr(feed.p, 'dataname', None)
+    values = getattr(feed.p, 'values', None)
+    md5 = hashlib.md5(type(feed).__qualname__.encode())
+    if isinstance(dataname, pd.DataFrame):
+        md5.update(repr(list(dataname.columns)).encode())
+        md5.update(pd.util.hash_pandas_object(dataname, index=True).to_numpy().tobytes())
+    elif isinstance(values, np.ndarray):
+        md5.update(repr(feed.getlinealiases()).encode())
+        md5.update(np.ascontiguousarray(values).tobytes())
+    else:
+        return None
+    params = {k: v for k, v in feed.p._getkwargs().items() if k not in ('dataname', 'values')}
+    md5.update(repr(sorted(params.items(), key=lambda item: item[0])).encode())
+    return md5.hexdigest()
+
+
+def result_key(payload: Dict[str, Any]) -> str:
+    """
+    缓存键
+
+    Args:
+        payload: 组成键的全部内容
+
+    Returns:
+        str: md5
+    """
+    return hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ResultCache:
+    """回测结果缓存类"""
+
+    def __init__(self, table_name: str = RESULT_CACHE_TABLE, cache_dir: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            table_name: 本地缓存库中的表名
+            cache_dir: 缓存目录，默认为 RESULT_CACHE_DIR
+        """
+        self.table_name = table_name
+        self.cache_dir = cache_dir or RESULT_CACHE_DIR
+        self.stats = {'hit': 0, 'miss': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.cache_dir, f'{self.table_name}.db'), timeout=30)
+        conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {self.table_name} (
+            cache_key TEXT,
+            update_time TIMESTAMP,
+            result_json TEXT,
+            equity_csv TEXT,
+            PRIMARY KEY (cache_key)
+        )
+        ''')
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Optional[pd.Series]]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], Optional[pd.Series]]]: (回测结果, 资金曲线)，未命中时为 None
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(f"SELECT result_json, equity_csv FROM {self.table_name} WHERE cache_key = ?",
+                               (key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            self.stats['miss'] += 1
+            return None
+
+        self.stats['hit'] += 1
+        result = json.loads(row[0])
+        if 'time_returns' in result:
+            result['time_returns'] = OrderedDict((datetime.fromisoformat(dt), r) for dt, r in result['time_returns'])
+        equity = None
+        if row[1] is not None:
+            equity = pd.read_csv(StringIO(row[1]), index_col=0, parse_dates=True,
+                                 float_precision='round_trip').iloc[:, 0]
+            equity.index.name = None
+        return result, equity
+
+    def put(self, key: str, result: Dict[str, Any], equity: Optional[pd.Series] = None) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            result: 回测结果
+            equity: 资金曲线
+        """
+        result = dict(result)
+        if 'time_returns' in result:
+            result['time_returns'] = [[dt.isoformat(), r] for dt, r in result['time_returns'].items()]
+        conn = self._connect()
+        try:
+            conn.execute(f"INSERT OR REPLACE INTO {self.table_name} (cache_key, update_time, result_json, equity_csv) "
+                         f"VALUES (?, ?, ?, ?)",
+                         (key, datetime.now(), json.dumps(result, default=_json_default),
+                          None if equity is None else equity.rename('equity').to_csv()))
+            conn.commit()
+        finally:
+            conn.close()
+        logger.debug(f"回测结果缓存写入: 键={key}")
+
+    def clear(self) -> None:
+        """清空缓存"""
+        conn = self._connect()
+        try:
+            conn.execute(f"DELETE FROM {self.table_name}")
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,394 @@
+"""
+向量化回测引擎模块
+
+面向信号和目标仓位策略的回测引擎，与 BacktestEngine 并列：
+- 输入 (日期 × 股票) 的价格矩阵和信号/目标仓位矩阵
+- 成交、手续费、滑点、持仓和资金曲线都用 NumPy 数组运算完成，不逐根 K 线调用 next()
+- 结果字典的键与 BacktestEngine._process_results 一致，各项指标按 backtrader 对应分析器的口径计算
+
+成交规则与 backtrader 默认的市价单相同：第 t 天收盘后产生的信号在第 t+1 天开盘成交，
+最后一天的信号不成交；开盘价缺失（停牌）的日期不成交，保持原有持仓。
+资金不足时与 BackBroker 一样拒绝买单（见 cash_limited），不会出现负现金；目标持仓持续有效，
+被拒绝的买单在之后的交易日重新尝试，而 backtrader 中被拒绝的订单不会自动重新提交。
+指定 fill_model（AShareFillModel）时与 PortfolioEngine 相同：目标股数按整手取整，开盘涨停不买入、开盘跌停不卖出，
+费用按佣金（最低佣金）、过户费和卖出印花税计算。
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from backTest.engine.fill_model import AShareFillModel
+from backTest.performance.metrics import backtrader_results
+from data.store.adjust import ffill_rows
+
+# 现金比较的容差，避免浮点误差导致拒绝恰好用完资金的买单
+CASH_EPSILON = 1e-6
+
+
+def cash_limited(qty: np.ndarray, fill: np.ndarray, comm: np.ndarray, cash: float) -> np.ndarray:
+    """
+    按可用资金筛选一天的成交：卖单全部成交并先回笼资金，买单按股票顺序依次扣减现金，
+    成交金额加手续费超过剩余现金的买单整笔不成交（与 BackBroker 资金不足时拒绝订单相同）
+
+    Args:
+        qty: 成交股数，买入为正、卖出为负
+        fill: 成交价
+        comm: 每笔手续费
+        cash: 开盘前的现金
+
+    Returns:
+        np.ndarray: bool，每笔是否成交
+    """
+    trade = qty != 0
+    value = np.where(trade, qty * fill, 0.0)
+    comm = np.where(trade, comm, 0.0)
+    sell = qty < 0
+    cash = cash - value[sell].sum() - comm[sell].sum()
+    buys = np.flatnonzero(qty > 0)
+    cost = value[buys] + comm[buys]
+    accepted = np.ones(len(qty), dtype=bool)
+    if cost.sum() <= cash + CASH_EPSILON:
+        return accepted
+    for i, c in zip(buys, cost):
+        if c <= cash + CASH_EPSILON:
+            cash -= c
+        else:
+            accepted[i] = False
+    return accepted
+
+
+def cross_signals(fast: pd.DataFrame, slow: pd.DataFrame) -> pd.DataFrame:
+    """
+    均线交叉信号
+
+    Args:
+        fast: 快线矩阵
+        slow: 慢线矩阵
+
+    Returns:
+        pd.DataFrame: 上穿为 1，下穿为 -1，其余为 0
+    """
+    diff = fast - slow
+    prev = diff.shift(1)
+    up = (diff > 0) & (prev < 0)
+    down = (diff < 0) & (prev > 0)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+
+def signals_to_targets(signals: pd.DataFrame, stake: float = 1) -> pd.DataFrame:
+    """
+    信号转换为目标持仓：信号为正时持有 stake 股，信号为负时清仓，信号为 0 时保持
+
+    Args:
+        signals: 信号矩阵
+        stake: 每次买入的数量
+
+    Returns:
+        pd.DataFrame: 目标持仓（股数）
+    """
+    values = signals.to_numpy(dtype=np.float64)
+    state = np.where(values > 0, 1.0, np.where(values < 0, 0.0, np.nan))
+    state = np.nan_to_num(ffill_rows(state), nan=0.0)
+    return pd.DataFrame(state * stake, index=signals.index, columns=signals.columns)
+
+
+class VectorEngine:
+    """向量化回测引擎类"""
+
+    def __init__(self,
+                 initial_cash: float = 100000.0,
+                 commission: float = 0.001,
+                 stake: int = 1,
+                 slippage: float = 0.0,
+                 margin: float = 1.0,
+                 fill_model: Optional[AShareFillModel] = None):
+        """
+        初始化回测引擎，参数与 BacktestEngine 相同
+
+        Args:
+            initial_cash: 初始资金
+            commission: 手续费率（按成交金额）
+            stake: 信号模式下每次交易数量
+            slippage: 滑点比例，买入价上浮、卖出价下浮，不超出当天最高价/最低价
+            margin: 保证金比例（股票回测不使用，为了与 BacktestEngine 参数一致而保留）
+            fill_model: A 股成交模型，指定时按模型计算费用和每手股数，忽略 commission 和 lot_size
+        """
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.stake = stake
+        self.slippage = slippage
+        self.margin = margin
+        self.fill_model = fill_model
+
+    # ------------------------------------------------------------------ 运行
+
+    def run_signals(self,
+                    close: pd.DataFrame,
+                    signals: pd.DataFrame,
+                    open_: Optional[pd.DataFrame] = None,
+                    high: Optional[pd.DataFrame] = None,
+                    low: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        运行信号策略：信号为正时买入 stake 股（已持仓不加仓），信号为负时清仓
+
+        Args:
+            close: 收盘价矩阵（日期 × 股票）
+            signals: 信号矩阵，与 close 对齐
+            open_: 开盘价矩阵，默认等于收盘价
+            high: 最高价矩阵，用于限制滑点
+            low: 最低价矩阵，用于限制滑点
+
+        Returns:
+            Dict[str, Any]: 回测结果
+        """
+        signals = signals.reindex(index=close.index, columns=close.columns).fillna(0)
+        return self.run_targets(close, signals_to_targets(signals, self.stake), open_, high, low)
+
+    def run_targets(self,
+                    close: pd.DataFrame,
+                    targets: pd.DataFrame,
+                    open_: Optional[pd.DataFrame] = None,
+                    high: Optional[pd.DataFrame] = None,
+                    low: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        运行目标仓位策略：第 t 天的目标持仓（股数）在第 t+1 天开盘调整到位
+
+        Args:
+            close: 收盘价矩阵（日期 × 股票）
+            targets: 目标持仓矩阵（股数），NaN 表示保持原持仓
+            open_: 开盘价矩阵，默认等于收盘价
+            high: 最高价矩阵，用于限制滑点
+            low: 最低价矩阵，用于限制滑点
+
+        Returns:
+            Dict[str, Any]: 回测结果
+        """
+        close_v = close.to_numpy(dtype=np.float64)
+        open_v = self._align(open_, close, close_v)
+        target_v = targets.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+
+        # 目标持仓延后一天执行，停牌日不成交
+        desired = np.vstack([np.zeros((1, close_v.shape[1])), target_v[:-1]])
+        desired = np.where(np.isnan(open_v), np.nan, desired)
+        desired[0] = np.nan_to_num(desired[0])
+        positions = np.nan_to_num(ffill_rows(desired))
+        positions = self._execute(positions, open_v, close_v, self._align(high, close, None),
+                                  self._align(low, close, None), close.columns)
+        return self._simulate(close, close_v, open_v, positions, high, low)
+
+    def run_weights(self,
+                    close: pd.DataFrame,
+                    weights: pd.DataFrame,
+                    open_: Optional[pd.DataFrame] = None,
+                    high: Optional[pd.DataFrame] = None,
+                    low: Optional[pd.DataFrame] = None,
+                    lot_size: int = 1) -> Dict[str, Any]:
+        """
+        运行目标权重策略：第 t 天的目标权重按第 t 天收盘后的总资产换算为股数，第 t+1 天开盘调整
+
+        总资产依赖之前的成交，所以按日期逐行计算，每一行在所有股票上向量化。
+
+        Args:
+            close: 收盘价矩阵（日期 × 股票）
+            weights: 目标权重矩阵，NaN 表示保持原持仓
+            open_: 开盘价矩阵，默认等于收盘价
+            high: 最高价矩阵，用于限制滑点
+            low: 最低价矩阵，用于限制滑点
+            lot_size: 每手股数，目标股数向下取整到整手，指定成交模型时使用模型的每手股数
+
+        Returns:
+            Dict[str, Any]: 回测结果
+        """
+        close_v = close.to_numpy(dtype=np.float64)
+        open_v = self._align(open_, close, close_v)
+        weight_v = weights.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+        high_v, low_v = self._align(high, close, None), self._align(low, close, None)
+        mark = ffill_rows(close_v)
+        n_dates, n_symbols = close_v.shape
+        model = self.fill_model
+        if model is not None:
+            lot_size = model.lot_size
+            limits = model.price_limits(close.columns)
+        positions = np.zeros((n_dates, n_symbols))
+        held = np.zeros(n_symbols)
+        cash = self.initial_cash
+        target = np.full(n_symbols, np.nan)
+        for t in range(n_dates):
+            tradable = ~np.isnan(target) & ~np.isnan(open_v[t])
+            desired = np.where(tradable, target, held)
+            if model is not None:
+                desired = model.round_targets(held, desired)
+                prev_close = mark[t - 1] if t else np.full(n_symbols, np.nan)
+                desired = np.where(model.blocked(np.sign(desired - held), open_v[t], prev_close, limits),
+                                   held, desired)
+            qty = desired - held
+            fill = self._fill_prices(open_v[t], np.sign(qty), None if high_v is None else high_v[t],
+                                     None if low_v is None else low_v[t])
+            comm = self._costs(qty, fill)
+            accepted = cash_limited(qty, fill, comm, cash)
+            qty = np.where(accepted, qty, 0.0)
+            cash -= np.nansum(qty * fill) + np.nansum(np.where(accepted, comm, 0.0))
+            held = held + qty
+            positions[t] = held
+            equity = cash + np.nansum(held * mark[t])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                shares = weight_v[t] * equity / mark[t]
+            target = np.where(np.isnan(weight_v[t]), np.nan, np.floor(np.nan_to_num(shares) / lot_size) * lot_size)
+        return self._simulate(close, close_v, open_v, positions, high, low)
+
+    # ------------------------------------------------------------------ 计算
+
+    @staticmethod
+    def _align(frame: Optional[pd.DataFrame], close: pd.DataFrame, default: np.ndarray) -> np.ndarray:
+        if frame is None:
+            return default
+        return frame.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+
+    def _fill_prices(self, open_v: np.ndarray, side: np.ndarray, high_v: Optional[np.ndarray],
+                     low_v: Optional[np.ndarray]) -> np.ndarray:
+        """开盘价加滑点，买入上浮、卖出下浮，不超出最高价/最低价"""
+        price = open_v * (1 + self.slippage * side)
+        if self.slippage and high_v is not None:
+            price = np.fmin(price, high_v)
+        if self.slippage and low_v is not None:
+            price = np.fmax(price, low_v)
+        return price
+
+    def _costs(self, qty: np.ndarray, fill: np.ndarray) -> np.ndarray:
+        """交易费用，指定成交模型时按 A 股费用计算（与 PortfolioEngine 相同）"""
+        if self.fill_model is not None:
+            return self.fill_model.costs(qty, fill)
+        return np.abs(qty) * fill * self.commission
+
+    def _execute(self, positions: np.ndarray, open_v: np.ndarray, close_v: np.ndarray,
+                 high_v: Optional[np.ndarray], low_v: Optional[np.ndarray], symbols: pd.Index) -> np.ndarray:
+        """
+        由目标持仓得到实际持仓：没有成交模型且目标持仓在任何一天都不透支时直接返回，
+        否则按日期逐行调仓，按成交模型取整和检查涨跌停，资金不足的买单不成交
+
+        Args:
+            positions: 每天开盘后的目标持仓
+            open_v: 开盘价
+            close_v: 收盘价，用于计算涨跌停价
+            high_v: 最高价
+            low_v: 最低价
+            symbols: 股票代码，用于确定涨跌幅限制
+
+        Returns:
+            np.ndarray: 实际持仓
+        """
+        model = self.fill_model
+        if model is None:
+            prev = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+            qty = positions - prev
+            fill = np.nan_to_num(self._fill_prices(open_v, np.sign(qty), high_v, low_v))
+            cash = self.initial_cash - np.cumsum((qty * fill + self._costs(qty, fill)).sum(axis=1))
+            if (cash >= -CASH_EPSILON).all():
+                return positions
+        else:
+            limits = model.price_limits(symbols)
+            mark = ffill_rows(close_v)
+
+        held = np.zeros(positions.shape[1])
+        cash = self.initial_cash
+        actual = np.empty_like(positions)
+        for t in range(len(positions)):
+            desired = np.where(np.isnan(open_v[t]), held, positions[t])
+            if model is not None:
+                desired = model.round_targets(held, desired)
+                prev_close = mark[t - 1] if t else np.full(len(held), np.nan)
+                desired = np.where(model.blocked(np.sign(desired - held), open_v[t], prev_close, limits),
+                                   held, desired)
+            qty = desired - held
+            fill = np.nan_to_num(self._fill_prices(open_v[t], np.sign(qty), None if high_v is None else high_v[t],
+                                                   None if low_v is None else low_v[t]))
+            comm = self._costs(qty, fill)
+            accepted = cash_limited(qty, fill, comm, cash)
+            qty = np.where(accepted, qty, 0.0)
+            cash -= np.sum(qty * fill) + np.sum(np.where(accepted, comm, 0.0))
+            held = held + qty
+            actual[t] = held
+        return actual
+
+    def _simulate(self, close: pd.DataFrame, close_v: np.ndarray, open_v: np.ndarray, positions: np.ndarray,
+                  high: Optional[pd.DataFrame], low: Optional[pd.DataFrame]) -> Dict[str, Any]:
+        """由每天开盘后的持仓计算成交、资金曲线和统计指标"""
+        prev = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+        qty = positions - prev
+        fill = np.nan_to_num(self._fill_prices(open_v, np.sign(qty), self._align(high, close, None),
+                                               self._align(low, close, None)))
+        comm = self._costs(qty, fill)
+        cash = self.initial_cash - np.cumsum((qty * fill + comm).sum(axis=1))
+        equity = cash + (positions * np.nan_to_num(ffill_rows(close_v))).sum(axis=1)
+
+        self.positions = pd.DataFrame(positions, index=close.index, columns=close.columns)
+        self.equity = pd.Series(equity, index=close.index)
+        self.traded_value = pd.Series((np.abs(qty) * fill).sum(axis=1), index=close.index)
+        trades = self._trade_stats(prev, positions, qty, fill, comm)
+        self.trade_pnl = trades['pnl']
+        return self._process_results(equity, close.index, trades)
+
+    @staticmethod
+    def _trade_stats(prev: np.ndarray, positions: np.ndarray, qty: np.ndarray, fill: np.ndarray,
+                     comm: np.ndarray) -> Dict[str, Any]:
+        """
+        按 backtrader 的口径统计交易：持仓从 0 变为非 0 时开仓，回到 0 时平仓，反手视为平仓后再开仓
+
+        Returns:
+            Dict[str, Any]: total(开仓次数)、won、lost(已平仓交易按扣除手续费后盈亏 >= 0 计为盈利)、
+                pnl(已平仓交易扣除手续费后的盈亏，按平仓日期排列)
+        """
+        flip = (prev != 0) & (positions != 0) & (np.sign(prev) != np.sign(positions))
+        old_part = np.where(prev != 0, np.where(flip, -prev, qty), 0.0)
+        new_part = np.where((prev == 0) | flip, positions, 0.0)
+        traded = np.abs(old_part) + np.abs(new_part)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            old_comm = np.where(traded > 0, comm * np.abs(old_part) / traded, 0.0)
+        new_comm = comm - old_comm
+
+        # 每只股票的交易序号，开仓当天属于新交易，调仓和平仓属于原交易
+        opened = new_part != 0
+        trade_no = np.cumsum(opened, axis=0)
+        n_dates = positions.shape[0]
+        offset = np.arange(positions.shape[1]) * (n_dates + 1)
+        old_id = (trade_no - opened + offset).ravel()
+        new_id = (trade_no + offset).ravel()
+        size = offset[-1] + n_dates + 1 if len(offset) else 0
+        pnl = np.bincount(old_id, weights=(-old_part * fill - old_comm).ravel(), minlength=size)
+        pnl += np.bincount(new_id, weights=(-new_part * fill - new_comm).ravel(), minlength=size)
+
+        closed = (prev != 0) & ((positions == 0) | flip)
+        closed_pnl = pnl[old_id[closed.ravel()]]
+        won = int((closed_pnl >= 0).sum())
+        return {'total': int(opened.sum()), 'won': won, 'lost': int(len(closed_pnl) - won), 'pnl': closed_pnl}
+
+    def _process_results(self, equity: np.ndarray, index: pd.Index, trades: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        计算与 BacktestEngine._process_results 相同的结果字典
+
+        Args:
+            equity: 每天收盘后的总资产
+            index: 日期
+            trades: 交易统计
+
+        Returns:
+            Dict[str, Any]: 回测结果
+        """
+        return backtrader_results(equity, index, self.initial_cash, trades['total'], trades['pnl'])
+
+
+if __name__ == '__main__':
+    import time
+
+    # 5000 只股票 × 10 年的均线交叉
+    dates = pd.bdate_range('2015-01-01', periods=2500)
+    symbols = [f'{600000 + i:06d}.SH' for i in range(5000)]
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0.0003, 0.02, (len(dates), len(symbols))), axis=0),
+                         index=dates, columns=symbols)
+    begin = time.time()
+    signals = cross_signals(close.rolling(5).mean(), close.rolling(20).mean())
+    result = VectorEngine(initial_cash=1e9, stake=100).run_signals(close, signals)
+    print(f"耗时: {time.time() - begin:.2f}秒, 交易次数: {result['total_trades']}, 期末资金: {result['final_value']:.2f}")
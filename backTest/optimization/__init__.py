@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+"""
+from .param_sweep import ParamSweep, grid_params, random_params, latin_hypercube_params
+from .walk_forward import WalkForward, walk_forward_windows
@@ -0,0 +1,435 @@
+"""
+参数扫描模块
+
+在进程池中并行运行 BacktestEngine，对策略参数做网格、随机和拉丁超立方扫描：
+- 参数空间：列表/range 表示离散取值，(low, high) 二元组表示连续区间（两端都是整数时为整数区间）
+- 行情数据只写入一次共享内存（SharedMarketData），各进程在初始化时直接映射，任务只传递参数字典
+- 结果按完成顺序流式返回，同时逐行追加到 JSON Lines 断点文件，重新运行时跳过已完成的参数组合；
+  每行记录扫描配置（策略源码、行情数据、引擎和数据参数、指标函数）的指纹，配置变化后旧记录不再被跳过
+
+example:
+    space = {'fast_period': range(5, 30, 5), 'slow_period': [20, 40, 60]}
+    sweep = ParamSweep(CrossStrategy, {'600000.SH': df}, engine_kwargs={'commission': 0.001},
+                       n_jobs=8, checkpoint='./cache/sweep_cross.jsonl')
+    results = sweep.run(grid_params(space))
+    print(results.sort_values('sharpe_ratio', ascending=False).head())
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import SharedMarketData
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.result_cache import function_fingerprint, strategy_fingerprint
+from utils.log_util import logger
+
+# 不进入结果表的回测结果字段（非标量）
+NON_SCALAR_METRICS = ('time_returns',)
+
+
+def _is_interval(values: Any) -> bool:
+    """(low, high) 二元组表示区间"""
+    return (isinstance(values, tuple) and len(values) == 2
+            and all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in values))
+
+
+def _is_int_interval(values: tuple) -> bool:
+    return all(isinstance(v, (int, np.integer)) for v in values)
+
+
+def _to_python(value: Any) -> Any:
+    """numpy 标量转换为 Python 类型，便于序列化和传给 backtrader"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _choices(name: str, values: Any) -> List[Any]:
+    if _is_interval(values):
+        raise ValueError(f"网格扫描需要离散取值，参数 {name} 是区间 {values}")
+    return [_to_python(v) for v in values]
+
+
+def grid_params(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    网格扫描：所有离散取值的笛卡尔积
+
+    Args:
+        space: 参数空间 {参数名: 取值列表}
+
+    Returns:
+        List[Dict[str, Any]]: 参数组合列表
+    """
+    names = list(space)
+    values = [_choices(name, space[name]) for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def _map_unit(values: Any, u: np.ndarray) -> List[Any]:
+    """将 [0, 1) 上的样本映射到参数取值"""
+    if _is_interval(values):
+        low, high = values
+        if _is_int_interval(values):
+            return [int(v) for v in np.minimum(np.floor(low + u * (high - low + 1)), high)]
+        return [float(v) for v in low + u * (high - low)]
+    values = list(values)
+    index = np.minimum((u * len(values)).astype(np.int64), len(values) - 1)
+    return [_to_python(values[i]) for i in index]
+
+
+def random_params(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    随机扫描：每个参数独立均匀抽样
+
+    Args:
+        space: 参数空间，离散取值或 (low, high) 区间
+        n: 抽样数量
+        seed: 随机种子
+
+    Returns:
+        List[Dict[str, Any]]: 参数组合列表
+    """
+    rng = np.random.default_rng(seed)
+    columns = {name: _map_unit(values, rng.random(n)) for name, values in space.items()}
+    return [{name: columns[name][i] for name in space} for i in range(n)]
+
+
+def latin_hypercube_params(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    拉丁超立方扫描：每个参数的取值范围等分为 n 层，每层恰好抽一个样本，各参数的分层随机配对
+
+    Args:
+        space: 参数空间，离散取值或 (low, high) 区间
+        n: 抽样数量
+        seed: 随机种子
+
+    Returns:
+        List[Dict[str, Any]]: 参数组合列表
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, values in space.items():
+        u = (rng.permutation(n) + rng.random(n)) / n
+        columns[name] = _map_unit(values, u)
+    return [{name: columns[name][i] for name in space} for i in range(n)]
+
+
+def params_key(params: Dict[str, Any]) -> str:
+    """
+    参数组合的稳定标识，用于断点续跑时判断是否已完成
+
+    Args:
+        params: 参数组合
+
+    Returns:
+        str: 16 位十六进制字符串
+    """
+    text = json.dumps({k: _to_python(v) for k, v in params.items()}, sort_keys=True, default=str)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _scalar_metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: _to_python(v) for k, v in result.items() if k not in NON_SCALAR_METRICS}
+
+
+# 工作进程内的状态：数据和回测配置只在进程初始化时加载一次
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(market: SharedMarketData, strategy: type, engine_kwargs: Dict[str, Any],
+                 data_kwargs: Dict[str, Any], metrics: Optional[Callable]) -> None:
+    # market 在子进程中反序列化时已映射到同一块共享内存
+    _WORKER.update(market=market, strategy=strategy, engine_kwargs=engine_kwargs,
+                   data_kwargs=data_kwargs, metrics=metrics)
+
+
+def run_backtest(strategy: type, data: Union[Dict[str, pd.DataFrame], SharedMarketData], params: Dict[str, Any],
+                 engine_kwargs: Optional[Dict[str, Any]] = None, data_kwargs: Optional[Dict[str, Any]] = None,
+                 metrics: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    用一组参数运行一次 BacktestEngine
+
+    Args:
+        strategy: 策略类
+        data: {数据名称: 行情数据}，或共享内存中的行情数据
+        params: 策略参数
+        engine_kwargs: BacktestEngine 的初始化参数，默认使用 analyzers='standard'
+        data_kwargs: 数据周期参数 timeframe、compression
+        metrics: 从回测结果中提取指标的函数 metrics(result) -> dict，默认取全部标量结果
+
+    Returns:
+        Dict[str, Any]: 指标
+    """
+    engine = BacktestEngine(**{'analyzers': 'standard', **(engine_kwargs or {})})
+    data_kwargs = data_kwargs or {}
+    if isinstance(data, SharedMarketData):
+        for name, feed in data.feeds(**data_kwargs).items():
+            engine.add_data(feed, name=name)
+    else:
+        for name, frame in data.items():
+            engine.add_data(frame, name=name, **data_kwargs)
+    engine.add_strategy(strategy, **params)
+    result = engine.run()
+    return (metrics or _scalar_metrics)(result)
+
+
+def _run_task(key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    row = {'task_id': key, **params}
+    try:
+        row.update(run_backtest(_WORKER['strategy'], _WORKER['market'], params, _WORKER['engine_kwargs'],
+                                _WORKER['data_kwargs'], _WORKER['metrics']))
+        row['error'] = None
+    except Exception as e:
+        row['error'] = f'{type(e).__name__}: {e}'
+    row['elapsed'] = time.perf_counter() - start
+    return row
+
+
+def parallel_map(func: Callable, tasks: Iterable[tuple], n_jobs: int, initializer: Optional[Callable] = None,
+                 initargs: tuple = ()) -> Iterator[Any]:
+    """
+    在进程池中执行 func(*task)，按完成顺序流式返回结果
+
+    Args:
+        func: 任务函数，需要定义在模块顶层
+        tasks: 任务参数元组
+        n_jobs: 进程数，为 1 时在当前进程中顺序执行
+        initializer: 进程初始化函数，n_jobs 为 1 时在当前进程中调用一次
+        initargs: 进程初始化函数的参数，每个进程只传递一次
+
+    Yields:
+        Any: 任务结果
+    """
+    if n_jobs == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield func(*task)
+        return
+
+    # 限制在途任务数量，结果可以及时流式返回，也不会一次提交大量任务
+    max_pending = n_jobs * 4
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=initializer, initargs=initargs) as pool:
+        pending = set()
+        while True:
+            for task in itertools.islice(tasks, max_pending - len(pending)):
+                pending.add(pool.submit(func, *task))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return str(value)
+
+
+def _truncate_partial_line(path: str) -> None:
+    """截掉写入中断的最后一行，之后追加的记录从新行开始"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def load_checkpoint(path: str) -> pd.DataFrame:
+    """
+    读取断点文件
+
+    Args:
+        path: JSON Lines 断点文件路径
+
+    Returns:
+        pd.DataFrame: 已完成的结果，文件不存在时为空表；写入中断的最后一行会被忽略
+    """
+    rows = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"断点文件中有不完整的记录，已忽略: {path}")
+    return pd.DataFrame(rows)
+
+
+class ParamSweep:
+    """并行参数扫描"""
+
+    def __init__(self,
+                 strategy: type,
+                 data: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+                 engine_kwargs: Optional[Dict[str, Any]] = None,
+                 data_kwargs: Optional[Dict[str, Any]] = None,
+                 metrics: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 n_jobs: Optional[int] = None,
+                 checkpoint: Optional[str] = None,
+                 retry_failed: bool = False):
+        """
+        初始化参数扫描
+
+        Args:
+            strategy: 策略类，需要定义在模块顶层以便子进程引用
+            data: 行情数据，单个 DataFrame 或 {数据名称: DataFrame}，以 DatetimeIndex 为索引
+            engine_kwargs: BacktestEngine 的初始化参数，如 initial_cash、commission；
+                只需要期末资金和回撤时可以用 analyzers='minimal'
+            data_kwargs: 数据周期参数 timeframe、compression
+            metrics: 从回测结果中提取指标的函数，需要定义在模块顶层，默认取全部标量结果
+            n_jobs: 进程数，默认为 CPU 核数，为 1 时在当前进程中顺序执行
+            checkpoint: JSON Lines 断点文件路径，为空时不保存
+            retry_failed: 断点续跑时是否重跑失败的参数组合
+        """
+        self.strategy = strategy
+        self.frames = {'data0': data} if isinstance(data, pd.DataFrame) else dict(data)
+        self.engine_kwargs = engine_kwargs or {}
+        self.data_kwargs = data_kwargs or {}
+        self.metrics = metrics
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.retry_failed = retry_failed
+        self.stats: Dict[str, int] = {}
+        self._skipped_rows: List[Dict[str, Any]] = []
+
+    def config_key(self) -> str:
+        """
+        扫描配置的指纹：策略类源码、行情数据内容、引擎参数、数据参数和指标函数，任何一项变化都会得到新的指纹
+
+        Returns:
+            str: 16 位十六进制字符串
+        """
+        digest = hashlib.md5(strategy_fingerprint(self.strategy).encode('utf-8'))
+        for name, frame in self.frames.items():
+            digest.update(repr((name, list(frame.columns))).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        settings = {
+            'engine': self.engine_kwargs,
+            'data': self.data_kwargs,
+            'metrics': None if self.metrics is None else function_fingerprint(self.metrics),
+        }
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _completed(self, config: str) -> Dict[str, Dict[str, Any]]:
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return {}
+        _truncate_partial_line(self.checkpoint)
+        done = load_checkpoint(self.checkpoint)
+        if done.empty:
+            return {}
+        # 配置不同（或没有记录配置）的旧记录不跳过，重新运行
+        same = done['config'] == config if 'config' in done else pd.Series(False, index=done.index)
+        if not same.all():
+            logger.warning(f"断点文件中有 {int((~same).sum())} 条记录的扫描配置与当前不同，将重新运行: {self.checkpoint}")
+            done = done[same]
+        if self.retry_failed and 'error' in done:
+            done = done[done['error'].isna()]
+        done = done.drop_duplicates('task_id', keep='last')
+        return {row['task_id']: row for row in done.to_dict('records')}
+
+    def _append(self, row: Dict[str, Any]) -> None:
+        with open(self.checkpoint, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(row, ensure_ascii=False, default=_json_default) + '\n')
+
+    def _run_pool(self, tasks: List[tuple], market: SharedMarketData) -> Iterator[Dict[str, Any]]:
+        initargs = (market, self.strategy, self.engine_kwargs, self.data_kwargs, self.metrics)
+        try:
+            yield from parallel_map(_run_task, tasks, self.n_jobs, initializer=_init_worker, initargs=initargs)
+        finally:
+            _WORKER.clear()
+
+    def iter_results(self, param_list: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        运行扫描并按完成顺序流式返回每组参数的结果，已在断点文件中的参数组合直接跳过
+
+        Args:
+            param_list: 参数组合，如 grid_params / random_params / latin_hypercube_params 的返回值
+
+        Yields:
+            Dict[str, Any]: 一行结果，包含 task_id、参数、指标、error、elapsed 和 config（扫描配置的指纹）
+        """
+        config = self.config_key()
+        completed = self._completed(config)
+        self._skipped_rows = list(completed.values())
+        tasks, seen = [], set(completed)
+        for params in param_list:
+            params = {k: _to_python(v) for k, v in params.items()}
+            key = params_key(params)
+            if key not in seen:
+                seen.add(key)
+                tasks.append((key, params))
+        self.stats = {'total': len(tasks) + len(completed), 'skipped': len(completed), 'done': 0, 'failed': 0}
+        logger.info(f"参数扫描: 共 {self.stats['total']} 组，断点中已完成 {len(completed)} 组，"
+                    f"待运行 {len(tasks)} 组，进程数 {self.n_jobs}")
+        if not tasks:
+            return
+
+        if self.checkpoint:
+            os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint)), exist_ok=True)
+        market = SharedMarketData.create(self.frames)
+        try:
+            start = time.perf_counter()
+            for row in self._run_pool(tasks, market):
+                row['config'] = config
+                self.stats['done'] += 1
+                if row['error'] is not None:
+                    self.stats['failed'] += 1
+                    logger.error(f"回测失败: {row['task_id']}, 错误={row['error']}")
+                if self.checkpoint:
+                    self._append(row)
+                yield row
+            logger.info(f"参数扫描完成: 运行 {self.stats['done']} 组，失败 {self.stats['failed']} 组，"
+                        f"耗时 {time.perf_counter() - start:.1f}s")
+        finally:
+            market.unlink()
+
+    def run(self, param_list: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        运行扫描，返回全部结果（包括断点文件中已完成的结果）
+
+        Args:
+            param_list: 参数组合
+
+        Returns:
+            pd.DataFrame: 每组参数一行，包含 task_id、参数、指标、error、elapsed 和 config
+        """
+        rows = list(self.iter_results(param_list))
+        return pd.DataFrame(self._skipped_rows + rows)
+
+
+if __name__ == '__main__':
+    class SmaCross(bt.Strategy):
+        params = (('fast_period', 5), ('slow_period', 20))
+
+        def __init__(self):
+            self.crossover = bt.indicators.CrossOver(bt.indicators.SMA(period=self.params.fast_period),
+                                                     bt.indicators.SMA(period=self.params.slow_period))
+
+        def next(self):
+            if not self.position and self.crossover > 0:
+                self.buy()
+            elif self.position and self.crossover < 0:
+                self.sell()
+
+    np.random.seed(0)
+    dates = pd.date_range('2015-01-01', '2024-12-31', freq='B')
+    price = 100 * (1 + np.random.normal(0.0003, 0.02, len(dates))).cumprod()
+    df = pd.DataFrame({'open': price, 'high': price * 1.01, 'low': price * 0.99, 'close': price,
+                       'volume': 1e6}, index=dates)
+    space = {'fast_period': (3, 30), 'slow_period': (20, 120)}
+    sweep = ParamSweep(SmaCross, df, engine_kwargs={'stake': 100}, n_jobs=4)
+    print(sweep.run(latin_hypercube_params(space, 32, seed=1)).sort_values('vwr', ascending=False).head())
@@ -0,0 +1,444 @@
+"""
+滚动前推（walk-forward）优化模块
+
+在交易日历上滚动划分训练/测试窗口，每个窗口在训练期做参数扫描，用最优参数在紧随其后的测试期做样本外回测：
+- 窗口按交易日数划分，可以滚动（固定训练期长度）或锚定（训练期起点固定）；每个窗口前留 warmup 个交易日给指标预热，
+  预热期内策略不下单，指标从预热期开始计算
+- 指标可以预先在完整历史上一次算好（indicators），写入共享内存作为数据源的附加 lines，重叠的窗口不再重复计算
+- 所有窗口的训练任务一起放入进程池并行运行，行情数据只在共享内存中保存一份
+- 样本外收益按测试期首尾相接，拼成一条连续的样本外资金曲线
+- 每个窗口的结果按 (策略源码, 参数列表, 目标函数源码, 回测配置, 窗口日期, 窗口内数据摘要) 缓存，历史数据向后延长时只计算新增的窗口
+
+example:
+    def indicators(frame):
+        return pd.DataFrame({f'sma_{n}': frame['close'].rolling(n).mean() for n in (5, 10, 20, 60)})
+
+    wf = WalkForward(CrossStrategy, {'600000.SH': df}, grid_params({'fast': [5, 10], 'slow': [20, 60]}),
+                     train=500, test=120, warmup=60, objective='sharpe', indicators=indicators, n_jobs=8)
+    result = wf.run()
+    result['equity'].plot()
+"""
+
+import hashlib
+import json
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import SharedMarketData
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.result_cache import function_fingerprint, strategy_fingerprint
+from backTest.optimization.param_sweep import params_key, parallel_map
+from utils.log_util import logger
+
+TRADING_DAYS_PER_YEAR = 252
+WALK_FORWARD_CACHE_DIR = './cache/walk_forward'
+
+
+def walk_forward_windows(calendar: Any, train: int, test: int, step: Optional[int] = None,
+                         anchored: bool = False, warmup: int = 0) -> List[Dict[str, Any]]:
+    """
+    在交易日历上划分训练/测试窗口
+
+    Args:
+        calendar: 交易日序列
+        train: 训练期交易日数（锚定时为第一个窗口的训练期长度）
+        test: 测试期交易日数，最后一个窗口的测试期可能不足
+        step: 相邻窗口的间隔交易日数，默认等于 test，测试期首尾相接
+        anchored: 训练期起点是否固定在日历开头
+        warmup: 训练期和测试期之前用于指标预热的交易日数
+
+    Returns:
+        List[Dict[str, Any]]: 窗口列表，包含 index、train_warmup、train_start、train_end、
+            test_warmup、test_start、test_end
+    """
+    calendar = pd.DatetimeIndex(calendar).sort_values().unique()
+    step = step or test
+    n = len(calendar)
+    windows = []
+    k = 0
+    while True:
+        train_hi = warmup + train + k * step
+        if train_hi >= n:
+            break
+        train_lo = warmup if anchored else warmup + k * step
+        test_hi = min(train_hi + test, n)
+        windows.append({
+            'index': k,
+            'train_warmup': calendar[max(train_lo - warmup, 0)],
+            'train_start': calendar[train_lo],
+            'train_end': calendar[train_hi - 1],
+            'test_warmup': calendar[max(train_hi - warmup, 0)],
+            'test_start': calendar[train_hi],
+            'test_end': calendar[test_hi - 1],
+        })
+        k += 1
+    return windows
+
+
+def window_metrics(returns: pd.Series, periods_per_year: int = TRADING_DAYS_PER_YEAR) -> Dict[str, float]:
+    """
+    根据逐日收益率计算窗口指标
+
+    Args:
+        returns: 逐日简单收益率
+        periods_per_year: 每年的周期数
+
+    Returns:
+        Dict[str, float]: total_return、annual_return、sharpe、max_drawdown（比例）、days
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    n = len(r)
+    if n == 0:
+        return {'total_return': 0.0, 'annual_return': 0.0, 'sharpe': math.nan, 'max_drawdown': 0.0, 'days': 0}
+    equity = np.cumprod(1 + r)
+    total = float(equity[-1] - 1)
+    std = r.std(ddof=1) if n > 1 else 0.0
+    drawdown = 1 - equity / np.maximum.accumulate(np.maximum(equity, 1.0))
+    return {
+        'total_return': total,
+        'annual_return': float((1 + total) ** (periods_per_year / n) - 1) if total > -1 else -1.0,
+        'sharpe': float(r.mean() / std * math.sqrt(periods_per_year)) if std > 0 else math.nan,
+        'max_drawdown': float(drawdown.max()),
+        'days': n,
+    }
+
+
+_WINDOWED: Dict[type, type] = {}
+
+
+def windowed_strategy(strategy: type) -> type:
+    """
+    策略的窗口版本：增加参数 trade_start，之前的 K 线只更新指标，不调用策略的 next()
+
+    Args:
+        strategy: 策略类
+
+    Returns:
+        type: 策略子类，同一个策略复用同一个子类
+    """
+    cls = _WINDOWED.get(strategy)
+    if cls is None:
+        def next(self):
+            if self.p.trade_start is None or self.datetime.datetime(0) >= self.p.trade_start:
+                strategy.next(self)
+
+        cls = type(strategy)(strategy.__name__ + 'Windowed', (strategy,),
+                             {'params': (('trade_start', None),), 'next': next, '__module__': strategy.__module__})
+        _WINDOWED[strategy] = cls
+    return cls
+
+
+# 工作进程内的状态：数据和回测配置只在进程初始化时加载一次
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(market: SharedMarketData, strategy: type, engine_kwargs: Dict[str, Any],
+                 data_kwargs: Dict[str, Any], objective: Union[str, Callable]) -> None:
+    _WORKER.update(market=market, strategy=windowed_strategy(strategy), engine_kwargs=engine_kwargs,
+                   data_kwargs=data_kwargs, objective=objective)
+
+
+def run_window(market: SharedMarketData, strategy: type, params: Dict[str, Any], fromdate: Any, todate: Any,
+               trade_start: Any, engine_kwargs: Optional[Dict[str, Any]] = None,
+               data_kwargs: Optional[Dict[str, Any]] = None) -> pd.Series:
+    """
+    在一个窗口上运行回测
+
+    Args:
+        market: 共享内存中的行情数据
+        strategy: 策略类（windowed_strategy 的返回值）
+        params: 策略参数
+        fromdate: 数据开始日期（含预热期）
+        todate: 数据结束日期
+        trade_start: 开始交易的日期
+        engine_kwargs: BacktestEngine 的初始化参数，默认使用 analyzers='standard'
+        data_kwargs: 数据周期参数 timeframe、compression
+
+    Returns:
+        pd.Series: trade_start 之后的逐日收益率
+    """
+    engine = BacktestEngine(**{'analyzers': 'standard', **(engine_kwargs or {})})
+    for name, feed in market.feeds(fromdate=fromdate, todate=todate, **(data_kwargs or {})).items():
+        # 窗口内没有数据（尚未上市或已退市）的股票不加入
+        if len(feed.p.values):
+            engine.add_data(feed, name=name)
+    trade_start = pd.Timestamp(trade_start).to_pydatetime()
+    engine.add_strategy(strategy, trade_start=trade_start, **params)
+    returns = pd.Series(engine.run()['time_returns'], dtype=np.float64)
+    returns.index = pd.DatetimeIndex(returns.index)
+    return returns[returns.index >= trade_start]
+
+
+def _score(returns: pd.Series, objective: Union[str, Callable]) -> float:
+    if callable(objective):
+        return float(objective(returns))
+    return window_metrics(returns)[objective]
+
+
+def _run_train(window_key: str, params: Dict[str, Any], fromdate: Any, todate: Any, trade_start: Any) -> tuple:
+    try:
+        returns = run_window(_WORKER['market'], _WORKER['strategy'], params, fromdate, todate, trade_start,
+                             _WORKER['engine_kwargs'], _WORKER['data_kwargs'])
+        return window_key, params, _score(returns, _WORKER['objective']), None
+    except Exception as e:
+        return window_key, params, math.nan, f'{type(e).__name__}: {e}'
+
+
+def _run_test(window_key: str, params: Dict[str, Any], fromdate: Any, todate: Any, trade_start: Any) -> tuple:
+    try:
+        returns = run_window(_WORKER['market'], _WORKER['strategy'], params, fromdate, todate, trade_start,
+                             _WORKER['engine_kwargs'], _WORKER['data_kwargs'])
+        return window_key, {d.strftime('%Y-%m-%d %H:%M:%S'): float(r) for d, r in returns.items()}, None
+    except Exception as e:
+        return window_key, {}, f'{type(e).__name__}: {e}'
+
+
+class WalkForward:
+    """滚动前推优化"""
+
+    def __init__(self,
+                 strategy: type,
+                 data: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+                 param_list: List[Dict[str, Any]],
+                 train: int,
+                 test: int,
+                 step: Optional[int] = None,
+                 anchored: bool = False,
+                 warmup: int = 0,
+                 objective: Union[str, Callable[[pd.Series], float]] = 'sharpe',
+                 calendar: Any = None,
+                 indicators: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                 engine_kwargs: Optional[Dict[str, Any]] = None,
+                 data_kwargs: Optional[Dict[str, Any]] = None,
+                 n_jobs: Optional[int] = None,
+                 cache_dir: Optional[str] = WALK_FORWARD_CACHE_DIR):
+        """
+        初始化滚动前推优化
+
+        Args:
+            strategy: 策略类，需要定义在模块顶层以便子进程引用
+            data: 行情数据，单个 DataFrame 或 {数据名称: DataFrame}，以 DatetimeIndex 为索引
+            param_list: 参数组合，如 grid_params / random_params / latin_hypercube_params 的返回值
+            train: 训练期交易日数
+            test: 测试期交易日数
+            step: 相邻窗口的间隔交易日数，默认等于 test
+            anchored: 训练期起点是否固定
+            warmup: 每段回测之前的指标预热交易日数
+            objective: 训练期的优化目标，window_metrics 的键（越大越好），或 objective(returns) -> float
+            calendar: 交易日历，默认为全部数据日期的并集
+            indicators: 预先计算指标的函数 indicators(frame) -> DataFrame，列名作为数据源的附加 lines，
+                需要只依赖当前及之前的数据
+            engine_kwargs: BacktestEngine 的初始化参数，如 initial_cash、commission
+            data_kwargs: 数据周期参数 timeframe、compression
+            n_jobs: 进程数，默认为 CPU 核数，为 1 时在当前进程中顺序执行
+            cache_dir: 窗口结果的缓存目录，为空时不缓存
+        """
+        self.strategy = strategy
+        self.frames = {'data0': data} if isinstance(data, pd.DataFrame) else dict(data)
+        self.param_list = [{k: v.item() if isinstance(v, np.generic) else v for k, v in p.items()}
+                           for p in param_list]
+        self.train = train
+        self.test = test
+        self.step = step
+        self.anchored = anchored
+        self.warmup = warmup
+        self.objective = objective
+        if calendar is None:
+            calendar = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in self.frames.values()))))
+        self.calendar = pd.DatetimeIndex(calendar)
+        self.indicators = indicators
+        self.engine_kwargs = engine_kwargs or {}
+        self.data_kwargs = data_kwargs or {}
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.stats: Dict[str, int] = {}
+
+    def windows(self) -> List[Dict[str, Any]]:
+        """
+        窗口列表
+
+        Returns:
+            List[Dict[str, Any]]: 见 walk_forward_windows
+        """
+        return walk_forward_windows(self.calendar, self.train, self.test, self.step, self.anchored, self.warmup)
+
+    def _prepare_frames(self) -> tuple:
+        if self.indicators is None:
+            return self.frames, ()
+        frames, extra = {}, []
+        for name, frame in self.frames.items():
+            values = self.indicators(frame)
+            extra += [c for c in values.columns if c not in extra]
+            frames[name] = pd.concat([frame, values], axis=1)
+        return frames, tuple(extra)
+
+    def _config_key(self) -> str:
+        # 策略、目标函数、指标函数按源码计算指纹，修改逻辑后不会命中旧的缓存
+        objective = self.objective if isinstance(self.objective, str) else function_fingerprint(self.objective)
+        indicators = None if self.indicators is None else function_fingerprint(self.indicators)
+        config = {
+            'strategy': strategy_fingerprint(self.strategy),
+            'params': sorted(params_key(p) for p in self.param_list),
+            'objective': objective,
+            'indicators': indicators,
+            'engine': self.engine_kwargs,
+            'data': self.data_kwargs,
+            'warmup': self.warmup,
+        }
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def _window_key(self, config: str, window: Dict[str, Any], market: SharedMarketData) -> str:
+        digest = hashlib.md5(config.encode('utf-8'))
+        digest.update(json.dumps({k: str(v) for k, v in window.items() if k != 'index'}, sort_keys=True).encode())
+        # 只摘要窗口内（含预热期）的数据，延长历史不影响已有窗口
+        for name in market.names:
+            digest.update(name.encode('utf-8'))
+            digest.update(np.ascontiguousarray(market.rows(name, window['train_warmup'], window['test_end'])).tobytes())
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _load_cached(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir or not os.path.exists(self._cache_path(key)):
+            return None
+        try:
+            with open(self._cache_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"窗口缓存读取失败，重新计算: {key}, 错误={str(e)}")
+            return None
+
+    def _save_cached(self, key: str, record: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def _compute(self, market: SharedMarketData, pending: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        initargs = (market, self.strategy, self.engine_kwargs, self.data_kwargs, self.objective)
+        records = {key: {'window': {k: str(v) for k, v in window.items()}, 'scores': []}
+                   for key, window in pending.items()}
+        try:
+            train_tasks = [(key, params, window['train_warmup'], window['train_end'], window['train_start'])
+                           for key, window in pending.items() for params in self.param_list]
+            for key, params, score, error in parallel_map(_run_train, train_tasks, self.n_jobs,
+                                                          initializer=_init_worker, initargs=initargs):
+                records[key]['scores'].append({'params': params, 'score': score, 'error': error})
+                if error:
+                    logger.error(f"训练期回测失败: {pending[key]['train_start']:%Y-%m-%d}, {params}, 错误={error}")
+
+            test_tasks = []
+            for key, record in records.items():
+                valid = [s for s in record['scores'] if not math.isnan(s['score'])]
+                best = max(valid, key=lambda s: s['score']) if valid else None
+                record['best_params'] = best['params'] if best else None
+                record['is_score'] = best['score'] if best else math.nan
+                if best:
+                    window = pending[key]
+                    test_tasks.append((key, best['params'], window['test_warmup'], window['test_end'],
+                                       window['test_start']))
+                else:
+                    logger.warning(f"训练期没有有效结果，跳过样本外回测: {pending[key]['train_start']:%Y-%m-%d}")
+                    record['oos_returns'], record['error'] = {}, 'no valid params'
+            for key, returns, error in parallel_map(_run_test, test_tasks, self.n_jobs,
+                                                    initializer=_init_worker, initargs=initargs):
+                records[key]['oos_returns'], records[key]['error'] = returns, error
+                if error:
+                    logger.error(f"样本外回测失败: {pending[key]['test_start']:%Y-%m-%d}, 错误={error}")
+        finally:
+            _WORKER.clear()
+        return records
+
+    def run(self) -> Dict[str, Any]:
+        """
+        运行滚动前推优化
+
+        Returns:
+            Dict[str, Any]:
+                windows: 每个窗口一行，包含窗口日期、最优参数、训练期得分和样本外指标
+                returns: 拼接后的样本外逐日收益率
+                equity: 样本外资金曲线（从 initial_cash 开始）
+        """
+        windows = self.windows()
+        if not windows:
+            raise ValueError(f"交易日数 {len(self.calendar)} 不足以划分窗口: "
+                             f"warmup={self.warmup}, train={self.train}, test={self.test}")
+        frames, extra = self._prepare_frames()
+        market = SharedMarketData.create(frames, extra_columns=extra)
+        start = time.perf_counter()
+        try:
+            config = self._config_key()
+            keys = [self._window_key(config, window, market) for window in windows]
+            records = {key: self._load_cached(key) for key in keys}
+            pending = {key: window for key, window in zip(keys, windows) if records[key] is None}
+            self.stats = {'windows': len(windows), 'cached': len(windows) - len(pending), 'computed': len(pending),
+                          'tasks': len(pending) * (len(self.param_list) + 1)}
+            logger.info(f"滚动前推: 共 {len(windows)} 个窗口，缓存命中 {self.stats['cached']} 个，"
+                        f"计算 {len(pending)} 个窗口 × {len(self.param_list)} 组参数，进程数 {self.n_jobs}")
+            if pending:
+                for key, record in self._compute(market, pending).items():
+                    if record.get('error') is None:
+                        self._save_cached(key, record)
+                    records[key] = record
+        finally:
+            market.unlink()
+
+        rows, pieces = [], []
+        for window, key in zip(windows, keys):
+            record = records[key]
+            returns = pd.Series(record['oos_returns'], dtype=np.float64)
+            returns.index = pd.DatetimeIndex(returns.index)
+            pieces.append(returns)
+            oos = window_metrics(returns)
+            rows.append({**window, 'best_params': record['best_params'], 'is_score': record['is_score'],
+                         **{f'oos_{k}': v for k, v in oos.items()}, 'error': record.get('error')})
+        returns = pd.concat(pieces).sort_index() if pieces else pd.Series(dtype=np.float64)
+        initial_cash = self.engine_kwargs.get('initial_cash', 100000.0)
+        logger.info(f"滚动前推完成: 耗时 {time.perf_counter() - start:.1f}s")
+        return {
+            'windows': pd.DataFrame(rows),
+            'returns': returns,
+            'equity': initial_cash * (1 + returns).cumprod(),
+        }
+
+
+if __name__ == '__main__':
+    from backTest.optimization.param_sweep import grid_params
+
+    class SmaCross(bt.Strategy):
+        """使用预先计算的均线"""
+        params = (('fast', 5), ('slow', 20))
+
+        def __init__(self):
+            self.crossover = bt.indicators.CrossOver(getattr(self.data, f'sma_{self.p.fast}'),
+                                                     getattr(self.data, f'sma_{self.p.slow}'))
+
+        def next(self):
+            if not self.position and self.crossover > 0:
+                self.buy()
+            elif self.position and self.crossover < 0:
+                self.sell()
+
+    def sma_lines(frame):
+        return pd.DataFrame({f'sma_{n}': frame['close'].rolling(n).mean() for n in (5, 10, 20, 40, 60)})
+
+    np.random.seed(0)
+    dates = pd.date_range('2015-01-01', '2024-12-31', freq='B')
+    price = 100 * (1 + np.random.normal(0.0003, 0.02, len(dates))).cumprod()
+    df = pd.DataFrame({'open': price, 'high': price * 1.01, 'low': price * 0.99, 'close': price,
+                       'volume': 1e6}, index=dates)
+    wf = WalkForward(SmaCross, df, grid_params({'fast': [5, 10], 'slow': [20, 40, 60]}), train=500, test=120,
+                     warmup=60, indicators=sma_lines, engine_kwargs={'stake': 100}, n_jobs=4, cache_dir=None)
+    result = wf.run()
+    print(result['windows'][['test_start', 'best_params', 'is_score', 'oos_total_return']])
+    print(result['equity'].tail())
@@ -4,3 +4,5 @@
 Created on 2025/4/13.
 @author: Air.Zou
 """
+from .metrics import performance_metrics, trade_statistics
+from .performance_analyzer import EquityRecorder, MinimalAnalyzer, PerformanceAnalyzer
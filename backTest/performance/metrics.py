@@ -0,0 +1,313 @@
+"""
+绩效指标模块
+
+由资金曲线一次性向量化计算绩效指标，backtrader 回测和向量化回测共用：
+- 收益：总收益、年化收益、年化波动率
+- 风险调整收益：Sharpe、Sortino、Calmar，以及滚动 Sharpe / Sortino
+- 回撤：回撤序列、最大回撤及其起止日期、最长回撤持续期
+- 换手率和交易统计
+- backtrader_results：按 backtrader 六个分析器的口径计算 BacktestEngine 的结果字典，
+  关闭逐根 K 线的分析器后结果不变
+"""
+
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS_PER_YEAR = 252
+# backtrader SharpeRatio 默认的年化无风险利率
+SHARPE_RISK_FREE_RATE = 0.01
+# backtrader VWR 默认参数
+VWR_TAU = 0.20
+VWR_SDEV_MAX = 2.0
+
+
+def returns_from_equity(equity: np.ndarray, initial_value: Optional[float] = None) -> np.ndarray:
+    """
+    资金曲线转换为逐期简单收益率
+
+    Args:
+        equity: 每期期末的资金
+        initial_value: 期初资金，默认为第一期的资金（第一期收益率为 0）
+
+    Returns:
+        np.ndarray: 与 equity 等长的收益率
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if not len(equity):
+        return equity.copy()
+    start = equity[0] if initial_value is None else initial_value
+    values = np.r_[start, equity]
+    return values[1:] / values[:-1] - 1
+
+
+def drawdown_series(equity: np.ndarray, initial_value: Optional[float] = None) -> tuple:
+    """
+    回撤序列
+
+    Args:
+        equity: 每期期末的资金
+        initial_value: 期初资金，作为最初的高点
+
+    Returns:
+        tuple: (回撤比例, 当前回撤已持续的期数)
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if not len(equity):
+        return equity.copy(), np.zeros(0, dtype=np.int64)
+    peak = np.maximum.accumulate(equity)
+    if initial_value is not None:
+        peak = np.maximum(peak, initial_value)
+    drawdown = 1 - equity / peak
+    rows = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(drawdown > 0, -1, rows))
+    duration = np.where(drawdown > 0, rows - last_peak, 0)
+    return drawdown, duration
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        csum = np.cumsum(np.r_[0.0, values])
+        out[window - 1:] = csum[window:] - csum[:-window]
+    return out
+
+
+def rolling_sharpe(returns: np.ndarray, window: int = 63, periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                   risk_free_rate: float = 0.0) -> np.ndarray:
+    """
+    滚动 Sharpe（年化）
+
+    Args:
+        returns: 逐期收益率
+        window: 窗口期数
+        periods_per_year: 每年的期数
+        risk_free_rate: 年化无风险利率
+
+    Returns:
+        np.ndarray: 前 window - 1 期为 NaN，窗口内标准差为 0 时为 NaN
+    """
+    excess = np.asarray(returns, dtype=np.float64) - risk_free_rate / periods_per_year
+    mean = _rolling_sum(excess, window) / window
+    var = (_rolling_sum(excess * excess, window) - window * mean * mean) / (window - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 1e-12, mean / std * math.sqrt(periods_per_year), np.nan)
+
+
+def rolling_sortino(returns: np.ndarray, window: int = 63, periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                    risk_free_rate: float = 0.0) -> np.ndarray:
+    """
+    滚动 Sortino（年化），下行偏差为 sqrt(mean(min(r - rf, 0)^2))
+
+    Args:
+        returns: 逐期收益率
+        window: 窗口期数
+        periods_per_year: 每年的期数
+        risk_free_rate: 年化无风险利率
+
+    Returns:
+        np.ndarray: 前 window - 1 期为 NaN，窗口内没有下跌时为 NaN
+    """
+    excess = np.asarray(returns, dtype=np.float64) - risk_free_rate / periods_per_year
+    mean = _rolling_sum(excess, window) / window
+    downside = np.sqrt(_rolling_sum(np.minimum(excess, 0.0) ** 2, window) / window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(downside > 0, mean / downside * math.sqrt(periods_per_year), np.nan)
+
+
+def trade_statistics(pnl: Sequence[float]) -> Dict[str, Any]:
+    """
+    已平仓交易的统计，盈亏 >= 0 计为盈利（与 backtrader TradeAnalyzer 一致）
+
+    Args:
+        pnl: 每笔已平仓交易扣除手续费后的盈亏
+
+    Returns:
+        Dict[str, Any]: total_trades、won、lost、win_rate、avg_profit、avg_loss、profit_factor、
+            expectancy、largest_win、largest_loss
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    won, lost = pnl[pnl >= 0], pnl[pnl < 0]
+    total = len(pnl)
+    loss_sum = -lost.sum()
+    return {
+        'total_trades': total,
+        'won': len(won),
+        'lost': len(lost),
+        'win_rate': len(won) / total if total else 0.0,
+        'avg_profit': float(won.mean()) if len(won) else 0.0,
+        'avg_loss': float(lost.mean()) if len(lost) else 0.0,
+        'profit_factor': float(won.sum() / loss_sum) if loss_sum > 0 else math.inf if len(won) else math.nan,
+        'expectancy': float(pnl.mean()) if total else 0.0,
+        'largest_win': float(won.max()) if len(won) else 0.0,
+        'largest_loss': float(lost.min()) if len(lost) else 0.0,
+    }
+
+
+def performance_metrics(equity: Any,
+                        index: Any = None,
+                        initial_value: Optional[float] = None,
+                        trade_pnl: Optional[Sequence[float]] = None,
+                        traded_value: Optional[Sequence[float]] = None,
+                        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                        risk_free_rate: float = 0.0,
+                        window: int = 63) -> Dict[str, Any]:
+    """
+    由资金曲线计算全部绩效指标
+
+    Args:
+        equity: 每期期末的资金，Series 时使用其索引
+        index: 日期，默认为 equity 的索引
+        initial_value: 期初资金，默认为第一期的资金
+        trade_pnl: 每笔已平仓交易扣除手续费后的盈亏
+        traded_value: 每期的成交金额，用于计算换手率
+        periods_per_year: 每年的期数
+        risk_free_rate: 年化无风险利率
+        window: 滚动指标的窗口期数
+
+    Returns:
+        Dict[str, Any]:
+            returns: total_return、annual_return、annual_volatility、best_period、worst_period
+            sharpe、sortino、calmar: 年化的风险调整收益，无法计算时为 NaN
+            drawdown: max_drawdown（比例）、max_drawdown_period（最长回撤期数）、max_drawdown_start、
+                max_drawdown_end、current_drawdown
+            turnover: total、annual（成交金额 / 上一期资金）
+            trade: 见 trade_statistics
+            series: 逐期的 equity、returns、drawdown、rolling_sharpe、rolling_sortino、turnover
+    """
+    if index is None and isinstance(equity, pd.Series):
+        index = equity.index
+    values = np.asarray(equity, dtype=np.float64)
+    n = len(values)
+    index = pd.RangeIndex(n) if index is None else pd.Index(index)
+    start = float(values[0]) if initial_value is None and n else float(initial_value or 0.0)
+
+    returns = returns_from_equity(values, start)
+    drawdown, duration = drawdown_series(values, start)
+    total = float(values[-1] / start - 1) if n and start else 0.0
+    annual = float((1 + total) ** (periods_per_year / n) - 1) if n and total > -1 else -1.0 if n else 0.0
+
+    rf = risk_free_rate / periods_per_year
+    excess = returns - rf
+    std = excess.std(ddof=1) if n > 1 else 0.0
+    downside = math.sqrt(np.mean(np.minimum(excess, 0.0) ** 2)) if n else 0.0
+    sharpe = float(excess.mean() / std * math.sqrt(periods_per_year)) if std > 1e-12 else math.nan
+    sortino = float(excess.mean() / downside * math.sqrt(periods_per_year)) if downside > 0 else math.nan
+    max_dd = float(drawdown.max()) if n else 0.0
+
+    trough = int(np.argmax(drawdown)) if n else 0
+    peak = trough - int(duration[trough]) if n else 0
+    dd = {
+        'max_drawdown': max_dd,
+        'max_drawdown_period': int(duration.max()) if n else 0,
+        'max_drawdown_start': index[peak] if max_dd > 0 else None,
+        'max_drawdown_end': index[trough] if max_dd > 0 else None,
+        'current_drawdown': float(drawdown[-1]) if n else 0.0,
+    }
+
+    series = pd.DataFrame({'equity': values, 'returns': returns, 'drawdown': drawdown,
+                           'rolling_sharpe': rolling_sharpe(returns, window, periods_per_year, risk_free_rate),
+                           'rolling_sortino': rolling_sortino(returns, window, periods_per_year, risk_free_rate)},
+                          index=index)
+    turnover = {'total': 0.0, 'annual': 0.0}
+    if traded_value is not None:
+        prev = np.r_[start, values[:-1]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            period_turnover = np.where(prev > 0, np.asarray(traded_value, dtype=np.float64) / prev, 0.0)
+        series['turnover'] = period_turnover
+        turnover = {'total': float(period_turnover.sum()),
+                    'annual': float(period_turnover.mean() * periods_per_year) if n else 0.0}
+
+    return {
+        'returns': {
+            'total_return': total,
+            'annual_return': annual,
+            'annual_volatility': float(returns.std(ddof=1) * math.sqrt(periods_per_year)) if n > 1 else 0.0,
+            'best_period': float(returns.max()) if n else 0.0,
+            'worst_period': float(returns.min()) if n else 0.0,
+        },
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'calmar': annual / max_dd if max_dd > 0 else math.nan,
+        'drawdown': dd,
+        'turnover': turnover,
+        'trade': trade_statistics(trade_pnl if trade_pnl is not None else []),
+        'series': series,
+    }
+
+
+def backtrader_results(equity: np.ndarray, index: Any, initial_value: float, total_trades: int,
+                       trade_pnl: Sequence[float]) -> Dict[str, Any]:
+    """
+    按 backtrader 分析器的口径计算 BacktestEngine 的结果字典
+
+    Returns 为对数收益率及其逐期均值，DrawDown 为百分比和持续期数，SharpeRatio 为按自然年收益率计算、
+    不年化、无风险利率 1%，VWR 为默认参数，交易数为开仓次数，盈亏 >= 0 的已平仓交易计为盈利。
+
+    Args:
+        equity: 每期期末的资金
+        index: 日期
+        initial_value: 期初资金
+        total_trades: 开仓次数（包括未平仓的交易）
+        trade_pnl: 每笔已平仓交易扣除手续费后的盈亏
+
+    Returns:
+        Dict[str, Any]: 与 BacktestEngine._process_results 相同的键
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    start = initial_value
+    values = np.r_[start, equity]
+    n = len(equity)
+    final = float(values[-1])
+
+    # Returns：对数收益率及其逐期均值
+    rtot = math.log(final / start) if final > 0 else float('-inf')
+    ravg = rtot / n if n else 0.0
+
+    # DrawDown：百分比回撤和回撤持续的期数
+    drawdown, duration = drawdown_series(equity)
+    drawdown = drawdown * 100.0
+
+    dates = pd.DatetimeIndex(pd.to_datetime(index.astype(str) if not isinstance(index, pd.DatetimeIndex)
+                                            else index))
+    period_returns = values[1:] / values[:-1] - 1
+
+    # SharpeRatio：按自然年的收益率，默认不年化
+    years = dates.year.to_numpy()
+    year_end = np.r_[years[1:] != years[:-1], True] if n else np.array([], dtype=bool)
+    year_values = np.r_[start, equity[year_end]]
+    yearly = year_values[1:] / year_values[:-1] - 1
+    sharpe = None
+    if len(yearly):
+        excess = yearly - SHARPE_RISK_FREE_RATE
+        std = excess.std()
+        sharpe = float(excess.mean() / std) if std > 0 else None
+
+    # VWR：以逐期对数收益率均值为基准的波动加权收益
+    vwr = 0.0
+    if n > 1:
+        rnorm100 = math.expm1(ravg * TRADING_DAYS_PER_YEAR) * 100.0
+        deviation = values[1:] / (values[:-1] * np.exp(ravg * np.arange(1, n + 1))) - 1.0
+        sdev = deviation.std(ddof=1)
+        vwr = rnorm100 * (1.0 - pow(sdev / VWR_SDEV_MAX, VWR_TAU))
+
+    pnl = np.asarray(trade_pnl, dtype=np.float64)
+    won = int((pnl >= 0).sum())
+    return {
+        'final_value': final,
+        'return': rtot,
+        'annual_return': ravg,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': float(drawdown.max()) if n else 0.0,
+        'max_drawdown_len': int(duration.max()) if n else 0,
+        'total_trades': total_trades,
+        'won_trades': won,
+        'lost_trades': int(len(pnl) - won),
+        'win_rate': won / (total_trades or 1),
+        'vwr': vwr,
+        'time_returns': OrderedDict(zip(dates.to_pydatetime(), period_returns.tolist())),
+    }
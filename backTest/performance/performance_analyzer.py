@@ -0,0 +1,227 @@
+"""
+性能分析器模块
+
+- EquityRecorder：backtrader 分析器，每根 K 线只记录一次总资产、日期和成交金额，交易关闭时记录盈亏，
+  不在回测过程中计算任何指标
+- MinimalAnalyzer：backtrader 分析器，只跟踪资金高水位、回撤和交易数，内存 O(1)，适合参数扫描
+- PerformanceAnalyzer：回测结束后由资金曲线一次性向量化计算全部绩效指标，
+  支持 backtrader 策略（通过 EquityRecorder）、VectorEngine 和资金曲线 Series
+
+example:
+    analyzer = PerformanceAnalyzer()
+    analyzer.add_to_cerebro(engine.cerebro)
+    engine.run()
+    results = analyzer.analyze(engine.cerebro.runstrats[0][0])
+
+    engine = VectorEngine()
+    engine.run_signals(close, signals)
+    results = analyzer.analyze(engine)
+"""
+
+from typing import Any, Dict, Optional
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import num2date_array
+from backTest.performance.metrics import TRADING_DAYS_PER_YEAR, performance_metrics
+
+
+class EquityRecorder(bt.Analyzer):
+    """资金曲线记录器，每根 K 线 O(1)"""
+
+    def start(self):
+        """回测开始"""
+        self.initial_value = self.strategy.broker.getvalue()
+        self._value = self.initial_value
+        self._traded = 0.0
+        self.dates = []
+        self.values = []
+        self.traded = []
+        self.trade_pnl = []
+        self.total_trades = 0
+
+    def notify_fund(self, cash, value, fundvalue, shares):
+        """记录最新的总资产（与 TimeReturn、DrawDown 使用同一个值）"""
+        self._value = value
+
+    def notify_order(self, order):
+        """累计当前 K 线的成交金额"""
+        if order.status == order.Completed:
+            self._traded += abs(order.executed.size * order.executed.price)
+
+    def notify_trade(self, trade):
+        """记录开仓次数和已平仓交易的盈亏"""
+        if trade.justopened:
+            self.total_trades += 1
+        elif trade.isclosed:
+            self.trade_pnl.append(trade.pnlcomm)
+
+    def next(self):
+        """记录当前 K 线"""
+        self.dates.append(self.strategy.datetime[0])
+        self.values.append(self._value)
+        self.traded.append(self._traded)
+        self._traded = 0.0
+
+    def get_analysis(self) -> Dict[str, Any]:
+        """
+        获取记录结果
+
+        Returns:
+            Dict[str, Any]: equity（资金曲线 Series）、traded_value（每根 K 线的成交金额 Series）、
+                trade_pnl（已平仓交易扣除手续费后的盈亏）、total_trades（开仓次数）、initial_value
+        """
+        index = pd.DatetimeIndex(num2date_array(np.asarray(self.dates, dtype=np.float64)))
+        return {
+            'equity': pd.Series(self.values, index=index, dtype=np.float64),
+            'traded_value': pd.Series(self.traded, index=index, dtype=np.float64),
+            'trade_pnl': np.asarray(self.trade_pnl, dtype=np.float64),
+            'total_trades': self.total_trades,
+            'initial_value': self.initial_value,
+        }
+
+
+class MinimalAnalyzer(bt.Analyzer):
+    """轻量分析器，只跟踪资金高水位、回撤和交易数，口径与 backtrader DrawDown、TradeAnalyzer 一致"""
+
+    def start(self):
+        """回测开始"""
+        self.initial_value = self.strategy.broker.getvalue()
+        self._value = self.initial_value
+        self.peak = float('-inf')
+        self.max_drawdown = 0.0
+        self._drawdown_len = 0
+        self.max_drawdown_len = 0
+        self.total_trades = 0
+        self.won_trades = 0
+        self.lost_trades = 0
+
+    def notify_fund(self, cash, value, fundvalue, shares):
+        """记录最新的总资产"""
+        self._value = value
+
+    def notify_trade(self, trade):
+        """统计开仓次数和已平仓交易的盈亏"""
+        if trade.justopened:
+            self.total_trades += 1
+        elif trade.isclosed:
+            if trade.pnlcomm >= 0:
+                self.won_trades += 1
+            else:
+                self.lost_trades += 1
+
+    def next(self):
+        """更新高水位和回撤"""
+        value = self._value
+        if value > self.peak:
+            self.peak = value
+        drawdown = 100.0 * (self.peak - value) / self.peak
+        self._drawdown_len = self._drawdown_len + 1 if drawdown else 0
+        self.max_drawdown = max(self.max_drawdown, drawdown)
+        self.max_drawdown_len = max(self.max_drawdown_len, self._drawdown_len)
+
+    def get_analysis(self) -> Dict[str, Any]:
+        """
+        获取分析结果
+
+        Returns:
+            Dict[str, Any]: initial_value、final_value、peak、max_drawdown（百分比）、max_drawdown_len、
+                total_trades（开仓次数）、won_trades、lost_trades
+        """
+        return {
+            'initial_value': self.initial_value,
+            'final_value': self._value,
+            'peak': self.peak,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_len': self.max_drawdown_len,
+            'total_trades': self.total_trades,
+            'won_trades': self.won_trades,
+            'lost_trades': self.lost_trades,
+        }
+
+
+class PerformanceAnalyzer:
+    """性能分析器类"""
+
+    def __init__(self,
+                 periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                 risk_free_rate: float = 0.0,
+                 window: int = 63,
+                 name: str = 'performance'):
+        """
+        初始化性能分析器
+
+        Args:
+            periods_per_year: 每年的期数，日线为 252
+            risk_free_rate: 年化无风险利率
+            window: 滚动 Sharpe / Sortino 的窗口期数
+            name: EquityRecorder 在 cerebro 中的名称
+        """
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+        self.window = window
+        self.name = name
+        self.results = None
+
+    def add_to_cerebro(self, cerebro: bt.Cerebro) -> None:
+        """
+        添加资金曲线记录器，已添加同名记录器时不重复添加
+
+        Args:
+            cerebro: backtrader Cerebro
+        """
+        if not any(kwargs.get('_name') == self.name for _, _, kwargs in cerebro.analyzers):
+            cerebro.addanalyzer(EquityRecorder, _name=self.name)
+
+    def analyze(self, source: Any, initial_value: Optional[float] = None) -> Dict[str, Any]:
+        """
+        计算绩效指标
+
+        Args:
+            source: 带有 EquityRecorder 的策略实例、运行后的 VectorEngine 或资金曲线 Series
+            initial_value: 期初资金，source 为 Series 时使用，默认为第一期的资金
+
+        Returns:
+            Dict[str, Any]: 绩效指标，见 performance_metrics
+        """
+        trade_pnl, traded_value = None, None
+        if isinstance(source, bt.Strategy):
+            record = source.analyzers.getbyname(self.name).get_analysis()
+            equity, trade_pnl = record['equity'], record['trade_pnl']
+            traded_value, initial_value = record['traded_value'], record['initial_value']
+        elif isinstance(source, pd.Series):
+            equity = source
+        elif getattr(source, 'equity', None) is not None:
+            equity, initial_value = source.equity, source.initial_cash
+            trade_pnl, traded_value = source.trade_pnl, source.traded_value
+        else:
+            raise TypeError(f'不支持的分析对象: {type(source).__name__}')
+
+        self.results = performance_metrics(equity, initial_value=initial_value, trade_pnl=trade_pnl,
+                                           traded_value=traded_value, periods_per_year=self.periods_per_year,
+                                           risk_free_rate=self.risk_free_rate, window=self.window)
+        return self.results
+
+    def plot_returns(self, results: Optional[Dict[str, Any]] = None, path: Optional[str] = None) -> None:
+        """
+        绘制资金曲线、回撤和滚动 Sharpe
+
+        Args:
+            results: analyze 的结果，默认为最近一次的结果
+            path: 保存路径，为空时直接显示
+        """
+        import matplotlib.pyplot as plt
+
+        series = (results or self.results)['series']
+        fig, axes = plt.subplots(3, 1, sharex=True, figsize=(12, 9))
+        series['equity'].plot(ax=axes[0], title='资金曲线')
+        (-series['drawdown']).plot(ax=axes[1], title='回撤', color='red')
+        series['rolling_sharpe'].plot(ax=axes[2], title=f'滚动 Sharpe（{self.window}期）')
+        fig.tight_layout()
+        if path:
+            fig.savefig(path)
+            plt.close(fig)
+        else:
+            plt.show()
@@ -4,3 +4,5 @@
 Created on 2025/4/13.
 @author: Air.Zou
 """
+from .base_strategy import BaseStrategy, DEFAULT_INDICATORS
+from .indicator_cache import IndicatorCache, get_indicator_cache, set_indicator_cache
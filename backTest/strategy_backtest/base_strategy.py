@@ -10,11 +10,26 @@
 
 import backtrader as bt
 from typing import Dict, Any, Optional, List
-import numpy as np
+
+from backTest.performance.metrics import performance_metrics, trade_statistics
+from .indicator_cache import build_indicator
+
+# 原先默认构造的指标，子类设置 indicators = DEFAULT_INDICATORS 可以保留 sma20、macd 等属性
+DEFAULT_INDICATORS = {
+    'sma20': ('sma', {'period': 20}),
+    'sma50': ('sma', {'period': 50}),
+    'macd': ('macd', {}),
+    'rsi': ('rsi', {'period': 14}),
+    'boll': ('boll', {'period': 20}),
+    'atr': ('atr', {'period': 14}),
+}
 
 class BaseStrategy(bt.Strategy):
     """基础策略类"""
 
+    # 策略使用的指标 {属性名: (指标名, 参数)}，默认不构造任何指标，子类按需声明
+    indicators: Dict[str, tuple] = {}
+
     params = (
         ('printlog', False),
         ('risk_free_rate', 0.02),  # 无风险利率
@@ -29,6 +44,8 @@ class BaseStrategy(bt.Strategy):
         self.order = None
         self.buyprice = None
         self.buycomm = None
+        # 最近一笔成交的价格，交易关闭时作为平仓价
+        self.executed_price = None
 
         # 记录交易状态
         self.trade_history = []
@@ -38,22 +55,23 @@ class BaseStrategy(bt.Strategy):
         self._init_indicators()
 
     def _init_indicators(self):
-        """初始化技术指标"""
-        # 移动平均线
-        self.sma20 = bt.indicators.SimpleMovingAverage(self.data, period=20)
-        self.sma50 = bt.indicators.SimpleMovingAverage(self.data, period=50)
-
-        # MACD
-        self.macd = bt.indicators.MACD(self.data)
+        """初始化声明的技术指标"""
+        for attr, (name, params) in self.indicators.items():
+            setattr(self, attr, self.indicator(name, **params))
 
-        # RSI
-        self.rsi = bt.indicators.RSI(self.data, period=14)
+    def indicator(self, name: str, data: Optional[bt.feed.DataBase] = None, **params) -> bt.Indicator:
+        """
+        构造指标，数据已预加载时使用指标缓存中预先计算的结果，只能在 __init__ 中调用
 
-        # 布林带
-        self.boll = bt.indicators.BollingerBands(self.data, period=20)
+        Args:
+            name: 指标名，如 'sma'、'ema'、'macd'、'rsi'、'boll'、'atr'
+            data: 数据源，默认为第一个数据源
+            **params: 指标参数，与 backtrader 同名指标的参数一致
 
-        # ATR
-        self.atr = bt.indicators.ATR(self.data, period=14)
+        Returns:
+            bt.Indicator: 指标，lines 与 backtrader 同名指标一致
+        """
+        return build_indicator(data if data is not None else self.data, name, **params)
 
     def log(self, txt: str, dt: Optional[Any] = None, doprint: bool = False) -> None:
         """
@@ -79,6 +97,7 @@ class BaseStrategy(bt.Strategy):
             return
 
         if order.status in [order.Completed]:
+            self.executed_price = order.executed.price
             if order.isbuy():
                 self.log(
                     f'买入: 价格={order.executed.price:.2f}, '
@@ -123,7 +142,8 @@ class BaseStrategy(bt.Strategy):
             'entry_date': bt.num2date(trade.dtopen),
             'exit_date': bt.num2date(trade.dtclose),
             'entry_price': trade.price,
-            'exit_price': trade.pnlcomm / trade.size + trade.price,
+            # 已关闭交易的 size 为 0，平仓价取最近一笔成交的价格（订单通知先于交易通知）
+            'exit_price': self.executed_price,
             'size': trade.size,
             'pnl': trade.pnl,
             'pnlcomm': trade.pnlcomm,
@@ -150,28 +170,22 @@ class BaseStrategy(bt.Strategy):
             self._calculate_statistics()
 
     def _calculate_statistics(self) -> None:
-        """计算策略统计指标"""
-        trades = self.trade_history
-        pnls = [t['pnlcomm'] for t in trades]
-
-        # 计算收益率序列
-        returns = np.array(pnls) / self.broker.startingcash
-
-        # 计算年化收益率
-        total_days = (trades[-1]['exit_date'] - trades[0]['entry_date']).days
-        annual_return = (1 + sum(returns)) ** (365 / total_days) - 1
-
-        # 计算夏普比率
-        sharpe = (np.mean(returns) - self.params.risk_free_rate/252) / np.std(returns) * np.sqrt(252)
-
-        # 计算最大回撤
-        cummax = np.maximum.accumulate(np.cumsum(returns))
-        drawdown = (cummax - np.cumsum(returns)) / cummax
-        max_drawdown = np.max(drawdown)
+        """
+        计算策略统计指标
 
+        Sharpe 和回撤需要逐根 K 线的资金曲线，只在添加了 EquityRecorder（名称为 performance）时计算，
+        否则只统计交易
+        """
+        stats = trade_statistics([t['pnlcomm'] for t in self.trade_history])
         self.log(f'策略统计:')
-        self.log(f'总交易次数: {len(trades)}')
-        self.log(f'年化收益率: {annual_return:.2%}')
-        self.log(f'夏普比率: {sharpe:.2f}')
-        self.log(f'最大回撤: {max_drawdown:.2%}')
-        self.log(f'胜率: {len([t for t in trades if t["pnlcomm"] > 0]) / len(trades):.2%}')
+        self.log(f'总交易次数: {stats["total_trades"]}')
+
+        recorder = self.analyzers.getbyname('performance') if 'performance' in self.analyzers.getnames() else None
+        if recorder is not None:
+            record = recorder.get_analysis()
+            metrics = performance_metrics(record['equity'], initial_value=record['initial_value'],
+                                          risk_free_rate=self.params.risk_free_rate)
+            self.log(f'年化收益率: {metrics["returns"]["annual_return"]:.2%}')
+            self.log(f'夏普比率: {metrics["sharpe"]:.2f}')
+            self.log(f'最大回撤: {metrics["drawdown"]["max_drawdown"]:.2%}')
+        self.log(f'胜率: {stats["win_rate"]:.2%}')
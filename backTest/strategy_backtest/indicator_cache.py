@@ -0,0 +1,466 @@
+"""
+指标缓存模块
+
+回测中常用指标的向量化计算、缓存和预计算 lines：
+- sma、ema、macd、rsi、boll、atr 用 NumPy 一次算完整条序列，口径与 backtrader 同名指标一致
+  （均线种子为前 period 个值的简单平均，平滑递推与 ExponentialSmoothing 相同）
+- IndicatorCache 以 (股票, 数据摘要, 指标, 参数) 为键，结果保存在内存和 ./cache/indicators 下的 .npz 文件中，
+  参数扫描的各个进程和多次运行之间共用
+- PrecomputedIndicator 把算好的数组作为 backtrader 指标的 lines 提供给策略，不再逐根 K 线计算
+
+example:
+    class MyStrategy(BaseStrategy):
+        params = (('fast', 5), ('slow', 20))
+
+        def __init__(self):
+            super().__init__()
+            self.crossover = bt.indicators.CrossOver(self.indicator('sma', period=self.p.fast),
+                                                     self.indicator('sma', period=self.p.slow))
+"""
+
+import array
+import hashlib
+import json
+import math
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import backtrader as bt
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils.log_util import logger
+
+INDICATOR_CACHE_DIR = './cache/indicators'
+
+
+def _first_valid(values: np.ndarray) -> int:
+    valid = np.flatnonzero(~np.isnan(values))
+    return int(valid[0]) if len(valid) else len(values)
+
+
+def sma(close: np.ndarray, period: int = 30) -> np.ndarray:
+    """
+    简单移动平均
+
+    Args:
+        close: 价格序列
+        period: 周期
+
+    Returns:
+        np.ndarray: 前 period - 1 个值为 NaN
+    """
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) >= period:
+        out[period - 1:] = sliding_window_view(close, period).sum(axis=1) / period
+    return out
+
+
+def exponential_smoothing(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """
+    指数平滑：以第一个有效值起前 period 个值的简单平均为种子，之后 y = y[-1] * (1 - alpha) + x * alpha
+
+    Args:
+        values: 输入序列，开头可以有 NaN
+        period: 种子的周期
+        alpha: 平滑系数
+
+    Returns:
+        np.ndarray: 平滑后的序列
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.full(n, np.nan)
+    start = _first_valid(values)
+    seed_end = start + period
+    if seed_end > n:
+        return out
+    prev = math.fsum(values[start:seed_end]) / period
+    out[seed_end - 1] = prev
+    alpha1 = 1.0 - alpha
+    # 递推依赖上一个值，按列表逐个计算
+    rest = values[seed_end:].tolist()
+    smoothed = []
+    for x in rest:
+        prev = prev * alpha1 + x * alpha
+        smoothed.append(prev)
+    out[seed_end:] = smoothed
+    return out
+
+
+def ema(close: np.ndarray, period: int = 30) -> np.ndarray:
+    """
+    指数移动平均，alpha = 2 / (period + 1)
+
+    Args:
+        close: 价格序列
+        period: 周期
+
+    Returns:
+        np.ndarray: 指数移动平均
+    """
+    return exponential_smoothing(close, period, 2.0 / (1 + period))
+
+
+def smma(values: np.ndarray, period: int = 30) -> np.ndarray:
+    """
+    平滑移动平均（Wilder），alpha = 1 / period
+
+    Args:
+        values: 输入序列
+        period: 周期
+
+    Returns:
+        np.ndarray: 平滑移动平均
+    """
+    return exponential_smoothing(values, period, 1.0 / period)
+
+
+def macd(close: np.ndarray, period_me1: int = 12, period_me2: int = 26,
+         period_signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD
+
+    Args:
+        close: 价格序列
+        period_me1: 快线周期
+        period_me2: 慢线周期
+        period_signal: 信号线周期
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (macd, signal, histo)
+    """
+    line = ema(close, period_me1) - ema(close, period_me2)
+    signal = ema(line, period_signal)
+    return line, signal, line - signal
+
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    out[1:] = values[1:] - values[:-1]
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    相对强弱指数，涨跌幅用平滑移动平均
+
+    Args:
+        close: 价格序列
+        period: 周期
+
+    Returns:
+        np.ndarray: 0 ~ 100，下跌均值为 0 时为 100
+    """
+    diff = _diff(close)
+    with np.errstate(invalid='ignore'):
+        up = smma(np.where(np.isnan(diff), np.nan, np.maximum(diff, 0.0)), period)
+        down = smma(np.where(np.isnan(diff), np.nan, np.maximum(-diff, 0.0)), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + up / down)
+    return np.where((down == 0) & ~np.isnan(up), 100.0, out)
+
+
+def boll(close: np.ndarray, period: int = 20, devfactor: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    布林带，标准差为总体标准差 sqrt(E[x^2] - E[x]^2)
+
+    Args:
+        close: 价格序列
+        period: 周期
+        devfactor: 标准差倍数
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: (mid, top, bot)
+    """
+    close = np.asarray(close, dtype=np.float64)
+    mid = sma(close, period)
+    with np.errstate(invalid='ignore'):
+        std = np.sqrt(sma(close * close, period) - mid * mid)
+    return mid, mid + devfactor * std, mid - devfactor * std
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    平均真实波幅
+
+    Args:
+        high: 最高价
+        low: 最低价
+        close: 收盘价
+        period: 周期
+
+    Returns:
+        np.ndarray: 平均真实波幅
+    """
+    high, low, close = (np.asarray(v, dtype=np.float64) for v in (high, low, close))
+    true_range = np.full(len(close), np.nan)
+    true_range[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+    return smma(true_range, period)
+
+
+# 指标名: (计算函数, 输入的 lines, 输出的 lines, 不能预计算时使用的 backtrader 指标)
+INDICATORS: Dict[str, Tuple[Callable, Tuple[str, ...], Tuple[str, ...], type]] = {
+    'sma': (sma, ('close',), ('sma',), bt.indicators.SimpleMovingAverage),
+    'ema': (ema, ('close',), ('ema',), bt.indicators.ExponentialMovingAverage),
+    'macd': (macd, ('close',), ('macd', 'signal', 'histo'), bt.indicators.MACDHisto),
+    'rsi': (rsi, ('close',), ('rsi',), bt.indicators.RSI),
+    'boll': (boll, ('close',), ('mid', 'top', 'bot'), bt.indicators.BollingerBands),
+    'atr': (atr, ('high', 'low', 'close'), ('atr',), bt.indicators.ATR),
+}
+
+
+def data_digest(columns: Sequence[np.ndarray]) -> str:
+    """
+    数据摘要，数据有任何变化时摘要不同
+
+    Args:
+        columns: 数据列
+
+    Returns:
+        str: 16 位十六进制字符串
+    """
+    digest = hashlib.md5()
+    for values in columns:
+        digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class IndicatorCache:
+    """指标缓存"""
+
+    def __init__(self, root: Optional[str] = INDICATOR_CACHE_DIR, max_items: int = 1024):
+        """
+        初始化指标缓存
+
+        Args:
+            root: 缓存目录，为空时只缓存在内存中
+            max_items: 内存中最多保留的指标数量
+        """
+        self.root = root
+        self.max_items = max_items
+        self._memory: 'OrderedDict[str, Dict[str, np.ndarray]]' = OrderedDict()
+        self.stats = {'memory': 0, 'disk': 0, 'computed': 0}
+
+    @staticmethod
+    def key(symbol: str, digest: str, name: str, params: Dict[str, Any]) -> str:
+        """
+        缓存键
+
+        Args:
+            symbol: 股票代码或数据名称
+            digest: 数据摘要
+            name: 指标名
+            params: 指标参数
+
+        Returns:
+            str: 缓存键，可以作为文件名
+        """
+        text = json.dumps(params, sort_keys=True, default=str)
+        return f"{symbol or 'data'}_{name}_{digest}_{hashlib.md5(text.encode('utf-8')).hexdigest()[:8]}"
+
+    def _remember(self, key: str, values: Dict[str, np.ndarray]) -> None:
+        self._memory[key] = values
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f'{key}.npz')
+
+    def _load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        if not self.root or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with np.load(self._path(key)) as npz:
+                return {k: npz[k] for k in npz.files}
+        except (OSError, ValueError) as e:
+            logger.warning(f"指标缓存读取失败，重新计算: {key}, 错误={str(e)}")
+            return None
+
+    def _save(self, key: str, values: Dict[str, np.ndarray]) -> None:
+        if not self.root:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        # 先写临时文件再替换，多个进程同时写同一个指标时不会读到不完整的文件
+        tmp = os.path.join(self.root, f'{key}.{os.getpid()}.tmp.npz')
+        np.savez(tmp, **values)
+        os.replace(tmp, self._path(key))
+
+    def get(self, name: str, inputs: Dict[str, np.ndarray], params: Optional[Dict[str, Any]] = None,
+            symbol: str = '', digest: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        获取指标，依次查找内存、磁盘，都没有时计算并保存
+
+        Args:
+            name: 指标名，见 INDICATORS
+            inputs: 输入数据 {line 名称: 数组}，需要包含指标的全部输入
+            params: 指标参数
+            symbol: 股票代码或数据名称
+            digest: 输入数据的摘要，默认根据 OHLCV 计算
+
+        Returns:
+            Dict[str, np.ndarray]: {输出 line 名称: 数组}
+        """
+        if name not in INDICATORS:
+            raise ValueError(f"未知的指标: {name}，可选 {list(INDICATORS)}")
+        func, input_names, output_names, _ = INDICATORS[name]
+        params = params or {}
+        if digest is None:
+            digest = data_digest([inputs[k] for k in sorted(inputs)])
+        key = self.key(symbol, digest, name, params)
+
+        values = self._memory.get(key)
+        if values is not None:
+            self._memory.move_to_end(key)
+            self.stats['memory'] += 1
+            return values
+        values = self._load(key)
+        if values is not None:
+            self.stats['disk'] += 1
+        else:
+            result = func(*(inputs[k] for k in input_names), **params)
+            result = result if isinstance(result, tuple) else (result,)
+            values = dict(zip(output_names, result))
+            self._save(key, values)
+            self.stats['computed'] += 1
+        self._remember(key, values)
+        return values
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        清空缓存
+
+        Args:
+            disk: 是否同时删除磁盘上的缓存文件
+        """
+        self._memory.clear()
+        if disk and self.root and os.path.isdir(self.root):
+            for file in os.listdir(self.root):
+                if file.endswith('.npz'):
+                    os.remove(os.path.join(self.root, file))
+
+
+_indicator_cache: Optional[IndicatorCache] = None
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """
+    进程内共用的指标缓存
+
+    Returns:
+        IndicatorCache: 指标缓存
+    """
+    global _indicator_cache
+    if _indicator_cache is None:
+        _indicator_cache = IndicatorCache()
+    return _indicator_cache
+
+
+def set_indicator_cache(cache: Optional[IndicatorCache]) -> None:
+    """
+    替换进程内共用的指标缓存，例如改用其他目录或只用内存缓存
+
+    Args:
+        cache: 指标缓存，为空时下次使用重新创建默认缓存
+    """
+    global _indicator_cache
+    _indicator_cache = cache
+
+
+class PrecomputedIndicator(bt.Indicator):
+    """把预先算好的数组作为 lines 的指标，数组与数据源的全部 K 线一一对应，lines 由 precomputed_class 定义"""
+
+    lines = ()
+    params = (
+        ('values', ()),
+    )
+
+    def __init__(self):
+        """初始化，最小周期为所有输出都有值的第一根 K 线"""
+        first = max((_first_valid(v) for v in self.p.values), default=0)
+        self.addminperiod(first + 1)
+
+    def next(self):
+        """逐根 K 线模式"""
+        i = len(self) - 1
+        for line, values in zip(self.lines, self.p.values):
+            line[0] = values[i]
+
+    def once(self, start, end):
+        """预加载模式，按切片整段写入"""
+        for line, values in zip(self.lines, self.p.values):
+            line.array[start:end] = array.array('d', values[start:end].tobytes())
+
+    # 最小周期之前已经有值的输出（如 MACD 的 macd 线）同样写入，与 backtrader 指标一致
+    prenext = next
+    preonce = once
+
+
+_PRECOMPUTED_CLASSES: Dict[tuple, type] = {}
+
+
+def precomputed_class(name: str, outputs: Sequence[str]) -> type:
+    """
+    输出 lines 与 backtrader 同名指标一致的预计算指标类
+
+    Args:
+        name: 指标名
+        outputs: 输出 lines 名称
+
+    Returns:
+        type: PrecomputedIndicator 的子类
+    """
+    key = (name, tuple(outputs))
+    cls = _PRECOMPUTED_CLASSES.get(key)
+    if cls is None:
+        cls = type(PrecomputedIndicator)(f'Precomputed_{name}', (PrecomputedIndicator,),
+                                         {'lines': tuple(outputs), 'plotinfo': {'plotname': name},
+                                          '__module__': __name__})
+        _PRECOMPUTED_CLASSES[key] = cls
+    return cls
+
+
+def line_values(data: bt.feed.DataBase, line: str) -> np.ndarray:
+    """
+    数据源某条 line 预加载的全部数值
+
+    Args:
+        data: 数据源
+        line: line 名称
+
+    Returns:
+        np.ndarray: float64 数组
+    """
+    return np.frombuffer(getattr(data.lines, line).array, dtype=np.float64).copy()
+
+
+def build_indicator(data: bt.feed.DataBase, name: str, cache: Optional[IndicatorCache] = None,
+                    **params) -> bt.Indicator:
+    """
+    为数据源构造指标：数据已预加载时从缓存取预计算的 lines，否则退回 backtrader 指标
+
+    需要在策略的 __init__ 中调用。
+
+    Args:
+        data: 数据源
+        name: 指标名，见 INDICATORS
+        cache: 指标缓存，默认为进程内共用的缓存
+        **params: 指标参数，与 backtrader 同名指标的参数一致
+
+    Returns:
+        bt.Indicator: 指标，lines 与 backtrader 同名指标一致
+    """
+    if name not in INDICATORS:
+        raise ValueError(f"未知的指标: {name}，可选 {list(INDICATORS)}")
+    _, input_names, output_names, native = INDICATORS[name]
+    # 没有预加载（如实盘数据源或 preload=False）时无法一次性计算
+    if not data.buflen() or len(data.close.array) < data.buflen():
+        return native(data, **params)
+    inputs = {k: line_values(data, k) for k in ('datetime', 'open', 'high', 'low', 'close', 'volume')}
+    digest = data_digest([inputs[k] for k in ('datetime', 'open', 'high', 'low', 'close', 'volume')])
+    values = (cache or get_indicator_cache()).get(name, inputs, params, symbol=data._name, digest=digest)
+    return precomputed_class(name, output_names)(data, values=tuple(values[k] for k in output_names))
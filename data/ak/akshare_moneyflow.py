@@ -4,8 +4,8 @@
 Created on 2025/3/16.
 @author: Air.Zou
 """
-import akshare as ak
+from utils.global_config import DataSource
 
 
-stock_zh_a_tick_tx_js_df = ak.stock_zh_a_tick_tx_js(symbol="sz300059")
+stock_zh_a_tick_tx_js_df = DataSource.akshare.stock_zh_a_tick_tx_js(symbol="sz300059")
 print(stock_zh_a_tick_tx_js_df)
\ No newline at end of file
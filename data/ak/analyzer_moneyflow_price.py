@@ -7,10 +7,10 @@ Created on 16/03/2025.
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 import numpy as np
-import akshare as ak
+from utils.global_config import DataSource
 
 # 数据准备
-df = ak.stock_zh_a_tick_tx_js(symbol="sz002261")
+df = DataSource.akshare.stock_zh_a_tick_tx_js(symbol="sz002261")
 print(df)
 
 '''
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+分笔成交存储
+
+akshare stock_zh_a_tick_tx_js 返回的当日分笔成交按 (股票, 交易日) 保存为一个文件，
+每一列转换为整数后做差分、ZigZag、Varint 编码（NumPy 批量编解码），比 CSV 小很多：
+    time    int32  距 0 点的秒数
+    price   int32  价格，单位为分
+    volume  int64  成交量，单位为手
+    amount  int64  成交金额，单位为元
+    side    int8   1 买盘，-1 卖盘，0 中性盘
+
+文件格式:
+    b'TICK' | 版本(1字节) | 行数(varint) | 每列: 字节数(varint) + 编码数据
+
+目录结构:
+    {root}/{symbol}/{YYYYMMDD}.tick
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import to_date_int
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.varint import Varint, decode_signed_array, encode_signed_array
+
+TICK_ROOT = './cache/tick'
+MAGIC = b'TICK'
+FORMAT_VERSION = 1
+# 价格精度：1 元 = 100 分
+PRICE_SCALE = 100
+
+# 列名与对应的 dtype，写入和读取时都按这个顺序
+COLUMNS = [('time', np.int32), ('price', np.int32), ('volume', np.int64), ('amount', np.int64), ('side', np.int8)]
+# 每列的差分阶数（单调或缓慢变化的列做差分），未列出的列直接 ZigZag
+# varint 按字节对齐，快照间隔固定时二阶差分并不能更小，所以 time 也只做一阶差分
+DELTA_ORDERS = {'time': 1, 'price': 1}
+
+SIDE_CODES = {'买盘': 1, '卖盘': -1, '中性盘': 0}
+SIDE_NAMES = {v: k for k, v in SIDE_CODES.items()}
+
+# 交易时段（秒）：上午 09:30-11:30，下午 13:00-15:00
+MORNING_OPEN, MORNING_CLOSE = 9 * 3600 + 30 * 60, 11 * 3600 + 30 * 60
+AFTERNOON_OPEN, AFTERNOON_CLOSE = 13 * 3600, 15 * 3600
+SESSION_MINUTES = 240
+
+
+def _encode_column(values: np.ndarray, order: int) -> bytes:
+    """差分 + ZigZag + Varint 编码一列整数"""
+    return encode_signed_array(values, order)
+
+
+def _decode_column(buf, count: int, order: int) -> np.ndarray:
+    """_encode_column 的逆过程"""
+    return decode_signed_array(buf, count, order)[0]
+
+
+def _read_varint(buf, offset: int):
+    value, length = Varint.decode(bytes(buf[offset:offset + 10]))
+    return value, offset + length
+
+
+def parse_seconds(values) -> np.ndarray:
+    """
+    将 'HH:MM:SS' 格式的时间转换为距 0 点的秒数
+
+    Args:
+        values: 时间字符串序列
+
+    Returns:
+        np.ndarray: int32 秒数
+    """
+    parts = pd.Series(values, dtype=str).str.split(':', expand=True).astype(np.int32)
+    return (parts[0] * 3600 + parts[1] * 60 + parts[2]).to_numpy(dtype=np.int32)
+
+
+def format_seconds(seconds: np.ndarray) -> List[str]:
+    """距 0 点的秒数转换为 'HH:MM:SS'"""
+    return [f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in np.asarray(seconds, dtype=np.int64)]
+
+
+def from_akshare(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    akshare 分笔成交转换为整数列
+
+    Args:
+        df (pd.DataFrame): 成交时间、成交价格、价格变动、成交量、成交金额、性质
+
+    Returns:
+        Dict[str, np.ndarray]: 列名 -> 数组，按成交时间排序
+    """
+    columns = {
+        'time': parse_seconds(df['成交时间']),
+        'price': np.round(df['成交价格'].to_numpy(dtype=np.float64) * PRICE_SCALE).astype(np.int32),
+        'volume': df['成交量'].to_numpy(dtype=np.int64),
+        'amount': np.round(df['成交金额'].to_numpy(dtype=np.float64)).astype(np.int64),
+        'side': df['性质'].map(SIDE_CODES).fillna(0).to_numpy(dtype=np.int8),
+    }
+    order = np.argsort(columns['time'], kind='stable')
+    return {k: v[order] for k, v in columns.items()}
+
+
+def to_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """整数列转换为 DataFrame，价格转换为元"""
+    df = pd.DataFrame(columns)
+    df['price'] = df['price'] / PRICE_SCALE
+    return df
+
+
+def to_akshare(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    转换回 akshare 的列名和格式，便于沿用原有的分析代码
+
+    Args:
+        df (pd.DataFrame): TickStore.read 返回的数据
+
+    Returns:
+        pd.DataFrame: 成交时间、成交价格、价格变动、成交量、成交金额、性质
+    """
+    price = df['price'].to_numpy()
+    return pd.DataFrame({
+        '成交时间': format_seconds(df['time'].to_numpy()),
+        '成交价格': price,
+        '价格变动': np.round(np.diff(price, prepend=price[:1]), 2),
+        '成交量': df['volume'].to_numpy(),
+        '成交金额': df['amount'].to_numpy(),
+        '性质': [SIDE_NAMES.get(int(s), '中性盘') for s in df['side']],
+    })
+
+
+def encode_ticks(columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    编码一个交易日的分笔成交
+
+    Args:
+        columns (Dict[str, np.ndarray]): from_akshare 的返回值
+
+    Returns:
+        bytes: 文件内容
+    """
+    count = len(columns['time'])
+    parts = [MAGIC, bytes((FORMAT_VERSION,)), Varint.encode(count)[0]]
+    for name, _ in COLUMNS:
+        data = _encode_column(columns[name], DELTA_ORDERS.get(name, 0))
+        parts.append(Varint.encode(len(data))[0])
+        parts.append(data)
+    return b''.join(parts)
+
+
+def decode_ticks(buf: bytes, names: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    解码分笔成交文件
+
+    Args:
+        buf (bytes | memoryview): 文件内容
+        names (List[str], optional): 需要解码的列，默认全部；未请求的列直接跳过
+
+    Returns:
+        Dict[str, np.ndarray]: 列名 -> 数组
+    """
+    buf = memoryview(buf)
+    if bytes(buf[:4]) != MAGIC:
+        raise ValueError("不是分笔成交文件")
+    if buf[4] != FORMAT_VERSION:
+        raise ValueError(f"不支持的分笔成交文件版本: {buf[4]}")
+    count, offset = _read_varint(buf, 5)
+    columns = {}
+    for name, dtype in COLUMNS:
+        size, offset = _read_varint(buf, offset)
+        if names is None or name in names:
+            columns[name] = _decode_column(buf[offset:offset + size], count, DELTA_ORDERS.get(name, 0)).astype(dtype)
+        offset += size
+    return columns
+
+
+def session_minutes(seconds: np.ndarray) -> np.ndarray:
+    """
+    将一天内的秒数转换为交易时段内的分钟序号（0~239）
+
+    集合竞价归入第一分钟，11:30 收盘的成交归入上午最后一分钟，15:00 收盘的成交归入最后一分钟。
+
+    Args:
+        seconds (np.ndarray): 从 0 点开始的秒数
+
+    Returns:
+        np.ndarray: int64 分钟序号
+    """
+    seconds = np.asarray(seconds, dtype=np.int64)
+    morning = (seconds - MORNING_OPEN) // 60
+    afternoon = 120 + (seconds - AFTERNOON_OPEN) // 60
+    minutes = np.where(seconds < AFTERNOON_OPEN, np.clip(morning, 0, 119), np.clip(afternoon, 120, 239))
+    return minutes.astype(np.int64)
+
+
+def session_seconds(minutes: np.ndarray) -> np.ndarray:
+    """session_minutes 的逆运算，返回分钟开始时刻的秒数"""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    return np.where(minutes < 120, MORNING_OPEN + minutes * 60, AFTERNOON_OPEN + (minutes - 120) * 60)
+
+
+def to_minute_bars(ticks: pd.DataFrame, minutes: int = 1) -> pd.DataFrame:
+    """
+    分笔成交合成 N 分钟线（向量化），按交易时段对齐（如 60 分钟线为 09:30、10:30、13:00、14:00 四根）
+
+    集合竞价和收盘的成交按 session_minutes 归入相邻的分钟：09:25 的开盘集合竞价归入 09:30 的 K 线，
+    11:30 的成交归入 11:29，15:00 的收盘集合竞价归入 14:59，每天固定 240 / minutes 根以内。
+
+    Args:
+        ticks (pd.DataFrame): TickStore.read 返回的数据，按时间排序；包含 trade_date 列时按日分组
+        minutes (int): 分钟线周期，应能整除 120 以免跨越午休
+
+    Returns:
+        pd.DataFrame: 以 (trade_date,) bar 开始时间为索引，open/high/low/close/volume/amount/count
+    """
+    if ticks.empty:
+        return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume', 'amount', 'count'])
+    bucket = session_minutes(ticks['time'].to_numpy()) // minutes
+    if 'trade_date' in ticks.columns:
+        key = ticks['trade_date'].to_numpy(dtype=np.int64) * 1000 + bucket
+    else:
+        key = bucket
+    # 数据按时间排序，key 相同的行连续，用 reduceat 一次完成分组聚合
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(key)] - 1
+    price = ticks['price'].to_numpy(dtype=np.float64)
+    bars = pd.DataFrame({
+        'time': format_seconds(session_seconds(bucket[starts] * minutes)),
+        'open': price[starts],
+        'high': np.maximum.reduceat(price, starts),
+        'low': np.minimum.reduceat(price, starts),
+        'close': price[ends],
+        'volume': np.add.reduceat(ticks['volume'].to_numpy(dtype=np.int64), starts),
+        'amount': np.add.reduceat(ticks['amount'].to_numpy(dtype=np.int64), starts),
+        'count': ends - starts + 1,
+    })
+    if 'trade_date' in ticks.columns:
+        bars.insert(0, 'trade_date', ticks['trade_date'].to_numpy()[starts])
+        return bars.set_index(['trade_date', 'time'])
+    return bars.set_index('time')
+
+
+class TickStore:
+    """
+    分笔成交存储
+
+    example:
+        store = TickStore()
+        store.write('sz300059', '20250321', ak_df)
+        ticks = store.read('sz300059', '20250321', start_time='09:30:00', end_time='10:00:00')
+        bars = to_minute_bars(store.read_range('sz300059', '20250301', '20250321'), minutes=5)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        初始化分笔成交存储
+
+        Args:
+            root (str, optional): 存储目录，默认为 TICK_ROOT
+        """
+        self.root = root or TICK_ROOT
+
+    def _path(self, symbol: str, trade_date) -> str:
+        return os.path.join(self.root, symbol, f'{to_date_int(trade_date)}.tick')
+
+    def dates(self, symbol: str) -> List[int]:
+        """已保存的交易日"""
+        folder = os.path.join(self.root, symbol)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(f[:8]) for f in os.listdir(folder) if f.endswith('.tick'))
+
+    def exists(self, symbol: str, trade_date) -> bool:
+        """是否已保存"""
+        return os.path.exists(self._path(symbol, trade_date))
+
+    def write(self, symbol: str, trade_date, df: pd.DataFrame) -> int:
+        """
+        保存一个交易日的分笔成交（覆盖）
+
+        Args:
+            symbol (str): 股票代码，如 'sz300059'
+            trade_date: 交易日
+            df (pd.DataFrame): akshare stock_zh_a_tick_tx_js 格式的数据
+
+        Returns:
+            int: 写入的字节数
+        """
+        data = encode_ticks(from_akshare(df))
+        path = self._path(symbol, trade_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        logger.debug(f"分笔成交已保存: 股票={symbol}, 日期={trade_date}, 行数={len(df)}, 字节数={len(data)}")
+        return len(data)
+
+    def read(self, symbol: str, trade_date, start_time: Optional[str] = None, end_time: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        读取一个交易日的分笔成交
+
+        Args:
+            symbol (str): 股票代码
+            trade_date: 交易日
+            start_time (str, optional): 开始时间（含），'HH:MM:SS'
+            end_time (str, optional): 结束时间（含），'HH:MM:SS'
+            columns (List[str], optional): 需要的列，time 总会返回
+
+        Returns:
+            pd.DataFrame: time(秒)、price(元)、volume(手)、amount(元)、side，没有数据时返回空表
+        """
+        path = self._path(symbol, trade_date)
+        if not os.path.exists(path):
+            return to_frame({name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS})
+        with open(path, 'rb') as f:
+            buf = f.read()
+        names = None if columns is None else ['time'] + [c for c in columns if c != 'time']
+        data = decode_ticks(buf, names)
+        times = data['time']
+        lo = 0 if start_time is None else int(np.searchsorted(times, parse_seconds([start_time])[0], side='left'))
+        hi = len(times) if end_time is None else int(np.searchsorted(times, parse_seconds([end_time])[0],
+                                                                      side='right'))
+        return to_frame({k: v[lo:hi] for k, v in data.items()})
+
+    def read_range(self, symbol: str, start_date=None, end_date=None, start_time: Optional[str] = None,
+                   end_time: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        读取多个交易日的分笔成交
+
+        Args:
+            symbol (str): 股票代码
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            start_time (str, optional): 每天的开始时间
+            end_time (str, optional): 每天的结束时间
+            columns (List[str], optional): 需要的列
+
+        Returns:
+            pd.DataFrame: 增加 trade_date 列，按日期、时间排序
+        """
+        lo = 0 if start_date is None else to_date_int(start_date)
+        hi = 99999999 if end_date is None else to_date_int(end_date)
+        frames = []
+        for d in self.dates(symbol):
+            if lo <= d <= hi:
+                df = self.read(symbol, d, start_time, end_time, columns)
+                df.insert(0, 'trade_date', d)
+                frames.append(df)
+        if not frames:
+            empty = self.read(symbol, 0)
+            empty.insert(0, 'trade_date', pd.Series(dtype=np.int64))
+            return empty
+        return pd.concat(frames, ignore_index=True)
+
+
+def fetch_ticks(symbol: str, trade_date: Optional[str] = None, store: Optional[TickStore] = None) -> pd.DataFrame:
+    """
+    获取当日分笔成交并保存（接口只提供当日数据，需要每天收盘后调用）
+
+    Args:
+        symbol (str): 股票代码，如 'sz300059'
+        trade_date (str, optional): 保存的交易日，默认为今天
+        store (TickStore, optional): 分笔成交存储
+
+    Returns:
+        pd.DataFrame: akshare 原始数据
+    """
+    store = store or TickStore()
+    trade_date = trade_date or pd.Timestamp.now().strftime('%Y%m%d')
+    df = DataSource.akshare.stock_zh_a_tick_tx_js(symbol=symbol)
+    if df is not None and not df.empty:
+        store.write(symbol, trade_date, df)
+    return df
+
+
+if __name__ == '__main__':
+    store = TickStore()
+    raw = fetch_ticks('sz300059', store=store)
+    print(f"CSV 字节数: {len(raw.to_csv(index=False).encode('utf-8'))}")
+    ticks = store.read_range('sz300059')
+    print(ticks.tail())
+    print(to_minute_bars(ticks, minutes=5).tail())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+并发数据下载执行器
+
+在 AsyncRateLimiter 的控制下以有限并发执行一批 (接口, 参数) 任务，
+结果按完成顺序流式返回，并写入本地日期范围缓存：缓存表由 FetchJob.cache_table 指定，
+传入 @date_range_cache_with_symbol 装饰的读取函数时写入该函数读取的表，之后调用该函数直接命中缓存。
+tushare / akshare 只有同步接口，没有原生异步客户端时在线程池中执行。
+
+example:
+    limiter = AsyncRateLimiter(28, key='tushare.stk_factor_pro')
+    executor = AsyncFetchExecutor(limiter, concurrency=16)
+    jobs = [FetchJob('stk_factor_pro', {'ts_code': code, 'start_date': '20250101', 'end_date': '20250331'},
+                     cache_table=stk_factor_pro_data)
+            for code in codes]
+    for result in executor.run(jobs):
+        ...
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from utils.async_rate_limit import AsyncRateLimiter
+from utils.consts import RequestPriority
+from utils.global_config import DataSource
+from utils.local_cache import save_date_range_frame
+from utils.log_util import logger
+
+
+class FetchJob:
+    """下载任务"""
+
+    def __init__(self,
+                 endpoint: Union[str, Callable],
+                 params: Optional[Dict[str, Any]] = None,
+                 priority: RequestPriority = RequestPriority.BATCH,
+                 cache_table: Optional[Union[str, Callable]] = None,
+                 symbol: Optional[str] = None):
+        """
+        初始化下载任务
+
+        Args:
+            endpoint (str | Callable): tushare 接口名称，或 akshare 等数据函数
+            params (dict, optional): 接口参数
+            priority (RequestPriority): 请求优先级
+            cache_table (str | Callable, optional): 写入的缓存表，@date_range_cache_with_symbol 装饰的读取函数
+                （写入该函数读取的表）或表名，为空时不写缓存；endpoint 本身是被装饰的函数时由装饰器写缓存
+            symbol (str, optional): 缓存中的唯一标识，默认取参数中的 ts_code / symbol / code
+        """
+        self.endpoint = endpoint
+        self.params = params or {}
+        self.priority = priority
+        self.name = endpoint if isinstance(endpoint, str) else getattr(endpoint, '__name__', str(endpoint))
+        if callable(cache_table):
+            if not hasattr(cache_table, 'cache_table'):
+                raise ValueError(f"{getattr(cache_table, '__name__', cache_table)} 没有使用 "
+                                 f"date_range_cache_with_symbol 装饰，无法确定缓存表")
+            cache_table = cache_table.cache_table
+        self.cache_table = cache_table
+        if symbol is None:
+            symbol = self.params.get('ts_code', self.params.get('symbol', self.params.get('code', '')))
+        self.symbol = symbol
+
+    def __repr__(self):
+        return f"FetchJob({self.name}, {self.params})"
+
+
+class FetchResult:
+    """下载结果"""
+
+    def __init__(self, job: FetchJob, data: Any = None, error: Optional[BaseException] = None,
+                 elapsed: float = 0.0, wait: float = 0.0):
+        """
+        初始化下载结果
+
+        Args:
+            job (FetchJob): 对应的任务
+            data (Any): 返回数据
+            error (BaseException, optional): 异常，成功时为空
+            elapsed (float): 接口耗时，单位为秒
+            wait (float): 等待调用额度的时间，单位为秒
+        """
+        self.job = job
+        self.data = data
+        self.error = error
+        self.elapsed = elapsed
+        self.wait = wait
+
+    @property
+    def ok(self) -> bool:
+        """是否成功"""
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error}'
+        return f"FetchResult({self.job}, {status}, elapsed={self.elapsed:.3f})"
+
+
+def _tushare_query(endpoint: str, **params) -> pd.DataFrame:
+    """默认的同步接口调用"""
+    return DataSource.tushare_pro.query(endpoint, **params)
+
+
+class AsyncFetchExecutor:
+    """并发数据下载执行器"""
+
+    def __init__(self,
+                 limiter: AsyncRateLimiter,
+                 concurrency: int = 8,
+                 fetcher: Optional[Callable] = None,
+                 write_cache: bool = True,
+                 date_column: str = 'trade_date',
+                 max_workers: Optional[int] = None):
+        """
+        初始化执行器
+
+        Args:
+            limiter (AsyncRateLimiter): 速率限制器
+            concurrency (int): 同时进行中的请求数上限
+            fetcher (Callable, optional): 字符串接口的调用函数 fetcher(endpoint, **params)，
+                可以是同步函数（在线程池中执行）或协程函数（原生异步客户端），默认调用 tushare pro
+            write_cache (bool): 是否将结果写入本地缓存
+            date_column (str): 写缓存时使用的日期列
+            max_workers (int, optional): 线程池大小，默认与 concurrency 相同
+        """
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.fetcher = fetcher or _tushare_query
+        self.write_cache = write_cache
+        self.date_column = date_column
+        self.max_workers = max_workers or concurrency
+
+    async def _call(self, job: FetchJob, pool: ThreadPoolExecutor) -> Any:
+        loop = asyncio.get_running_loop()
+        if isinstance(job.endpoint, str):
+            func, args = self.fetcher, (job.endpoint,)
+        else:
+            func, args = job.endpoint, ()
+        if inspect.iscoroutinefunction(func):
+            return await func(*args, **job.params)
+        return await loop.run_in_executor(pool, lambda: func(*args, **job.params))
+
+    def _save(self, job: FetchJob, data: Any) -> None:
+        if isinstance(data, pd.DataFrame) and job.cache_table:
+            save_date_range_frame(job.cache_table, job.symbol, data, date_column=self.date_column)
+
+    async def _run_job(self, job: FetchJob, pool: ThreadPoolExecutor) -> FetchResult:
+        wait = await self.limiter.acquire(job.priority)
+        start = time.perf_counter()
+        try:
+            data = await self._call(job, pool)
+        except Exception as e:
+            logger.error(f"下载失败: {job}, 错误={str(e)}")
+            return FetchResult(job, error=e, elapsed=time.perf_counter() - start, wait=wait)
+        elapsed = time.perf_counter() - start
+        if self.write_cache:
+            try:
+                await asyncio.get_running_loop().run_in_executor(pool, self._save, job, data)
+            except Exception as e:
+                logger.error(f"写入缓存失败: {job}, 错误={str(e)}")
+        return FetchResult(job, data=data, elapsed=elapsed, wait=wait)
+
+    async def stream(self, jobs: Iterable[FetchJob]) -> AsyncIterator[FetchResult]:
+        """
+        执行任务并按完成顺序流式返回结果
+
+        Args:
+            jobs (Iterable[FetchJob]): 任务列表
+
+        Yields:
+            FetchResult: 下载结果
+        """
+        pending = asyncio.Queue()
+        for job in jobs:
+            pending.put_nowait(job)
+        total = pending.qsize()
+        done = asyncio.Queue()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            async def worker():
+                while True:
+                    try:
+                        job = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    await done.put(await self._run_job(job, pool))
+
+            workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, total))]
+            try:
+                for _ in range(total):
+                    yield await done.get()
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def gather(self, jobs: Iterable[FetchJob]) -> List[FetchResult]:
+        """
+        执行任务并返回全部结果（按完成顺序）
+
+        Args:
+            jobs (Iterable[FetchJob]): 任务列表
+
+        Returns:
+            List[FetchResult]: 下载结果
+        """
+        return [result async for result in self.stream(jobs)]
+
+    def run(self, jobs: Iterable[FetchJob]) -> List[FetchResult]:
+        """
+        在同步代码中执行任务
+
+        Args:
+            jobs (Iterable[FetchJob]): 任务列表
+
+        Returns:
+            List[FetchResult]: 下载结果（按完成顺序）
+        """
+        results = asyncio.run(self.gather(jobs))
+        failed = sum(1 for r in results if not r.ok)
+        logger.info(f"批量下载完成: 任务数={len(results)}, 失败数={failed}")
+        return results
+
+
+if __name__ == '__main__':
+    from data.tushare.basic.ts_stock_all import get_stock_all_basic
+    from data.tushare.feature.ts_complex import stk_factor_pro_data
+
+    codes = get_stock_all_basic()['ts_code'].tolist()[:20]
+    executor = AsyncFetchExecutor(AsyncRateLimiter(28, key='tushare.stk_factor_pro'), concurrency=8)
+    for r in executor.run([FetchJob('stk_factor_pro', {'ts_code': c, 'start_date': '20250101', 'end_date': '20250331'},
+                                    cache_table=stk_factor_pro_data)
+                           for c in codes]):
+        print(r)
+    # 之后的读取直接命中缓存
+    print(stk_factor_pro_data(code=codes[0], start_date='20250101', end_date='20250331'))
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+"""
+
+"""
+本地列式数据存储
+"""
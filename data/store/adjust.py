@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+本地复权计算
+
+复权因子 adj_factor 是累积因子，与不复权价格一起保存在日线面板数据中：
+    后复权价格 = 价格 × adj_factor
+    前复权价格 = 价格 × adj_factor / 锚定日的 adj_factor
+
+每只股票向前填充后的因子序列缓存在内存中（面板数据版本变化时失效），
+前复权更换锚定日只需要一次向量除法，不需要重新下载。
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore, to_date_int
+
+# 需要复权的价格字段，成交量、成交额、涨跌幅不复权
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'pre_close', 'change']
+ADJ_FIELD = 'adj_factor'
+
+
+def ffill_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    沿日期轴（第0维）向前填充 NaN
+
+    Args:
+        matrix (np.ndarray): 一维或 (日期 × 股票) 二维数组
+
+    Returns:
+        np.ndarray: 填充后的数组，开头的 NaN 保持不变
+    """
+    values = np.asarray(matrix, dtype=np.float64)
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1)), 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    if values.ndim == 1:
+        return values[idx]
+    return values[idx, np.arange(values.shape[1])]
+
+
+class AdjustEngine:
+    """
+    本地复权计算
+
+    example:
+        engine = AdjustEngine(PanelStore('daily'))
+        qfq = engine.adjust('000001.SZ', how='qfq', anchor_date='20250331')
+        hfq_close = engine.adjust_panel('close', how='hfq', start_date='20250101')
+    """
+
+    def __init__(self, store: Optional[PanelStore] = None):
+        """
+        初始化复权计算
+
+        Args:
+            store (PanelStore, optional): 保存不复权日线和 adj_factor 的面板数据，默认为日线面板数据
+        """
+        self.store = store or PanelStore('daily')
+        self._factors: Dict[str, np.ndarray] = {}
+        self._version = self.store.version
+
+    def _check_version(self) -> None:
+        self.store.reload()
+        if self.store.version != self._version:
+            self._factors.clear()
+            self._version = self.store.version
+
+    def factors(self, symbol: str) -> np.ndarray:
+        """
+        获取股票向前填充后的复权因子序列（与面板数据日期轴对齐）
+
+        Args:
+            symbol (str): 股票代码
+
+        Returns:
+            np.ndarray: 复权因子，上市前为 NaN
+        """
+        self._check_version()
+        return self._symbol_factors(symbol)
+
+    def _symbol_factors(self, symbol: str) -> np.ndarray:
+        if symbol not in self._factors:
+            col = self.store.symbol_index().get(symbol)
+            if col is None:
+                raise KeyError(f"面板数据中没有该股票: {symbol}")
+            self._factors[symbol] = ffill_rows(np.array(self.store.field(ADJ_FIELD)[:, col]))
+        return self._factors[symbol]
+
+    @staticmethod
+    def _scale(factors: np.ndarray, how: str, anchor: Optional[int]) -> np.ndarray:
+        """由因子序列计算价格乘数，anchor 为锚定日在日期轴上的位置"""
+        if how == 'hfq':
+            return factors
+        if how == 'qfq':
+            return factors / factors[anchor]
+        raise ValueError(f"不支持的复权方式: {how}")
+
+    def _anchor_row(self, anchor_date, rows: slice) -> int:
+        """锚定日所在行，默认为查询区间的最后一天；锚定日不是交易日时取之前最近的交易日"""
+        if anchor_date is None:
+            return max(rows.stop - 1, 0)
+        return max(int(np.searchsorted(self.store.dates, to_date_int(anchor_date), side='right')) - 1, 0)
+
+    def adjust(self, symbol: str, how: str = 'qfq', anchor_date=None, start_date=None, end_date=None,
+               fields: Sequence[str] = None) -> pd.DataFrame:
+        """
+        计算单只股票的复权日线
+
+        Args:
+            symbol (str): 股票代码
+            how (str): 'qfq' 前复权，'hfq' 后复权，None 不复权
+            anchor_date: 前复权锚定日，默认为 end_date（与 pro_bar 一致）
+            start_date: 开始日期
+            end_date: 结束日期
+            fields (Sequence[str], optional): 返回的字段，默认为面板数据中的全部字段
+
+        Returns:
+            pd.DataFrame: 以日期（整数）为索引的日线数据
+        """
+        self._check_version()
+        fields = [f for f in (fields or self.store.fields) if f != ADJ_FIELD]
+        rows = self.store.date_slice(start_date, end_date)
+        df = self.store.read_symbol(symbol, fields, start_date, end_date, dropna=False)
+        if how is not None and not df.empty:
+            factors = self._symbol_factors(symbol)
+            scale = self._scale(factors, how, self._anchor_row(anchor_date, rows))[rows]
+            for f in fields:
+                if f in PRICE_FIELDS:
+                    df[f] = df[f].to_numpy() * scale
+        return df.dropna(how='all')
+
+    def adjust_panel(self, field: str = 'close', how: str = 'qfq', anchor_date=None, start_date=None,
+                     end_date=None, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        计算多只股票的复权价格宽表
+
+        Args:
+            field (str): 价格字段
+            how (str): 'qfq' 前复权，'hfq' 后复权
+            anchor_date: 前复权锚定日，默认为 end_date
+            start_date: 开始日期
+            end_date: 结束日期
+            symbols (Sequence[str], optional): 股票列表，默认全部
+
+        Returns:
+            pd.DataFrame: 以日期（整数）为索引、股票代码为列
+        """
+        self._check_version()
+        rows = self.store.date_slice(start_date, end_date)
+        prices = self.store.read(field, start_date, end_date, symbols)
+        if how is None or field not in PRICE_FIELDS:
+            return prices
+        factors = ffill_rows(self.store.read(ADJ_FIELD, symbols=list(prices.columns)).to_numpy())
+        scale = self._scale(factors, how, self._anchor_row(anchor_date, rows))[rows]
+        return pd.DataFrame(prices.to_numpy() * scale, index=prices.index, columns=prices.columns)
+
+
+def get_adjusted_daily(code: str, start_date=None, end_date=None, adj: str = 'qfq',
+                       store: Optional[PanelStore] = None) -> pd.DataFrame:
+    """
+    从本地面板数据获取复权日线，格式与 ts_daily.get_daily_data 一致
+
+    Args:
+        code (str): 股票代码（带交易所后缀）
+        start_date: 开始日期
+        end_date: 结束日期
+        adj (str): 'qfq' / 'hfq' / None
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        pd.DataFrame: 以 trade_date 为索引的日线数据
+    """
+    df = AdjustEngine(store).adjust(code, adj, start_date=start_date, end_date=end_date)
+    df.index = df.index.astype(str)
+    df.index.name = 'trade_date'
+    df.insert(0, 'ts_code', code)
+    return df
+
+
+if __name__ == '__main__':
+    engine = AdjustEngine()
+    print(engine.adjust('000001.SZ', how='qfq', start_date='20250101', end_date='20250331'))
+    print(engine.adjust('000001.SZ', how='qfq', anchor_date='20250228', start_date='20250101'))
+    print(engine.adjust_panel('close', how='hfq', start_date='20250101').tail())
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+面板数据存储
+
+每个数据集按字段保存为 (日期 × 股票) 的 float64 矩阵，每个字段一个二进制文件，
+读取时通过 numpy.memmap 映射，不需要整体加载到内存。
+
+目录结构:
+    {root}/{name}/meta.json     日期轴、股票轴、字段列表、版本号
+    {root}/{name}/{field}.bin   行优先的 (日期 × 股票) float64 矩阵，缺失值为 NaN
+
+股票轴只追加不删除，已有股票的列位置保持不变；新交易日追加在末尾时只需要追加写文件，
+插入历史日期或出现新股票时才会重写整个字段文件。
+同一个数据集同一时间只允许一个进程写入。
+"""
+import os
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.log_util import logger
+
+# 面板数据根目录
+PANEL_ROOT = './cache/panel'
+
+DTYPE = np.float64
+
+
+def to_date_int(value) -> int:
+    """
+    将日期转换为 YYYYMMDD 格式的整数
+
+    Args:
+        value: '20250102' / '2025-01-02' / 20250102 / datetime / pd.Timestamp
+
+    Returns:
+        int: 例如 20250102
+    """
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (datetime, pd.Timestamp, np.datetime64)):
+        return int(pd.Timestamp(value).strftime('%Y%m%d'))
+    return int(str(value).replace('-', '')[:8])
+
+
+def to_date_ints(values: Iterable) -> np.ndarray:
+    """批量将日期转换为 YYYYMMDD 格式的整数数组"""
+    values = pd.Index(values)
+    if pd.api.types.is_integer_dtype(values):
+        return values.to_numpy(dtype=np.int64)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return (values.year * 10000 + values.month * 100 + values.day).to_numpy(dtype=np.int64)
+    return values.astype(str).str.replace('-', '').str[:8].astype(np.int64).to_numpy()
+
+
+class PanelStore:
+    """
+    面板数据存储
+
+    example:
+        store = PanelStore('daily')
+        store.upsert(df, date_col='trade_date', symbol_col='ts_code')
+        close = store.read('close', start_date='20250101', symbols=['000001.SZ'])
+        close_matrix = store.field('close')  # memmap, shape = (日期数, 股票数)
+    """
+
+    def __init__(self, name: str, root: str = None):
+        """
+        初始化面板数据存储
+
+        Args:
+            name (str): 数据集名称
+            root (str, optional): 根目录，默认为 PANEL_ROOT
+        """
+        self.name = name
+        self.path = os.path.join(root or PANEL_ROOT, name)
+        self._meta = self._load_meta()
+        self._symbol_index = None
+
+    # ------------------------------------------------------------------ 元数据
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, 'meta.json')
+
+    def _field_path(self, field: str) -> str:
+        return os.path.join(self.path, f'{field}.bin')
+
+    def _load_meta(self) -> dict:
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'dates': [], 'symbols': [], 'fields': [], 'version': 0, 'updated': None, 'extra': {}}
+
+    def _save_meta(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        self._meta['version'] += 1
+        self._meta['updated'] = time.time()
+        tmp = self._meta_path() + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._meta_path())
+        self._symbol_index = None
+
+    def reload(self) -> 'PanelStore':
+        """重新加载元数据（其他进程写入后调用）"""
+        self._meta = self._load_meta()
+        self._symbol_index = None
+        return self
+
+    @property
+    def dates(self) -> np.ndarray:
+        """日期轴，YYYYMMDD 格式的整数数组"""
+        return np.asarray(self._meta['dates'], dtype=np.int64)
+
+    @property
+    def symbols(self) -> List[str]:
+        """股票轴"""
+        return self._meta['symbols']
+
+    @property
+    def fields(self) -> List[str]:
+        """字段列表"""
+        return self._meta['fields']
+
+    @property
+    def version(self) -> int:
+        """版本号，每次写入加1，用于判断派生数据是否过期"""
+        return self._meta['version']
+
+    @property
+    def shape(self):
+        """(日期数, 股票数)"""
+        return len(self._meta['dates']), len(self._meta['symbols'])
+
+    @property
+    def extra(self) -> dict:
+        """附加信息，调用方可以保存自己的状态，修改后需调用 save_extra"""
+        return self._meta.setdefault('extra', {})
+
+    def save_extra(self) -> None:
+        """保存附加信息"""
+        self._save_meta()
+
+    def symbol_index(self) -> Dict[str, int]:
+        """股票代码 -> 列位置"""
+        if self._symbol_index is None:
+            self._symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        return self._symbol_index
+
+    def date_slice(self, start_date=None, end_date=None) -> slice:
+        """
+        获取日期范围对应的行切片
+
+        Args:
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+
+        Returns:
+            slice: 行切片
+        """
+        dates = self.dates
+        start = 0 if start_date is None else int(np.searchsorted(dates, to_date_int(start_date), side='left'))
+        end = len(dates) if end_date is None else int(np.searchsorted(dates, to_date_int(end_date), side='right'))
+        return slice(start, end)
+
+    # ------------------------------------------------------------------ 读取
+
+    def field(self, field: str, mmap: bool = True) -> np.ndarray:
+        """
+        获取字段矩阵
+
+        Args:
+            field (str): 字段名
+            mmap (bool): 是否以只读 memmap 方式映射，False 时读入内存
+
+        Returns:
+            np.ndarray: shape = (日期数, 股票数)，字段不存在时返回全 NaN 矩阵
+        """
+        shape = self.shape
+        path = self._field_path(field)
+        if field not in self.fields or shape[0] * shape[1] == 0 or not os.path.exists(path):
+            return np.full(shape, np.nan, dtype=DTYPE)
+        if mmap:
+            return np.memmap(path, dtype=DTYPE, mode='r', shape=shape)
+        return np.fromfile(path, dtype=DTYPE, count=shape[0] * shape[1]).reshape(shape)
+
+    def read(self, field: str, start_date=None, end_date=None,
+             symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        读取字段数据
+
+        Args:
+            field (str): 字段名
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            symbols (Sequence[str], optional): 股票列表，为空时返回全部股票；不存在的股票为 NaN 列
+
+        Returns:
+            pd.DataFrame: 以日期（整数）为索引、股票代码为列
+        """
+        rows = self.date_slice(start_date, end_date)
+        matrix = self.field(field)[rows]
+        dates = self.dates[rows]
+        if symbols is None:
+            return pd.DataFrame(np.array(matrix), index=dates, columns=list(self.symbols))
+        index = self.symbol_index()
+        cols = np.array([index.get(s, -1) for s in symbols], dtype=np.int64)
+        values = np.full((len(dates), len(cols)), np.nan, dtype=DTYPE)
+        found = cols >= 0
+        values[:, found] = matrix[:, cols[found]]
+        return pd.DataFrame(values, index=dates, columns=list(symbols))
+
+    def read_symbol(self, symbol: str, fields: Optional[Sequence[str]] = None,
+                    start_date=None, end_date=None, dropna: bool = True) -> pd.DataFrame:
+        """
+        读取单只股票的多个字段
+
+        Args:
+            symbol (str): 股票代码
+            fields (Sequence[str], optional): 字段列表，默认全部字段
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            dropna (bool): 是否去掉全部字段都缺失的日期
+
+        Returns:
+            pd.DataFrame: 以日期（整数）为索引、字段为列
+        """
+        fields = list(fields or self.fields)
+        rows = self.date_slice(start_date, end_date)
+        col = self.symbol_index().get(symbol)
+        if col is None:
+            return pd.DataFrame(columns=fields)
+        df = pd.DataFrame({f: np.array(self.field(f)[rows, col]) for f in fields}, index=self.dates[rows])
+        return df.dropna(how='all') if dropna else df
+
+    # ------------------------------------------------------------------ 写入
+
+    def reset(self) -> None:
+        """删除全部字段文件和日期、股票轴，版本号继续递增（派生数据重新计算前调用）"""
+        for f in self.fields:
+            if os.path.exists(self._field_path(f)):
+                os.remove(self._field_path(f))
+        self._meta.update(dates=[], symbols=[], fields=[])
+        self._save_meta()
+
+    def _rebuild(self, new_dates: np.ndarray, new_symbols: List[str]) -> None:
+        """按新的日期轴、股票轴重写所有字段文件"""
+        old_dates = self.dates
+        old_ns = len(self.symbols)
+        rows = np.searchsorted(new_dates, old_dates)
+        for f in self.fields:
+            old = self.field(f, mmap=False)
+            new = np.full((len(new_dates), len(new_symbols)), np.nan, dtype=DTYPE)
+            if old.size:
+                new[rows, :old_ns] = old
+            tmp = self._field_path(f) + '.tmp'
+            new.tofile(tmp)
+            os.replace(tmp, self._field_path(f))
+        self._meta['dates'] = [int(d) for d in new_dates]
+        self._meta['symbols'] = list(new_symbols)
+        logger.debug(f"面板数据重建: 数据集={self.name}, 形状=({len(new_dates)}, {len(new_symbols)})")
+
+    def _append_dates(self, new_dates: np.ndarray) -> None:
+        """在日期轴末尾追加日期，只需追加写文件"""
+        extra = len(new_dates) - len(self._meta['dates'])
+        block = np.full((extra, len(self.symbols)), np.nan, dtype=DTYPE)
+        for f in self.fields:
+            with open(self._field_path(f), 'ab') as fp:
+                block.tofile(fp)
+        self._meta['dates'] = [int(d) for d in new_dates]
+
+    def write_frames(self, frames: Dict[str, pd.DataFrame]) -> None:
+        """
+        写入宽表数据，已有数据中对应位置被覆盖，传入值为 NaN 的位置保持原值
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): 字段名 -> 以日期为索引、股票代码为列的 DataFrame
+        """
+        frames = {f: df for f, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return
+        os.makedirs(self.path, exist_ok=True)
+
+        incoming_dates = np.unique(np.concatenate([to_date_ints(df.index) for df in frames.values()]))
+        old_dates = self.dates
+        new_dates = np.union1d(old_dates, incoming_dates)
+        known = self.symbol_index()
+        added = sorted({s for df in frames.values() for s in df.columns if s not in known})
+        new_symbols = list(self.symbols) + added
+
+        inserted = np.setdiff1d(incoming_dates, old_dates)
+        if added or (len(old_dates) and len(inserted) and inserted.min() < old_dates[-1]):
+            self._rebuild(new_dates, new_symbols)
+        elif len(inserted):
+            self._append_dates(new_dates)
+
+        # 新字段创建全 NaN 文件
+        shape = (len(new_dates), len(new_symbols))
+        for f in frames:
+            if f not in self.fields:
+                np.full(shape, np.nan, dtype=DTYPE).tofile(self._field_path(f))
+                self._meta['fields'].append(f)
+        self._symbol_index = None
+
+        index = self.symbol_index()
+        for f, df in frames.items():
+            rows = np.searchsorted(new_dates, to_date_ints(df.index))
+            cols = np.array([index[s] for s in df.columns], dtype=np.int64)
+            values = df.to_numpy(dtype=DTYPE)
+            matrix = np.memmap(self._field_path(f), dtype=DTYPE, mode='r+', shape=shape)
+            block = matrix[np.ix_(rows, cols)]
+            mask = ~np.isnan(values)
+            block[mask] = values[mask]
+            matrix[np.ix_(rows, cols)] = block
+            matrix.flush()
+            del matrix
+        self._save_meta()
+
+    def upsert(self, df: pd.DataFrame, date_col: str = 'trade_date', symbol_col: str = 'ts_code',
+               fields: Optional[Sequence[str]] = None) -> int:
+        """
+        写入长表数据（每行一只股票一天）
+
+        Args:
+            df (pd.DataFrame): 长表数据
+            date_col (str): 日期列
+            symbol_col (str): 股票代码列
+            fields (Sequence[str], optional): 需要保存的字段，默认为除日期、代码外的全部数值列
+
+        Returns:
+            int: 写入的行数
+        """
+        if df is None or df.empty:
+            return 0
+        if fields is None:
+            fields = [c for c in df.columns
+                      if c not in (date_col, symbol_col) and pd.api.types.is_numeric_dtype(df[c])]
+        df = df.drop_duplicates(subset=[date_col, symbol_col], keep='last')
+        dates = to_date_ints(df[date_col])
+        frames = {}
+        for f in fields:
+            frames[f] = pd.DataFrame({'date': dates, 'symbol': df[symbol_col].to_numpy(),
+                                      'value': pd.to_numeric(df[f], errors='coerce').to_numpy(dtype=DTYPE)}) \
+                .pivot(index='date', columns='symbol', values='value')
+        self.write_frames(frames)
+        return len(df)
+
+    def clear_cells(self, fields: Sequence[str], dates: Union[Sequence, np.ndarray], symbols: Sequence[str]) -> int:
+        """
+        将 (日期 × 股票) 网格上的单元格置为 NaN（write_frames 不会用 NaN 覆盖已有数据）
+
+        Args:
+            fields (Sequence[str]): 字段列表，不存在的字段忽略
+            dates: 日期列表，不在日期轴上的日期忽略
+            symbols (Sequence[str]): 股票列表，不存在的股票忽略
+
+        Returns:
+            int: 每个字段清除的单元格数
+        """
+        all_dates = self.dates
+        date_ints = to_date_ints(dates)
+        rows = np.searchsorted(all_dates, date_ints)
+        rows = rows[(rows < len(all_dates)) & (all_dates[np.minimum(rows, len(all_dates) - 1)] == date_ints)] \
+            if len(all_dates) else rows[:0]
+        index = self.symbol_index()
+        cols = np.array([index[s] for s in symbols if s in index], dtype=np.int64)
+        if len(rows) == 0 or len(cols) == 0:
+            return 0
+        for f in fields:
+            if f not in self.fields:
+                continue
+            matrix = np.memmap(self._field_path(f), dtype=DTYPE, mode='r+', shape=self.shape)
+            matrix[np.ix_(rows, cols)] = np.nan
+            matrix.flush()
+            del matrix
+        self._save_meta()
+        return len(rows) * len(cols)
+
+    def set_cells(self, field: str, dates: Union[Sequence, np.ndarray], symbols: Sequence[str],
+                  value: float = 1.0) -> None:
+        """
+        将 (日期 × 股票) 网格上的所有单元格设置为同一个值
+
+        Args:
+            field (str): 字段名
+            dates: 日期列表
+            symbols (Sequence[str]): 股票列表
+            value (float): 写入的值
+        """
+        if len(dates) == 0 or len(symbols) == 0:
+            return
+        self.write_frames({field: pd.DataFrame(value, index=to_date_ints(dates), columns=list(symbols))})
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+数据质量扫描
+
+在 (交易日 × 股票) 矩阵上向量化检查面板数据，按股票分块读取 memmap，全市场扫描只需几秒：
+    missing       上市期间的交易日没有数据，也没有标记为已获取（停牌）
+    stale         成交量为 0 且收盘价等于前一天收盘价，停牌日被旧收盘价填充
+    zero_volume   成交量为 0 但价格有变化
+    outlier       相对 pre_close 的涨跌幅超过涨跌幅限制（上市初期不检查）
+    bad_ohlc      价格非正，或 high/low 与 open/close 矛盾
+    off_calendar  非交易日有数据
+以及 local_cache 日期缓存表中无法解析（corrupt）或有重复行（duplicate）的记录。
+
+连续的问题单元格合并为一条区间记录，repair_plan 生成紧凑的修复计划：
+需要重新获取的部分与 plan_daily_ingest 的格式相同（按交易日或按股票，取调用次数少的方式），
+需要清除的单元格和缓存记录单独列出。
+
+example:
+    scanner = QualityScanner(PanelStore('daily'), trade_dates=get_trade_days_str('20200101'),
+                             master=get_security_master())
+    report = scanner.scan()
+    print(report.summary())
+    save_repair_plan(report.repair_plan(), './cache/daily_repair.json')
+"""
+import json
+import math
+import os
+import sqlite3
+from io import StringIO
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.adjust import ffill_rows
+from data.store.panel_store import PanelStore, to_date_ints
+from utils.code_symbol import price_limits
+from utils.log_util import logger
+
+MISSING = 'missing'
+STALE = 'stale'
+ZERO_VOLUME = 'zero_volume'
+OUTLIER = 'outlier'
+BAD_OHLC = 'bad_ohlc'
+OFF_CALENDAR = 'off_calendar'
+CORRUPT = 'corrupt'
+DUPLICATE = 'duplicate'
+
+# 需要重新获取的问题类型
+REFETCH_KINDS = (MISSING, ZERO_VOLUME, OUTLIER, BAD_OHLC)
+# 需要清除的问题类型（重新获取不会返回数据）
+CLEAR_KINDS = (STALE, OFF_CALENDAR)
+ISSUE_COLUMNS = ['kind', 'ts_code', 'start_date', 'end_date', 'count']
+# 单次按股票取数的最多行数，与 ts_daily_ingest.MAX_ROWS_PER_CALL 一致
+MAX_ROWS_PER_CALL = 6000
+
+
+def mask_runs(mask: np.ndarray, dates: np.ndarray, symbols: Sequence[str], kind: str) -> pd.DataFrame:
+    """
+    将 (日期 × 股票) 布尔矩阵中每列连续的 True 合并为区间记录
+
+    Args:
+        mask (np.ndarray): 布尔矩阵
+        dates (np.ndarray): 日期轴
+        symbols (Sequence[str]): 股票轴
+        kind (str): 问题类型
+
+    Returns:
+        pd.DataFrame: kind, ts_code, start_date, end_date, count
+    """
+    n_dates, n_symbols = mask.shape
+    padded = np.zeros((n_symbols, n_dates + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask.T
+    edges = np.diff(padded, axis=1)
+    start_cols, start_pos = np.nonzero(edges == 1)
+    _, end_pos = np.nonzero(edges == -1)
+    return pd.DataFrame({
+        'kind': kind,
+        'ts_code': np.asarray(symbols, dtype=object)[start_cols],
+        'start_date': np.asarray(dates, dtype=np.int64)[start_pos],
+        'end_date': np.asarray(dates, dtype=np.int64)[end_pos - 1],
+        'count': (end_pos - start_pos).astype(np.int64),
+    }, columns=ISSUE_COLUMNS)
+
+
+def _empty_issues() -> pd.DataFrame:
+    return mask_runs(np.zeros((0, 0), dtype=bool), np.array([], dtype=np.int64), [], '')
+
+
+class QualityReport:
+    """
+    数据质量扫描结果
+    """
+
+    def __init__(self, issues: pd.DataFrame, calendar: np.ndarray, cache_issues: Optional[pd.DataFrame] = None):
+        """
+        初始化扫描结果
+
+        Args:
+            issues (pd.DataFrame): 面板数据的问题区间记录
+            calendar (np.ndarray): 扫描使用的交易日
+            cache_issues (pd.DataFrame, optional): 缓存表的问题记录，见 scan_cache_table
+        """
+        self.issues = issues.sort_values(['ts_code', 'start_date', 'kind'], kind='stable').reset_index(drop=True)
+        self.calendar = np.asarray(calendar, dtype=np.int64)
+        self.cache_issues = cache_issues if cache_issues is not None else pd.DataFrame(
+            columns=['table', 'symbol', 'date_key', 'kind'])
+
+    def __len__(self) -> int:
+        return len(self.issues) + len(self.cache_issues)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        按问题类型汇总
+
+        Returns:
+            pd.DataFrame: 以问题类型为索引，symbols(股票数)、runs(区间数)、cells(单元格数)
+        """
+        panel = self.issues.groupby('kind').agg(symbols=('ts_code', 'nunique'), runs=('ts_code', 'size'),
+                                                cells=('count', 'sum'))
+        if not self.cache_issues.empty:
+            cache = self.cache_issues.groupby('kind').agg(symbols=('symbol', 'nunique'), runs=('symbol', 'size'))
+            cache['cells'] = cache['runs']
+            panel = pd.concat([panel, cache])
+        return panel
+
+    def repair_plan(self) -> Dict:
+        """
+        生成修复计划
+
+        重新获取的单元格在按交易日取数（每个涉及的交易日一次调用）和按股票取数
+        （每只股票从最早到最晚的问题日期一次调用）之间选择调用次数少的方式。
+
+        Returns:
+            Dict: mode、calls、dates、ranges（格式同 plan_daily_ingest），
+                clear({股票: [[开始日期, 结束日期], ...]})，cache([[表名, 股票, 日期], ...])
+        """
+        plan = {'mode': 'none', 'calls': 0, 'dates': [], 'ranges': {}, 'clear': {}, 'cache': []}
+        refetch = self.issues[self.issues['kind'].isin(REFETCH_KINDS)]
+        if not refetch.empty:
+            # 区间展开到交易日上，统计涉及的交易日
+            start = np.searchsorted(self.calendar, refetch['start_date'].to_numpy())
+            end = np.searchsorted(self.calendar, refetch['end_date'].to_numpy(), side='right')
+            touched = np.zeros(len(self.calendar) + 1, dtype=np.int64)
+            np.add.at(touched, start, 1)
+            np.add.at(touched, end, -1)
+            dates = self.calendar[np.cumsum(touched)[:-1] > 0]
+
+            spans = refetch.groupby('ts_code').agg(start=('start_date', 'min'), end=('end_date', 'max'))
+            span_rows = (np.searchsorted(self.calendar, spans['end'].to_numpy(), side='right')
+                         - np.searchsorted(self.calendar, spans['start'].to_numpy()))
+            symbol_calls = int(sum(math.ceil(max(n, 1) / MAX_ROWS_PER_CALL) for n in span_rows))
+            if len(dates) <= symbol_calls:
+                plan.update(mode='date', calls=len(dates), dates=[str(d) for d in dates])
+            else:
+                plan.update(mode='symbol', calls=symbol_calls,
+                            ranges={s: (str(r.start), str(r.end)) for s, r in spans.iterrows()})
+
+        clear = self.issues[self.issues['kind'].isin(CLEAR_KINDS)]
+        for symbol, group in clear.groupby('ts_code'):
+            plan['clear'][symbol] = [[int(a), int(b)] for a, b in zip(group['start_date'], group['end_date'])]
+        plan['cache'] = self.cache_issues[['table', 'symbol', 'date_key']].values.tolist()
+        return plan
+
+
+class QualityScanner:
+    """
+    面板数据质量扫描
+
+    example:
+        report = QualityScanner(store, trade_dates).scan(start_date='20240101')
+        report.issues[report.issues['kind'] == 'missing']
+    """
+
+    def __init__(self, store: PanelStore, trade_dates: Optional[Sequence] = None, master=None,
+                 chunk_size: int = 1000, outlier_tolerance: float = 0.01, new_listing_days: int = 5,
+                 fetched_field: str = 'fetched'):
+        """
+        初始化数据质量扫描
+
+        Args:
+            store (PanelStore): 日线面板数据
+            trade_dates (Sequence, optional): 交易日历，默认使用面板数据的日期轴（只能发现部分股票缺失的日期）
+            master (SecurityMaster, optional): 证券主数据，提供上市/退市日期和涨跌幅限制；
+                为空时以每只股票第一个和最后一个有数据的日期作为上市区间，涨跌幅限制按代码前缀推断
+            chunk_size (int): 每次读取的股票数
+            outlier_tolerance (float): 涨跌幅超过限制多少才视为异常，用于容忍价格取整
+            new_listing_days (int): 上市后前多少个有数据的交易日不检查涨跌幅（新股不设涨跌幅限制）
+            fetched_field (str): 已获取标记字段，为 1 时表示当天停牌而不是缺失
+        """
+        self.store = store
+        self.trade_dates = None if trade_dates is None else np.unique(to_date_ints(trade_dates))
+        self.master = master
+        self.chunk_size = chunk_size
+        self.outlier_tolerance = outlier_tolerance
+        self.new_listing_days = new_listing_days
+        self.fetched_field = fetched_field
+
+    def _calendar(self, start_date=None, end_date=None) -> np.ndarray:
+        calendar = self.trade_dates if self.trade_dates is not None else self.store.dates
+        lo = -np.inf if start_date is None else to_date_ints([start_date])[0]
+        hi = np.inf if end_date is None else to_date_ints([end_date])[0]
+        return calendar[(calendar >= lo) & (calendar <= hi)]
+
+    def _limits(self, symbols: List[str]) -> np.ndarray:
+        if self.master is not None:
+            return self.master.price_limits(symbols)
+        return price_limits(pd.Series(symbols, dtype=object).str[:6])
+
+    def _expected(self, calendar: np.ndarray, symbols: List[str], have: np.ndarray) -> np.ndarray:
+        """上市期间的交易日"""
+        if self.master is not None:
+            return self.master.listed_mask(calendar, symbols).to_numpy()
+        rows = np.arange(len(calendar))[:, None]
+        any_data = have.any(axis=0)
+        first = np.where(any_data, np.argmax(have, axis=0), len(calendar))
+        last = np.where(any_data, len(calendar) - 1 - np.argmax(have[::-1], axis=0), -1)
+        return (rows >= first[None, :]) & (rows <= last[None, :])
+
+    def scan(self, start_date=None, end_date=None, symbols: Optional[Sequence[str]] = None,
+             cache_tables: Sequence[str] = ()) -> QualityReport:
+        """
+        扫描面板数据
+
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            symbols (Sequence[str], optional): 股票列表，默认为面板数据和证券主数据中的全部股票
+            cache_tables (Sequence[str]): 同时检查的 local_cache 日期缓存表
+
+        Returns:
+            QualityReport: 扫描结果
+        """
+        store = self.store
+        calendar = self._calendar(start_date, end_date)
+        store_dates = store.dates
+        rows = store.date_slice(start_date, end_date)
+        window_dates = store_dates[rows]
+
+        # 交易日在面板日期轴上的位置，不在面板中的交易日整行为 NaN
+        pos = np.searchsorted(window_dates, calendar)
+        pos_clip = np.minimum(pos, max(len(window_dates) - 1, 0))
+        on_store = (pos < len(window_dates)) & (window_dates[pos_clip] == calendar) if len(window_dates) \
+            else np.zeros(len(calendar), dtype=bool)
+        off_rows = np.nonzero(~np.isin(window_dates, calendar))[0]
+
+        if symbols is None:
+            # 有证券主数据时，从未入库的股票也要检查
+            symbols = list(store.symbols)
+            if self.master is not None:
+                known = store.symbol_index()
+                symbols += [s for s in self.master.symbols if s not in known]
+        symbols = list(symbols)
+        index = store.symbol_index()
+        matrices = {f: store.field(f) for f in ('open', 'high', 'low', 'close', 'pre_close', 'vol',
+                                                 self.fetched_field)}
+
+        issues = []
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            cols = np.array([index.get(s, -1) for s in chunk], dtype=np.int64)
+            found = cols >= 0
+
+            def block(field: str) -> np.ndarray:
+                values = np.full((len(calendar), len(chunk)), np.nan)
+                if found.any() and on_store.any():
+                    lo, hi = cols[found].min(), cols[found].max() + 1
+                    part = np.asarray(matrices[field][rows, lo:hi])
+                    values[np.ix_(on_store, found)] = part[np.ix_(pos[on_store], cols[found] - lo)]
+                return values
+
+            issues.extend(self._scan_block(calendar, chunk, block))
+            if len(off_rows) and found.any():
+                lo, hi = cols[found].min(), cols[found].max() + 1
+                close = np.asarray(matrices['close'][rows, lo:hi])[off_rows][:, cols[found] - lo]
+                issues.append(mask_runs(~np.isnan(close), window_dates[off_rows],
+                                        np.asarray(chunk, dtype=object)[found], OFF_CALENDAR))
+
+        issues = pd.concat(issues, ignore_index=True) if issues else _empty_issues()
+        cache_issues = pd.concat([scan_cache_table(t) for t in cache_tables], ignore_index=True) \
+            if cache_tables else None
+        report = QualityReport(issues, calendar, cache_issues)
+        logger.info(f"数据质量扫描完成: 数据集={store.name}, 交易日={len(calendar)}, 股票数={len(symbols)}, "
+                    f"问题区间={len(issues)}")
+        return report
+
+    def _scan_block(self, calendar: np.ndarray, symbols: List[str], block) -> List[pd.DataFrame]:
+        """扫描一组股票，block(field) 返回对齐到交易日的矩阵"""
+        close = block('close')
+        have = ~np.isnan(close)
+        fetched = block(self.fetched_field) == 1
+        expected = self._expected(calendar, symbols, have)
+        missing = expected & ~have & ~fetched
+
+        vol = block('vol')
+        prev_close = np.vstack([np.full((1, len(symbols)), np.nan), ffill_rows(close)[:-1]])
+        zero = have & (vol <= 0)
+        stale = zero & (close == prev_close)
+        zero_volume = zero & ~stale
+
+        pre_close = block('pre_close')
+        reference = np.where(np.isnan(pre_close), prev_close, pre_close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.abs(close / reference - 1)
+        seasoned = np.cumsum(have, axis=0) > self.new_listing_days
+        limits = self._limits(symbols)[None, :]
+        outlier = have & seasoned & (change > limits + self.outlier_tolerance)
+
+        open_, high, low = block('open'), block('high'), block('low')
+        eps = 1e-6
+        with np.errstate(invalid='ignore'):
+            bad = (close <= 0) | (open_ <= 0) | (high <= 0) | (low <= 0)
+            bad |= high < np.fmax(np.fmax(open_, close), low) - eps
+            bad |= low > np.fmin(open_, close) + eps
+        bad &= have
+
+        return [mask_runs(mask, calendar, symbols, kind) for mask, kind in
+                ((missing, MISSING), (stale, STALE), (zero_volume, ZERO_VOLUME), (outlier, OUTLIER),
+                 (bad, BAD_OHLC)) if mask.any()]
+
+
+def _cache_db_path(table_name: str, db_path: Optional[str] = None) -> str:
+    from utils.local_cache import DB_PATH
+    return db_path or os.path.join(DB_PATH, f'{table_name}.db')
+
+
+def scan_cache_table(table_name: str, db_path: Optional[str] = None, date_column: str = 'trade_date') -> pd.DataFrame:
+    """
+    检查 local_cache 日期缓存表（date_range_cache_with_symbol / save_date_range_frame）中的记录
+
+    date_range_cache_with_symbol 读取到无法解析的 CSV 时只记录日志并重新获取，这里集中找出这些记录。
+
+    Args:
+        table_name (str): 缓存表名（即被装饰的函数名）
+        db_path (str, optional): 数据库文件路径，默认为 ./cache/{table_name}.db
+        date_column (str): 检查重复时使用的日期列
+
+    Returns:
+        pd.DataFrame: table, symbol, date_key, kind（corrupt / duplicate）
+    """
+    path = _cache_db_path(table_name, db_path)
+    rows = []
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            cursor = conn.execute(f"SELECT date_key, symbol, data_csv FROM {table_name}")
+            for date_key, symbol, data_csv in cursor:
+                try:
+                    df = pd.read_csv(StringIO(data_csv))
+                except Exception:
+                    rows.append((table_name, symbol, date_key, CORRUPT))
+                    continue
+                keys = [c for c in (date_column, 'ts_code') if c in df.columns]
+                if keys and df.duplicated(subset=keys).any():
+                    rows.append((table_name, symbol, date_key, DUPLICATE))
+        finally:
+            conn.close()
+    return pd.DataFrame(rows, columns=['table', 'symbol', 'date_key', 'kind'])
+
+
+def purge_cache_rows(rows: Sequence[Sequence[str]], db_path: Optional[str] = None) -> int:
+    """
+    删除有问题的缓存记录，下次调用被装饰的函数时会重新获取
+
+    Args:
+        rows (Sequence): [[表名, 股票, 日期], ...]，即修复计划中的 cache
+        db_path (str, optional): 数据库文件路径，默认按表名推断
+
+    Returns:
+        int: 删除的记录数
+    """
+    deleted = 0
+    for table_name, group in pd.DataFrame(list(rows), columns=['table', 'symbol', 'date_key']).groupby('table'):
+        conn = sqlite3.connect(_cache_db_path(table_name, db_path))
+        try:
+            cursor = conn.executemany(f"DELETE FROM {table_name} WHERE symbol = ? AND date_key = ?",
+                                      group[['symbol', 'date_key']].values.tolist())
+            deleted += cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+    logger.info(f"已删除有问题的缓存记录: {deleted}条")
+    return deleted
+
+
+def save_repair_plan(plan: Dict, path: str) -> None:
+    """保存修复计划为 JSON 文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False)
+
+
+def load_repair_plan(path: str) -> Dict:
+    """读取修复计划"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    # 全市场规模的合成数据：2500 个交易日 × 5000 只股票
+    calendar = pd.bdate_range('20150101', periods=2500).strftime('%Y%m%d')
+    symbols = [f'{600000 + i:06d}.SH' for i in range(5000)]
+    rng = np.random.default_rng(0)
+    close = np.cumprod(1 + rng.normal(0, 0.01, (len(calendar), len(symbols))), axis=0) * 10
+    close[rng.random(close.shape) < 0.001] = np.nan
+    with tempfile.TemporaryDirectory() as root:
+        store = PanelStore('daily', root=root)
+        store.write_frames({f: pd.DataFrame(close, index=calendar, columns=symbols)
+                            for f in ('open', 'high', 'low', 'close')})
+        store.write_frames({'vol': pd.DataFrame(1.0, index=calendar, columns=symbols)})
+        begin = time.time()
+        report = QualityScanner(store, calendar).scan()
+        print(f'扫描耗时: {time.time() - begin:.2f}秒')
+        print(report.summary())
+        plan = report.repair_plan()
+        print(plan['mode'], plan['calls'])
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+K线周期转换
+
+日线面板数据按交易日历分组（周、月、季、年、每 N 个交易日），分笔成交按交易时段分组（N 分钟），
+分组聚合都用 reduceat 一次完成，不再依赖 backtrader 在每次回测时逐根 resample。
+结果保存为派生数据集并记录源数据的版本，源数据更新后自动重新计算：
+    日线 -> {源数据集}@{周期}              PanelStore，extra 中记录 source_version
+    分笔 -> {root}/{股票}/{日期}_{N}m.npz  记录分笔文件的大小和修改时间
+
+example:
+    resampler = Resampler(PanelStore('daily'))
+    weekly_close = resampler.read('W', 'close', start_date='20240101')
+    bars = resampler.read_bars('000001.SZ', 'M')
+    engine.add_data(feed_frame(bars), name='000001.SZ', timeframe='Months')
+
+    minute_bars = MinuteBarCache(TickStore()).read('sz300059', '20250321', minutes=30)
+"""
+import os
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.ak.hq.tick_store import to_minute_bars
+from data.store.panel_store import PanelStore, to_date_ints
+from utils.log_util import logger
+
+# 字段的聚合方式，未列出的字段取周期内最后一个有效值
+FIELD_AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'pre_close': 'first',
+    'vol': 'sum',
+    'amount': 'sum',
+}
+# 由聚合结果重新计算的字段
+DERIVED_FIELDS = ('change', 'pct_chg')
+
+
+def period_keys(dates: Sequence, rule: str) -> np.ndarray:
+    """
+    计算每个交易日所属的周期，相邻交易日周期相同即为同一根 K 线
+
+    Args:
+        dates (Sequence): 交易日（升序）
+        rule (str): W 周、M 月、Q 季、Y 年、ND 每 N 个交易日（从第一个交易日开始计数，如 5D）
+
+    Returns:
+        np.ndarray: int64 周期编号
+    """
+    ints = to_date_ints(dates)
+    rule = rule.upper()
+    if rule == 'W':
+        # 从 1970-01-05（周一）开始的周序号，跨年的周不会被拆开
+        days = pd.to_datetime(ints.astype(str), format='%Y%m%d').to_numpy().astype('datetime64[D]').astype(np.int64)
+        return (days - 4) // 7
+    if rule == 'M':
+        return ints // 100
+    if rule == 'Q':
+        return ints // 10000 * 10 + (ints // 100 % 100 - 1) // 3
+    if rule == 'Y':
+        return ints // 10000
+    match = re.fullmatch(r'(\d+)D', rule)
+    if match and int(match.group(1)) > 0:
+        return np.arange(len(ints), dtype=np.int64) // int(match.group(1))
+    raise ValueError(f'不支持的周期: {rule}')
+
+
+def group_starts(keys: np.ndarray) -> np.ndarray:
+    """相邻相同的 key 为一组，返回每组的起始位置"""
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def reduce_groups(matrix: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """
+    沿第 0 维按组聚合，NaN 不参与计算，整组缺失时为 NaN
+
+    Args:
+        matrix (np.ndarray): 一维或 (日期 × 股票) 二维数组
+        starts (np.ndarray): 每组的起始位置
+        how (str): first / last / max / min / sum
+
+    Returns:
+        np.ndarray: (组数, ...) 数组
+    """
+    values = np.asarray(matrix, dtype=np.float64)
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    if how in ('first', 'last'):
+        rows = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+        if how == 'first':
+            pos = np.minimum.reduceat(np.where(valid, rows, len(values)), starts, axis=0)
+        else:
+            pos = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        pos = np.clip(pos, 0, len(values) - 1)
+        result = np.take_along_axis(values, pos, axis=0) if values.ndim > 1 else values[pos]
+    elif how == 'max':
+        result = np.fmax.reduceat(values, starts, axis=0)
+    elif how == 'min':
+        result = np.fmin.reduceat(values, starts, axis=0)
+    elif how == 'sum':
+        result = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    else:
+        raise ValueError(f'不支持的聚合方式: {how}')
+    return np.where(count > 0, result, np.nan)
+
+
+def resample_matrices(matrices: Dict[str, np.ndarray], dates: Sequence, rule: str):
+    """
+    将 (交易日 × 股票) 矩阵转换为 (周期 × 股票) 矩阵
+
+    Args:
+        matrices (Dict[str, np.ndarray]): 字段名 -> 矩阵
+        dates (Sequence): 矩阵的日期轴
+        rule (str): 周期，见 period_keys
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: 每个周期最后一个交易日，以及聚合后的矩阵；
+            包含 close 和 pre_close 时重新计算 change、pct_chg
+    """
+    ints = to_date_ints(dates)
+    starts = group_starts(period_keys(ints, rule))
+    ends = np.r_[starts[1:], len(ints)] - 1
+    result = {f: reduce_groups(m, starts, FIELD_AGGREGATIONS.get(f, 'last'))
+              for f, m in matrices.items() if f not in DERIVED_FIELDS}
+    if 'close' in result and 'pre_close' in result:
+        result['change'] = result['close'] - result['pre_close']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['pct_chg'] = result['change'] / result['pre_close'] * 100
+    return ints[ends], result
+
+
+class Resampler:
+    """
+    日线面板数据的周期转换，结果保存为派生数据集
+    """
+
+    def __init__(self, source: PanelStore, root: Optional[str] = None, chunk_size: int = 1000):
+        """
+        初始化周期转换
+
+        Args:
+            source (PanelStore): 日线面板数据
+            root (str, optional): 派生数据集根目录，默认与源数据相同
+            chunk_size (int): 每次读取的股票数
+        """
+        self.source = source
+        self.root = root or os.path.dirname(source.path)
+        self.chunk_size = chunk_size
+
+    def dataset(self, rule: str) -> PanelStore:
+        """派生数据集（不检查是否过期）"""
+        return PanelStore(f'{self.source.name}@{rule.upper()}', root=self.root)
+
+    def is_stale(self, rule: str) -> bool:
+        """派生数据集是否需要重新计算"""
+        derived = self.dataset(rule)
+        return derived.extra.get('source_version') != self.source.reload().version or not derived.fields
+
+    def build(self, rule: str, fields: Optional[Sequence[str]] = None) -> PanelStore:
+        """
+        重新计算派生数据集
+
+        Args:
+            rule (str): 周期，见 period_keys
+            fields (Sequence[str], optional): 字段列表，默认为源数据的全部字段
+
+        Returns:
+            PanelStore: 派生数据集
+        """
+        source = self.source.reload()
+        fields = [f for f in (fields or source.fields) if f in source.fields]
+        derived = self.dataset(rule)
+        derived.reset()
+        symbols = list(source.symbols)
+        frames: Dict[str, List[np.ndarray]] = {}
+        labels = np.array([], dtype=np.int64)
+        for i in range(0, len(symbols), self.chunk_size):
+            matrices = {f: np.asarray(source.field(f)[:, i:i + self.chunk_size]) for f in fields}
+            labels, result = resample_matrices(matrices, source.dates, rule)
+            for f, m in result.items():
+                frames.setdefault(f, []).append(m)
+        if symbols and len(labels):
+            derived.write_frames({f: pd.DataFrame(np.hstack(parts), index=labels, columns=symbols)
+                                  for f, parts in frames.items()})
+        derived.extra.update(source=source.name, source_version=source.version, rule=rule.upper())
+        derived.save_extra()
+        logger.info(f"派生数据已重新计算: 数据集={derived.name}, 形状={derived.shape}, 源版本={source.version}")
+        return derived
+
+    def get(self, rule: str, fields: Optional[Sequence[str]] = None) -> PanelStore:
+        """
+        获取派生数据集，源数据有更新时重新计算
+
+        Args:
+            rule (str): 周期，见 period_keys
+            fields (Sequence[str], optional): 重新计算时使用的字段列表
+
+        Returns:
+            PanelStore: 派生数据集
+        """
+        if self.is_stale(rule):
+            return self.build(rule, fields)
+        return self.dataset(rule)
+
+    def read(self, rule: str, field: str, start_date=None, end_date=None,
+             symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        读取派生数据宽表
+
+        Returns:
+            pd.DataFrame: 以周期最后一个交易日为索引、股票为列
+        """
+        return self.get(rule).read(field, start_date, end_date, symbols)
+
+    def read_bars(self, symbol: str, rule: str, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        读取单只股票的派生 K 线
+
+        Returns:
+            pd.DataFrame: 以周期最后一个交易日为索引
+        """
+        return self.get(rule).read_symbol(symbol, start_date=start_date, end_date=end_date)
+
+
+def feed_frame(bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    转换为 backtrader PandasData 需要的格式，可直接传给 BacktestEngine.add_data
+
+    Args:
+        bars (pd.DataFrame): 以 YYYYMMDD 日期为索引，包含 open/high/low/close/vol
+
+    Returns:
+        pd.DataFrame: 以 DatetimeIndex 为索引，open/high/low/close/volume/openinterest
+    """
+    frame = pd.DataFrame({
+        'open': bars['open'], 'high': bars['high'], 'low': bars['low'], 'close': bars['close'],
+        'volume': bars['vol'] if 'vol' in bars.columns else bars.get('volume', 0.0),
+        'openinterest': 0.0,
+    })
+    frame.index = pd.to_datetime(pd.Index(bars.index).astype(str), format='%Y%m%d')
+    return frame
+
+
+# ---------------------------------------------------------------------- 分钟线
+
+
+def resample_ticks(ticks: pd.DataFrame, minutes: int = 1) -> pd.DataFrame:
+    """
+    分笔成交合成 N 分钟线，即 tick_store.to_minute_bars（集合竞价和收盘成交的归属规则见该函数）
+
+    Args:
+        ticks (pd.DataFrame): TickStore.read 返回的一个交易日的数据，按时间排序
+        minutes (int): 分钟数，应能整除 120 以免跨越午休
+
+    Returns:
+        pd.DataFrame: 以 bar 开始时间为索引，open/high/low/close/volume/amount/count
+    """
+    return to_minute_bars(ticks, minutes)
+
+
+class MinuteBarCache:
+    """
+    由分笔成交合成的分钟线缓存，分笔文件变化后重新计算
+    """
+
+    def __init__(self, tick_store, root: Optional[str] = None):
+        """
+        初始化分钟线缓存
+
+        Args:
+            tick_store (TickStore): 分笔成交存储
+            root (str, optional): 缓存目录，默认为分笔目录下的 minute
+        """
+        self.tick_store = tick_store
+        self.root = root or os.path.join(tick_store.root, 'minute')
+
+    def _path(self, symbol: str, trade_date, minutes: int) -> str:
+        return os.path.join(self.root, symbol, f'{to_date_ints([trade_date])[0]}_{minutes}m.npz')
+
+    def _signature(self, symbol: str, trade_date) -> np.ndarray:
+        stat = os.stat(self.tick_store._path(symbol, trade_date))
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def read(self, symbol: str, trade_date, minutes: int = 1) -> pd.DataFrame:
+        """
+        读取分钟线
+
+        Args:
+            symbol (str): 股票代码
+            trade_date: 交易日
+            minutes (int): 分钟数
+
+        Returns:
+            pd.DataFrame: 格式同 resample_ticks，当天没有分笔数据时为空
+        """
+        if not self.tick_store.exists(symbol, trade_date):
+            return resample_ticks(pd.DataFrame(), minutes)
+        path = self._path(symbol, trade_date, minutes)
+        signature = self._signature(symbol, trade_date)
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as cached:
+                if np.array_equal(cached['signature'], signature):
+                    return pd.DataFrame({c: cached[c] for c in cached.files if c not in ('signature', 'time')},
+                                        index=pd.Index(cached['time'], name='time'))
+        bars = resample_ticks(self.tick_store.read(symbol, trade_date), minutes)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, signature=signature, time=bars.index.to_numpy(dtype=str),
+                 **{c: bars[c].to_numpy() for c in bars.columns})
+        os.replace(tmp, path)
+        return bars
+
+    def read_range(self, symbol: str, minutes: int = 1, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        读取多个交易日的分钟线
+
+        Returns:
+            pd.DataFrame: 以 (trade_date, time) 为索引
+        """
+        dates = np.asarray(self.tick_store.dates(symbol), dtype=np.int64)
+        if start_date is not None:
+            dates = dates[dates >= to_date_ints([start_date])[0]]
+        if end_date is not None:
+            dates = dates[dates <= to_date_ints([end_date])[0]]
+        frames = {int(d): self.read(symbol, int(d), minutes) for d in dates}
+        frames = {d: f for d, f in frames.items() if not f.empty}
+        if not frames:
+            return resample_ticks(pd.DataFrame(), minutes)
+        return pd.concat(frames, names=['trade_date', 'time'])
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    calendar = pd.bdate_range('20150101', periods=2500).strftime('%Y%m%d')
+    symbols = [f'{600000 + i:06d}.SH' for i in range(5000)]
+    close = np.cumprod(1 + np.random.default_rng(0).normal(0, 0.01, (len(calendar), len(symbols))), axis=0) * 10
+    with tempfile.TemporaryDirectory() as root:
+        store = PanelStore('daily', root=root)
+        store.write_frames({f: pd.DataFrame(close, index=calendar, columns=symbols)
+                            for f in ('open', 'high', 'low', 'close', 'vol')})
+        resampler = Resampler(store)
+        for rule in ('W', 'M', '5D'):
+            begin = time.time()
+            derived = resampler.get(rule)
+            print(f'{rule}: 形状={derived.shape}, 耗时={time.time() - begin:.2f}秒')
+        begin = time.time()
+        resampler.get('W')
+        print(f'未过期直接读取: 耗时={time.time() - begin:.4f}秒')
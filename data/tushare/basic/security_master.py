@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+证券主数据（参考数据）
+
+一次性加载上市、退市股票（stock_basic）和沪深港通标的（hs_const），把股票代码映射为连续的整数编号，
+交易所、板块、涨跌幅限制、行业、上市日期等属性按编号存放在 numpy 数组中：
+单个查询是一次字典查找加一次数组下标，批量查询通过 pd.Index.get_indexer 一次完成，
+不在数据中的代码按 utils.code_symbol 的前缀规则推断。
+
+example:
+    master = get_security_master()
+    master.board('688001.SH')                    # '科创板'
+    master.price_limits(close.columns)           # 每只股票的涨跌幅限制
+    ids = master.ids(close.columns)              # 稠密整数编号，可直接作为数组下标
+"""
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.code_symbol import (BOARD_PRICE_LIMITS, DEFAULT_PRICE_LIMIT, ST_PRICE_LIMIT, boards_of, code_symbols,
+                               price_limits)
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_request import rate_limit
+
+SECURITY_MASTER_PATH = './cache/security_master.csv'
+STOCK_BASIC_FIELDS = 'ts_code,symbol,name,area,industry,market,exchange,list_date,delist_date,list_status'
+MASTER_COLUMNS = ['ts_code', 'name', 'industry', 'market', 'list_date', 'delist_date', 'list_status', 'hs_type']
+# 未知代码的编号
+MISSING_ID = -1
+
+
+@rate_limit(200, key='tushare.stock_basic')
+def get_stock_basic(list_status: str) -> pd.DataFrame:
+    """
+    获取股票列表
+
+    Args:
+        list_status (str): L 上市，D 退市，P 暂停上市
+
+    Returns:
+        pd.DataFrame: stock_basic 数据
+    """
+    return DataSource.tushare_pro.stock_basic(exchange='', list_status=list_status, fields=STOCK_BASIC_FIELDS)
+
+
+@rate_limit(200, key='tushare.hs_const')
+def get_hs_const(hs_type: str) -> pd.DataFrame:
+    """
+    获取沪深港通标的
+
+    Args:
+        hs_type (str): SH 沪股通，SZ 深股通
+
+    Returns:
+        pd.DataFrame: hs_const 数据
+    """
+    return DataSource.tushare_pro.hs_const(hs_type=hs_type)
+
+
+def _is_st(names: np.ndarray) -> np.ndarray:
+    return pd.Series(names, dtype=object).fillna('').str.upper().str.contains('ST').to_numpy(dtype=bool)
+
+
+class SecurityMaster:
+    """
+    证券主数据，代码到稠密整数编号的映射和按编号存放的属性数组
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        """
+        初始化证券主数据
+
+        Args:
+            frame (pd.DataFrame): 每只股票一行，至少包含 ts_code，可选 MASTER_COLUMNS 中的其他列
+        """
+        frame = frame.drop_duplicates('ts_code', keep='first').reset_index(drop=True)
+        frame = frame.reindex(columns=MASTER_COLUMNS)
+        self.frame = frame
+        self.symbols = frame['ts_code'].to_numpy(dtype=object)
+        self._index = pd.Index(self.symbols)
+        self._ids: Dict[str, int] = {s: i for i, s in enumerate(self.symbols)}
+
+        # 按编号存放的属性数组
+        self.names = frame['name'].to_numpy(dtype=object)
+        self.industries = frame['industry'].to_numpy(dtype=object)
+        self.exchanges = np.array([s[-2:] for s in self.symbols], dtype=object)
+        market = frame['market'].to_numpy(dtype=object)
+        prefix_boards = boards_of(pd.Series(self.symbols, dtype=object).str[:6])
+        self.boards = np.where(pd.isna(market), prefix_boards, market)
+        self.is_st = _is_st(self.names)
+        self.limits = self._board_limits(self.boards, self.is_st)
+        self.list_dates = pd.to_numeric(frame['list_date'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        self.delist_dates = pd.to_numeric(frame['delist_date'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        self.is_hs = frame['hs_type'].notna().to_numpy(dtype=bool)
+
+    @staticmethod
+    def _board_limits(boards: np.ndarray, is_st: np.ndarray) -> np.ndarray:
+        limits = pd.Series(boards, dtype=object).map(BOARD_PRICE_LIMITS).fillna(DEFAULT_PRICE_LIMIT)
+        limits = limits.to_numpy(dtype=np.float64)
+        return np.where(is_st & (boards == '主板'), ST_PRICE_LIMIT, limits)
+
+    @classmethod
+    def from_frames(cls, listed: pd.DataFrame, delisted: Optional[pd.DataFrame] = None,
+                    hs_sh: Optional[pd.DataFrame] = None, hs_sz: Optional[pd.DataFrame] = None) -> 'SecurityMaster':
+        """
+        由 stock_basic 和 hs_const 数据构建
+
+        Args:
+            listed (pd.DataFrame): 上市股票 stock_basic(list_status='L')
+            delisted (pd.DataFrame, optional): 退市股票 stock_basic(list_status='D')
+            hs_sh (pd.DataFrame, optional): 沪股通标的 hs_const(hs_type='SH')
+            hs_sz (pd.DataFrame, optional): 深股通标的 hs_const(hs_type='SZ')
+
+        Returns:
+            SecurityMaster: 证券主数据
+        """
+        parts = []
+        for df, status in ((listed, 'L'), (delisted, 'D')):
+            if df is not None and not df.empty:
+                df = df.copy()
+                if 'list_status' not in df.columns:
+                    df['list_status'] = status
+                parts.append(df)
+        frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['ts_code'])
+        frame = frame.sort_values('ts_code', kind='stable')
+
+        hs = [df[['ts_code', 'hs_type']] for df in (hs_sh, hs_sz) if df is not None and not df.empty]
+        if hs:
+            hs_map = pd.concat(hs).drop_duplicates('ts_code').set_index('ts_code')['hs_type']
+            frame['hs_type'] = frame['ts_code'].map(hs_map)
+        return cls(frame)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, refresh: bool = False) -> 'SecurityMaster':
+        """
+        加载证券主数据，本地快照当天有效，否则从 tushare 重新获取
+
+        Args:
+            path (str, optional): 快照文件路径，默认为 SECURITY_MASTER_PATH
+            refresh (bool): 是否强制重新获取
+
+        Returns:
+            SecurityMaster: 证券主数据
+        """
+        path = path or SECURITY_MASTER_PATH
+        today = pd.Timestamp.today().strftime('%Y%m%d')
+        if not refresh and os.path.exists(path):
+            modified = pd.Timestamp.fromtimestamp(os.path.getmtime(path)).strftime('%Y%m%d')
+            if modified == today:
+                return cls(pd.read_csv(path, dtype=str))
+
+        master = cls.from_frames(get_stock_basic('L'), get_stock_basic('D'), get_hs_const('SH'), get_hs_const('SZ'))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        master.frame.to_csv(path, index=False)
+        logger.info(f"证券主数据已更新: 股票数={len(master)}, 文件={path}")
+        return master
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    # ------------------------------------------------------------------ 单个查询
+
+    def id_of(self, symbol: str) -> int:
+        """
+        股票代码对应的整数编号
+
+        Args:
+            symbol (str): 股票代码，如 '600000.SH'
+
+        Returns:
+            int: 编号，不存在时为 MISSING_ID
+        """
+        return self._ids.get(symbol, MISSING_ID)
+
+    def info(self, symbol: str) -> Optional[dict]:
+        """
+        单只股票的全部属性
+
+        Args:
+            symbol (str): 股票代码
+
+        Returns:
+            dict: 属性字典，不存在时为 None
+        """
+        i = self.id_of(symbol)
+        if i == MISSING_ID:
+            return None
+        return {
+            'ts_code': symbol,
+            'name': self.names[i],
+            'exchange': self.exchanges[i],
+            'board': self.boards[i],
+            'price_limit': float(self.limits[i]),
+            'industry': self.industries[i],
+            'list_date': int(self.list_dates[i]),
+            'delist_date': int(self.delist_dates[i]),
+            'is_st': bool(self.is_st[i]),
+            'is_hs': bool(self.is_hs[i]),
+        }
+
+    def exchange(self, symbol: str) -> Optional[str]:
+        """交易所：SH / SZ / BJ"""
+        i = self.id_of(symbol)
+        if i != MISSING_ID:
+            return self.exchanges[i]
+        code = code_symbols([symbol])[0]
+        return code[-2:] if code else None
+
+    def board(self, symbol: str) -> Optional[str]:
+        """板块：主板 / 创业板 / 科创板 / 北交所 等"""
+        i = self.id_of(symbol)
+        return self.boards[i] if i != MISSING_ID else boards_of([symbol])[0]
+
+    def price_limit(self, symbol: str) -> float:
+        """涨跌幅限制，如 0.1 表示 10%"""
+        i = self.id_of(symbol)
+        return float(self.limits[i]) if i != MISSING_ID else float(price_limits([symbol])[0])
+
+    def industry(self, symbol: str) -> Optional[str]:
+        """所属行业"""
+        i = self.id_of(symbol)
+        return self.industries[i] if i != MISSING_ID else None
+
+    def list_date(self, symbol: str) -> Optional[int]:
+        """上市日期（整数，如 20100101）"""
+        i = self.id_of(symbol)
+        return int(self.list_dates[i]) if i != MISSING_ID else None
+
+    # ------------------------------------------------------------------ 批量查询
+
+    def ids(self, symbols: Sequence[str]) -> np.ndarray:
+        """
+        批量获取整数编号
+
+        Args:
+            symbols (Sequence[str]): 股票代码序列
+
+        Returns:
+            np.ndarray: int64 编号，不存在的为 MISSING_ID
+        """
+        return self._index.get_indexer(pd.Index(symbols, dtype=object)).astype(np.int64)
+
+    def _take(self, values: np.ndarray, symbols: Sequence[str], fill) -> Tuple[np.ndarray, np.ndarray]:
+        ids = self.ids(symbols)
+        result = np.where(ids >= 0, values[np.maximum(ids, 0)] if len(values) else fill, fill)
+        return result, ids < 0
+
+    def price_limits(self, symbols: Sequence[str]) -> np.ndarray:
+        """
+        批量获取涨跌幅限制，不在主数据中的代码按前缀规则推断
+
+        Args:
+            symbols (Sequence[str]): 股票代码序列
+
+        Returns:
+            np.ndarray: float64 涨跌幅限制
+        """
+        limits, missing = self._take(self.limits, symbols, np.nan)
+        limits = limits.astype(np.float64)
+        if missing.any():
+            limits[missing] = price_limits(pd.Series(np.asarray(symbols, dtype=object)[missing]).str[:6])
+        return limits
+
+    def boards_of(self, symbols: Sequence[str]) -> np.ndarray:
+        """批量获取板块，不在主数据中的代码按前缀规则推断"""
+        boards, missing = self._take(self.boards, symbols, None)
+        boards = boards.astype(object)
+        if missing.any():
+            boards[missing] = boards_of(pd.Series(np.asarray(symbols, dtype=object)[missing]).str[:6])
+        return boards
+
+    def industries_of(self, symbols: Sequence[str]) -> np.ndarray:
+        """批量获取行业，不存在的为 None"""
+        return self._take(self.industries, symbols, None)[0].astype(object)
+
+    def list_dates_of(self, symbols: Sequence[str]) -> np.ndarray:
+        """批量获取上市日期，不存在的为 0"""
+        return self._take(self.list_dates, symbols, 0)[0].astype(np.int64)
+
+    def listed_mask(self, dates: Sequence, symbols: Sequence[str]) -> pd.DataFrame:
+        """
+        (日期 × 股票) 的上市状态掩码：上市日期当天及之后、退市日期之前为 True
+
+        Args:
+            dates (Sequence): 日期列表
+            symbols (Sequence[str]): 股票列表
+
+        Returns:
+            pd.DataFrame: 布尔矩阵，不在主数据中的股票全部为 False
+        """
+        from data.store.panel_store import to_date_ints
+
+        ids = self.ids(symbols)
+        known = ids >= 0
+        start = np.where(known, self.list_dates[np.maximum(ids, 0)] if len(self) else 0, np.iinfo(np.int64).max)
+        end = self.delist_dates[np.maximum(ids, 0)] if len(self) else np.zeros(len(ids), dtype=np.int64)
+        end = np.where(known & (end > 0), end, np.iinfo(np.int64).max)
+        d = to_date_ints(dates)[:, None]
+        return pd.DataFrame((d >= start[None, :]) & (d < end[None, :]), index=pd.Index(dates), columns=list(symbols))
+
+    def industry_map(self) -> Dict[str, str]:
+        """股票代码 -> 行业，可直接用于 MoneyflowPanel.industry_net_inflow"""
+        keep = pd.notna(self.industries)
+        return dict(zip(self.symbols[keep], self.industries[keep]))
+
+
+_master: Optional[SecurityMaster] = None
+
+
+def get_security_master(refresh: bool = False) -> SecurityMaster:
+    """
+    获取进程内共享的证券主数据，首次调用时加载
+
+    Args:
+        refresh (bool): 是否强制重新加载
+
+    Returns:
+        SecurityMaster: 证券主数据
+    """
+    global _master
+    if _master is None or refresh:
+        _master = SecurityMaster.load(refresh=refresh)
+    return _master
+
+
+if __name__ == '__main__':
+    master = get_security_master()
+    print(len(master), master.info('600000.SH'))
+    print(master.price_limits(['600000.SH', '688001.SH', '300750.SZ', '830799.BJ']))
+    print(master.ids(['000001.SZ', '600519.SH', 'UNKNOWN']))
@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+复权因子入库
+
+复权因子保存在日线面板数据的 adj_factor 字段中，与不复权的 OHLCV 放在一起，
+复权价格由 data.store.adjust.AdjustEngine 在本地计算，不再调用 pro_bar(adj='qfq')。
+"""
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+from data.tushare.basic.exchange_calendar import get_trade_days_str
+from data.tushare.basic.ts_daily_ingest import DAILY_STORE, MAX_ROWS_PER_CALL
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_request import rate_limit
+
+# 复权因子字段
+ADJ_FIELD = 'adj_factor'
+# 已按交易日获取过全市场复权因子的日期
+ADJ_COMPLETE_KEY = 'adj_complete_dates'
+
+
+@rate_limit(500, key='tushare.adj_factor')
+def get_adj_factor(ts_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '') -> pd.DataFrame:
+    """
+    获取复权因子
+
+    Args:
+        ts_code (str): 股票代码，为空时返回全市场
+        trade_date (str): 交易日
+        start_date (str): 开始日期
+        end_date (str): 结束日期
+
+    Returns:
+        pd.DataFrame: ts_code, trade_date, adj_factor
+    """
+    return DataSource.tushare_pro.adj_factor(ts_code=ts_code, trade_date=trade_date,
+                                             start_date=start_date, end_date=end_date)
+
+
+def ingest_adj_factor(start_date: str, end_date: Optional[str] = None, symbols: Optional[Sequence[str]] = None,
+                      store: Optional[PanelStore] = None, trade_dates: Optional[Sequence[str]] = None) -> Dict:
+    """
+    将复权因子补齐到日线面板数据
+
+    全市场按交易日获取（每天一次调用），指定股票时按股票获取整段区间。
+
+    Args:
+        start_date (str): 开始日期
+        end_date (str, optional): 结束日期，默认为今天
+        symbols (Sequence[str], optional): 股票列表，为空时表示全市场
+        store (PanelStore, optional): 日线面板数据
+        trade_dates (Sequence[str], optional): 交易日列表，默认从交易日历获取
+
+    Returns:
+        Dict: calls(调用次数)、rows(写入行数)
+    """
+    store = store or PanelStore(DAILY_STORE)
+    if trade_dates is None:
+        trade_dates = get_trade_days_str(start_date, end_date)
+    trade_dates = [str(d) for d in trade_dates]
+    stats = {'calls': 0, 'rows': 0}
+    if not trade_dates:
+        return stats
+
+    if symbols is None:
+        complete = set(store.extra.get(ADJ_COMPLETE_KEY, []))
+        for trade_date in trade_dates:
+            if int(trade_date) in complete:
+                continue
+            df = get_adj_factor(trade_date=trade_date)
+            stats['calls'] += 1
+            if df is None or df.empty:
+                logger.warning(f"交易日没有返回复权因子: {trade_date}")
+                continue
+            stats['rows'] += store.upsert(df, fields=[ADJ_FIELD])
+            complete.add(int(trade_date))
+            store.extra[ADJ_COMPLETE_KEY] = sorted(complete)
+            store.save_extra()
+    else:
+        for symbol in symbols:
+            for i in range(0, len(trade_dates), MAX_ROWS_PER_CALL):
+                chunk = trade_dates[i:i + MAX_ROWS_PER_CALL]
+                df = get_adj_factor(ts_code=symbol, start_date=chunk[0], end_date=chunk[-1])
+                stats['calls'] += 1
+                stats['rows'] += store.upsert(df, fields=[ADJ_FIELD])
+
+    logger.info(f"复权因子入库完成: 调用次数={stats['calls']}, 写入行数={stats['rows']}")
+    return stats
+
+
+if __name__ == '__main__':
+    print(ingest_adj_factor('20250301', '20250331'))
+    print(ingest_adj_factor('20150101', '20250331', symbols=['000001.SZ']))
@@ -7,8 +7,10 @@ Created on 2025/3/28.
 
 from utils.global_config import DataSource
 from utils.code_symbol import code_symbol
+from utils.rate_limit_request import rate_limit
 import pandas as pd
 
+@rate_limit(500, key='tushare.daily')
 def get_daily_data(code, start_date: str, end_date: str) -> pd.DataFrame:
     """
     获取指定股票代码在指定日期范围内的日线数据
@@ -0,0 +1,258 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+日线数据批量入库
+
+tushare daily 接口既可以按股票取一段时间（ts_code + start_date/end_date），
+也可以按交易日取全市场（trade_date），单次最多返回 6000 行。
+全市场更新按交易日取数只需每天一次调用；少量股票补长历史时按股票取数更省调用次数。
+ingest_daily 根据本地面板数据中缺失的 (日期 × 股票) 单元格自动选择调用次数更少的方式。
+"""
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore, to_date_ints
+from data.tushare.basic.exchange_calendar import get_trade_days_str
+from data.tushare.basic.ts_daily import get_daily_data
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_request import rate_limit
+
+# 日线面板数据集名称
+DAILY_STORE = 'daily'
+# 日线字段
+DAILY_FIELDS = ['open', 'high', 'low', 'close', 'pre_close', 'change', 'pct_chg', 'vol', 'amount']
+# 标记 (日期, 股票) 已经从接口获取过（停牌日没有数据，但不需要重复获取）
+FETCHED_FIELD = 'fetched'
+# tushare daily 接口单次最多返回的行数
+MAX_ROWS_PER_CALL = 6000
+
+
+@rate_limit(500, key='tushare.daily')
+def get_daily_by_trade_date(trade_date: str) -> pd.DataFrame:
+    """
+    获取指定交易日全市场的日线数据
+
+    Args:
+        trade_date (str): 交易日，格式为 YYYYMMDD
+
+    Returns:
+        pd.DataFrame: 日线数据，每只股票一行
+    """
+    return DataSource.tushare_pro.daily(trade_date=trade_date)
+
+
+def _complete_dates(store: PanelStore) -> set:
+    return set(store.extra.get('complete_dates', []))
+
+
+def plan_daily_ingest(trade_dates: Sequence[str], symbols: Optional[Sequence[str]] = None,
+                      store: Optional[PanelStore] = None) -> Dict:
+    """
+    计算需要补齐的数据以及取数方式
+
+    Args:
+        trade_dates (Sequence[str]): 交易日列表
+        symbols (Sequence[str], optional): 股票列表，为空时表示全市场
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        Dict: mode('date' / 'symbol' / 'none')、calls(预计调用次数)、
+            dates(需要按交易日获取的日期)、ranges(需要按股票获取的 {股票: (开始日期, 结束日期)})
+    """
+    store = store or PanelStore(DAILY_STORE)
+    complete = _complete_dates(store)
+    dates = [d for d in trade_dates if int(d) not in complete]
+    plan = {'mode': 'none', 'calls': 0, 'dates': [], 'ranges': {}}
+    if not dates:
+        return plan
+
+    if symbols is None:
+        plan.update(mode='date', calls=len(dates), dates=dates)
+        return plan
+
+    # 已获取标记矩阵，缺失的单元格需要补齐
+    fetched = store.read(FETCHED_FIELD, symbols=list(symbols)).reindex(to_date_ints(dates))
+    missing = fetched.isna().to_numpy()
+    if not missing.any():
+        return plan
+
+    missing_dates = [d for d, m in zip(dates, missing.any(axis=1)) if m]
+    ranges = {}
+    symbol_calls = 0
+    date_pos = np.arange(len(dates))
+    for j, symbol in enumerate(symbols):
+        rows = date_pos[missing[:, j]]
+        if len(rows) == 0:
+            continue
+        # 按股票取数时取连续区间，区间内的交易日都会返回
+        span = rows[-1] - rows[0] + 1
+        symbol_calls += math.ceil(span / MAX_ROWS_PER_CALL)
+        ranges[symbol] = (dates[rows[0]], dates[rows[-1]])
+
+    if len(missing_dates) <= symbol_calls:
+        plan.update(mode='date', calls=len(missing_dates), dates=missing_dates)
+    else:
+        plan.update(mode='symbol', calls=symbol_calls, ranges=ranges)
+    return plan
+
+
+def ingest_daily(start_date: str, end_date: Optional[str] = None, symbols: Optional[Sequence[str]] = None,
+                 mode: str = 'auto', store: Optional[PanelStore] = None,
+                 trade_dates: Optional[Sequence[str]] = None) -> Dict:
+    """
+    将日线数据补齐到本地面板数据
+
+    Args:
+        start_date (str): 开始日期
+        end_date (str, optional): 结束日期，默认为今天
+        symbols (Sequence[str], optional): 股票列表，为空时表示全市场
+        mode (str): 'auto' 自动选择，'date' 强制按交易日，'symbol' 强制按股票（需要 symbols）
+        store (PanelStore, optional): 日线面板数据
+        trade_dates (Sequence[str], optional): 交易日列表，默认从交易日历获取
+
+    Returns:
+        Dict: mode、calls(实际调用次数)、rows(写入行数)
+    """
+    store = store or PanelStore(DAILY_STORE)
+    if trade_dates is None:
+        trade_dates = get_trade_days_str(start_date, end_date)
+    trade_dates = [str(d) for d in trade_dates]
+
+    plan = plan_daily_ingest(trade_dates, symbols, store)
+    if mode == 'date' and plan['mode'] == 'symbol':
+        dates = sorted({d for r in plan['ranges'].values() for d in trade_dates if r[0] <= d <= r[1]})
+        plan.update(mode='date', calls=len(dates), dates=dates)
+    elif mode == 'symbol' and plan['mode'] == 'date' and symbols is not None:
+        plan.update(mode='symbol', calls=len(symbols),
+                    ranges={s: (plan['dates'][0], plan['dates'][-1]) for s in symbols})
+
+    logger.info(f"日线入库计划: 方式={plan['mode']}, 预计调用次数={plan['calls']}, "
+                f"日期范围={trade_dates[0] if trade_dates else ''}至{trade_dates[-1] if trade_dates else ''}")
+
+    stats = execute_daily_plan(plan, trade_dates, store)
+    logger.info(f"日线入库完成: 方式={stats['mode']}, 调用次数={stats['calls']}, 写入行数={stats['rows']}")
+    return stats
+
+
+def execute_daily_plan(plan: Dict, trade_dates: Sequence[str], store: Optional[PanelStore] = None) -> Dict:
+    """
+    执行取数计划（plan_daily_ingest 或数据质量扫描生成的修复计划）
+
+    Args:
+        plan (Dict): mode、dates、ranges，格式同 plan_daily_ingest 的返回值
+        trade_dates (Sequence[str]): 交易日列表，按股票取数时用于确定区间内的交易日
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        Dict: mode、calls(实际调用次数)、rows(写入行数)
+    """
+    store = store or PanelStore(DAILY_STORE)
+    trade_dates = [str(d) for d in trade_dates]
+    stats = {'mode': plan['mode'], 'calls': 0, 'rows': 0}
+    if plan['mode'] == 'date':
+        for trade_date in plan['dates']:
+            trade_date = str(trade_date)
+            df = get_daily_by_trade_date(trade_date)
+            stats['calls'] += 1
+            if df is None or df.empty:
+                logger.warning(f"交易日没有返回数据: {trade_date}")
+                continue
+            stats['rows'] += store.upsert(df, fields=[f for f in DAILY_FIELDS if f in df.columns])
+            store.set_cells(FETCHED_FIELD, [trade_date], df['ts_code'].unique().tolist())
+            # 按交易日取数得到的是全市场数据，该日期以后不需要再取
+            store.extra['complete_dates'] = sorted(_complete_dates(store) | {int(trade_date)})
+            store.save_extra()
+    elif plan['mode'] == 'symbol':
+        for symbol, (start, end) in plan['ranges'].items():
+            dates = [d for d in trade_dates if str(start) <= d <= str(end)]
+            for i in range(0, len(dates), MAX_ROWS_PER_CALL):
+                chunk = dates[i:i + MAX_ROWS_PER_CALL]
+                df = get_daily_data(symbol, chunk[0], chunk[-1]).reset_index()
+                stats['calls'] += 1
+                if not df.empty:
+                    stats['rows'] += store.upsert(df, fields=[f for f in DAILY_FIELDS if f in df.columns])
+                store.set_cells(FETCHED_FIELD, chunk, [symbol])
+    return stats
+
+
+def repair_daily(plan: Dict, trade_dates: Sequence[str], store: Optional[PanelStore] = None) -> Dict:
+    """
+    执行数据质量扫描（data.store.quality）生成的修复计划：先清除停牌填充和非交易日数据，再重新获取有问题的数据
+
+    Args:
+        plan (Dict): QualityReport.repair_plan 的返回值
+        trade_dates (Sequence[str]): 交易日列表
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        Dict: mode、calls、rows，以及 cleared(清除的单元格数)
+    """
+    store = store or PanelStore(DAILY_STORE)
+    cleared = 0
+    for symbol, spans in plan.get('clear', {}).items():
+        dates = store.dates
+        for start, end in spans:
+            span_dates = dates[(dates >= int(start)) & (dates <= int(end))]
+            cleared += store.clear_cells(DAILY_FIELDS, span_dates, [symbol])
+    stats = execute_daily_plan(plan, trade_dates, store)
+    stats['cleared'] = cleared
+    logger.info(f"日线修复完成: 方式={stats['mode']}, 调用次数={stats['calls']}, 写入行数={stats['rows']}, "
+                f"清除单元格={cleared}")
+    return stats
+
+
+def read_daily_bars(code: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                    store: Optional[PanelStore] = None) -> pd.DataFrame:
+    """
+    从本地面板数据读取单只股票的日线，格式与 ts_daily.get_daily_data 一致
+
+    Args:
+        code (str): 股票代码（带交易所后缀）
+        start_date (str, optional): 开始日期
+        end_date (str, optional): 结束日期
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        pd.DataFrame: 以 trade_date 为索引的日线数据
+    """
+    store = store or PanelStore(DAILY_STORE)
+    df = store.read_symbol(code, [f for f in DAILY_FIELDS if f in store.fields], start_date, end_date)
+    df.index = df.index.astype(str)
+    df.index.name = 'trade_date'
+    df.insert(0, 'ts_code', code)
+    return df
+
+
+def read_daily_panel(fields: Sequence[str] = ('close',), start_date: Optional[str] = None,
+                     end_date: Optional[str] = None, symbols: Optional[List[str]] = None,
+                     store: Optional[PanelStore] = None) -> Dict[str, pd.DataFrame]:
+    """
+    从本地面板数据读取 (日期 × 股票) 宽表
+
+    Args:
+        fields (Sequence[str]): 字段列表
+        start_date (str, optional): 开始日期
+        end_date (str, optional): 结束日期
+        symbols (List[str], optional): 股票列表，默认全部
+        store (PanelStore, optional): 日线面板数据
+
+    Returns:
+        Dict[str, pd.DataFrame]: 字段名 -> 宽表
+    """
+    store = store or PanelStore(DAILY_STORE)
+    return {f: store.read(f, start_date, end_date, symbols) for f in fields}
+
+
+if __name__ == '__main__':
+    # 全市场最近一个月的日线，每个交易日一次调用
+    print(ingest_daily('20250301', '20250331'))
+    # 少量股票的长历史，每只股票一次调用
+    print(ingest_daily('20150101', '20250331', symbols=['000001.SZ', '600000.SH']))
+    print(read_daily_bars('000001.SZ', '20250301', '20250331'))
@@ -4,7 +4,12 @@
 Created on 2025/3/16.
 @author: Air.Zou
 """
-from utils.global_config import DataSource
+from utils.adaptive_throttle import AdaptiveThrottle
+from utils.log_util import logger
+from utils.rate_limit_request import RateLimiter
+
+# 资金流向接口共用一个自适应限流控制器
+throttle = AdaptiveThrottle(RateLimiter(200, key='tushare.moneyflow'))
 
 
 def get_industry_moneyflow(start_date, end_date):
@@ -18,15 +23,15 @@ def get_industry_moneyflow(start_date, end_date):
     """
     try:
         # 调用 moneyflow_ind_ths 接口获取数据
-        data = DataSource.tushare_pro.moneyflow_ind_ths(start_date=start_date, end_date=end_date)
+        data = throttle.query('moneyflow_ind_ths', start_date=start_date, end_date=end_date)
         return data
     except Exception as e:
-        print(f"获取数据失败：{e}")
+        logger.error(f"获取板块资金流向数据失败: {e}")
         return None
 
 def get_stock_moneyflow(symbol, start_date:str = None, end_date:str = None) -> float: # type: ignore
     # df = pro.moneyflow(ts_code=symbol, start_date=start_date, end_date=end_date)
-    df = DataSource.tushare_pro.moneyflow_ths(ts_code=symbol, start_date=start_date, end_date=end_date)
+    df = throttle.query('moneyflow_ths', ts_code=symbol, start_date=start_date, end_date=end_date)
     # 计算总流入和总流出
     # bs = df['buy_sm_amount'].sum()
     # bm = df['buy_md_amount'].sum()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+财务指标仓库
+
+fina_indicator_vip 按报告期一次获取全市场的财务指标，保存到本地 SQLite，
+每条记录以 (ts_code, end_date, ann_date) 为主键，保留更正公告的历史版本。
+asof_panel 按公告日把财务指标对齐到 (日期 × 股票) 网格：某一天只能看到当天之前已经公告的报告，
+避免未来函数，因子研究可以直接与行情宽表组合。
+fetch_symbol_fina 按股票读取，下一期报告仍在披露期内时按 max_age 重新获取，新公布的报告期不会被本地数据挡住。
+"""
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.adjust import ffill_rows
+from data.store.panel_store import to_date_ints
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_request import rate_limit
+
+FINA_DB_PATH = './cache/fina_indicator.db'
+FINA_TABLE = 'fina_indicator'
+KEY_COLUMNS = ['ts_code', 'ann_date', 'end_date']
+# 默认保存的指标
+FINA_FIELDS = ['eps', 'dt_eps', 'total_revenue_ps', 'revenue_ps', 'capital_rese_ps', 'surplus_rese_ps', 'bps',
+               'ocfps', 'grossprofit_margin', 'netprofit_margin', 'roe', 'roe_dt', 'roa', 'debt_to_assets',
+               'current_ratio', 'quick_ratio', 'or_yoy', 'netprofit_yoy']
+# 报告期结束后多少天内的报告仍可能有公司未披露（年报最晚 4 月 30 日），超过后不再重复获取
+DISCLOSURE_DAYS = 125
+# 单只股票的财务指标在下一期报告披露期内的最短刷新间隔
+SYMBOL_MAX_AGE = pd.Timedelta(days=1)
+
+
+@rate_limit(60, key='tushare.fina_indicator')
+def get_fina_indicator_vip(period: str, fields: Sequence[str] = FINA_FIELDS) -> pd.DataFrame:
+    """
+    获取某个报告期全市场的财务指标
+
+    Args:
+        period (str): 报告期，如 '20241231'
+        fields (Sequence[str]): 指标字段
+
+    Returns:
+        pd.DataFrame: ts_code, ann_date, end_date 以及指标字段
+    """
+    return DataSource.tushare_pro.fina_indicator_vip(period=period, fields=','.join(KEY_COLUMNS + list(fields)))
+
+
+@rate_limit(60, key='tushare.fina_indicator')
+def get_fina_indicator(ts_code: str) -> pd.DataFrame:
+    """
+    获取单只股票的全部历史财务指标
+
+    Args:
+        ts_code (str): 股票代码
+
+    Returns:
+        pd.DataFrame: ts_code, ann_date, end_date 以及全部指标字段
+    """
+    return DataSource.tushare_pro.fina_indicator(ts_code=ts_code)
+
+
+def report_periods(start_period: str, end_period: Optional[str] = None) -> List[str]:
+    """
+    报告期列表（每个季度末）
+
+    Args:
+        start_period (str): 开始日期
+        end_period (str, optional): 结束日期，默认为今天
+
+    Returns:
+        List[str]: YYYYMMDD 格式的报告期
+    """
+    end = pd.Timestamp(end_period) if end_period else pd.Timestamp.now()
+    return list(pd.date_range(pd.Timestamp(start_period), end, freq='QE').strftime('%Y%m%d'))
+
+
+class FundamentalStore:
+    """
+    财务指标仓库
+
+    example:
+        store = FundamentalStore()
+        ingest_fina_indicator('20150101', store=store)
+        roe = store.asof_panel('roe', trade_dates, symbols)   # (日期 × 股票)
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化财务指标仓库
+
+        Args:
+            db_path (str, optional): SQLite 文件路径，默认为 FINA_DB_PATH
+        """
+        self.db_path = db_path or FINA_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {FINA_TABLE} (
+                ts_code TEXT,
+                ann_date TEXT,
+                end_date TEXT,
+                PRIMARY KEY (ts_code, end_date, ann_date)
+            )
+            ''')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{FINA_TABLE}_ann ON {FINA_TABLE} (ann_date)')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS fina_periods (
+                period TEXT PRIMARY KEY,
+                update_time TIMESTAMP,
+                rows INTEGER
+            )
+            ''')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS fina_symbols (
+                ts_code TEXT PRIMARY KEY,
+                update_time TIMESTAMP,
+                rows INTEGER
+            )
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def columns(self) -> List[str]:
+        """已保存的指标字段"""
+        with self._connect() as conn:
+            info = conn.execute(f'PRAGMA table_info({FINA_TABLE})').fetchall()
+        return [row[1] for row in info if row[1] not in KEY_COLUMNS]
+
+    def upsert(self, df: pd.DataFrame, period: Optional[str] = None, ts_code: Optional[str] = None) -> int:
+        """
+        写入财务指标，主键相同的记录被覆盖，新的指标字段自动加列
+
+        Args:
+            df (pd.DataFrame): 至少包含 ts_code, ann_date, end_date
+            period (str, optional): 按报告期获取时记录获取时间
+            ts_code (str, optional): 按股票获取时记录获取时间
+
+        Returns:
+            int: 写入行数
+        """
+        if df is None or df.empty:
+            rows = 0
+        else:
+            df = df.dropna(subset=KEY_COLUMNS).drop_duplicates(subset=KEY_COLUMNS, keep='first')
+            fields = [c for c in df.columns if c not in KEY_COLUMNS and pd.api.types.is_numeric_dtype(df[c])]
+            existing = set(self.columns())
+            with self._connect() as conn:
+                for f in fields:
+                    if f not in existing:
+                        conn.execute(f'ALTER TABLE {FINA_TABLE} ADD COLUMN "{f}" REAL')
+                columns = KEY_COLUMNS + fields
+                values = df[columns].astype(object).where(df[columns].notna(), None)
+                placeholders = ', '.join('?' * len(columns))
+                names = ', '.join(f'"{c}"' for c in columns)
+                conn.executemany(f'INSERT OR REPLACE INTO {FINA_TABLE} ({names}) VALUES ({placeholders})',
+                                 [tuple(str(v) if i < 3 else v for i, v in enumerate(row))
+                                  for row in values.itertuples(index=False)])
+            rows = len(df)
+        if period is not None:
+            with self._connect() as conn:
+                conn.execute('INSERT OR REPLACE INTO fina_periods (period, update_time, rows) VALUES (?, ?, ?)',
+                             (period, datetime.now(), rows))
+        if ts_code is not None:
+            with self._connect() as conn:
+                conn.execute('INSERT OR REPLACE INTO fina_symbols (ts_code, update_time, rows) VALUES (?, ?, ?)',
+                             (ts_code, datetime.now(), rows))
+        return rows
+
+    def fetched_periods(self) -> Dict[str, datetime]:
+        """已获取的报告期 -> 获取时间"""
+        with self._connect() as conn:
+            rows = conn.execute('SELECT period, update_time FROM fina_periods').fetchall()
+        return {p: pd.Timestamp(t).to_pydatetime() for p, t in rows}
+
+    def symbol_fetched_at(self, ts_code: str) -> Optional[datetime]:
+        """单只股票最近一次按股票获取的时间，没有获取过时为 None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT update_time FROM fina_symbols WHERE ts_code = ?', (ts_code,)).fetchone()
+        return pd.Timestamp(row[0]).to_pydatetime() if row else None
+
+    def read(self, ts_codes: Optional[Sequence[str]] = None, fields: Optional[Sequence[str]] = None,
+             start_ann_date: Optional[str] = None, end_ann_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        读取财务指标记录
+
+        Args:
+            ts_codes (Sequence[str], optional): 股票列表，默认全部
+            fields (Sequence[str], optional): 指标字段，默认全部
+            start_ann_date (str, optional): 公告日起
+            end_ann_date (str, optional): 公告日止
+
+        Returns:
+            pd.DataFrame: 按 ts_code, ann_date, end_date 排序
+        """
+        fields = list(fields) if fields is not None else self.columns()
+        columns = ', '.join(f'"{c}"' for c in KEY_COLUMNS + fields)
+        where, params = [], []
+        if ts_codes is not None:
+            ts_codes = list(ts_codes)
+            where.append(f"ts_code IN ({', '.join('?' * len(ts_codes))})")
+            params.extend(ts_codes)
+        if start_ann_date:
+            where.append('ann_date >= ?')
+            params.append(str(start_ann_date))
+        if end_ann_date:
+            where.append('ann_date <= ?')
+            params.append(str(end_ann_date))
+        sql = f"SELECT {columns} FROM {FINA_TABLE}"
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql + ' ORDER BY ts_code, ann_date, end_date', conn, params=params)
+        return df
+
+    def history(self, ts_code: str) -> pd.DataFrame:
+        """
+        单只股票每个报告期的最新一版财务指标
+
+        Args:
+            ts_code (str): 股票代码
+
+        Returns:
+            pd.DataFrame: 按报告期排序
+        """
+        df = self.read([ts_code])
+        return df.drop_duplicates(subset=['end_date'], keep='last').sort_values('end_date').reset_index(drop=True)
+
+    def asof_panel(self, field: str, dates: Sequence, symbols: Optional[Sequence[str]] = None,
+                   strict: bool = True) -> pd.DataFrame:
+        """
+        把财务指标按公告日对齐到 (日期 × 股票) 网格
+
+        每个日期取已公告报告中报告期最新的一期；晚于新报告公布的旧报告期更正公告会被忽略，
+        同一报告期的更正公告覆盖原值。
+
+        Args:
+            field (str): 指标字段
+            dates (Sequence): 交易日列表（升序）
+            symbols (Sequence[str], optional): 股票列表，默认为仓库中的全部股票
+            strict (bool): True 时公告日当天不可见（盘后公告），从下一个日期开始生效
+
+        Returns:
+            pd.DataFrame: 以输入日期为索引、股票为列，尚无报告时为 NaN
+        """
+        records = self.read(symbols, [field])
+        date_ints = to_date_ints(dates)
+        if symbols is None:
+            symbols = sorted(records['ts_code'].unique())
+        symbols = list(symbols)
+        values = np.full((len(date_ints) + 1, len(symbols)), np.nan)
+        if not records.empty:
+            ann = to_date_ints(records['ann_date'])
+            end = to_date_ints(records['end_date'])
+            codes = records['ts_code'].to_numpy()
+            # records 已按 (ts_code, ann_date, end_date) 排序，组内报告期累计最大值之前的旧报告期不再生效
+            newest = pd.Series(end).groupby(codes).cummax().to_numpy()
+            keep = (end == newest) & ~np.isnan(records[field].to_numpy(dtype=np.float64))
+            col_index = {s: i for i, s in enumerate(symbols)}
+            cols = np.array([col_index.get(c, -1) for c in codes], dtype=np.int64)
+            keep &= cols >= 0
+            # 生效的第一个日期所在行，落在最后一个日期之后的写到多出来的一行
+            rows = np.searchsorted(date_ints, ann, side='right' if strict else 'left')
+            cells = pd.DataFrame({'row': rows[keep], 'col': cols[keep],
+                                  'value': records[field].to_numpy(dtype=np.float64)[keep]})
+            # 同一单元格多条记录时保留最后公告的
+            cells = cells.drop_duplicates(subset=['row', 'col'], keep='last')
+            values[cells['row'].to_numpy(), cells['col'].to_numpy()] = cells['value'].to_numpy()
+            values = ffill_rows(values)
+        return pd.DataFrame(values[:-1], index=pd.Index(dates), columns=symbols)
+
+
+def ingest_fina_indicator(start_period: str = '20100101', end_period: Optional[str] = None,
+                          store: Optional[FundamentalStore] = None, fields: Sequence[str] = FINA_FIELDS) -> Dict:
+    """
+    按报告期增量获取全市场财务指标
+
+    报告期结束超过 DISCLOSURE_DAYS 天之后获取过的报告期不再重复获取，仍在披露期内的报告期每次都会刷新。
+
+    Args:
+        start_period (str): 开始日期
+        end_period (str, optional): 结束日期，默认为今天
+        store (FundamentalStore, optional): 财务指标仓库
+        fields (Sequence[str]): 指标字段
+
+    Returns:
+        Dict: calls(调用次数)、rows(写入行数)
+    """
+    store = store or FundamentalStore()
+    fetched = store.fetched_periods()
+    stats = {'calls': 0, 'rows': 0}
+    for period in report_periods(start_period, end_period):
+        done_at = fetched.get(period)
+        if done_at is not None and done_at >= pd.Timestamp(period) + pd.Timedelta(days=DISCLOSURE_DAYS):
+            continue
+        df = get_fina_indicator_vip(period, fields)
+        stats['calls'] += 1
+        stats['rows'] += store.upsert(df, period=period)
+    logger.info(f"财务指标入库完成: 调用次数={stats['calls']}, 写入行数={stats['rows']}")
+    return stats
+
+
+def symbol_is_stale(store: FundamentalStore, ts_code: str, history: pd.DataFrame,
+                    max_age: Optional[pd.Timedelta] = SYMBOL_MAX_AGE) -> bool:
+    """
+    单只股票的财务指标是否需要重新获取
+
+    最新报告期的下一期已经结束、仍在披露期（DISCLOSURE_DAYS）内，且距离上次获取超过 max_age 时需要重新获取；
+    下一期尚未结束时不会有新报告，上次获取已经晚于披露截止日时说明公司没有按期披露（如已退市），都不再获取。
+    上次获取时间取按股票获取的时间，没有时取按报告期获取下一期的时间。
+
+    Args:
+        store (FundamentalStore): 财务指标仓库
+        ts_code (str): 股票代码
+        history (pd.DataFrame): store.history(ts_code)
+        max_age (pd.Timedelta, optional): 最短刷新间隔，None 表示本地有数据时不再获取
+
+    Returns:
+        bool: 是否需要重新获取
+    """
+    if history.empty:
+        return True
+    if max_age is None:
+        return False
+    now = pd.Timestamp.now()
+    next_period = pd.Timestamp(history['end_date'].iloc[-1]) + pd.offsets.QuarterEnd(1)
+    if next_period >= now.normalize():
+        return False
+    fetched_at = store.symbol_fetched_at(ts_code) or store.fetched_periods().get(next_period.strftime('%Y%m%d'))
+    if fetched_at is None:
+        return True
+    if fetched_at >= next_period + pd.Timedelta(days=DISCLOSURE_DAYS):
+        return False
+    return now - pd.Timestamp(fetched_at) >= max_age
+
+
+def fetch_symbol_fina(ts_code: str, store: Optional[FundamentalStore] = None,
+                      max_age: Optional[pd.Timedelta] = SYMBOL_MAX_AGE) -> pd.DataFrame:
+    """
+    读取单只股票的财务指标，本地没有或者可能有新报告时（见 symbol_is_stale）获取该股票的全部历史并保存
+
+    Args:
+        ts_code (str): 股票代码
+        store (FundamentalStore, optional): 财务指标仓库
+        max_age (pd.Timedelta, optional): 披露期内的最短刷新间隔，None 表示本地有数据时不再获取
+
+    Returns:
+        pd.DataFrame: 每个报告期最新一版的财务指标
+    """
+    store = store or FundamentalStore()
+    df = store.history(ts_code)
+    if symbol_is_stale(store, ts_code, df, max_age):
+        store.upsert(get_fina_indicator(ts_code), ts_code=ts_code)
+        df = store.history(ts_code)
+    return df
+
+
+if __name__ == '__main__':
+    store = FundamentalStore()
+    print(ingest_fina_indicator('20230101', store=store))
+    dates = pd.bdate_range('20240101', '20241231').strftime('%Y%m%d')
+    print(store.asof_panel('roe', dates, ['000001.SZ', '600000.SH']).iloc[::20])
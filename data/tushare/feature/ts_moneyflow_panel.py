@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+全市场资金流向面板
+
+moneyflow_ths / moneyflow_ind_ths 按交易日获取全市场数据写入面板数据，每天只需一次调用，
+之后的滚动净流入、横截面排名、行业汇总都在 (日期 × 股票) 矩阵上向量化计算，
+不再逐只股票调用 get_stock_moneyflow。
+
+example:
+    ingest_moneyflow('20250101', '20250331')
+    flow = MoneyflowPanel()
+    net5 = flow.rolling_net_inflow(5, start_date='20250301')
+    rank = flow.inflow_rank(5, start_date='20250301')
+    by_industry = flow.industry_net_inflow(industry_map, 5, start_date='20250301')
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+from data.tushare.basic.exchange_calendar import get_trade_days_str
+from data.tushare.basic.ts_moneyflow import throttle
+from utils.log_util import logger
+
+# 个股资金流向面板数据集
+MONEYFLOW_STORE = 'moneyflow'
+# 行业资金流向面板数据集
+MONEYFLOW_IND_STORE = 'moneyflow_ind'
+MONEYFLOW_FIELDS = ['net_amount', 'net_d5_amount', 'buy_lg_amount', 'buy_md_amount', 'buy_sm_amount',
+                    'pct_change']
+MONEYFLOW_IND_FIELDS = ['net_amount', 'net_buy_amount', 'net_sell_amount', 'pct_change', 'close']
+
+
+def rolling_sum(matrix: np.ndarray, window: int) -> np.ndarray:
+    """
+    沿日期轴计算滚动求和，NaN 视为 0，不足 window 天时按已有天数求和
+
+    Args:
+        matrix (np.ndarray): (日期 × 股票) 矩阵
+        window (int): 窗口大小
+
+    Returns:
+        np.ndarray: 与输入形状相同的矩阵，整个窗口都缺失的位置为 NaN
+    """
+    values = np.asarray(matrix, dtype=np.float64)
+    valid = ~np.isnan(values)
+    zero_row = np.zeros((1,) + values.shape[1:])
+    csum = np.concatenate([zero_row, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    ccount = np.concatenate([zero_row, np.cumsum(valid, axis=0)])
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    total = csum[1:] - csum[start]
+    count = ccount[1:] - ccount[start]
+    return np.where(count > 0, total, np.nan)
+
+
+def cross_section_rank(frame: pd.DataFrame, ascending: bool = False) -> pd.DataFrame:
+    """
+    横截面百分位排名（每个日期在所有股票中排名）
+
+    Args:
+        frame (pd.DataFrame): 以日期为索引、股票为列的宽表
+        ascending (bool): False 时数值越大排名越靠前（越接近 1）
+
+    Returns:
+        pd.DataFrame: 0~1 之间的百分位排名，缺失值保持 NaN
+    """
+    return frame.rank(axis=1, pct=True, ascending=not ascending)
+
+
+def group_sum(frame: pd.DataFrame, groups: Dict[str, str]) -> pd.DataFrame:
+    """
+    按分组汇总宽表的列，通过 (股票 × 分组) 的 0/1 矩阵乘法一次完成
+
+    Args:
+        frame (pd.DataFrame): 以日期为索引、股票为列的宽表
+        groups (Dict[str, str]): 股票代码 -> 分组名称，未包含的股票不参与汇总
+
+    Returns:
+        pd.DataFrame: 以日期为索引、分组为列
+    """
+    labels = pd.Series([groups.get(s) for s in frame.columns], index=frame.columns)
+    names = sorted(labels.dropna().unique())
+    onehot = (labels.to_numpy()[:, None] == np.array(names, dtype=object)[None, :]).astype(np.float64)
+    values = frame.to_numpy(dtype=np.float64)
+    total = np.nan_to_num(values) @ onehot
+    # 分组内所有股票都缺失时为 NaN
+    count = (~np.isnan(values)).astype(np.float64) @ onehot
+    return pd.DataFrame(np.where(count > 0, total, np.nan), index=frame.index, columns=names)
+
+
+def _ingest_by_date(api_name: str, store: PanelStore, fields: Sequence[str], trade_dates: Sequence[str]) -> Dict:
+    """按交易日获取全市场数据，已完成的交易日跳过"""
+    complete = set(store.extra.get('complete_dates', []))
+    stats = {'calls': 0, 'rows': 0}
+    for trade_date in trade_dates:
+        if int(trade_date) in complete:
+            continue
+        df = throttle.query(api_name, trade_date=trade_date)
+        stats['calls'] += 1
+        if df is None or df.empty:
+            logger.warning(f"交易日没有返回资金流向数据: 接口={api_name}, 日期={trade_date}")
+            continue
+        stats['rows'] += store.upsert(df, fields=[f for f in fields if f in df.columns])
+        if 'industry' in df.columns:
+            names = store.extra.setdefault('names', {})
+            names.update(dict(zip(df['ts_code'], df['industry'])))
+        complete.add(int(trade_date))
+        store.extra['complete_dates'] = sorted(complete)
+        store.save_extra()
+    return stats
+
+
+def ingest_moneyflow(start_date: str, end_date: Optional[str] = None, store: Optional[PanelStore] = None,
+                     ind_store: Optional[PanelStore] = None, trade_dates: Optional[Sequence[str]] = None,
+                     industry: bool = True) -> Dict:
+    """
+    将个股和行业资金流向增量写入面板数据，每个交易日各一次调用
+
+    Args:
+        start_date (str): 开始日期
+        end_date (str, optional): 结束日期，默认为今天
+        store (PanelStore, optional): 个股资金流向面板数据
+        ind_store (PanelStore, optional): 行业资金流向面板数据
+        trade_dates (Sequence[str], optional): 交易日列表，默认从交易日历获取
+        industry (bool): 是否同时获取行业资金流向
+
+    Returns:
+        Dict: stock / industry 的调用次数和写入行数
+    """
+    store = store or PanelStore(MONEYFLOW_STORE)
+    if trade_dates is None:
+        trade_dates = get_trade_days_str(start_date, end_date)
+    trade_dates = [str(d) for d in trade_dates]
+    stats = {'stock': _ingest_by_date('moneyflow_ths', store, MONEYFLOW_FIELDS, trade_dates)}
+    if industry:
+        ind_store = ind_store or PanelStore(MONEYFLOW_IND_STORE)
+        stats['industry'] = _ingest_by_date('moneyflow_ind_ths', ind_store, MONEYFLOW_IND_FIELDS, trade_dates)
+    logger.info(f"资金流向入库完成: {stats}")
+    return stats
+
+
+class MoneyflowPanel:
+    """
+    资金流向向量化分析
+    """
+
+    def __init__(self, store: Optional[PanelStore] = None, ind_store: Optional[PanelStore] = None):
+        """
+        初始化资金流向分析
+
+        Args:
+            store (PanelStore, optional): 个股资金流向面板数据
+            ind_store (PanelStore, optional): 行业资金流向面板数据
+        """
+        self.store = store or PanelStore(MONEYFLOW_STORE)
+        self.ind_store = ind_store or PanelStore(MONEYFLOW_IND_STORE)
+
+    @staticmethod
+    def _rolling(store: PanelStore, field: str, window: int, start_date=None, end_date=None,
+                 symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """只读取 start_date 之前 window-1 行作为预热，每日增量计算时只需读取很少的数据"""
+        rows = store.date_slice(start_date, end_date)
+        warmup = max(rows.start - (window - 1), 0)
+        dates = store.dates
+        frame = store.read(field, dates[warmup] if rows.stop > warmup else start_date, end_date, symbols)
+        result = pd.DataFrame(rolling_sum(frame.to_numpy(), window), index=frame.index, columns=frame.columns)
+        return result.iloc[rows.start - warmup:]
+
+    def net_inflow(self, start_date=None, end_date=None, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        每日净流入宽表
+
+        Returns:
+            pd.DataFrame: 以日期为索引、股票为列
+        """
+        return self.store.read('net_amount', start_date, end_date, symbols)
+
+    def rolling_net_inflow(self, window: int = 5, start_date=None, end_date=None,
+                           symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        滚动 window 个交易日的累计净流入
+
+        Args:
+            window (int): 窗口大小（交易日）
+            start_date: 开始日期
+            end_date: 结束日期
+            symbols (Sequence[str], optional): 股票列表，默认全部
+
+        Returns:
+            pd.DataFrame: 以日期为索引、股票为列
+        """
+        return self._rolling(self.store, 'net_amount', window, start_date, end_date, symbols)
+
+    def inflow_rank(self, window: int = 5, start_date=None, end_date=None,
+                    symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        滚动净流入的横截面百分位排名，1 表示当天净流入最多
+
+        Returns:
+            pd.DataFrame: 以日期为索引、股票为列
+        """
+        return cross_section_rank(self.rolling_net_inflow(window, start_date, end_date, symbols))
+
+    def top_inflow(self, trade_date, n: int = 20, window: int = 5) -> pd.Series:
+        """
+        某个交易日滚动净流入最多的股票
+
+        Args:
+            trade_date: 交易日
+            n (int): 返回数量
+            window (int): 窗口大小
+
+        Returns:
+            pd.Series: 股票代码 -> 滚动净流入，从大到小排列
+        """
+        row = self.rolling_net_inflow(window, trade_date, trade_date)
+        if row.empty:
+            return pd.Series(dtype=np.float64)
+        return row.iloc[-1].dropna().nlargest(n)
+
+    def industry_net_inflow(self, industry_map: Dict[str, str], window: int = 1, start_date=None,
+                            end_date=None) -> pd.DataFrame:
+        """
+        由个股资金流向汇总行业净流入
+
+        Args:
+            industry_map (Dict[str, str]): 股票代码 -> 行业，例如 stock_basic 的 industry 列
+            window (int): 滚动窗口，1 表示当日
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            pd.DataFrame: 以日期为索引、行业为列
+        """
+        return group_sum(self.rolling_net_inflow(window, start_date, end_date), industry_map)
+
+    def ths_industry_net_inflow(self, window: int = 1, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        同花顺行业资金流向（moneyflow_ind_ths）的滚动净流入，列为行业名称
+
+        Returns:
+            pd.DataFrame: 以日期为索引、行业为列
+        """
+        frame = self._rolling(self.ind_store, 'net_amount', window, start_date, end_date)
+        names = self.ind_store.extra.get('names', {})
+        return frame.rename(columns=lambda c: names.get(c, c))
+
+
+if __name__ == '__main__':
+    from data.tushare.basic.ts_stock_all import get_stock_all_basic
+
+    print(ingest_moneyflow('20250301', '20250331'))
+    flow = MoneyflowPanel()
+    print(flow.top_inflow('20250331', n=10))
+    basic = get_stock_all_basic()
+    print(flow.industry_net_inflow(dict(zip(basic['ts_code'], basic['industry'])), 5, '20250301').tail())
+    print(flow.ths_industry_net_inflow(5, '20250301').tail())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+指数历史成分股（point-in-time）
+
+由 tushare index_weight 的历史快照（通常每月一次）生成成分股区间记录 (symbol, in_date, out_date)：
+股票在某次快照中出现即视为从该快照日起纳入，在之后第一次缺席的快照日剔除（不含）。
+回测时用 members_at 得到 (日期 × 股票) 的布尔掩码，与因子或信号矩阵相乘即可过滤股票池，
+避免只用当前成分股带来的幸存者偏差。
+
+目录结构:
+    {root}/{index_code}.json    快照日期列表、已获取的日期范围与区间记录
+"""
+import os
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import to_date_int, to_date_ints
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_request import rate_limit
+
+INDEX_CONSTITUENT_ROOT = './cache/index_constituents'
+# 仍在指数中的股票的剔除日期
+OPEN_END = 99991231
+# index_weight 单次最多返回 6000 行，按年分段获取，返回行数达到上限时视为被截断，日期范围对半拆分后重新获取
+FETCH_YEARS = 1
+INDEX_WEIGHT_LIMIT = 6000
+
+
+@rate_limit(200, key='tushare.index_weight')
+def get_index_weight(index_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    获取指数成分和权重快照
+
+    Args:
+        index_code (str): 指数代码，如 '000300.SH'
+        start_date (str): 开始日期
+        end_date (str): 结束日期
+
+    Returns:
+        pd.DataFrame: index_code, con_code, trade_date, weight
+    """
+    return DataSource.tushare_pro.index_weight(index_code=index_code, start_date=start_date, end_date=end_date)
+
+
+def fetch_index_weight(index_code: str, start: pd.Timestamp, end: pd.Timestamp) -> List[pd.DataFrame]:
+    """
+    获取一段日期范围内的成分快照，返回行数达到 INDEX_WEIGHT_LIMIT 时对半拆分日期范围重新获取
+
+    Args:
+        index_code (str): 指数代码
+        start (pd.Timestamp): 开始日期
+        end (pd.Timestamp): 结束日期
+
+    Returns:
+        List[pd.DataFrame]: 非空的快照数据
+    """
+    df = get_index_weight(index_code, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'))
+    if df is None or df.empty:
+        return []
+    if len(df) < INDEX_WEIGHT_LIMIT:
+        return [df]
+    if start >= end:
+        logger.warning(f"指数成分单日快照达到接口行数上限，数据可能不完整: 指数={index_code}, 日期={start:%Y%m%d}")
+        return [df]
+    mid = start + (end - start) // 2
+    logger.debug(f"指数成分返回行数达到上限，拆分日期范围: 指数={index_code}, {start:%Y%m%d}至{end:%Y%m%d}")
+    return fetch_index_weight(index_code, start, mid) + fetch_index_weight(index_code, mid + pd.Timedelta(days=1), end)
+
+
+def build_intervals(snapshots: pd.DataFrame, snapshot_dates: Optional[Sequence] = None) -> pd.DataFrame:
+    """
+    由成分快照生成区间记录
+
+    Args:
+        snapshots (pd.DataFrame): 至少包含 con_code, trade_date 两列
+        snapshot_dates (Sequence, optional): 全部快照日期，默认为 snapshots 中出现的日期
+
+    Returns:
+        pd.DataFrame: con_code, in_date, out_date（整数日期，out_date 不含，仍在指数中为 OPEN_END）
+    """
+    dates = np.unique(to_date_ints(snapshot_dates if snapshot_dates is not None else snapshots['trade_date']))
+    if snapshots.empty or len(dates) == 0:
+        return pd.DataFrame({'con_code': pd.Series(dtype=object), 'in_date': pd.Series(dtype=np.int64),
+                             'out_date': pd.Series(dtype=np.int64)})
+    codes, code_idx = np.unique(snapshots['con_code'].to_numpy(dtype=str), return_inverse=True)
+    date_idx = np.searchsorted(dates, to_date_ints(snapshots['trade_date']))
+
+    # (快照 × 股票) 的成分矩阵，两端补 False 后取差分得到纳入和剔除位置
+    present = np.zeros((len(dates) + 2, len(codes)), dtype=np.int8)
+    present[date_idx + 1, code_idx] = 1
+    edges = np.diff(present, axis=0)
+    in_rows, in_cols = np.nonzero(edges.T == 1)
+    out_rows, out_cols = np.nonzero(edges.T == -1)
+    ends = np.append(dates, OPEN_END)
+    return pd.DataFrame({
+        'con_code': codes[in_rows],
+        'in_date': dates[in_cols],
+        'out_date': ends[out_cols],
+    })
+
+
+class IndexConstituentStore:
+    """
+    指数历史成分股存储
+
+    example:
+        store = IndexConstituentStore()
+        store.update('000300.SH', start_date='20150101')
+        mask = store.members_at('000300.SH', trade_dates, symbols=close.columns)
+        universe_close = close.where(mask)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        初始化成分股存储
+
+        Args:
+            root (str, optional): 存储目录，默认为 INDEX_CONSTITUENT_ROOT
+        """
+        self.root = root or INDEX_CONSTITUENT_ROOT
+        self._cache: Dict[str, dict] = {}
+
+    def _path(self, index_code: str) -> str:
+        return os.path.join(self.root, f'{index_code}.json')
+
+    def _load(self, index_code: str) -> dict:
+        if index_code not in self._cache:
+            path = self._path(index_code)
+            data = {'snapshots': [], 'fetched': None, 'con_code': [], 'in_date': [], 'out_date': []}
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            self._cache[index_code] = data
+        return self._cache[index_code]
+
+    def _save(self, index_code: str, data: dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path(index_code) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(index_code))
+        self._cache[index_code] = data
+
+    def snapshot_dates(self, index_code: str) -> np.ndarray:
+        """已保存的快照日期"""
+        return np.asarray(self._load(index_code)['snapshots'], dtype=np.int64)
+
+    def fetched_range(self, index_code: str) -> Optional[tuple]:
+        """
+        已从数据源获取过的日期范围，旧文件没有记录时取第一个和最后一个快照日期
+
+        Returns:
+            Optional[tuple]: (开始日期, 结束日期) 整数日期，没有数据时为 None
+        """
+        data = self._load(index_code)
+        if data.get('fetched'):
+            return tuple(data['fetched'])
+        dates = self.snapshot_dates(index_code)
+        return (int(dates[0]), int(dates[-1])) if len(dates) else None
+
+    def covers(self, index_code: str, start_date, end_date) -> bool:
+        """
+        已获取的日期范围是否覆盖 [start_date, end_date]
+
+        Args:
+            index_code (str): 指数代码
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            bool: 是否覆盖
+        """
+        fetched = self.fetched_range(index_code)
+        return fetched is not None and fetched[0] <= to_date_int(start_date) and to_date_int(end_date) <= fetched[1]
+
+    def intervals(self, index_code: str) -> pd.DataFrame:
+        """
+        获取成分股区间记录
+
+        Args:
+            index_code (str): 指数代码
+
+        Returns:
+            pd.DataFrame: con_code, in_date, out_date
+        """
+        data = self._load(index_code)
+        return pd.DataFrame({'con_code': data['con_code'],
+                             'in_date': np.asarray(data['in_date'], dtype=np.int64),
+                             'out_date': np.asarray(data['out_date'], dtype=np.int64)})
+
+    def add_snapshots(self, index_code: str, snapshots: pd.DataFrame) -> int:
+        """
+        合并新的成分快照并重新生成区间记录
+
+        只需要保留区间记录：已有区间按快照日期展开后与新快照合并，重新计算区间。
+
+        Args:
+            index_code (str): 指数代码
+            snapshots (pd.DataFrame): 至少包含 con_code, trade_date 两列
+
+        Returns:
+            int: 新增的快照日期数
+        """
+        if snapshots is None or snapshots.empty:
+            return 0
+        old_dates = self.snapshot_dates(index_code)
+        new_dates = np.setdiff1d(np.unique(to_date_ints(snapshots['trade_date'])), old_dates)
+        if len(new_dates) == 0:
+            return 0
+        all_dates = np.union1d(old_dates, new_dates)
+
+        # 已有区间展开为 (股票, 快照日期)
+        old = self.intervals(index_code)
+        expanded = []
+        for code, start, end in old.itertuples(index=False):
+            d = old_dates[(old_dates >= start) & (old_dates < end)]
+            expanded.append(pd.DataFrame({'con_code': code, 'trade_date': d}))
+        fresh = snapshots[['con_code', 'trade_date']].copy()
+        fresh['trade_date'] = to_date_ints(fresh['trade_date'])
+        fresh = fresh[np.isin(fresh['trade_date'], new_dates)]
+        merged = pd.concat(expanded + [fresh], ignore_index=True)
+
+        intervals = build_intervals(merged, all_dates)
+        self._save(index_code, {
+            'snapshots': [int(d) for d in all_dates],
+            'fetched': self._load(index_code).get('fetched'),
+            'con_code': intervals['con_code'].tolist(),
+            'in_date': [int(d) for d in intervals['in_date']],
+            'out_date': [int(d) for d in intervals['out_date']],
+        })
+        logger.info(f"指数成分更新: 指数={index_code}, 新增快照={len(new_dates)}, 区间记录={len(intervals)}")
+        return len(new_dates)
+
+    def update(self, index_code: str, start_date: str = '20050101', end_date: Optional[str] = None) -> int:
+        """
+        从 tushare 增量获取成分快照：早于已获取范围的部分补齐，之后的部分从最后一个快照日之后开始
+        （快照发布有延迟，最后一个快照日之后的日期每次都重新获取）
+
+        Args:
+            index_code (str): 指数代码
+            start_date (str): 开始日期
+            end_date (str, optional): 结束日期，默认为今天
+
+        Returns:
+            int: 新增的快照日期数
+        """
+        start = pd.Timestamp(str(to_date_int(start_date)))
+        end = pd.Timestamp(str(to_date_int(end_date or pd.Timestamp.today().strftime('%Y%m%d'))))
+        fetched = self.fetched_range(index_code)
+        dates = self.snapshot_dates(index_code)
+        if fetched is None:
+            ranges = [(start, end)]
+        else:
+            first, last = pd.Timestamp(str(fetched[0])), pd.Timestamp(str(fetched[1]))
+            ranges = []
+            if start < first:
+                ranges.append((start, first - pd.Timedelta(days=1)))
+            tail = pd.Timestamp(str(dates[-1])) + pd.Timedelta(days=1) if len(dates) else last + pd.Timedelta(days=1)
+            if end >= tail:
+                ranges.append((tail, end))
+
+        frames = []
+        for range_start, range_end in ranges:
+            while range_start <= range_end:
+                stop = min(range_start + pd.DateOffset(years=FETCH_YEARS) - pd.Timedelta(days=1), range_end)
+                frames += fetch_index_weight(index_code, range_start, stop)
+                range_start = stop + pd.Timedelta(days=1)
+        added = self.add_snapshots(index_code, pd.concat(frames)) if frames else 0
+
+        if ranges:
+            data = dict(self._load(index_code))
+            lo, hi = int(start.strftime('%Y%m%d')), int(end.strftime('%Y%m%d'))
+            data['fetched'] = [lo, hi] if fetched is None else [min(lo, fetched[0]), max(hi, fetched[1])]
+            self._save(index_code, data)
+        return added
+
+    def members_at(self, index_code: str, dates: Sequence, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        获取每个日期的成分股掩码
+
+        Args:
+            index_code (str): 指数代码
+            dates (Sequence): 日期列表
+            symbols (Sequence[str], optional): 股票列表（掩码的列），默认为曾经的全部成分股
+
+        Returns:
+            pd.DataFrame: 以输入日期为索引、股票为列的布尔矩阵；早于第一个快照的日期全部为 False
+        """
+        intervals = self.intervals(index_code)
+        date_ints = to_date_ints(dates)
+        if symbols is None:
+            symbols = sorted(intervals['con_code'].unique())
+        symbols = list(symbols)
+        col_index = {s: i for i, s in enumerate(symbols)}
+        cols = np.array([col_index.get(c, -1) for c in intervals['con_code']], dtype=np.int64)
+        keep = cols >= 0
+        cols = cols[keep]
+        start = intervals['in_date'].to_numpy()[keep]
+        end = intervals['out_date'].to_numpy()[keep]
+
+        # (日期 × 区间) 是否落在区间内，再按股票归并
+        inside = (date_ints[:, None] >= start[None, :]) & (date_ints[:, None] < end[None, :])
+        mask = np.zeros((len(date_ints), len(symbols)), dtype=bool)
+        rows, hits = np.nonzero(inside)
+        mask[rows, cols[hits]] = True
+        return pd.DataFrame(mask, index=pd.Index(dates), columns=symbols)
+
+    def members_on(self, index_code: str, date) -> List[str]:
+        """
+        获取某一天的成分股列表
+
+        Args:
+            index_code (str): 指数代码
+            date: 日期
+
+        Returns:
+            List[str]: 成分股代码
+        """
+        d = to_date_int(date)
+        intervals = self.intervals(index_code)
+        inside = (intervals['in_date'] <= d) & (intervals['out_date'] > d)
+        return sorted(intervals.loc[inside, 'con_code'])
+
+
+if __name__ == '__main__':
+    store = IndexConstituentStore()
+    store.update('000300.SH', start_date='20200101')
+    print(store.intervals('000300.SH'))
+    print(len(store.members_on('000300.SH', '20230601')))
+    mask = store.members_at('000300.SH', ['20210104', '20230601', '20250102'])
+    print(mask.sum(axis=1))
@@ -4,9 +4,10 @@
 Created on 16/03/2025.
 @author: Air.Zou
 """
+import pandas as pd
+
 from utils.date_utils import get_days_ago, get_current_date_str
 from utils.global_config import DataSource
-import akshare as ak
 
 pro = DataSource.tushare_pro
 
@@ -30,14 +31,48 @@ ETF300 = '000300' # 沪深300指数代码
 A50 = '930050' # A50指数代码
 ZZHL100 = '000922' # ZZ红利100指数代码
 
+# tushare index_weight 使用的指数代码
+TS_INDEX_CODES = {
+    ETF300: '000300.SH',
+    ZZ500: '000905.SH',
+    A500: '000510.SH',
+    A50: '930050.CSI',
+    ZZHL100: '000922.CSI',
+}
+
 def hs300_constituents():
-    return ak.index_stock_cons_csindex(symbol=ETF300)
+    return DataSource.akshare.index_stock_cons_csindex(symbol=ETF300)
 
 def a500_constituents():
-    return ak.index_stock_cons_csindex(symbol=A500)
+    return DataSource.akshare.index_stock_cons_csindex(symbol=A500)
 
 def a50_constituents():
-    return ak.index_stock_cons_csindex(symbol=A50)
+    return DataSource.akshare.index_stock_cons_csindex(symbol=A50)
+
+def index_members_at(index: str, dates, symbols=None):
+    """
+    获取指数在每个日期的历史成分股掩码（回测使用，避免幸存者偏差）
+
+    Args:
+        index (str): 中证指数代码，如 ETF300
+        dates: 日期列表
+        symbols: 掩码的列，默认为曾经的全部成分股
+
+    Returns:
+        pd.DataFrame: (日期 × 股票) 布尔矩阵
+    """
+    from data.store.panel_store import to_date_ints
+    from data.tushare.stock.ts_index_constituent import IndexConstituentStore
+
+    store = IndexConstituentStore()
+    index_code = TS_INDEX_CODES.get(index, index)
+    # 只有本地已获取的日期范围不能覆盖请求的日期时才访问接口
+    date_ints = to_date_ints(dates)
+    start = str(min(int(date_ints.min()), 20050101))
+    end = str(min(int(date_ints.max()), int(pd.Timestamp.today().strftime('%Y%m%d'))))
+    if not store.covers(index_code, start, end):
+        store.update(index_code, start_date=start)
+    return store.members_at(index_code, dates, symbols)
 
 if __name__ == '__main__':
     print("hs300_constituents")
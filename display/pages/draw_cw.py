@@ -10,9 +10,7 @@ import pandas as pd
 import tushare as ts
 import plotly.express as px
 from datetime import datetime
-from utils import DataSource
-# 初始化Tushare
-pro = DataSource.tushare_pro
+from data.tushare.cw.ts_fina_indicator import fetch_symbol_fina
 
 # 核心财务指标列表
 CORE_INDICATORS = {
@@ -46,9 +44,9 @@ ALL_INDICATORS = {
 }
 
 def fetch_fina_data(ts_code):
-    """获取财务指标数据"""
+    """获取财务指标数据（优先读取本地财务指标仓库）"""
     try:
-        df = pro.fina_indicator(ts_code=ts_code)
+        df = fetch_symbol_fina(ts_code)
         # 处理日期格式
         df['end_date'] = pd.to_datetime(df['end_date'])
         df['year'] = df['end_date'].dt.year
@@ -18,8 +18,9 @@ from pyecharts import options as opts
 from pyecharts.charts import Bar
 from streamlit_echarts import st_pyecharts
 import numpy as np
-from utils.global_config import DataSource
-from utils.code_symbol import code_symbol
+from utils.consts import RequestPriority
+from utils.rate_limit_request import request_priority
+from data.tushare.basic.ts_daily import get_daily_data
 
 st.title('股票K线图')
 
@@ -29,15 +30,11 @@ st.date_input('结束日期', key='end_date', value=pd.to_datetime('20251231'))
 
 if st.session_state.code:
     code = st.session_state.code
-    code = code_symbol(code)
     start_date = st.session_state.start_date.strftime('%Y%m%d')
     end_date = st.session_state.end_date.strftime('%Y%m%d')
-    pro = DataSource.tushare_pro
-    stock = pro.daily(ts_code=code, start_date=start_date
-                                         , end_date=end_date)
-
-    stock.set_index('trade_date', inplace=True)
-    stock.sort_index(inplace=True)
+    # 页面加载属于交互请求，优先于批量下载获得调用额度
+    with request_priority(RequestPriority.INTERACTIVE):
+        stock = get_daily_data(code, start_date, end_date)
 
     # 计算均线，使用min_periods参数避免开始的NaN值，并保留2位小数
     stock['ma5'] = stock['close'].rolling(window=5, min_periods=1).mean().round(3)
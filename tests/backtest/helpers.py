@@ -0,0 +1,50 @@
+"""
+回测测试的公共工具
+
+- create_test_data：随机游走的 OHLCV 测试数据
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def create_test_data(start: str = '2020-01-01',
+                     end: Optional[str] = '2020-12-31',
+                     periods: Optional[int] = None,
+                     seed: int = 42,
+                     freq: str = 'D',
+                     drift: float = 0.001,
+                     open_noise: float = 0.0,
+                     capitalize: bool = False) -> pd.DataFrame:
+    """
+    创建随机游走的测试数据
+
+    Args:
+        start: 开始日期
+        end: 结束日期，指定 periods 时忽略
+        periods: K 线数量
+        seed: 随机种子
+        freq: 日期频率，'D' 为自然日，'B' 为工作日
+        drift: 每天收益率的均值
+        open_noise: 开盘价相对收盘价的波动，为 0 时开盘价等于收盘价
+        capitalize: 列名首字母大写（Open、High、Low、Close、Volume）
+
+    Returns:
+        pd.DataFrame: 以 datetime 为索引的 OHLCV 数据，最高价/最低价为开盘价和收盘价的最大值/最小值上下浮动 1%
+    """
+    rng = np.random.default_rng(seed)
+    if periods is None:
+        dates = pd.date_range(start=start, end=end, freq=freq)
+    else:
+        dates = pd.date_range(start=start, periods=periods, freq=freq)
+    n = len(dates)
+    close = 100 * (1 + rng.normal(drift, 0.02, n)).cumprod()
+    open_ = close * (1 + rng.normal(0, open_noise, n)) if open_noise else close
+    frame = pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) * 1.01,
+                          'low': np.minimum(open_, close) * 0.99, 'close': close,
+                          'volume': rng.integers(1000, 10000, n)}, index=dates)
+    if capitalize:
+        frame.columns = [c.capitalize() for c in frame.columns]
+    return frame
@@ -0,0 +1,168 @@
+"""
+A 股成交模型测试用例
+
+测试 A 股成交模型的各项功能：
+- 涨跌停价、整手取整、交易费用的计算
+- backtrader：买入整手取整，开盘涨停不买入、开盘跌停不卖出，委托保留到下一根 K 线
+- backtrader：T+1，当天买入的股票当天不能卖出
+- PortfolioEngine：涨跌停当天不成交，费用按模型计算
+- VectorEngine：目标持仓和目标权重按模型取整、涨跌停不成交、计算费用，与 PortfolioEngine 一致
+"""
+
+import unittest
+
+import backtrader
+import numpy as np
+import pandas as pd
+
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.fill_model import AShareFillModel
+from backTest.engine.portfolio_engine import PortfolioEngine
+from backTest.engine.vector_engine import VectorEngine
+
+
+def create_bars(open_, close):
+    """
+    由开盘价和收盘价创建日线数据，最高价/最低价取两者的最大值/最小值
+
+    Returns:
+        pd.DataFrame: 以 datetime 为索引的 OHLCV 数据
+    """
+    open_, close = np.asarray(open_, dtype=float), np.asarray(close, dtype=float)
+    dates = pd.bdate_range('2024-01-01', periods=len(close))
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close), 'low': np.minimum(open_, close),
+                         'close': close, 'volume': 10000}, index=dates)
+
+
+class ScriptedStrategy(backtrader.Strategy):
+    """按 K 线序号下单的策略，记录成交"""
+
+    params = (
+        ('orders', {}),
+    )
+
+    def __init__(self):
+        """初始化策略"""
+        self.fills = []
+
+    def next(self):
+        """按脚本下单"""
+        for method, kwargs in self.p.orders.get(len(self) - 1, []):
+            getattr(self, method)(**kwargs)
+
+    def notify_order(self, order):
+        """记录成交的 K 线序号、数量、价格和费用"""
+        if order.status == order.Completed:
+            self.fills.append((len(self) - 1, order.executed.size, order.executed.price, order.executed.comm))
+
+
+class TestFillModel(unittest.TestCase):
+    """A 股成交模型测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.model = AShareFillModel()
+
+    def _run(self, data, orders):
+        engine = BacktestEngine(initial_cash=1e5, fill_model=self.model, analyzers='none')
+        engine.add_data(data, name='600000.SH')
+        engine.add_strategy(ScriptedStrategy, orders=orders)
+        engine.run()
+        return engine.cerebro.runstrats[0][0].fills
+
+    def test_rules(self):
+        """测试涨跌停价、整手取整和交易费用"""
+        up, down = self.model.limit_prices(np.array([10.0, 12.35]), np.array([0.1, 0.2]))
+        np.testing.assert_allclose(up, [11.0, 14.82])
+        np.testing.assert_allclose(down, [9.0, 9.88])
+        np.testing.assert_allclose(self.model.price_limits(['600000.SH', '300750.SZ', '830799.BJ']), [0.1, 0.2, 0.3])
+        model = AShareFillModel(limits={'600000.SH': 0.05})
+        np.testing.assert_allclose(model.price_limits(['600000.SH', '688001.SH']), [0.05, 0.2])
+        model = AShareFillModel(st_symbols=['000004.SZ', '688001.SH'])
+        np.testing.assert_allclose(model.price_limits(['000004.SZ', '688001.SH', '600000.SH']), [0.05, 0.2, 0.1])
+        np.testing.assert_allclose(self.model.price_limits(['000004.SZ'], is_st=[True]), [0.05])
+
+        blocked = self.model.blocked(np.array([1, 1, -1, -1]), np.array([11.0, 10.99, 9.0, 9.01]),
+                                     np.full(4, 10.0), np.full(4, 0.1))
+        np.testing.assert_array_equal(blocked, [True, False, True, False])
+
+        rounded = self.model.round_targets([0, 1000, 1050, 1050, 0], [150, 250, 1000, 0, -100])
+        np.testing.assert_array_equal(rounded, [100, 300, 1050, 0, 0])
+
+        # 买入 1 万元：最低佣金 5 元 + 过户费；卖出 10 万元：佣金 25 元 + 过户费 1 元 + 印花税 50 元
+        np.testing.assert_allclose(self.model.costs([1000, -1000, 0], [10.0, 100.0, 10.0]), [5.1, 76.0, 0.0])
+
+    def test_lot_and_limit(self):
+        """测试买入整手取整，开盘涨停不买入、开盘跌停不卖出，委托留到下一根 K 线"""
+        data = create_bars(open_=[10, 10, 11, 11, 11, 9.9, 10.5], close=[10, 10, 11, 11, 11, 11, 11])
+        fills = self._run(data, {0: [('buy', {'size': 150})], 1: [('buy', {'size': 100})],
+                                 4: [('sell', {'size': 250})]})
+        # 第 2 根开盘涨停（前收 10.00，涨停 11.00），第 5 根开盘跌停（前收 11.00，跌停 9.90）
+        self.assertEqual([(bar, size, price) for bar, size, price, _ in fills],
+                         [(1, 100, 10.0), (3, 100, 11.0), (6, -200, 10.5)])
+        self.assertAlmostEqual(fills[0][3], 5.01)
+        self.assertAlmostEqual(fills[2][3], 5.0 + 2100 * (0.00001 + 0.0005))
+
+    def test_t_plus_one(self):
+        """测试当天买入的股票当天不能卖出"""
+        data = create_bars(open_=[10] * 5, close=[10] * 5)
+        stop = {'size': 100, 'exectype': backtrader.Order.Stop, 'price': 20.0}
+        fills = self._run(data, {0: [('buy', {'size': 100}), ('sell', stop)]})
+        self.assertEqual([(bar, size) for bar, size, _, _ in fills], [(1, 100), (2, -100)])
+
+        # 没有成交模型时止损单在买入当天成交
+        engine = BacktestEngine(initial_cash=1e5, analyzers='none')
+        engine.add_data(data, name='600000.SH')
+        engine.add_strategy(ScriptedStrategy, orders={0: [('buy', {'size': 100}), ('sell', stop)]})
+        engine.run()
+        self.assertEqual([(bar, size) for bar, size, _, _ in engine.cerebro.runstrats[0][0].fills],
+                         [(1, 100), (1, -100)])
+
+    def test_portfolio_engine(self):
+        """测试组合回测引擎：开盘涨停不买入、开盘跌停不卖出，费用按模型计算"""
+        dates = pd.bdate_range('2024-01-01', periods=10)
+        symbols = ['600000.SH', '600001.SH']
+        close = pd.DataFrame(10.0, index=dates, columns=symbols)
+        open_ = close.copy()
+        open_.iloc[1, 0] = 11.0
+        open_.iloc[6, 0] = 9.0
+        weights = pd.DataFrame(0.3905, index=dates, columns=symbols)
+        weights.iloc[5:, 0] = 0.0
+
+        engine = PortfolioEngine(initial_cash=1e6, fill_model=self.model)
+        result = engine.run(close, weights, open_=open_)
+        trades = engine.trades
+        self.assertEqual(list(zip(trades['date'], trades['symbol'], trades['qty'])),
+                         [(dates[1], symbols[1], 39000), (dates[2], symbols[0], 39000),
+                          (dates[7], symbols[0], -39000)])
+        np.testing.assert_allclose(trades['commission'], self.model.costs(trades['qty'], trades['price']))
+        self.assertAlmostEqual(result['final_value'], 1e6 - trades['commission'].sum())
+
+    def test_vector_engine(self):
+        """测试向量化回测引擎：整手取整、开盘涨停不买入、开盘跌停不卖出，费用按模型计算"""
+        dates = pd.bdate_range('2024-01-01', periods=10)
+        symbols = ['600000.SH', '600001.SH']
+        close = pd.DataFrame(10.0, index=dates, columns=symbols)
+        open_ = close.copy()
+        open_.iloc[1, 0] = 11.0
+        open_.iloc[6, 0] = 9.0
+        weights = pd.DataFrame(0.3905, index=dates, columns=symbols)
+        weights.iloc[5:, 0] = 0.0
+
+        portfolio = PortfolioEngine(initial_cash=1e6, fill_model=self.model)
+        expected = portfolio.run(close, weights, open_=open_)
+        engine = VectorEngine(initial_cash=1e6, fill_model=self.model)
+        result = engine.run_weights(close, weights, open_=open_)
+        self.assertAlmostEqual(result['final_value'], expected['final_value'])
+        self.assertEqual(engine.positions.iloc[[1, 2, 6, 7]].to_numpy().tolist(),
+                         [[0, 39000], [39000, 39000], [39000, 39000], [0, 39000]])
+
+        # 目标持仓：150 股取整为 100 股，第 2 天开盘涨停不买入，费用含最低佣金
+        targets = pd.DataFrame({symbols[0]: [150.0] + [np.nan] * 9, symbols[1]: [0.0] * 10}, index=dates)
+        result = engine.run_targets(close, targets, open_=open_)
+        self.assertEqual(engine.positions[symbols[0]].tolist(), [0, 0, 100, 100, 100, 100, 100, 100, 100, 100])
+        self.assertAlmostEqual(result['final_value'], 1e6 - self.model.costs([100], [10.0])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+指标缓存测试用例
+
+测试指标缓存的各项功能：
+- 向量化指标与 backtrader 同名指标一致
+- 预计算指标的回测结果与 backtrader 指标一致
+- 内存和磁盘缓存
+- BaseStrategy 按需声明指标
+"""
+
+import tempfile
+import unittest
+
+import backtrader
+import numpy as np
+
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.strategy_backtest.base_strategy import DEFAULT_INDICATORS, BaseStrategy
+from backTest.strategy_backtest.indicator_cache import (INDICATORS, IndicatorCache, PrecomputedIndicator,
+                                                        build_indicator, set_indicator_cache)
+from tests.backtest.helpers import create_test_data
+
+
+# 与 INDICATORS 对应的 backtrader 指标和非默认参数
+NATIVE_CASES = [
+    ('sma', {'period': 20}),
+    ('ema', {'period': 10}),
+    ('macd', {}),
+    ('rsi', {'period': 14}),
+    ('boll', {'period': 20, 'devfactor': 2.5}),
+    ('atr', {'period': 14}),
+]
+
+
+class CollectStrategy(backtrader.Strategy):
+    """同时构造 backtrader 指标和预计算指标"""
+
+    params = (
+        ('cache', None),
+    )
+
+    def __init__(self):
+        """初始化策略"""
+        self.native = {name: INDICATORS[name][3](self.data, **params) for name, params in NATIVE_CASES}
+        self.precomputed = {name: build_indicator(self.data, name, cache=self.p.cache, **params)
+                            for name, params in NATIVE_CASES}
+
+
+class NativeCross(backtrader.Strategy):
+    """均线交叉策略，使用 backtrader 指标"""
+
+    def __init__(self):
+        """初始化策略"""
+        self.crossover = backtrader.indicators.CrossOver(backtrader.indicators.EMA(period=10),
+                                                         backtrader.indicators.SMA(period=30))
+        self.rsi = backtrader.indicators.RSI(period=14)
+
+    def next(self):
+        """策略逻辑"""
+        if not self.position and self.crossover > 0 and self.rsi < 70:
+            self.buy()
+        elif self.position and self.crossover < 0:
+            self.sell()
+
+
+class CachedCross(BaseStrategy, NativeCross):
+    """均线交叉策略，通过 BaseStrategy 使用预计算指标"""
+
+    indicators = {'rsi': ('rsi', {'period': 14})}
+
+    def __init__(self):
+        """初始化策略"""
+        BaseStrategy.__init__(self)
+        self.crossover = backtrader.indicators.CrossOver(self.indicator('ema', period=10),
+                                                         self.indicator('sma', period=30))
+
+    def next(self):
+        """策略逻辑"""
+        NativeCross.next(self)
+
+    def notify_order(self, order):
+        """不使用 BaseStrategy 的止损止盈单"""
+
+
+def run_strategy(strategy, data, preload=True, **kwargs):
+    """运行策略并返回策略实例"""
+    cerebro = backtrader.Cerebro()
+    cerebro.adddata(backtrader.feeds.PandasData(dataname=data), name='600000.SH')
+    cerebro.addstrategy(strategy, **kwargs)
+    return cerebro.run(preload=preload)[0]
+
+
+class TestIndicatorCache(unittest.TestCase):
+    """指标缓存测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.data = create_test_data(periods=300, freq='B', drift=0.0005, open_noise=0.005)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = IndicatorCache(root=self.tmpdir.name)
+        set_indicator_cache(self.cache)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        set_indicator_cache(None)
+        self.tmpdir.cleanup()
+
+    def test_match_backtrader(self):
+        """测试向量化指标与 backtrader 指标逐根一致"""
+        for runonce in (True, False):
+            cerebro = backtrader.Cerebro(runonce=runonce)
+            cerebro.adddata(backtrader.feeds.PandasData(dataname=self.data))
+            cerebro.addstrategy(CollectStrategy, cache=self.cache)
+            strategy = cerebro.run()[0]
+            for name, _ in NATIVE_CASES:
+                native, precomputed = strategy.native[name], strategy.precomputed[name]
+                self.assertIsInstance(precomputed, PrecomputedIndicator)
+                self.assertEqual(precomputed._minperiod, native._minperiod, name)
+                for line in INDICATORS[name][2]:
+                    expected = np.array(getattr(native.lines, line).array)
+                    actual = np.array(getattr(precomputed.lines, line).array)
+                    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                               err_msg=f'{name}.{line}')
+
+    def test_same_backtest_result(self):
+        """测试使用预计算指标的回测结果与 backtrader 指标一致"""
+        results = []
+        for strategy in (NativeCross, CachedCross):
+            engine = BacktestEngine(stake=10)
+            engine.add_data(self.data, name='600000.SH')
+            engine.add_strategy(strategy)
+            results.append(engine.run())
+        for key in ('final_value', 'total_trades', 'max_drawdown'):
+            self.assertAlmostEqual(results[0][key], results[1][key], places=8)
+        self.assertGreater(results[0]['total_trades'], 0)
+
+    def test_cache_hits(self):
+        """测试内存缓存和磁盘缓存"""
+        run_strategy(CachedCross, self.data)
+        self.assertEqual(self.cache.stats, {'memory': 0, 'disk': 0, 'computed': 3})
+        run_strategy(CachedCross, self.data)
+        self.assertEqual(self.cache.stats, {'memory': 3, 'disk': 0, 'computed': 3})
+
+        other = IndicatorCache(root=self.tmpdir.name)
+        set_indicator_cache(other)
+        run_strategy(CachedCross, self.data)
+        self.assertEqual(other.stats, {'memory': 0, 'disk': 3, 'computed': 0})
+
+        # 数据变化时重新计算
+        changed = self.data.copy()
+        changed.iloc[-1, changed.columns.get_loc('close')] *= 1.01
+        run_strategy(CachedCross, changed)
+        self.assertEqual(other.stats['computed'], 3)
+
+    def test_opt_in(self):
+        """测试 BaseStrategy 默认不构造指标，声明后才构造"""
+
+        class Empty(BaseStrategy):
+            def next(self):
+                pass
+
+        class Declared(Empty):
+            indicators = DEFAULT_INDICATORS
+
+        self.assertEqual(len(run_strategy(Empty, self.data).getindicators()), 0)
+        strategy = run_strategy(Declared, self.data)
+        self.assertEqual(len(strategy.getindicators()), len(DEFAULT_INDICATORS))
+        self.assertTrue(hasattr(strategy.boll.lines, 'top'))
+        self.assertTrue(hasattr(strategy.macd.lines, 'signal'))
+
+    def test_no_preload_fallback(self):
+        """测试未预加载时退回 backtrader 指标"""
+        strategy = run_strategy(CachedCross, self.data, preload=False)
+        self.assertIsInstance(strategy.rsi, backtrader.indicators.RSI)
+        self.assertEqual(self.cache.stats['computed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
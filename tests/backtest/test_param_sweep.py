@@ -0,0 +1,177 @@
+"""
+参数扫描测试用例
+
+测试参数扫描的各项功能：
+- 网格、随机、拉丁超立方抽样
+- 多进程结果与单进程、直接运行 BacktestEngine 一致
+- 断点续跑
+- 失败任务的记录
+"""
+
+import os
+import tempfile
+import unittest
+
+import backtrader
+import pandas as pd
+
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.optimization.param_sweep import (ParamSweep, grid_params, latin_hypercube_params, load_checkpoint,
+                                               params_key, random_params)
+from tests.backtest.helpers import create_test_data
+
+
+class SweepStrategy(backtrader.Strategy):
+    """均线交叉策略，fail 为真时抛出异常"""
+
+    params = (
+        ('fast_period', 5),
+        ('slow_period', 20),
+        ('fail', False),
+    )
+
+    def __init__(self):
+        """初始化策略"""
+        if self.params.fail:
+            raise ValueError('参数错误')
+        fast = backtrader.indicators.SMA(self.data, period=self.params.fast_period)
+        slow = backtrader.indicators.SMA(self.data, period=self.params.slow_period)
+        self.crossover = backtrader.indicators.CrossOver(fast, slow)
+
+    def next(self):
+        """策略逻辑"""
+        if not self.position:
+            if self.crossover > 0:
+                self.buy()
+        elif self.crossover < 0:
+            self.sell()
+
+
+class SlowSweepStrategy(SweepStrategy):
+    """源码不同的均线交叉策略，只在没有持仓时交易"""
+
+    def next(self):
+        """策略逻辑"""
+        if not self.position and self.crossover > 0:
+            self.buy()
+
+
+class TestSamplers(unittest.TestCase):
+    """参数抽样测试类"""
+
+    def test_grid(self):
+        """测试网格扫描"""
+        params = grid_params({'fast_period': range(3, 6), 'slow_period': [20, 30]})
+        self.assertEqual(len(params), 6)
+        self.assertEqual(params[0], {'fast_period': 3, 'slow_period': 20})
+        self.assertIsInstance(params[0]['fast_period'], int)
+        with self.assertRaises(ValueError):
+            grid_params({'fast_period': (3, 10)})
+
+    def test_random(self):
+        """测试随机扫描"""
+        space = {'fast_period': (3, 10), 'ratio': (0.5, 1.5), 'mode': ['a', 'b']}
+        params = random_params(space, 50, seed=1)
+        self.assertEqual(params, random_params(space, 50, seed=1))
+        self.assertTrue(all(3 <= p['fast_period'] <= 10 and isinstance(p['fast_period'], int) for p in params))
+        self.assertTrue(all(0.5 <= p['ratio'] < 1.5 for p in params))
+        self.assertEqual({p['mode'] for p in params}, {'a', 'b'})
+
+    def test_latin_hypercube(self):
+        """测试拉丁超立方扫描：每个分层恰好一个样本"""
+        n = 20
+        params = latin_hypercube_params({'ratio': (0.0, 1.0), 'period': (1, 20)}, n, seed=3)
+        strata = sorted(int(p['ratio'] * n) for p in params)
+        self.assertEqual(strata, list(range(n)))
+        self.assertEqual(sorted(p['period'] for p in params), list(range(1, 21)))
+
+
+class TestParamSweep(unittest.TestCase):
+    """参数扫描测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.data = create_test_data()
+        self.engine_kwargs = {'initial_cash': 100000.0, 'commission': 0.001, 'stake': 10}
+        self.params = grid_params({'fast_period': [3, 5, 8], 'slow_period': [15, 25]})
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'sweep.jsonl')
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.tmpdir.cleanup()
+
+    def test_parallel_matches_engine(self):
+        """测试多进程结果与直接运行 BacktestEngine 一致"""
+        parallel = ParamSweep(SweepStrategy, self.data, engine_kwargs=self.engine_kwargs, n_jobs=2).run(self.params)
+        serial = ParamSweep(SweepStrategy, self.data, engine_kwargs=self.engine_kwargs, n_jobs=1).run(self.params)
+        self.assertEqual(len(parallel), len(self.params))
+        parallel = parallel.set_index('task_id').sort_index()
+        serial = serial.set_index('task_id').sort_index()
+        columns = [c for c in parallel.columns if c != 'elapsed']
+        pd.testing.assert_frame_equal(parallel[columns], serial[columns])
+
+        engine = BacktestEngine(**self.engine_kwargs)
+        engine.add_data(self.data)
+        engine.add_strategy(SweepStrategy, fast_period=5, slow_period=25)
+        expected = engine.run()
+        row = parallel.loc[params_key({'fast_period': 5, 'slow_period': 25})]
+        for key in ('final_value', 'return', 'max_drawdown', 'total_trades', 'vwr'):
+            self.assertAlmostEqual(row[key], expected[key], places=10)
+
+    def test_resume(self):
+        """测试断点续跑：已完成的参数组合不再运行，写入中断的记录被忽略"""
+        sweep = ParamSweep(SweepStrategy, self.data, engine_kwargs=self.engine_kwargs, n_jobs=1,
+                           checkpoint=self.checkpoint)
+        sweep.run(self.params[:4])
+        with open(self.checkpoint, 'a', encoding='utf-8') as f:
+            f.write('{"task_id": "trunc')
+        self.assertEqual(len(load_checkpoint(self.checkpoint)), 4)
+
+        results = sweep.run(self.params)
+        self.assertEqual(sweep.stats['skipped'], 4)
+        self.assertEqual(sweep.stats['done'], 2)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(set(results['task_id']), {params_key(p) for p in self.params})
+
+        sweep.run(self.params)
+        self.assertEqual(sweep.stats['done'], 0)
+
+    def test_resume_config(self):
+        """测试断点续跑：策略、行情数据、引擎参数变化后旧记录不再跳过"""
+        def sweep_with(strategy=SweepStrategy, data=None, **engine_kwargs):
+            return ParamSweep(strategy, self.data if data is None else data,
+                              engine_kwargs={**self.engine_kwargs, **engine_kwargs}, n_jobs=1,
+                              checkpoint=self.checkpoint)
+
+        first = sweep_with().run(self.params[:2])
+        for sweep in (sweep_with(commission=0.002), sweep_with(data=self.data * 1.01),
+                      sweep_with(strategy=SlowSweepStrategy)):
+            results = sweep.run(self.params[:2])
+            self.assertEqual((sweep.stats['skipped'], sweep.stats['done']), (0, 2))
+            self.assertEqual(len(results), 2)
+
+        sweep = sweep_with(commission=0.002)
+        results = sweep.run(self.params[:2])
+        self.assertEqual((sweep.stats['skipped'], sweep.stats['done']), (2, 0))
+        self.assertNotEqual(set(results['config']), set(first['config']))
+        self.assertNotEqual(results.sort_values('task_id')['final_value'].tolist(),
+                            first.sort_values('task_id')['final_value'].tolist())
+
+    def test_failure(self):
+        """测试失败的参数组合被记录，重跑失败时重新运行"""
+        params = [{'fail': True}, {'fail': False}]
+        sweep = ParamSweep(SweepStrategy, self.data, engine_kwargs=self.engine_kwargs, n_jobs=1,
+                           checkpoint=self.checkpoint)
+        results = sweep.run(params).set_index('fail')
+        self.assertIn('ValueError', results.loc[True, 'error'])
+        self.assertIsNone(results.loc[False, 'error'])
+        self.assertEqual(sweep.stats['failed'], 1)
+
+        sweep.retry_failed = True
+        sweep.run(params)
+        self.assertEqual(sweep.stats['done'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+绩效指标测试用例
+
+测试绩效指标模块的各项功能：
+- 收益、Sharpe、Sortino、回撤与逐项手工计算一致
+- 滚动指标与 pandas rolling 一致
+- 关闭 backtrader 分析器后 BacktestEngine 的结果不变
+- 分析器配置 none / minimal / standard / full
+- PerformanceAnalyzer 同时支持 backtrader 策略和 VectorEngine
+"""
+
+import math
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.vector_engine import VectorEngine, cross_signals
+from backTest.performance.metrics import drawdown_series, performance_metrics, rolling_sharpe, trade_statistics
+from backTest.performance.performance_analyzer import PerformanceAnalyzer
+from tests.backtest.helpers import create_test_data
+from tests.backtest.test_vector_engine import CrossStrategy
+
+
+class TestMetrics(unittest.TestCase):
+    """绩效指标测试类"""
+
+    def test_returns_and_ratios(self):
+        """测试收益和风险调整收益"""
+        equity = np.array([100.0, 110.0, 99.0, 108.9, 120.0])
+        result = performance_metrics(equity, initial_value=100.0, periods_per_year=252)
+        returns = np.array([0.0, 0.1, -0.1, 0.1, 120.0 / 108.9 - 1])
+        np.testing.assert_allclose(result['series']['returns'].to_numpy(), returns)
+        self.assertAlmostEqual(result['returns']['total_return'], 0.2)
+        self.assertAlmostEqual(result['returns']['annual_return'], 1.2 ** (252 / 5) - 1)
+        self.assertAlmostEqual(result['sharpe'], returns.mean() / returns.std(ddof=1) * math.sqrt(252))
+        downside = math.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+        self.assertAlmostEqual(result['sortino'], returns.mean() / downside * math.sqrt(252))
+
+    def test_drawdown(self):
+        """测试回撤"""
+        index = pd.bdate_range('2020-01-01', periods=7)
+        equity = pd.Series([100.0, 120.0, 90.0, 60.0, 90.0, 130.0, 117.0], index=index)
+        drawdown, duration = drawdown_series(equity.to_numpy())
+        np.testing.assert_allclose(drawdown, [0, 0, 0.25, 0.5, 0.25, 0, 0.1])
+        np.testing.assert_array_equal(duration, [0, 0, 1, 2, 3, 0, 1])
+
+        result = performance_metrics(equity)['drawdown']
+        self.assertAlmostEqual(result['max_drawdown'], 0.5)
+        self.assertEqual(result['max_drawdown_period'], 3)
+        self.assertEqual(result['max_drawdown_start'], index[1])
+        self.assertEqual(result['max_drawdown_end'], index[3])
+        self.assertAlmostEqual(result['current_drawdown'], 0.1)
+
+    def test_rolling_and_trades(self):
+        """测试滚动 Sharpe 和交易统计"""
+        returns = np.random.default_rng(0).normal(0.001, 0.01, 200)
+        expected = pd.Series(returns).rolling(20).mean() / pd.Series(returns).rolling(20).std() * math.sqrt(252)
+        np.testing.assert_allclose(rolling_sharpe(returns, 20), expected.to_numpy(), rtol=1e-8, equal_nan=True)
+
+        stats = trade_statistics([10.0, -5.0, 0.0, -15.0, 30.0])
+        self.assertEqual((stats['total_trades'], stats['won'], stats['lost']), (5, 3, 2))
+        self.assertAlmostEqual(stats['profit_factor'], 2.0)
+        self.assertAlmostEqual(stats['expectancy'], 4.0)
+        self.assertAlmostEqual(stats['avg_loss'], -10.0)
+
+
+class TestEngines(unittest.TestCase):
+    """回测引擎的绩效计算测试类"""
+
+    PARAMS = dict(initial_cash=100000.0, commission=0.001, stake=10, slippage=0.005)
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.data = create_test_data(start='2019-01-01', end='2021-06-30')
+
+    def _run(self, profile, analyzer=None):
+        engine = BacktestEngine(analyzers=profile, **self.PARAMS)
+        engine.add_data(self.data, name='600000.SH')
+        engine.add_strategy(CrossStrategy)
+        if analyzer is not None:
+            analyzer.add_to_cerebro(engine.cerebro)
+        return engine, engine.run()
+
+    def test_without_analyzers(self):
+        """测试关闭 backtrader 分析器后结果逐项一致"""
+        _, expected = self._run('full')
+        _, actual = self._run('standard')
+        self.assertGreater(expected['total_trades'], 0)
+        self.assertEqual(expected.keys(), actual.keys())
+        for key in ('final_value', 'return', 'annual_return', 'sharpe_ratio', 'max_drawdown', 'vwr', 'win_rate'):
+            self.assertAlmostEqual(actual[key], expected[key], places=9, msg=key)
+        for key in ('max_drawdown_len', 'total_trades', 'won_trades', 'lost_trades'):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertEqual(list(actual['time_returns']), list(expected['time_returns']))
+        np.testing.assert_allclose(list(actual['time_returns'].values()), list(expected['time_returns'].values()),
+                                   atol=1e-12)
+
+    def test_profiles(self):
+        """测试分析器配置：结果只包含已添加的分析器对应的键，数值与 full 一致"""
+        full = self._run('full')[1]
+        none = self._run('none')[1]
+        self.assertEqual(set(none), {'final_value', 'return'})
+        self.assertAlmostEqual(none['return'], full['return'], places=9)
+
+        minimal = self._run('minimal')[1]
+        self.assertNotIn('time_returns', minimal)
+        for key in ('final_value', 'return', 'max_drawdown', 'max_drawdown_len', 'total_trades', 'won_trades',
+                    'lost_trades', 'win_rate'):
+            self.assertAlmostEqual(minimal[key], full[key], places=9, msg=key)
+
+        standard = self._run('standard')[1]
+        self.assertEqual(set(standard), set(full))
+        with self.assertRaises(ValueError):
+            BacktestEngine(analyzers='fast')
+
+    def test_analyzer_backtrader_and_vector(self):
+        """测试 PerformanceAnalyzer 对 backtrader 和 VectorEngine 的结果一致"""
+        analyzer = PerformanceAnalyzer()
+        engine, _ = self._run('full', analyzer)
+        expected = analyzer.analyze(engine.cerebro.runstrats[0][0])
+
+        close = self.data[['close']].rename(columns={'close': '600000.SH'})
+        vector = VectorEngine(**self.PARAMS)
+        vector.run_signals(close, cross_signals(close.rolling(5).mean(), close.rolling(20).mean()),
+                           open_=close, high=close * 1.01, low=close * 0.99)
+        actual = analyzer.analyze(vector)
+
+        for key in ('total_return', 'annual_return', 'annual_volatility'):
+            self.assertAlmostEqual(actual['returns'][key], expected['returns'][key], places=9)
+        self.assertAlmostEqual(actual['sharpe'], expected['sharpe'], places=9)
+        self.assertAlmostEqual(actual['drawdown']['max_drawdown'], expected['drawdown']['max_drawdown'], places=9)
+        self.assertAlmostEqual(actual['turnover']['total'], expected['turnover']['total'], places=9)
+        self.assertGreater(expected['turnover']['total'], 0)
+        self.assertEqual(actual['trade'].keys(), expected['trade'].keys())
+        for key, value in expected['trade'].items():
+            self.assertAlmostEqual(actual['trade'][key], value, places=6, msg=key)
+
+
+if __name__ == '__main__':
+    unittest.main()
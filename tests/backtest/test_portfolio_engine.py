@@ -0,0 +1,150 @@
+"""
+组合回测引擎测试用例
+
+测试组合回测引擎的各项功能：
+- 与 VectorEngine.run_weights 的结果一致
+- 停牌日不成交，估值使用最后收盘价
+- 退市清算、股票池（指数成分）变化
+- 横截面调仓回调和 PanelStore memmap 输入
+- 持仓记录只随持仓变化增长
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from backTest.engine.portfolio_engine import PortfolioEngine
+from backTest.engine.vector_engine import VectorEngine
+from backTest.performance.performance_analyzer import PerformanceAnalyzer
+from data.store.panel_store import PanelStore
+
+
+def create_panel(n_dates=250, n_symbols=40, seed=7):
+    """
+    创建 (日期 × 股票) 的开盘价和收盘价矩阵
+
+    Returns:
+        tuple: (open, close)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2021-01-01', periods=n_dates)
+    symbols = [f'{600000 + i:06d}.SH' for i in range(n_symbols)]
+    close = 10 * np.cumprod(1 + rng.normal(0.0005, 0.02, (n_dates, n_symbols)), axis=0)
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    return (pd.DataFrame(open_, index=dates, columns=symbols), pd.DataFrame(close, index=dates, columns=symbols))
+
+
+def monthly_top_weights(close, n=5):
+    """每月第一个交易日等权持有 20 日涨幅最高的 n 只股票"""
+    momentum = close / close.shift(20) - 1
+    month_start = close.index.to_series().groupby(close.index.to_period('M')).first()
+    rows = []
+    for date in month_start.iloc[1:]:
+        top = momentum.loc[date].nlargest(n).index
+        rows.append(pd.Series(0.0, index=close.columns).where(~close.columns.isin(top), 0.95 / n).rename(date))
+    return pd.DataFrame(rows)
+
+
+class TestPortfolioEngine(unittest.TestCase):
+    """组合回测引擎测试类"""
+
+    PARAMS = dict(initial_cash=1e6, commission=0.001, slippage=0.002)
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.open, self.close = create_panel()
+        self.weights = monthly_top_weights(self.close)
+
+    def test_match_vector_engine(self):
+        """测试与 VectorEngine.run_weights 的结果逐项一致"""
+        engine = PortfolioEngine(**self.PARAMS)
+        actual = engine.run(self.close, self.weights, open_=self.open, lot_size=100)
+        expected = VectorEngine(**self.PARAMS).run_weights(self.close, self.weights.reindex(self.close.index),
+                                                           open_=self.open, lot_size=100)
+        for key in ('final_value', 'return', 'sharpe_ratio', 'max_drawdown', 'vwr', 'win_rate'):
+            self.assertAlmostEqual(actual[key], expected[key], places=6, msg=key)
+        for key in ('max_drawdown_len', 'total_trades', 'won_trades', 'lost_trades'):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertGreater(actual['total_trades'], 10)
+
+        # 持仓记录只在持仓变化的日期保存，与 VectorEngine 的稠密持仓一致
+        vector = VectorEngine(**self.PARAMS)
+        vector.run_weights(self.close, self.weights.reindex(self.close.index), open_=self.open, lot_size=100)
+        dense = engine.positions.pivot(index='date', columns='symbol', values='qty')
+        last = engine.positions['date'].max()
+        held = dense.loc[last].dropna()
+        pd.testing.assert_series_equal(held, vector.positions.loc[last, held.index], check_names=False)
+        self.assertLessEqual(engine.positions['date'].nunique(), len(self.weights))
+
+        result = PerformanceAnalyzer().analyze(engine)
+        self.assertAlmostEqual(result['returns']['total_return'], actual['final_value'] / 1e6 - 1)
+
+    def test_suspension(self):
+        """测试停牌日不成交，估值使用最后一个有效收盘价"""
+        symbol = self.close.columns[0]
+        date = self.close.index[100]
+        weights = pd.DataFrame({symbol: [0.5]}, index=[self.close.index[99]])
+        open_, close = self.open.copy(), self.close.copy()
+        open_.loc[date, symbol] = np.nan
+        engine = PortfolioEngine(**self.PARAMS)
+        engine.run(close, weights, open_=open_)
+        self.assertTrue(engine.trades.empty)
+
+        weights = pd.DataFrame({symbol: [0.5]}, index=[self.close.index[98]])
+        close.loc[date, symbol] = np.nan
+        engine.run(close, weights, open_=open_)
+        qty = engine.trades['qty'].iloc[0]
+        self.assertAlmostEqual(engine.equity[date] - engine.equity[self.close.index[99]], 0.0)
+        self.assertAlmostEqual(engine.equity.iloc[-1] - engine.equity[date],
+                               qty * (close[symbol].iloc[-1] - close[symbol].iloc[99]))
+
+    def test_delisting_and_universe(self):
+        """测试退市清算和股票池变化"""
+        a, b = self.close.columns[:2]
+        weights = pd.DataFrame({a: [0.4, 0.4], b: [0.4, 0.4]}, index=self.close.index[[10, 60]])
+        listed = pd.DataFrame(True, index=self.close.index, columns=self.close.columns)
+        listed.loc[self.close.index[40]:, a] = False
+        universe = listed.copy()
+        universe.loc[self.close.index[60]:, b] = False
+
+        engine = PortfolioEngine(**self.PARAMS)
+        result = engine.run(self.close, weights, open_=self.open, universe=universe, listed=listed)
+        trades = engine.trades
+        # a 在退市日按最后收盘价清算，b 在调出股票池后的调仓日卖出，之后没有持仓
+        exit_a = trades[(trades['symbol'] == a) & (trades['qty'] < 0)].iloc[0]
+        self.assertEqual(exit_a['date'], self.close.index[40])
+        self.assertAlmostEqual(exit_a['price'], self.close[a].iloc[39])
+        exit_b = trades[(trades['symbol'] == b) & (trades['qty'] < 0)].iloc[0]
+        self.assertEqual(exit_b['date'], self.close.index[61])
+        self.assertEqual(len(trades), 4)
+        self.assertEqual((result['total_trades'], result['won_trades'] + result['lost_trades']), (2, 2))
+        self.assertAlmostEqual(result['final_value'], engine.equity.iloc[-1])
+
+    def test_callback_and_panel(self):
+        """测试横截面调仓回调，PanelStore 的 memmap 输入与 DataFrame 输入结果一致"""
+        def rebalance(ctx):
+            momentum = ctx.close[ctx.t] / ctx.close[max(ctx.t - 20, 0)] - 1
+            momentum = np.where(ctx.universe, momentum, np.nan)
+            top = np.argsort(-np.nan_to_num(momentum, nan=-np.inf))[:5]
+            return pd.Series(0.95 / 5, index=ctx.symbols[top])
+
+        expected = PortfolioEngine(**self.PARAMS).run(self.close, self.weights, open_=self.open, lot_size=100)
+        dates = list(self.weights.index)
+        actual = PortfolioEngine(**self.PARAMS).run(self.close, rebalance, open_=self.open, rebalance_dates=dates,
+                                                    lot_size=100)
+        self.assertAlmostEqual(actual['final_value'], expected['final_value'], places=6)
+
+        with tempfile.TemporaryDirectory() as root:
+            store = PanelStore('daily', root=root)
+            store.write_frames({'open': self.open, 'close': self.close})
+            engine = PortfolioEngine(**self.PARAMS)
+            panel = engine.run_panel(store, rebalance, rebalance_dates=[int(d.strftime('%Y%m%d')) for d in dates],
+                                     lot_size=100)
+        self.assertAlmostEqual(panel['final_value'], expected['final_value'], places=6)
+        self.assertEqual(panel['total_trades'], expected['total_trades'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+回测结果缓存测试用例
+
+测试回测结果缓存的各项功能：
+- 相同的回测命中缓存，结果和资金曲线与实际运行一致
+- 策略参数、设置、分析器配置、数据变化时不命中
+- 策略源码的指纹
+- 无法计算指纹的数据源不使用缓存
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import backtrader
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import SharedMarketData
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.result_cache import ResultCache, strategy_fingerprint
+from tests.backtest.helpers import create_test_data
+from tests.backtest.test_vector_engine import CrossStrategy
+
+
+class SlowCross(CrossStrategy):
+    """参数不同的均线交叉策略"""
+
+    params = (
+        ('fast_period', 10),
+    )
+
+
+class TestResultCache(unittest.TestCase):
+    """回测结果缓存测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ResultCache(cache_dir=self.tmp_dir)
+        self.data = create_test_data()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, data=None, strategy=CrossStrategy, engine_kwargs=None, **kwargs):
+        engine = BacktestEngine(**{'stake': 10, **(engine_kwargs or {})})
+        engine.add_data(self.data if data is None else data, name='600000.SH')
+        engine.add_strategy(strategy, **kwargs)
+        return engine, engine.run(cache=self.cache)
+
+    def test_hit(self):
+        """测试相同的回测命中缓存，结果和资金曲线一致"""
+        first_engine, first = self._run()
+        engine, second = self._run()
+        self.assertEqual(self.cache.stats, {'hit': 1, 'miss': 1})
+        self.assertFalse(hasattr(engine.cerebro, 'runstrats'))
+        self.assertEqual(first.keys(), second.keys())
+        for key, value in first.items():
+            if key == 'time_returns':
+                self.assertEqual(list(second[key].items()), list(value.items()))
+            else:
+                self.assertEqual(second[key], value, key)
+        pd.testing.assert_series_equal(engine.equity, first_engine.equity, check_names=False, check_freq=False)
+
+    def test_miss_on_change(self):
+        """测试参数、设置、分析器配置和数据变化时不命中"""
+        self._run()
+        changed = self.data.copy()
+        changed.iloc[-1, changed.columns.get_loc('close')] *= 1.01
+        self._run(fast_period=10)
+        self._run(engine_kwargs={'commission': 0.002})
+        self._run(engine_kwargs={'analyzers': 'standard'})
+        self._run(data=changed)
+        self._run(data=self.data.iloc[:-1])
+        self.assertEqual(self.cache.stats, {'hit': 0, 'miss': 6})
+        self._run(engine_kwargs={'analyzers': 'standard'})
+        self.assertEqual(self.cache.stats['hit'], 1)
+
+    def test_strategy_fingerprint(self):
+        """测试策略指纹包含子类和基类的源码"""
+        self.assertNotEqual(strategy_fingerprint(CrossStrategy), strategy_fingerprint(SlowCross))
+        dynamic = type('Dynamic', (CrossStrategy,), {'__module__': __name__})
+        self.assertEqual(strategy_fingerprint(dynamic), strategy_fingerprint(dynamic))
+
+    def test_shared_feed_and_unknown_feed(self):
+        """测试共享内存数据源可以缓存，无法计算指纹的数据源不使用缓存"""
+        with SharedMarketData.create({'600000.SH': self.data}) as market:
+            for _ in range(2):
+                engine = BacktestEngine(stake=10)
+                engine.add_data(market.feed('600000.SH'), name='600000.SH')
+                engine.add_strategy(CrossStrategy)
+                engine.run(cache=self.cache)
+        self.assertEqual(self.cache.stats, {'hit': 1, 'miss': 1})
+
+        engine = BacktestEngine(stake=10)
+        engine.add_data(backtrader.feeds.GenericCSVData(dataname='600000.SH.csv'), name='600000.SH')
+        self.assertIsNone(engine.cache_key())
+
+    def test_minimal_profile(self):
+        """测试没有资金曲线的分析器配置"""
+        _, first = self._run(engine_kwargs={'analyzers': 'minimal'})
+        engine, second = self._run(engine_kwargs={'analyzers': 'minimal'})
+        self.assertIsNone(engine.equity)
+        self.assertEqual(first, second)
+        self.assertTrue(np.isfinite(second['max_drawdown']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+共享内存数据源测试用例
+
+测试共享内存数据源的各项功能：
+- 日期数值与 backtrader 一致
+- 回测结果与 PandasData 一致
+- 序列化和子进程映射同一块共享内存
+- 释放共享内存
+"""
+
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import backtrader
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import SharedMarketData, date2num_array
+from backTest.engine.backtest_engine import BacktestEngine
+from tests.backtest.helpers import create_test_data
+
+
+class CrossStrategy(backtrader.Strategy):
+    """均线交叉策略，支持多只股票"""
+
+    def __init__(self):
+        """初始化策略"""
+        self.crossover = {data: backtrader.indicators.CrossOver(backtrader.indicators.SMA(data, period=5),
+                                                               backtrader.indicators.SMA(data, period=20))
+                          for data in self.datas}
+
+    def next(self):
+        """策略逻辑"""
+        for data, crossover in self.crossover.items():
+            if not self.getposition(data):
+                if crossover > 0:
+                    self.buy(data=data)
+            elif crossover < 0:
+                self.sell(data=data)
+
+
+def _close_sum_and_write(market, name):
+    """子进程中读取共享数据的收盘价之和，并修改第一行的 openinterest"""
+    values = market.values(name)
+    values[0, 6] = 123.0
+    return float(values[:, 4].sum())
+
+
+class TestSharedFeed(unittest.TestCase):
+    """共享内存数据源测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.frames = {'a': create_test_data(seed=1, capitalize=True),
+                       'b': create_test_data(seed=2, capitalize=True)}
+        self.market = SharedMarketData.create(self.frames)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.market.unlink()
+
+    def test_date2num(self):
+        """测试日期数值与 bt.date2num 一致"""
+        index = pd.DatetimeIndex(['2020-01-02', '2020-01-02 09:31:00', '1999-12-31 15:00:00'])
+        expected = [backtrader.date2num(dt.to_pydatetime()) for dt in index]
+        np.testing.assert_allclose(date2num_array(index), expected, rtol=0, atol=1e-9)
+        self.assertEqual(backtrader.num2date(date2num_array([datetime(2020, 3, 5)])[0]), datetime(2020, 3, 5))
+
+    def test_frame_roundtrip(self):
+        """测试共享数据还原为 DataFrame"""
+        frame = self.market.frame('a')
+        expected = self.frames['a']
+        pd.testing.assert_index_equal(frame.index, expected.index, check_names=False, exact=False)
+        np.testing.assert_array_equal(frame['close'].to_numpy(), expected['Close'].to_numpy())
+        self.assertTrue(frame['openinterest'].isna().all())
+
+    def test_match_pandas_data(self):
+        """测试回测结果与 PandasData 一致"""
+        engine = BacktestEngine(commission=0.001, stake=10)
+        for name, frame in self.frames.items():
+            engine.add_data(frame, name=name)
+        engine.add_strategy(CrossStrategy)
+        expected = engine.run()
+
+        engine = BacktestEngine(commission=0.001, stake=10)
+        for name, feed in self.market.feeds().items():
+            engine.add_data(feed, name=name)
+        engine.add_strategy(CrossStrategy)
+        result = engine.run()
+
+        for key, value in expected.items():
+            self.assertEqual(result[key], value, key)
+
+    def test_pickle_attach(self):
+        """测试序列化后映射同一块共享内存"""
+        payload = pickle.dumps(self.market)
+        self.assertLess(len(payload), 1024)
+        attached = pickle.loads(payload)
+        self.assertFalse(attached.owner)
+        attached.values('b')[5, 6] = 7.0
+        self.assertEqual(self.market.values('b')[5, 6], 7.0)
+        attached.close()
+
+    def test_subprocess(self):
+        """测试子进程直接读写共享内存"""
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            total = pool.submit(_close_sum_and_write, self.market, 'a').result()
+        self.assertAlmostEqual(total, self.frames['a']['Close'].sum())
+        self.assertEqual(self.market.values('a')[0, 6], 123.0)
+
+    def test_unlink(self):
+        """测试释放共享内存"""
+        market = SharedMarketData.create({'a': self.frames['a']})
+        name = market.shm.name
+        market.unlink()
+        with self.assertRaises(FileNotFoundError):
+            SharedMarketData.attach(name, market.layout)
+
+
+if __name__ == '__main__':
+    unittest.main()
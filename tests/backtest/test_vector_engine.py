@@ -0,0 +1,165 @@
+"""
+向量化回测引擎测试用例
+
+测试向量化回测引擎的各项功能：
+- 与 backtrader（BacktestEngine）的结果逐项一致
+- 多只股票、停牌日
+- 目标仓位和目标权重
+- 资金不足时拒绝买单，被拒绝的目标持仓之后重新尝试（与 backtrader 的差异）
+"""
+
+import unittest
+
+import backtrader
+import numpy as np
+import pandas as pd
+
+from backTest.engine.backtest_engine import BacktestEngine
+from backTest.engine.portfolio_engine import PortfolioEngine
+from backTest.engine.vector_engine import VectorEngine, cash_limited, cross_signals
+from tests.backtest.helpers import create_test_data
+
+
+class CrossStrategy(backtrader.Strategy):
+    """均线交叉策略，与 tests/backtest/test_strategy.TestStrategy 相同，支持多只股票"""
+
+    params = (
+        ('fast_period', 5),
+        ('slow_period', 20),
+    )
+
+    def __init__(self):
+        """初始化策略"""
+        self.crossover = {}
+        for data in self.datas:
+            fast = backtrader.indicators.SMA(data, period=self.params.fast_period)
+            slow = backtrader.indicators.SMA(data, period=self.params.slow_period)
+            self.crossover[data] = backtrader.indicators.CrossOver(fast, slow)
+
+    def next(self):
+        """策略逻辑"""
+        for data, crossover in self.crossover.items():
+            if not self.getposition(data):
+                if crossover > 0:
+                    self.buy(data=data)
+            elif crossover < 0:
+                self.sell(data=data)
+
+
+class TestVectorEngine(unittest.TestCase):
+    """向量化回测引擎测试类"""
+
+    PARAMS = dict(initial_cash=100000.0, commission=0.001, stake=10, slippage=0.005)
+
+    def _run_both(self, frames):
+        engine = BacktestEngine(**self.PARAMS)
+        for name, df in frames.items():
+            engine.add_data(df, name=name)
+        engine.add_strategy(CrossStrategy)
+        expected = engine.run()
+
+        panel = {f: pd.DataFrame({name: df[f] for name, df in frames.items()})
+                 for f in ('open', 'high', 'low', 'close')}
+        signals = cross_signals(panel['close'].rolling(5).mean(), panel['close'].rolling(20).mean())
+        actual = VectorEngine(**self.PARAMS).run_signals(panel['close'], signals, open_=panel['open'],
+                                                        high=panel['high'], low=panel['low'])
+        return expected, actual
+
+    def _assert_same(self, expected, actual):
+        self.assertEqual(set(expected), set(actual))
+        for key, value in expected.items():
+            if key == 'time_returns':
+                self.assertEqual(list(value), list(actual[key]))
+                np.testing.assert_allclose(list(value.values()), list(actual[key].values()), atol=1e-12)
+            elif value is None:
+                self.assertIsNone(actual[key], key)
+            else:
+                self.assertAlmostEqual(value, actual[key], places=8, msg=key)
+
+    def test_match_backtrader(self):
+        """测试单只股票的结果与 backtrader 一致"""
+        expected, actual = self._run_both({'test': create_test_data()})
+        self._assert_same(expected, actual)
+        self.assertGreater(actual['total_trades'], 0)
+
+    def test_match_backtrader_multi_year(self):
+        """测试多只股票、多年数据（夏普比率有值）的结果与 backtrader 一致"""
+        frames = {f's{seed}': create_test_data('2018-01-01', '2020-12-31', seed=seed) for seed in (1, 2, 3)}
+        expected, actual = self._run_both(frames)
+        self._assert_same(expected, actual)
+        self.assertIsNotNone(actual['sharpe_ratio'])
+
+    def test_suspension(self):
+        """测试停牌日不成交，复牌后按目标仓位成交"""
+        dates = pd.date_range('2020-01-01', periods=5)
+        close = pd.DataFrame({'a': [10.0, 11.0, np.nan, 12.0, 13.0]}, index=dates)
+        targets = pd.DataFrame({'a': [100.0, 100.0, 0.0, np.nan, np.nan]}, index=dates)
+        engine = VectorEngine(initial_cash=10000.0, commission=0.0)
+        result = engine.run_targets(close, targets)
+        self.assertEqual(engine.positions['a'].tolist(), [0.0, 100.0, 100.0, 0.0, 0.0])
+        self.assertAlmostEqual(result['final_value'], 10000.0 + 100 * (12.0 - 11.0))
+        self.assertEqual((result['total_trades'], result['won_trades']), (1, 1))
+
+    def test_weights(self):
+        """测试目标权重按总资产换算为整手股数"""
+        dates = pd.date_range('2020-01-01', periods=3)
+        close = pd.DataFrame({'a': [10.0, 10.0, 20.0], 'b': [5.0, 5.0, 5.0]}, index=dates)
+        weights = pd.DataFrame({'a': [0.5, np.nan, np.nan], 'b': [0.25, np.nan, np.nan]}, index=dates)
+        engine = VectorEngine(initial_cash=10000.0, commission=0.0)
+        result = engine.run_weights(close, weights, lot_size=100)
+        self.assertEqual(engine.positions.iloc[-1].tolist(), [500.0, 500.0])
+        self.assertAlmostEqual(result['final_value'], 10000.0 + 500 * 10.0)
+
+    def test_cash_limit(self):
+        """测试资金不足时与 backtrader 一样拒绝买单，不出现负现金"""
+        class BuyAll(backtrader.Strategy):
+            """第一根 K 线买入全部股票"""
+
+            def next(self):
+                if len(self) == 1:
+                    for data in self.datas:
+                        self.buy(data=data)
+
+        dates = pd.date_range('2020-01-01', periods=5)
+        close = pd.DataFrame({'a': [10.0] * 5, 'b': [10.0] * 5}, index=dates)
+        params = dict(initial_cash=1500.0, commission=0.001, stake=100)
+        engine = BacktestEngine(**params)
+        for name in close.columns:
+            engine.add_data(pd.DataFrame({f: close[name] for f in ('open', 'high', 'low', 'close')}), name=name)
+        engine.add_strategy(BuyAll)
+        expected = engine.run()
+
+        vector = VectorEngine(**params)
+        targets = pd.DataFrame({'a': [100.0] + [np.nan] * 4, 'b': [100.0] + [np.nan] * 4}, index=dates)
+        actual = vector.run_targets(close, targets)
+        self.assertEqual(vector.positions.iloc[-1].tolist(), [100.0, 0.0])
+        self.assertAlmostEqual(actual['final_value'], expected['final_value'])
+        self.assertAlmostEqual(actual['final_value'], 1500.0 - 1.0)
+
+        # 目标权重：两只股票各 60%，只能买入第一只，与 PortfolioEngine 一致
+        weights = pd.DataFrame({'a': [0.6], 'b': [0.6]}, index=dates[:1])
+        vector.run_weights(close, weights.reindex(dates))
+        portfolio = PortfolioEngine(initial_cash=1500.0, commission=0.001)
+        portfolio.run(close, weights)
+        self.assertEqual(vector.positions.iloc[-1].tolist(), [90.0, 0.0])
+        self.assertEqual(portfolio.trades['symbol'].tolist(), ['a'])
+        self.assertGreaterEqual(vector.equity.min(), 0.0)
+
+        # 先卖后买，买单按列顺序依次检查资金
+        np.testing.assert_array_equal(cash_limited(np.array([80.0, -50.0, 30.0]), np.full(3, 10.0), np.zeros(3),
+                                                   400.0), [True, True, False])
+
+    def test_cash_limit_retry(self):
+        """测试被拒绝的目标持仓在资金释放后重新尝试（backtrader 中被拒绝的订单不会重新提交）"""
+        dates = pd.date_range('2020-01-01', periods=6)
+        close = pd.DataFrame({'a': [10.0] * 6, 'b': [10.0] * 6}, index=dates)
+        targets = pd.DataFrame({'a': [100.0, np.nan, 0.0, np.nan, np.nan, np.nan],
+                                'b': [100.0, np.nan, np.nan, np.nan, np.nan, np.nan]}, index=dates)
+        engine = VectorEngine(initial_cash=1500.0, commission=0.0)
+        engine.run_targets(close, targets)
+        self.assertEqual(engine.positions['a'].tolist(), [0.0, 100.0, 100.0, 0.0, 0.0, 0.0])
+        self.assertEqual(engine.positions['b'].tolist(), [0.0, 0.0, 0.0, 100.0, 100.0, 100.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+"""
+滚动前推优化测试用例
+
+测试滚动前推优化的各项功能：
+- 交易日历上的窗口划分
+- 预热期内不交易
+- 预先计算的指标与 backtrader 指标结果一致
+- 每个窗口选出训练期得分最高的参数，样本外收益首尾相接
+- 窗口结果缓存，延长历史只计算新增窗口，修改策略或目标函数的源码后不命中
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+
+import backtrader
+import numpy as np
+import pandas as pd
+
+from backTest.data_feed.shared_feed import SharedMarketData
+from backTest.optimization.param_sweep import grid_params
+from backTest.optimization.walk_forward import (WalkForward, run_window, walk_forward_windows, window_metrics,
+                                                windowed_strategy)
+from tests.backtest.helpers import create_test_data
+
+
+def sma_lines(frame):
+    """预先计算的均线"""
+    return pd.DataFrame({f'sma_{n}': frame['close'].rolling(n).mean() for n in (5, 10, 20, 30)})
+
+
+class SmaCross(backtrader.Strategy):
+    """均线交叉策略，使用 backtrader 指标"""
+
+    params = (
+        ('fast', 5),
+        ('slow', 20),
+    )
+
+    def __init__(self):
+        """初始化策略"""
+        self.crossover = backtrader.indicators.CrossOver(backtrader.indicators.SMA(period=self.p.fast),
+                                                         backtrader.indicators.SMA(period=self.p.slow))
+
+    def next(self):
+        """策略逻辑"""
+        if not self.position and self.crossover > 0:
+            self.buy()
+        elif self.position and self.crossover < 0:
+            self.sell()
+
+
+class PrecomputedSmaCross(SmaCross):
+    """均线交叉策略，使用预先计算的均线 lines"""
+
+    def __init__(self):
+        """初始化策略"""
+        self.crossover = backtrader.indicators.CrossOver(getattr(self.data, f'sma_{self.p.fast}'),
+                                                         getattr(self.data, f'sma_{self.p.slow}'))
+
+
+class TestWindows(unittest.TestCase):
+    """窗口划分测试类"""
+
+    def test_rolling(self):
+        """测试滚动窗口"""
+        calendar = pd.bdate_range('2020-01-01', periods=100)
+        windows = walk_forward_windows(calendar, train=40, test=20, warmup=10)
+        self.assertEqual(len(windows), 3)
+        first = windows[0]
+        self.assertEqual(first['train_warmup'], calendar[0])
+        self.assertEqual(first['train_start'], calendar[10])
+        self.assertEqual(first['train_end'], calendar[49])
+        self.assertEqual(first['test_warmup'], calendar[40])
+        self.assertEqual(first['test_start'], calendar[50])
+        self.assertEqual(first['test_end'], calendar[69])
+        self.assertEqual(windows[1]['train_start'], calendar[30])
+        # 最后一个窗口的测试期不足 20 天
+        self.assertEqual(windows[2]['test_start'], calendar[90])
+        self.assertEqual(windows[2]['test_end'], calendar[99])
+
+    def test_anchored_step(self):
+        """测试锚定窗口和自定义间隔"""
+        calendar = pd.bdate_range('2020-01-01', periods=100)
+        windows = walk_forward_windows(calendar, train=40, test=20, step=30, anchored=True)
+        self.assertEqual([w['train_start'] for w in windows], [calendar[0]] * 2)
+        self.assertEqual([w['train_end'] for w in windows], [calendar[39], calendar[69]])
+        self.assertEqual(walk_forward_windows(calendar, train=100, test=20), [])
+
+    def test_window_metrics(self):
+        """测试窗口指标"""
+        metrics = window_metrics(pd.Series([0.1, -0.5, 0.2]))
+        self.assertAlmostEqual(metrics['total_return'], 1.1 * 0.5 * 1.2 - 1)
+        self.assertAlmostEqual(metrics['max_drawdown'], 0.5)
+        self.assertEqual(metrics['days'], 3)
+
+
+class TestWalkForward(unittest.TestCase):
+    """滚动前推优化测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.data = create_test_data(periods=400, freq='B', drift=0.0005)
+        self.params = grid_params({'fast': [5, 10], 'slow': [20, 30]})
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.kwargs = dict(train=120, test=60, warmup=40, engine_kwargs={'stake': 10}, n_jobs=1,
+                           cache_dir=self.tmpdir.name)
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        self.tmpdir.cleanup()
+
+    def test_no_trading_in_warmup(self):
+        """测试预热期内不交易，收益率从 trade_start 开始"""
+        trade_start = self.data.index[100]
+        with SharedMarketData.create({'a': self.data}) as market:
+            returns = run_window(market, windowed_strategy(SmaCross), {}, self.data.index[0],
+                                 self.data.index[199], trade_start)
+            full = run_window(market, windowed_strategy(SmaCross), {}, self.data.index[0],
+                              self.data.index[199], self.data.index[0])
+        self.assertEqual(returns.index[0], trade_start)
+        self.assertEqual(len(returns), 100)
+        self.assertFalse(returns.equals(full[full.index >= trade_start]))
+
+    def test_precomputed_indicators(self):
+        """测试预先计算的指标与 backtrader 指标的样本外结果一致"""
+        expected = WalkForward(SmaCross, self.data, self.params, **self.kwargs).run()
+        result = WalkForward(PrecomputedSmaCross, self.data, self.params, indicators=sma_lines, **self.kwargs).run()
+        self.assertEqual(list(result['windows']['best_params']), list(expected['windows']['best_params']))
+        np.testing.assert_allclose(result['returns'].to_numpy(), expected['returns'].to_numpy(), atol=1e-12)
+
+    def test_stitch_and_best(self):
+        """测试最优参数和样本外收益的拼接"""
+        wf = WalkForward(PrecomputedSmaCross, self.data, self.params, indicators=sma_lines, **self.kwargs)
+        result = wf.run()
+        windows = result['windows']
+        self.assertEqual(len(windows), 4)
+        self.assertTrue(windows['error'].isna().all())
+        returns = result['returns']
+        test_days = self.data.index[(self.data.index >= windows['test_start'].iloc[0])]
+        pd.testing.assert_index_equal(returns.index, test_days, check_names=False, exact=False)
+        self.assertAlmostEqual(result['equity'].iloc[-1], 100000.0 * (1 + returns).prod())
+
+        window = wf.windows()[0]
+        scores = {}
+        with SharedMarketData.create(*wf._prepare_frames()) as market:
+            for params in self.params:
+                r = run_window(market, windowed_strategy(PrecomputedSmaCross), params, window['train_warmup'],
+                               window['train_end'], window['train_start'], {'stake': 10})
+                scores[tuple(params.values())] = window_metrics(r)['sharpe']
+        best = max(scores, key=scores.get)
+        self.assertEqual(tuple(windows['best_params'].iloc[0].values()), best)
+
+    def test_cache(self):
+        """测试窗口缓存：重复运行全部命中，延长历史只计算新增窗口"""
+        wf = WalkForward(PrecomputedSmaCross, self.data, self.params, indicators=sma_lines, **self.kwargs)
+        first = wf.run()
+        self.assertEqual(wf.stats['computed'], 4)
+        second = wf.run()
+        self.assertEqual(wf.stats['computed'], 0)
+        pd.testing.assert_series_equal(first['returns'], second['returns'])
+
+        longer = create_test_data(periods=520, freq='B', drift=0.0005)
+        longer.iloc[:len(self.data)] = self.data.to_numpy()
+        wf = WalkForward(PrecomputedSmaCross, longer, self.params, indicators=sma_lines, **self.kwargs)
+        result = wf.run()
+        self.assertEqual(wf.stats['windows'], 6)
+        self.assertEqual(wf.stats['computed'], 2)
+        pd.testing.assert_series_equal(result['returns'].loc[first['returns'].index], first['returns'])
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 6)
+
+    def test_cache_key_source(self):
+        """测试缓存键包含策略和目标函数的源码，修改逻辑后不命中旧的缓存"""
+        source = (
+            'from tests.backtest.test_walk_forward import PrecomputedSmaCross\n\n\n'
+            'class EditedCross(PrecomputedSmaCross):\n'
+            '    def next(self):\n'
+            '        super().next()\n\n\n'
+            'def objective(returns):\n'
+            '    return returns.sum()\n'
+        )
+        sys.path.insert(0, self.tmpdir.name)
+        path = os.path.join(self.tmpdir.name, 'edited_strategy.py')
+        try:
+            with open(path, 'w') as f:
+                f.write(source)
+            module = importlib.import_module('edited_strategy')
+            kwargs = {**self.kwargs, 'cache_dir': None}
+            keys = [WalkForward(module.EditedCross, self.data, self.params, objective=module.objective,
+                                **kwargs)._config_key()]
+            for old, new in (('super().next()', 'return super().next()'), ('returns.sum()', 'returns.mean() * 252')):
+                source = source.replace(old, new)
+                with open(path, 'w') as f:
+                    f.write(source)
+                module = importlib.reload(module)
+                keys.append(WalkForward(module.EditedCross, self.data, self.params, objective=module.objective,
+                                        **kwargs)._config_key())
+        finally:
+            sys.path.remove(self.tmpdir.name)
+            sys.modules.pop('edited_strategy', None)
+        self.assertEqual(len(set(keys)), 3)
+
+    def test_parallel(self):
+        """测试多进程结果与单进程一致"""
+        serial = WalkForward(PrecomputedSmaCross, self.data, self.params, indicators=sma_lines,
+                             **{**self.kwargs, 'cache_dir': None}).run()
+        parallel = WalkForward(PrecomputedSmaCross, self.data, self.params, indicators=sma_lines,
+                               **{**self.kwargs, 'cache_dir': None, 'n_jobs': 2}).run()
+        pd.testing.assert_series_equal(serial['returns'], parallel['returns'])
+
+
+if __name__ == '__main__':
+    unittest.main()
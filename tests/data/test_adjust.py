@@ -0,0 +1,97 @@
+"""
+本地复权计算测试用例
+
+测试复权计算的各项功能：
+- 前复权与后复权
+- 更换锚定日
+- 复权因子入库
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.store.adjust import AdjustEngine, ffill_rows
+from data.store.panel_store import PanelStore
+from data.tushare.basic import ts_adj_factor
+from utils.global_config import DataSource
+
+DATES = ['20250102', '20250103', '20250106', '20250107']
+
+
+class FakePro:
+    """模拟 tushare pro 的 adj_factor 接口"""
+
+    def adj_factor(self, ts_code='', trade_date='', start_date='', end_date=''):
+        factors = {'20250102': 1.0, '20250103': 1.0, '20250106': 2.0, '20250107': 2.0}
+        return pd.DataFrame([{'ts_code': '000001.SZ', 'trade_date': trade_date, 'adj_factor': factors[trade_date]}])
+
+
+class TestAdjustEngine(unittest.TestCase):
+    """本地复权计算测试类"""
+
+    def setUp(self):
+        """测试初始化：20250106 除权，价格减半、因子翻倍"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('daily', root=self.root)
+        self.store.upsert(pd.DataFrame({
+            'ts_code': ['000001.SZ'] * 4,
+            'trade_date': DATES,
+            'close': [10.0, 12.0, 6.0, 7.0],
+            'vol': [100.0, 100.0, 200.0, 200.0],
+            'adj_factor': [1.0, 1.0, 2.0, np.nan],
+        }))
+        self.engine = AdjustEngine(self.store)
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_ffill_rows(self):
+        """测试向前填充"""
+        filled = ffill_rows(np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, 3.0]]))
+        np.testing.assert_array_equal(filled[1:], [[2.0, 1.0], [2.0, 3.0]])
+        self.assertTrue(np.isnan(filled[0, 0]))
+
+    def test_qfq_and_hfq(self):
+        """测试前复权与后复权"""
+        qfq = self.engine.adjust('000001.SZ', how='qfq')
+        np.testing.assert_allclose(qfq['close'], [5.0, 6.0, 6.0, 7.0])
+        # 成交量不复权
+        np.testing.assert_allclose(qfq['vol'], [100.0, 100.0, 200.0, 200.0])
+        hfq = self.engine.adjust('000001.SZ', how='hfq')
+        np.testing.assert_allclose(hfq['close'], [10.0, 12.0, 12.0, 14.0])
+
+    def test_reanchor(self):
+        """测试前复权更换锚定日"""
+        qfq = self.engine.adjust('000001.SZ', how='qfq', anchor_date='20250103')
+        np.testing.assert_allclose(qfq['close'], [10.0, 12.0, 12.0, 14.0])
+        qfq = self.engine.adjust('000001.SZ', how='qfq', end_date='20250103')
+        np.testing.assert_allclose(qfq['close'], [10.0, 12.0])
+
+    def test_panel_and_invalidation(self):
+        """测试宽表复权以及数据更新后缓存失效"""
+        self.engine.factors('000001.SZ')
+        self.store.upsert(pd.DataFrame({'ts_code': ['000001.SZ'], 'trade_date': ['20250107'], 'adj_factor': [4.0]}))
+        panel = self.engine.adjust_panel('close', how='qfq')
+        np.testing.assert_allclose(panel['000001.SZ'], [2.5, 3.0, 3.0, 7.0])
+        self.assertEqual(self.engine.factors('000001.SZ')[-1], 4.0)
+
+    def test_ingest_adj_factor(self):
+        """测试按交易日获取复权因子"""
+        store = PanelStore('adj', root=self.root)
+        pro, DataSource.tushare_pro = DataSource.tushare_pro, FakePro()
+        try:
+            stats = ts_adj_factor.ingest_adj_factor(DATES[0], DATES[-1], store=store, trade_dates=DATES)
+            again = ts_adj_factor.ingest_adj_factor(DATES[0], DATES[-1], store=store, trade_dates=DATES)
+        finally:
+            DataSource.tushare_pro = pro
+        self.assertEqual((stats['calls'], again['calls']), (4, 0))
+        self.assertEqual(list(store.read('adj_factor')['000001.SZ']), [1.0, 1.0, 2.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+并发下载执行器测试用例
+
+测试并发下载的各项功能：
+- 异步速率限制与优先级
+- 有限并发执行
+- 结果写入缓存
+"""
+
+import asyncio
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from data.fetch_executor import AsyncFetchExecutor, FetchJob
+from data.tushare.feature import ts_complex
+from utils import local_cache
+from utils.async_rate_limit import AsyncRateLimiter
+from utils.consts import RequestPriority
+from utils.rate_limit_backend import MemoryBackend
+
+
+class TestFetchExecutor(unittest.TestCase):
+    """并发下载执行器测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = local_cache.DB_PATH
+        local_cache.DB_PATH = self.tmp_dir
+
+    def tearDown(self):
+        """测试清理"""
+        local_cache.DB_PATH = self.db_path
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_priority_order(self):
+        """测试额度优先分配给高优先级请求"""
+        limiter = AsyncRateLimiter(1, time_window=0.05, backend=MemoryBackend())
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        async def main():
+            await limiter.acquire()
+            tasks = [asyncio.ensure_future(request(f'batch{i}', RequestPriority.BATCH)) for i in range(3)]
+            await asyncio.sleep(0)
+            tasks.append(asyncio.ensure_future(request('live', RequestPriority.LIVE_TRADING)))
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.queue_depth(RequestPriority.BATCH), 3)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order[0], 'live')
+
+    def test_backend_does_not_block_loop(self):
+        """测试阻塞的后端不会阻塞事件循环"""
+        class SlowBackend(MemoryBackend):
+            def acquire(self, key, max_calls, time_window):
+                time.sleep(0.2)
+                return super().acquire(key, max_calls, time_window)
+
+        limiter = AsyncRateLimiter(10, backend=SlowBackend())
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(limiter.acquire(), ticker())
+
+        start = time.monotonic()
+        asyncio.run(main())
+        # 后端 acquire 期间其他协程照常运行
+        self.assertLess(ticks[-1] - start, 0.15)
+
+    def test_bounded_concurrency(self):
+        """测试并发数上限"""
+        state = {'running': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def fetcher(endpoint, **params):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.02)
+            with lock:
+                state['running'] -= 1
+            return params['n']
+
+        executor = AsyncFetchExecutor(AsyncRateLimiter(1000, backend=MemoryBackend()), concurrency=3,
+                                      fetcher=fetcher, write_cache=False)
+        results = executor.run([FetchJob('daily', {'n': i}) for i in range(12)])
+        self.assertEqual(sorted(r.data for r in results), list(range(12)))
+        self.assertLessEqual(state['peak'], 3)
+
+    def test_errors_and_async_fetcher(self):
+        """测试异常隔离和原生异步接口"""
+        async def fetcher(endpoint, **params):
+            if params['n'] == 1:
+                raise ValueError('boom')
+            return params['n']
+
+        executor = AsyncFetchExecutor(AsyncRateLimiter(1000, backend=MemoryBackend()), fetcher=fetcher,
+                                      write_cache=False)
+        results = executor.run([FetchJob('daily', {'n': i}) for i in range(3)])
+        self.assertEqual(sum(1 for r in results if not r.ok), 1)
+
+    def test_write_cache(self):
+        """测试结果写入指定的日期范围缓存表，未指定缓存表时不写入"""
+        def fetcher(endpoint, **params):
+            return pd.DataFrame({'ts_code': [params['ts_code']] * 2, 'trade_date': ['20250102', '20250103'],
+                                 'close': [1.0, 2.0]})
+
+        executor = AsyncFetchExecutor(AsyncRateLimiter(1000, backend=MemoryBackend()), fetcher=fetcher)
+        executor.run([FetchJob('daily', {'ts_code': '000001.SZ'}, cache_table='daily'),
+                      FetchJob('daily', {'ts_code': '600000.SH'}, cache_table='daily'),
+                      FetchJob('daily', {'ts_code': '000002.SZ'})])
+
+        conn = sqlite3.connect(local_cache.ensure_db_exists('daily'))
+        rows = conn.execute('SELECT date_key, symbol FROM daily ORDER BY symbol, date_key').fetchall()
+        conn.close()
+        self.assertEqual(rows, [('20250102', '000001.SZ'), ('20250103', '000001.SZ'),
+                                ('20250102', '600000.SH'), ('20250103', '600000.SH')])
+
+        with self.assertRaises(ValueError):
+            FetchJob('daily', cache_table=fetcher)
+
+    def test_cache_hit_through_reader(self):
+        """测试执行器写入的缓存可以被 date_range_cache_with_symbol 装饰的读取函数直接命中"""
+        def fetcher(endpoint, **params):
+            self.assertEqual(endpoint, 'stk_factor_pro')
+            return pd.DataFrame({'ts_code': [params['ts_code']] * 2, 'trade_date': ['20250102', '20250103'],
+                                 'close': [1.0, 2.0]})
+
+        self.assertEqual(FetchJob('stk_factor_pro', cache_table=ts_complex.stk_factor_pro_data).cache_table,
+                         'stk_factor_pro_data')
+        executor = AsyncFetchExecutor(AsyncRateLimiter(1000, backend=MemoryBackend()), fetcher=fetcher)
+        results = executor.run([FetchJob('stk_factor_pro', {'ts_code': '000001.SZ', 'start_date': '20250102',
+                                                            'end_date': '20250103'},
+                                         cache_table=ts_complex.stk_factor_pro_data)])
+        self.assertTrue(results[0].ok)
+
+        with mock.patch('utils.date_utils.get_exchange_days', return_value=['20250102', '20250103']), \
+                mock.patch.object(ts_complex, 'DataSource') as source:
+            source.tushare_pro.stk_factor_pro.side_effect = AssertionError('不应调用接口')
+            cached = ts_complex.stk_factor_pro_data(code='000001.SZ', start_date='20250102', end_date='20250103')
+        self.assertEqual(sorted(cached), ['20250102', '20250103'])
+        self.assertEqual(cached['20250103']['close'].tolist(), [2.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+财务指标仓库测试用例
+
+测试财务指标仓库的各项功能：
+- 按报告期增量获取
+- 按公告日对齐（无未来函数）
+- 更正公告
+- 单只股票在披露期内重新获取新公布的报告期
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.tushare.cw.ts_fina_indicator import FundamentalStore, fetch_symbol_fina, ingest_fina_indicator
+from utils.global_config import DataSource
+from utils.stub_source import StubDataSource
+
+
+class PublishingSource(StubDataSource):
+    """只返回报告期不晚于 published 的财务指标，模拟新报告陆续公布"""
+
+    published = None
+
+    def _fina_indicator(self, **kwargs) -> pd.DataFrame:
+        df = super()._fina_indicator(**kwargs)
+        return df[df['end_date'] <= self.published]
+
+
+class TestFundamentalStore(unittest.TestCase):
+    """财务指标仓库测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = FundamentalStore(os.path.join(self.tmp_dir, 'fina.db'))
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_asof_join(self):
+        """测试按公告日对齐，更正公告覆盖同一报告期，旧报告期的更正不回退"""
+        self.store.upsert(pd.DataFrame({
+            'ts_code': ['A', 'A', 'A', 'A', 'B'],
+            'ann_date': ['20250110', '20250120', '20250301', '20250315', '20250105'],
+            'end_date': ['20240930', '20240930', '20241231', '20240930', '20240930'],
+            'roe': [1.0, 1.5, 2.0, 9.0, 5.0],
+        }))
+        dates = ['20250109', '20250110', '20250113', '20250121', '20250303', '20250317']
+        panel = self.store.asof_panel('roe', dates, ['A', 'B', 'C'])
+        a = panel['A'].tolist()
+        self.assertTrue(np.isnan(a[0]) and np.isnan(a[1]))
+        self.assertEqual(a[2:], [1.0, 1.5, 2.0, 2.0])
+        self.assertEqual(panel.loc['20250109', 'B'], 5.0)
+        self.assertTrue(panel['C'].isna().all())
+        # 非严格模式下公告日当天可见
+        self.assertEqual(self.store.asof_panel('roe', dates, ['A'], strict=False).loc['20250110', 'A'], 1.0)
+
+    def test_ingest_and_history(self):
+        """测试按报告期增量获取以及单只股票历史"""
+        old = DataSource.set_source(StubDataSource(n_symbols=5))
+        try:
+            stats = ingest_fina_indicator('20230101', '20231231', store=self.store)
+            again = ingest_fina_indicator('20230101', '20231231', store=self.store)
+            history = fetch_symbol_fina('000001.SZ', self.store, max_age=None)
+            missing = fetch_symbol_fina('000003.SZ', self.store)
+        finally:
+            DataSource.set_source(*old)
+        self.assertEqual((stats['calls'], stats['rows'], again['calls']), (4, 20, 0))
+        self.assertEqual(history['end_date'].tolist(), ['20230331', '20230630', '20230930', '20231231'])
+        self.assertFalse(missing.empty)
+
+        panel = self.store.asof_panel('roe', pd.bdate_range('20230101', '20240630').strftime('%Y%m%d'))
+        self.assertEqual(panel.shape[1], 6)
+        last = history.iloc[-1]
+        visible = panel.loc[panel.index > last['ann_date'], '000001.SZ']
+        self.assertTrue((visible == last['roe']).all())
+
+    def test_symbol_refresh(self):
+        """测试单只股票本地有数据时，下一期报告披露期内重新获取，能读到新公布的报告期"""
+        today = pd.Timestamp.now().normalize()
+        latest = (today - pd.offsets.QuarterEnd(1)).strftime('%Y%m%d')
+        previous = (pd.Timestamp(latest) - pd.offsets.QuarterEnd(1)).strftime('%Y%m%d')
+        source = PublishingSource(n_symbols=3, start_date='20240101', end_date=today.strftime('%Y%m%d'))
+        source.published = previous
+        old = DataSource.set_source(source)
+        try:
+            first = fetch_symbol_fina('000001.SZ', self.store)
+            cached = fetch_symbol_fina('000001.SZ', self.store)
+            source.published = latest
+            refreshed = fetch_symbol_fina('000001.SZ', self.store, max_age=pd.Timedelta(0))
+            final = fetch_symbol_fina('000001.SZ', self.store, max_age=pd.Timedelta(0))
+        finally:
+            DataSource.set_source(*old)
+        self.assertEqual(first['end_date'].iloc[-1], previous)
+        # 距离上次获取不到 max_age 时读取本地
+        self.assertEqual(len(cached), len(first))
+        self.assertEqual(refreshed['end_date'].iloc[-1], latest)
+        # 下一期尚未结束，不再获取
+        self.assertEqual(len(final), len(refreshed))
+        self.assertEqual(source.calls['fina_indicator'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
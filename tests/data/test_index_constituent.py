@@ -0,0 +1,116 @@
+"""
+指数历史成分股测试用例
+
+测试指数历史成分股的各项功能：
+- 由快照生成区间记录
+- 增量合并快照
+- 成分股掩码
+- 接口返回行数达到上限时拆分日期范围
+- 已获取的日期范围覆盖请求时不访问接口
+"""
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from data.tushare.stock import ts_index_constituent
+from data.tushare.stock.ts_index_constituent import OPEN_END, IndexConstituentStore, build_intervals
+from data.tushare.stock.ts_index_contains import ETF300, index_members_at
+from utils.global_config import DataSource
+from utils.stub_source import StubDataSource
+
+
+def _snapshots(members):
+    """{快照日期: [成分股]} 转换为快照表"""
+    return pd.DataFrame([{'con_code': c, 'trade_date': d} for d, codes in members.items() for c in codes])
+
+
+class TestIndexConstituent(unittest.TestCase):
+    """指数历史成分股测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = IndexConstituentStore(self.root)
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_build_intervals(self):
+        """测试区间记录，包括剔除后重新纳入"""
+        intervals = build_intervals(_snapshots({
+            '20250102': ['A', 'B'],
+            '20250203': ['A', 'C'],
+            '20250303': ['A', 'B'],
+        }))
+        records = set(intervals.itertuples(index=False, name=None))
+        self.assertEqual(records, {('A', 20250102, OPEN_END), ('B', 20250102, 20250203),
+                                   ('B', 20250303, OPEN_END), ('C', 20250203, 20250303)})
+
+    def test_incremental_and_mask(self):
+        """测试增量合并与成分股掩码"""
+        self.store.add_snapshots('IDX', _snapshots({'20250102': ['A', 'B'], '20250203': ['A', 'C']}))
+        self.store.add_snapshots('IDX', _snapshots({'20250303': ['A', 'B']}))
+        self.assertEqual(len(IndexConstituentStore(self.root).intervals('IDX')), 4)
+
+        mask = self.store.members_at('IDX', ['20241231', '20250110', '20250210', '20250310'], ['A', 'B', 'C', 'D'])
+        self.assertEqual(mask.values.astype(int).tolist(), [[0, 0, 0, 0], [1, 1, 0, 0], [1, 0, 1, 0], [1, 1, 0, 0]])
+        self.assertEqual(self.store.members_on('IDX', '20250210'), ['A', 'C'])
+
+    def test_update_from_source(self):
+        """测试从数据源获取快照，与逐日快照结果一致"""
+        source = StubDataSource(n_symbols=20)
+        old = DataSource.set_source(source)
+        try:
+            self.store.update('000300.SH', start_date='20240101', end_date='20241231')
+            self.assertEqual(self.store.update('000300.SH', start_date='20240101', end_date='20241231'), 0)
+            snapshot = source.index_weight(index_code='000300.SH', trade_date='20240701')
+        finally:
+            DataSource.set_source(*old)
+        self.assertEqual(len(self.store.snapshot_dates('000300.SH')), 12)
+        self.assertEqual(self.store.members_on('000300.SH', '20240705'), sorted(snapshot['con_code']))
+
+    def test_truncated_response(self):
+        """测试返回行数达到上限时对半拆分日期范围，不丢失快照"""
+        limit = 40
+
+        class TruncatingSource(StubDataSource):
+            """与 tushare 一样只返回前 limit 行（最新的快照在前）"""
+
+            def _index_weight(self, **kwargs):
+                return super()._index_weight(**kwargs).head(limit)
+
+        source = TruncatingSource(n_symbols=20)
+        old = DataSource.set_source(source)
+        try:
+            with mock.patch.object(ts_index_constituent, 'INDEX_WEIGHT_LIMIT', limit):
+                self.store.update('000300.SH', start_date='20240101', end_date='20241231')
+            snapshot = source.index_weight(index_code='000300.SH', trade_date='20240201')
+        finally:
+            DataSource.set_source(*old)
+        self.assertEqual(len(self.store.snapshot_dates('000300.SH')), 12)
+        self.assertGreater(source.calls['index_weight'], 2)
+        self.assertEqual(self.store.members_on('000300.SH', '20240205'), sorted(snapshot['con_code']))
+
+    def test_members_at_uses_cache(self):
+        """测试 index_members_at 在已获取的日期范围内不再访问接口"""
+        source = StubDataSource(n_symbols=20)
+        old = DataSource.set_source(source)
+        try:
+            with mock.patch.object(ts_index_constituent, 'INDEX_CONSTITUENT_ROOT', self.root):
+                first = index_members_at(ETF300, ['20240105', '20240705'])
+                calls = source.calls['index_weight']
+                second = index_members_at(ETF300, ['20240105', '20240705', '20241231'])
+        finally:
+            DataSource.set_source(*old)
+        self.assertEqual(source.calls['index_weight'], calls)
+        pd.testing.assert_frame_equal(second.iloc[:2], first)
+        self.assertTrue(IndexConstituentStore(self.root).covers('000300.SH', '20050101', '20241231'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+资金流向面板测试用例
+
+测试资金流向面板的各项功能：
+- 滚动求和、横截面排名、分组汇总
+- 按交易日增量入库
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+from data.tushare.feature.ts_moneyflow_panel import (MoneyflowPanel, cross_section_rank, group_sum,
+                                                     ingest_moneyflow, rolling_sum)
+from utils.global_config import DataSource
+from utils.stub_source import StubDataSource
+
+TRADE_DATES = ['20250102', '20250103', '20250106', '20250107', '20250108']
+
+
+class TestMoneyflowPanel(unittest.TestCase):
+    """资金流向面板测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('moneyflow', root=self.root)
+        self.ind_store = PanelStore('moneyflow_ind', root=self.root)
+        self.source = StubDataSource(n_symbols=9)
+        self.old = DataSource.set_source(self.source)
+
+    def tearDown(self):
+        """测试清理"""
+        DataSource.set_source(*self.old)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_rolling_sum(self):
+        """测试滚动求和"""
+        matrix = np.array([[1.0, np.nan], [2.0, np.nan], [3.0, 5.0], [np.nan, np.nan]])
+        result = rolling_sum(matrix, 2)
+        np.testing.assert_array_equal(result[:, 0], [1.0, 3.0, 5.0, 3.0])
+        self.assertTrue(np.isnan(result[1, 1]))
+        self.assertEqual(result[3, 1], 5.0)
+
+    def test_rank_and_group(self):
+        """测试横截面排名和分组汇总"""
+        frame = pd.DataFrame([[1.0, 3.0, np.nan, 2.0]], columns=['a', 'b', 'c', 'd'])
+        self.assertEqual(cross_section_rank(frame).iloc[0, 1], 1.0)
+        grouped = group_sum(frame, {'a': 'x', 'b': 'x', 'c': 'y', 'd': 'z'})
+        self.assertEqual(grouped.loc[0, 'x'], 4.0)
+        self.assertTrue(np.isnan(grouped.loc[0, 'y']))
+
+    def test_ingest_and_analytics(self):
+        """测试增量入库以及与逐只股票计算结果一致"""
+        stats = ingest_moneyflow(TRADE_DATES[0], TRADE_DATES[2], store=self.store, ind_store=self.ind_store,
+                                 trade_dates=TRADE_DATES[:3])
+        self.assertEqual(stats['stock']['calls'], 3)
+        stats = ingest_moneyflow(TRADE_DATES[0], TRADE_DATES[-1], store=self.store, ind_store=self.ind_store,
+                                 trade_dates=TRADE_DATES)
+        self.assertEqual((stats['stock']['calls'], stats['industry']['calls']), (2, 2))
+
+        flow = MoneyflowPanel(self.store, self.ind_store)
+        net3 = flow.rolling_net_inflow(3, start_date='20250108')
+        self.assertEqual(list(net3.index), [20250108])
+        symbol = self.source.symbols[0]
+        expected = sum(self.source.moneyflow_ths(trade_date=d).set_index('ts_code').loc[symbol, 'net_amount']
+                       for d in TRADE_DATES[2:])
+        self.assertAlmostEqual(net3.loc[20250108, symbol], expected, places=6)
+
+        top = flow.top_inflow('20250108', n=3, window=3)
+        self.assertEqual(top.iloc[0], net3.iloc[0].max())
+        industry = flow.industry_net_inflow({s: 'all' for s in self.source.symbols}, 3, '20250108')
+        self.assertAlmostEqual(industry.loc[20250108, 'all'], net3.iloc[0].sum(), places=6)
+        self.assertIn('银行', flow.ths_industry_net_inflow(2).columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
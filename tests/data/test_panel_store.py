@@ -0,0 +1,81 @@
+"""
+面板数据存储测试用例
+
+测试面板数据存储的各项功能：
+- 长表写入与宽表读取
+- 追加交易日与新增股票
+- memmap 读取
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+
+
+def _bars(dates, symbols, base=10.0):
+    """生成长表日线数据"""
+    rows = [{'trade_date': d, 'ts_code': s, 'close': base + i + j / 10, 'vol': 100.0 * (i + 1)}
+            for i, d in enumerate(dates) for j, s in enumerate(symbols)]
+    return pd.DataFrame(rows)
+
+
+class TestPanelStore(unittest.TestCase):
+    """面板数据存储测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('daily', root=self.root)
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_upsert_and_read(self):
+        """测试写入和读取"""
+        self.store.upsert(_bars(['20250102', '20250103'], ['000001.SZ', '600000.SH']))
+        self.assertEqual(self.store.shape, (2, 2))
+        close = self.store.read('close')
+        self.assertEqual(list(close.index), [20250102, 20250103])
+        self.assertAlmostEqual(close.loc[20250103, '600000.SH'], 11.1)
+        # 不存在的股票返回 NaN 列
+        self.assertTrue(self.store.read('close', symbols=['300750.SZ'])['300750.SZ'].isna().all())
+
+    def test_append_and_new_symbols(self):
+        """测试追加交易日、插入历史日期和新增股票"""
+        self.store.upsert(_bars(['20250103'], ['000001.SZ']))
+        version = self.store.version
+        self.store.upsert(_bars(['20250106'], ['000001.SZ']))
+        self.store.upsert(_bars(['20250102'], ['600000.SH'], base=20.0))
+        self.assertGreater(self.store.version, version)
+
+        reopened = PanelStore('daily', root=self.root)
+        self.assertEqual(list(reopened.dates), [20250102, 20250103, 20250106])
+        self.assertEqual(reopened.symbols, ['000001.SZ', '600000.SH'])
+        close = reopened.field('close')
+        self.assertIsInstance(close, np.memmap)
+        self.assertEqual(close[1, 0], 10.0)
+        self.assertEqual(close[0, 1], 20.0)
+        self.assertTrue(np.isnan(close[0, 0]))
+
+    def test_nan_does_not_overwrite(self):
+        """测试 NaN 不覆盖已有数据"""
+        self.store.upsert(_bars(['20250102'], ['000001.SZ']))
+        self.store.write_frames({'close': pd.DataFrame({'000001.SZ': [np.nan]}, index=[20250102])})
+        self.assertEqual(self.store.read('close').iloc[0, 0], 10.0)
+
+    def test_read_symbol(self):
+        """测试读取单只股票"""
+        self.store.upsert(_bars(['20250102', '20250103'], ['000001.SZ', '600000.SH']))
+        df = self.store.read_symbol('000001.SZ', start_date='20250103')
+        self.assertEqual(list(df.index), [20250103])
+        self.assertEqual(df.loc[20250103, 'vol'], 200.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
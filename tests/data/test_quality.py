@@ -0,0 +1,158 @@
+"""
+数据质量扫描测试用例
+
+测试数据质量扫描的各项功能：
+- 缺失、停牌填充、零成交量、异常涨跌幅、OHLC 矛盾、非交易日数据
+- 上市日期范围
+- 修复计划生成与执行
+- 缓存表检查
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+from data.store.quality import (QualityScanner, mask_runs, purge_cache_rows, scan_cache_table, load_repair_plan,
+                                save_repair_plan)
+from data.tushare.basic import ts_daily_ingest
+from data.tushare.basic.security_master import SecurityMaster
+from utils.global_config import DataSource
+
+CALENDAR = ['20250102', '20250103', '20250106', '20250107', '20250108', '20250109', '20250110', '20250113']
+SYMBOLS = ['000001.SZ', '600000.SH', '300750.SZ']
+
+
+def _clean_bars(dates=CALENDAR, symbols=SYMBOLS):
+    """每只股票每天上涨 1%"""
+    rows = []
+    for j, s in enumerate(symbols):
+        for i, d in enumerate(dates):
+            close = round(10.0 * (j + 1) * 1.01 ** (CALENDAR.index(d) + 1), 2)
+            pre = round(10.0 * (j + 1) * 1.01 ** CALENDAR.index(d), 2)
+            rows.append({'ts_code': s, 'trade_date': d, 'open': pre, 'high': close, 'low': pre, 'close': close,
+                         'pre_close': pre, 'vol': 100.0})
+    return pd.DataFrame(rows)
+
+
+class FakePro:
+    """返回干净数据的 daily 接口"""
+
+    def __init__(self):
+        self.calls = []
+
+    def daily(self, ts_code=None, trade_date=None, start_date=None, end_date=None):
+        self.calls.append((ts_code, trade_date))
+        dates = [trade_date] if trade_date else [d for d in CALENDAR if start_date <= d <= end_date]
+        return _clean_bars(dates, [ts_code] if ts_code else SYMBOLS)
+
+
+class TestQuality(unittest.TestCase):
+    """数据质量扫描测试类"""
+
+    def setUp(self):
+        """测试初始化，写入带有各种问题的数据"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('daily', root=self.root)
+        bars = _clean_bars()
+        key = bars.set_index(['ts_code', 'trade_date']).index
+        # 000001.SZ 缺失 20250106、20250107
+        bars = bars[~key.isin([('000001.SZ', '20250106'), ('000001.SZ', '20250107')])]
+        bars = bars.set_index(['ts_code', 'trade_date'])
+        # 600000.SH 20250108 停牌被旧收盘价填充
+        bars.loc[('600000.SH', '20250108'), ['close', 'vol']] = [bars.loc[('600000.SH', '20250107'), 'close'], 0]
+        # 300750.SZ 20250109 零成交量但价格变化、20250110 涨幅 50%、20250113 high 低于 close
+        bars.loc[('300750.SZ', '20250109'), 'vol'] = 0
+        bars.loc[('300750.SZ', '20250110'), ['close', 'high']] *= 1.5
+        bars.loc[('300750.SZ', '20250113'), 'high'] = 1.0
+        bars = bars.reset_index()
+        # 非交易日数据
+        weekend = _clean_bars(['20250102'], ['600000.SH']).assign(trade_date='20250104')
+        self.store.upsert(pd.concat([bars, weekend]), fields=['open', 'high', 'low', 'close', 'pre_close', 'vol'])
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_mask_runs(self):
+        """测试连续区间合并"""
+        mask = np.array([[1, 0], [1, 1], [0, 1], [1, 1]], dtype=bool)
+        runs = mask_runs(mask, np.array([1, 2, 3, 4]), ['a', 'b'], 'missing')
+        self.assertEqual(runs[['ts_code', 'start_date', 'end_date', 'count']].values.tolist(),
+                         [['a', 1, 2, 2], ['a', 4, 4, 1], ['b', 2, 4, 3]])
+
+    def test_scan(self):
+        """测试各类问题的识别"""
+        issues = QualityScanner(self.store, CALENDAR).scan().issues
+        found = {(r.kind, r.ts_code, r.start_date, r.end_date) for r in issues.itertuples()}
+        self.assertEqual(found, {
+            ('missing', '000001.SZ', 20250106, 20250107),
+            ('stale', '600000.SH', 20250108, 20250108),
+            ('off_calendar', '600000.SH', 20250104, 20250104),
+            ('zero_volume', '300750.SZ', 20250109, 20250109),
+            ('outlier', '300750.SZ', 20250110, 20250110),
+            ('bad_ohlc', '300750.SZ', 20250113, 20250113),
+        })
+
+    def test_fetched_and_listing(self):
+        """测试已标记停牌的日期和上市日期之前不算缺失"""
+        self.store.set_cells('fetched', ['20250106'], ['000001.SZ'])
+        master = SecurityMaster.from_frames(pd.DataFrame({
+            'ts_code': SYMBOLS + ['688001.SH'], 'list_date': ['20000101', '20000101', '20000101', '20250109']}))
+        issues = QualityScanner(self.store, CALENDAR, master=master, new_listing_days=0).scan().issues
+        missing = issues[issues['kind'] == 'missing']
+        self.assertEqual(missing[['ts_code', 'start_date', 'end_date']].values.tolist(),
+                         [['000001.SZ', 20250107, 20250107], ['688001.SH', 20250109, 20250113]])
+
+    def test_repair(self):
+        """测试修复计划的生成、保存和执行"""
+        report = QualityScanner(self.store, CALENDAR).scan()
+        plan = report.repair_plan()
+        # 问题分布在 5 个交易日、2 只股票，按股票取数更省
+        self.assertEqual((plan['mode'], plan['calls']), ('symbol', 2))
+        self.assertEqual(plan['ranges']['300750.SZ'], ('20250109', '20250113'))
+        self.assertEqual(plan['clear'], {'600000.SH': [[20250104, 20250104], [20250108, 20250108]]})
+
+        path = os.path.join(self.root, 'plan.json')
+        save_repair_plan(plan, path)
+        plan = load_repair_plan(path)
+        old, fake = DataSource.tushare_pro, FakePro()
+        DataSource.tushare_pro = fake
+        try:
+            stats = ts_daily_ingest.repair_daily(plan, CALENDAR, store=self.store)
+        finally:
+            DataSource.tushare_pro = old
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['cleared'], 2)
+        # 停牌日清除后标记为已获取，不再视为缺失
+        self.store.set_cells('fetched', ['20250108'], ['600000.SH'])
+        self.assertEqual(len(QualityScanner(self.store, CALENDAR).scan()), 0)
+
+    def test_cache_table(self):
+        """测试缓存表中无法解析和重复的记录"""
+        path = os.path.join(self.root, 'get_bars.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE get_bars (date_key TEXT, symbol TEXT, update_time TIMESTAMP, data_csv TEXT, '
+                     'PRIMARY KEY (date_key, symbol))')
+        good = 'trade_date,close\n20250102,1.0\n'
+        conn.executemany('INSERT INTO get_bars VALUES (?, ?, ?, ?)', [
+            ('20250102', 'A', None, good),
+            ('20250103', 'A', None, 'trade_date,close\n"20250103,1.0\n'),
+            ('20250102', 'B', None, good + '20250102,1.0\n'),
+        ])
+        conn.commit()
+        conn.close()
+        issues = scan_cache_table('get_bars', path)
+        self.assertEqual(issues[['symbol', 'date_key', 'kind']].values.tolist(),
+                         [['A', '20250103', 'corrupt'], ['B', '20250102', 'duplicate']])
+        self.assertEqual(purge_cache_rows(issues[['table', 'symbol', 'date_key']].values.tolist(), path), 2)
+        self.assertTrue(scan_cache_table('get_bars', path).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+K线周期转换测试用例
+
+测试K线周期转换的各项功能：
+- 周期划分
+- 分组聚合（含缺失值）
+- 派生数据集的计算与失效
+- 分笔合成按交易时段对齐的分钟线
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.ak.hq.tick_store import TickStore, session_minutes, to_minute_bars
+from data.store.panel_store import PanelStore
+from data.store.resample import MinuteBarCache, Resampler, feed_frame, period_keys, reduce_groups, resample_ticks
+from utils.stub_source import StubDataSource
+
+SYMBOLS = ['000001.SZ', '600000.SH']
+
+
+class TestResample(unittest.TestCase):
+    """K线周期转换测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('daily', root=self.root)
+        self.calendar = pd.bdate_range('20241216', '20250228')
+        rng = np.random.default_rng(1)
+        close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (len(self.calendar), len(SYMBOLS))), axis=0)
+        close[5, 0] = np.nan
+        open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+        frames = {'close': close, 'open': open_, 'high': np.fmax(close, open_) * 1.01,
+                  'low': np.fmin(close, open_) * 0.99, 'vol': rng.integers(100, 1000, close.shape).astype(float)}
+        frames['vol'][5, 0] = np.nan
+        index = self.calendar.strftime('%Y%m%d')
+        self.frames = {f: pd.DataFrame(v, index=self.calendar, columns=SYMBOLS) for f, v in frames.items()}
+        self.store.write_frames({f: pd.DataFrame(v, index=index, columns=SYMBOLS) for f, v in frames.items()})
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_period_keys(self):
+        """测试周期划分，跨年的一周不拆开"""
+        dates = ['20241230', '20241231', '20250102', '20250103', '20250106']
+        keys = period_keys(dates, 'W')
+        self.assertEqual(len(set(keys[:4])), 1)
+        self.assertNotEqual(keys[3], keys[4])
+        self.assertEqual(list(period_keys(dates, 'M')), [202412, 202412, 202501, 202501, 202501])
+        self.assertEqual(list(period_keys(dates, '2D')), [0, 0, 1, 1, 2])
+        with self.assertRaises(ValueError):
+            period_keys(dates, 'H')
+
+    def test_reduce_groups(self):
+        """测试分组聚合忽略缺失值"""
+        values = np.array([[np.nan, 1.0], [2.0, np.nan], [np.nan, np.nan], [3.0, 4.0]])
+        starts = np.array([0, 2])
+        np.testing.assert_array_equal(reduce_groups(values, starts, 'first'), [[2.0, 1.0], [3.0, 4.0]])
+        np.testing.assert_array_equal(reduce_groups(values, starts, 'last'), [[2.0, 1.0], [3.0, 4.0]])
+        np.testing.assert_array_equal(reduce_groups(values[:, :1], np.array([0, 2, 3]), 'sum'),
+                                      [[2.0], [np.nan], [3.0]])
+
+    def test_weekly_matches_pandas(self):
+        """测试周线与 pandas resample 的结果一致"""
+        resampler = Resampler(self.store)
+        for rule, freq in (('W', 'W-FRI'), ('M', 'ME')):
+            derived = resampler.get(rule)
+            for field, how in (('open', 'first'), ('high', 'max'), ('low', 'min'), ('close', 'last'),
+                               ('vol', 'sum')):
+                expected = getattr(self.frames[field].resample(freq), how)()
+                actual = derived.read(field, symbols=SYMBOLS)
+                np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-12)
+        # 标签为周期内最后一个交易日
+        self.assertEqual(resampler.get('M').dates[-1], 20250228)
+        bars = feed_frame(resampler.read_bars('000001.SZ', 'W'))
+        self.assertEqual(list(bars.columns), ['open', 'high', 'low', 'close', 'volume', 'openinterest'])
+        self.assertIsInstance(bars.index, pd.DatetimeIndex)
+
+    def test_invalidation(self):
+        """测试源数据更新后派生数据重新计算，未更新时不重新计算"""
+        resampler = Resampler(self.store)
+        version = resampler.get('W').version
+        self.assertEqual(resampler.get('W').version, version)
+        self.assertFalse(resampler.is_stale('W'))
+        self.store.write_frames({'close': pd.DataFrame(99.0, index=['20250303'], columns=SYMBOLS)})
+        self.assertTrue(resampler.is_stale('W'))
+        weekly = resampler.read('W', 'close')
+        self.assertEqual(weekly.index[-1], 20250303)
+        self.assertEqual(weekly.iloc[-1].tolist(), [99.0, 99.0])
+
+    def test_resample_ticks(self):
+        """测试分笔合成分钟线按交易时段对齐"""
+        seconds = np.array([9 * 3600 + 25 * 60, 11 * 3600 + 30 * 60, 13 * 3600, 15 * 3600])
+        self.assertEqual(session_minutes(seconds).tolist(), [0, 119, 120, 239])
+
+        ticks = pd.DataFrame({'time': [34200, 37799, 37800, 41400, 46800, 54000],
+                              'price': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0], 'volume': 1, 'amount': 10})
+        bars = resample_ticks(ticks, 60)
+        self.assertEqual(bars.index.tolist(), ['09:30:00', '10:30:00', '13:00:00', '14:00:00'])
+        self.assertEqual(bars['close'].tolist(), [2.0, 4.0, 5.0, 6.0])
+        self.assertEqual(bars['count'].tolist(), [2, 2, 1, 1])
+
+    def test_minute_bars_agree(self):
+        """测试 resample_ticks、MinuteBarCache 与 to_minute_bars 对集合竞价和收盘成交的处理一致"""
+        store = TickStore(self.root)
+        raw = StubDataSource().ticks('sz300001', '20250321')
+        # 加入 09:25 开盘集合竞价、11:30 和 15:00 的成交
+        extra = raw.iloc[[0, 0, 0]].copy()
+        extra['成交时间'] = ['09:25:00', '11:30:00', '15:00:00']
+        raw = pd.concat([raw, extra]).sort_values('成交时间', kind='stable')
+        store.write('sz300001', '20250321', raw)
+        store.write('sz300001', '20250324', raw)
+        ticks = store.read('sz300001', '20250321')
+        for minutes in (1, 5, 30):
+            bars = resample_ticks(ticks, minutes)
+            pd.testing.assert_frame_equal(bars, to_minute_bars(ticks, minutes))
+            pd.testing.assert_frame_equal(MinuteBarCache(store).read('sz300001', '20250321', minutes), bars,
+                                          check_dtype=False)
+            pd.testing.assert_frame_equal(to_minute_bars(store.read_range('sz300001'), minutes).loc[20250324], bars)
+            self.assertEqual(bars['volume'].sum(), ticks['volume'].sum())
+        bars = resample_ticks(ticks, 1)
+        self.assertEqual((bars.index[0], bars.index[-1]), ('09:30:00', '14:59:00'))
+        self.assertNotIn('11:30:00', bars.index)
+        self.assertLessEqual(len(bars), 240)
+
+    def test_minute_cache(self):
+        """测试分钟线缓存，分笔文件更新后重新计算"""
+        ticks = TickStore(self.root)
+        raw = StubDataSource().ticks('sz300001', '20250321')
+        ticks.write('sz300001', '20250321', raw)
+        cache = MinuteBarCache(ticks)
+        bars = cache.read('sz300001', '20250321', 30)
+        self.assertEqual(len(bars), 8)
+        self.assertEqual(bars['volume'].sum(), raw['成交量'].sum())
+        pd.testing.assert_frame_equal(cache.read('sz300001', '20250321', 30), bars, check_dtype=False)
+
+        ticks.write('sz300001', '20250321', raw.iloc[: len(raw) // 2])
+        self.assertLess(cache.read('sz300001', '20250321', 30)['volume'].sum(), bars['volume'].sum())
+        self.assertEqual(len(cache.read_range('sz300001', 30).index.names), 2)
+        self.assertTrue(cache.read('sz300001', '20250324', 30).empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
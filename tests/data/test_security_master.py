@@ -0,0 +1,120 @@
+"""
+证券主数据测试用例
+
+测试证券主数据的各项功能：
+- 代码前缀推断（单个和向量化）
+- 稠密整数编号和单个/批量查询
+- ST 和北交所的涨跌幅限制
+- 上市状态掩码
+- 从数据源加载
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.tushare.basic.security_master import MISSING_ID, SecurityMaster
+from utils.code_symbol import code_symbol, code_symbols, price_limits
+from utils.global_config import DataSource
+from utils.stub_source import StubDataSource
+from utils.utils import get_limit_prices, get_rise_limit_by_stock_code
+
+
+class TestSecurityMaster(unittest.TestCase):
+    """证券主数据测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        listed = pd.DataFrame({
+            'ts_code': ['600000.SH', '688001.SH', '300750.SZ', '000004.SZ', '830799.BJ'],
+            'name': ['浦发银行', '华兴源创', '宁德时代', '*ST国华', '艾融软件'],
+            'industry': ['银行', '专用机械', '电气设备', '软件服务', '软件服务'],
+            'market': ['主板', '科创板', '创业板', '主板', '北交所'],
+            'list_date': ['19991110', '20190722', '20180611', '19910114', '20200727'],
+        })
+        delisted = pd.DataFrame({'ts_code': ['600001.SH'], 'name': ['邯郸钢铁'], 'industry': ['钢铁'],
+                                 'market': ['主板'], 'list_date': ['19980122'], 'delist_date': ['20091229']})
+        hs_sh = pd.DataFrame({'ts_code': ['600000.SH'], 'hs_type': ['SH']})
+        self.master = SecurityMaster.from_frames(listed, delisted, hs_sh)
+
+    def test_code_symbol(self):
+        """测试前缀推断，向量化版本与单个版本一致"""
+        codes = ['000001', '300750', '600000', '688001', '830799', '430001', '900901', '999999', '600000.SH']
+        expected = [code_symbol(c) for c in codes]
+        self.assertEqual(list(code_symbols(codes)), expected)
+        self.assertIsNone(expected[7])
+        self.assertEqual(code_symbol(1), '000001.SZ')
+        series = code_symbols(pd.Series([1, 600519], index=['a', 'b']))
+        self.assertEqual(series.to_dict(), {'a': '000001.SZ', 'b': '600519.SH'})
+
+    def test_price_limits(self):
+        """测试按前缀的涨跌幅限制和涨跌停价"""
+        limits = price_limits(['600000', '300750', '688001', '830799', '000004'], [False, False, True, False, True])
+        np.testing.assert_allclose(limits, [0.1, 0.2, 0.2, 0.3, 0.05])
+        self.assertEqual(get_rise_limit_by_stock_code('688001'), 0.2)
+        up, down = get_limit_prices([10.0, 9.99], ['600000', '300750'])
+        np.testing.assert_allclose(up, [11.0, 11.99])
+        np.testing.assert_allclose(down, [9.0, 7.99])
+        # 恰好半分时四舍五入（half-up），不是银行家舍入
+        up, down = get_limit_prices([12.35, 7.25, 2.25], ['600000', '600000', '600000'])
+        np.testing.assert_allclose(up, [13.59, 7.98, 2.48])
+        np.testing.assert_allclose(down, [11.12, 6.53, 2.03])
+
+    def test_lookup(self):
+        """测试编号和单个查询"""
+        master = self.master
+        self.assertEqual(len(master), 6)
+        ids = master.ids(['600000.SH', 'UNKNOWN', '830799.BJ'])
+        self.assertEqual(ids[1], MISSING_ID)
+        self.assertEqual(master.symbols[ids[0]], '600000.SH')
+        self.assertEqual(master.id_of('830799.BJ'), ids[2])
+
+        info = master.info('600000.SH')
+        self.assertEqual((info['exchange'], info['board'], info['industry']), ('SH', '主板', '银行'))
+        self.assertEqual(info['list_date'], 19991110)
+        self.assertTrue(info['is_hs'])
+        self.assertEqual(master.price_limit('000004.SZ'), 0.05)
+        self.assertEqual(master.price_limit('830799.BJ'), 0.3)
+        self.assertEqual(master.info('600001.SH')['delist_date'], 20091229)
+        # 不在主数据中的代码按前缀推断
+        self.assertEqual(master.board('301001.SZ'), '创业板')
+        self.assertEqual(master.exchange('301001'), 'SZ')
+        self.assertIsNone(master.industry('301001.SZ'))
+
+    def test_batch_lookup(self):
+        """测试批量查询"""
+        symbols = ['688001.SH', '000004.SZ', '301001.SZ']
+        np.testing.assert_allclose(self.master.price_limits(symbols), [0.2, 0.05, 0.2])
+        self.assertEqual(list(self.master.boards_of(symbols)), ['科创板', '主板', '创业板'])
+        self.assertEqual(list(self.master.industries_of(symbols)), ['专用机械', '软件服务', None])
+        self.assertEqual(list(self.master.list_dates_of(symbols)), [20190722, 19910114, 0])
+
+    def test_listed_mask(self):
+        """测试上市状态掩码"""
+        mask = self.master.listed_mask(['20080101', '20190801', '20200101'], ['600001.SH', '688001.SH', 'X'])
+        self.assertEqual(mask.to_numpy().tolist(), [[True, False, False], [False, True, False],
+                                                    [False, True, False]])
+
+    def test_load(self):
+        """测试从数据源加载并保存当天快照"""
+        old = DataSource.set_source(StubDataSource(seed=1, n_symbols=12))
+        try:
+            with tempfile.TemporaryDirectory() as root:
+                path = os.path.join(root, 'master.csv')
+                master = SecurityMaster.load(path)
+                self.assertEqual(len(master), 12)
+                self.assertTrue(master.is_hs.any())
+                calls = dict(DataSource.tushare_pro.calls)
+                again = SecurityMaster.load(path)
+                self.assertEqual(DataSource.tushare_pro.calls, calls)
+                self.assertEqual(list(again.symbols), list(master.symbols))
+                self.assertEqual(list(again.boards), list(master.boards))
+        finally:
+            DataSource.set_source(*old)
+
+
+if __name__ == '__main__':
+    unittest.main()
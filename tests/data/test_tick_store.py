@@ -0,0 +1,80 @@
+"""
+分笔成交存储测试用例
+
+测试分笔成交存储的各项功能：
+- 编码解码无损
+- 时间范围读取
+- 合成分钟线
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from data.ak.hq.tick_store import TickStore, decode_ticks, encode_ticks, from_akshare, to_akshare, to_minute_bars
+from utils.stub_source import StubDataSource
+
+
+class TestTickStore(unittest.TestCase):
+    """分笔成交存储测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = TickStore(self.root)
+        self.source = StubDataSource()
+        self.raw = self.source.ticks('sz300001', '20250321')
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_roundtrip(self):
+        """测试编码解码无损且小于 CSV"""
+        columns = from_akshare(self.raw)
+        data = encode_ticks(columns)
+        decoded = decode_ticks(data)
+        for name, values in columns.items():
+            np.testing.assert_array_equal(decoded[name], values)
+            self.assertEqual(decoded[name].dtype, values.dtype)
+        self.assertLess(len(data) * 3, len(self.raw.to_csv(index=False).encode('utf-8')))
+        restored = to_akshare(self._write_and_read())
+        self.assertEqual(restored['成交时间'].tolist(), self.raw['成交时间'].tolist())
+        self.assertEqual(restored['性质'].tolist(), self.raw['性质'].tolist())
+        np.testing.assert_allclose(restored['成交价格'], self.raw['成交价格'])
+
+    def _write_and_read(self):
+        self.store.write('sz300001', '20250321', self.raw)
+        return self.store.read('sz300001', '20250321')
+
+    def test_range_read(self):
+        """测试按日期和时间范围读取"""
+        self.store.write('sz300001', '20250320', self.source.ticks('sz300001', '20250320'))
+        self.store.write('sz300001', '20250321', self.raw)
+        ticks = self.store.read('sz300001', '20250321', start_time='10:00:00', end_time='10:00:59',
+                                columns=['price'])
+        self.assertEqual(len(ticks), 20)
+        self.assertEqual(list(ticks.columns), ['time', 'price'])
+        both = self.store.read_range('sz300001', '20250320', '20250321', start_time='14:59:00')
+        self.assertEqual(sorted(both['trade_date'].unique()), [20250320, 20250321])
+        self.assertEqual(self.store.dates('sz300001'), [20250320, 20250321])
+        self.assertTrue(self.store.read_range('sz300001', '20250101', '20250102').empty)
+
+    def test_minute_bars(self):
+        """测试合成分钟线与逐分钟计算结果一致"""
+        ticks = self._write_and_read()
+        bars = to_minute_bars(ticks)
+        self.assertEqual(bars['volume'].sum(), ticks['volume'].sum())
+        minute = ticks[(ticks['time'] >= 10 * 3600) & (ticks['time'] < 10 * 3600 + 60)]
+        bar = bars.loc['10:00:00']
+        self.assertEqual((bar['open'], bar['close']), (minute['price'].iloc[0], minute['price'].iloc[-1]))
+        self.assertEqual((bar['high'], bar['low']), (minute['price'].max(), minute['price'].min()))
+        five = to_minute_bars(self.store.read_range('sz300001'), minutes=5)
+        self.assertEqual(five.index.names, ['trade_date', 'time'])
+        self.assertEqual(five.loc[(20250321, '10:00:00'), 'count'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+日线入库测试用例
+
+测试日线入库的各项功能：
+- 取数方式自动选择
+- 按交易日入库
+- 按股票入库
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from data.store.panel_store import PanelStore
+from data.tushare.basic import ts_daily_ingest
+from utils.global_config import DataSource
+
+TRADE_DATES = ['20250102', '20250103', '20250106', '20250107']
+SYMBOLS = ['000001.SZ', '600000.SH', '300750.SZ']
+
+
+class FakePro:
+    """模拟 tushare pro 的 daily 接口"""
+
+    def __init__(self):
+        self.calls = []
+
+    def daily(self, ts_code=None, trade_date=None, start_date=None, end_date=None):
+        self.calls.append((ts_code, trade_date))
+        dates = [trade_date] if trade_date else [d for d in TRADE_DATES if start_date <= d <= end_date]
+        codes = [ts_code] if ts_code else SYMBOLS
+        return pd.DataFrame([{'ts_code': c, 'trade_date': d, 'open': 1.0, 'high': 1.0, 'low': 1.0,
+                              'close': float(d[-2:]), 'vol': 10.0} for d in dates for c in codes])
+
+
+class TestDailyIngest(unittest.TestCase):
+    """日线入库测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.root = tempfile.mkdtemp()
+        self.store = PanelStore('daily', root=self.root)
+        self.pro = DataSource.tushare_pro
+        self.fake = FakePro()
+        DataSource.tushare_pro = self.fake
+
+    def tearDown(self):
+        """测试清理"""
+        DataSource.tushare_pro = self.pro
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_universe_by_date(self):
+        """测试全市场更新按交易日取数，每天一次调用"""
+        stats = ts_daily_ingest.ingest_daily(TRADE_DATES[0], TRADE_DATES[-1], store=self.store,
+                                             trade_dates=TRADE_DATES)
+        self.assertEqual(stats['mode'], 'date')
+        self.assertEqual(stats['calls'], len(TRADE_DATES))
+        self.assertEqual(self.store.shape, (4, 3))
+        # 已入库的日期不会重复获取
+        again = ts_daily_ingest.ingest_daily(TRADE_DATES[0], TRADE_DATES[-1], store=self.store,
+                                             trade_dates=TRADE_DATES)
+        self.assertEqual(again['calls'], 0)
+
+    def test_single_symbol_by_symbol(self):
+        """测试单只股票长历史按股票取数"""
+        stats = ts_daily_ingest.ingest_daily(TRADE_DATES[0], TRADE_DATES[-1], symbols=['000001.SZ'],
+                                             store=self.store, trade_dates=TRADE_DATES)
+        self.assertEqual(stats['mode'], 'symbol')
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(self.fake.calls, [('000001.SZ', None)])
+
+        bars = ts_daily_ingest.read_daily_bars('000001.SZ', store=self.store)
+        self.assertEqual(list(bars.index), TRADE_DATES)
+        self.assertEqual(bars.loc['20250107', 'close'], 7.0)
+
+        plan = ts_daily_ingest.plan_daily_ingest(TRADE_DATES, ['000001.SZ'], self.store)
+        self.assertEqual(plan['mode'], 'none')
+
+    def test_plan_prefers_fewer_calls(self):
+        """测试多只股票短区间时按交易日取数"""
+        plan = ts_daily_ingest.plan_daily_ingest(TRADE_DATES[:1], SYMBOLS, self.store)
+        self.assertEqual(plan['mode'], 'date')
+        self.assertEqual(plan['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+自适应限流测试用例
+
+测试自适应限流的各项功能：
+- 错误分类
+- 退避重试
+- AIMD 频率调整
+- 熔断器
+"""
+
+import unittest
+
+import requests
+
+from utils.adaptive_throttle import (AdaptiveThrottle, CircuitBreaker, CircuitOpenError, ErrorKind,
+                                     classify_error)
+from utils.rate_limit_backend import MemoryBackend
+from utils.rate_limit_request import RateLimiter
+
+
+def _throttle(max_calls=100, **kwargs):
+    """创建不等待的测试控制器"""
+    kwargs.setdefault('base_delay', 0.0)
+    kwargs.setdefault('max_delay', 0.0)
+    limiter = RateLimiter(max_calls, time_window=0.001, backend=MemoryBackend(), key='test')
+    return AdaptiveThrottle(limiter, **kwargs)
+
+
+class TestAdaptiveThrottle(unittest.TestCase):
+    """自适应限流测试类"""
+
+    def test_classify_error(self):
+        """测试错误分类"""
+        self.assertEqual(classify_error(Exception('抱歉，您每分钟最多访问该接口200次')), ErrorKind.RATE_LIMIT)
+        self.assertEqual(classify_error(ConnectionError('reset by peer')), ErrorKind.NETWORK)
+        self.assertEqual(classify_error(Exception('Internal Server Error')), ErrorKind.SERVER)
+        self.assertEqual(classify_error(Exception('抱歉，您没有访问该接口的权限')), ErrorKind.CLIENT)
+        self.assertEqual(classify_error(ValueError('something else')), ErrorKind.UNKNOWN)
+        self.assertEqual(classify_error(Exception('token无效, timeout')), ErrorKind.CLIENT)
+
+    def test_classify_http_error(self):
+        """测试带响应的 requests 异常按状态码分类，没有响应的按网络错误处理"""
+        def http_error(status):
+            response = requests.Response()
+            response.status_code = status
+            return requests.HTTPError(f'{status} Error', response=response)
+
+        self.assertEqual(classify_error(http_error(429)), ErrorKind.RATE_LIMIT)
+        self.assertEqual(classify_error(http_error(503)), ErrorKind.SERVER)
+        self.assertEqual(classify_error(http_error(400)), ErrorKind.CLIENT)
+        self.assertEqual(classify_error(http_error(401)), ErrorKind.CLIENT)
+        self.assertEqual(classify_error(requests.ConnectionError('reset by peer')), ErrorKind.NETWORK)
+        self.assertEqual(classify_error(requests.Timeout('read timed out')), ErrorKind.NETWORK)
+
+    def test_retry_until_success(self):
+        """测试可重试错误会重试直到成功"""
+        throttle = _throttle()
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise Exception('Service Unavailable')
+            return 'ok'
+
+        self.assertEqual(throttle.call('daily', flaky), 'ok')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(throttle.stats()['retries'], 2)
+
+    def test_client_error_not_retried(self):
+        """测试客户端错误不重试"""
+        throttle = _throttle()
+        calls = []
+
+        def bad():
+            calls.append(1)
+            raise Exception('参数错误')
+
+        with self.assertRaises(Exception):
+            throttle.call('daily', bad)
+        self.assertEqual(len(calls), 1)
+
+    def test_aimd(self):
+        """测试 AIMD 频率调整"""
+        throttle = _throttle(max_calls=8, max_retries=1)
+        state = {'fail': True}
+
+        def limited():
+            if state['fail']:
+                state['fail'] = False
+                raise Exception('抱歉，您每分钟最多访问该接口8次')
+            return 1
+
+        throttle.call('daily', limited)
+        # 乘性减
+        self.assertEqual(throttle.current_rate, 4)
+        # 一个窗口全部成功后加性增，且不超过上限
+        for _ in range(40):
+            throttle.call('daily', lambda: 1)
+        self.assertEqual(throttle.current_rate, 8)
+
+    def test_circuit_breaker(self):
+        """测试熔断器"""
+        throttle = _throttle(max_retries=10, failure_threshold=3, recovery_time=60)
+
+        def down():
+            raise Exception('Bad Gateway')
+
+        with self.assertRaises(CircuitOpenError):
+            throttle.call('daily', down)
+        self.assertEqual(throttle.stats()['breakers']['daily'], CircuitBreaker.OPEN)
+        # 其他接口不受影响
+        self.assertEqual(throttle.call('trade_cal', lambda: 1), 1)
+
+    def test_half_open(self):
+        """测试熔断器半开试探"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_time=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_decorator(self):
+        """测试装饰器用法"""
+        throttle = _throttle()
+
+        @throttle
+        def fetch(x):
+            return x * 2
+
+        self.assertEqual(fetch(2), 4)
+        self.assertIs(fetch.throttle, throttle)
+
+
+if __name__ == '__main__':
+    unittest.main()
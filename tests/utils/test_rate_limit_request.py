@@ -0,0 +1,153 @@
+"""
+速率限制器测试用例
+
+测试速率限制器的各项功能：
+- 内存后端
+- SQLite 后端跨进程共享额度
+- 远程后端
+- 优先级队列与额度预留
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import get_context
+
+from utils.rate_limit_backend import MemoryBackend, SqliteBackend, RemoteBackend, RateLimitServer, backend_from_url
+from utils.consts import RequestPriority
+from utils.rate_limit_request import RateLimiter, rate_limit, request_priority
+
+
+def _acquire_in_process(db_path, count, queue):
+    """子进程中尝试占用额度，返回成功次数"""
+    backend = SqliteBackend(db_path)
+    queue.put(sum(1 for _ in range(count) if backend.acquire('shared', 5, 60) == 0))
+
+
+class TestRateLimiter(unittest.TestCase):
+    """速率限制器测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'rate_limit.db')
+
+    def tearDown(self):
+        """测试清理"""
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_memory_backend(self):
+        """测试内存后端"""
+        backend = MemoryBackend()
+        self.assertEqual(backend.acquire('a', 2, 60), 0)
+        self.assertEqual(backend.acquire('a', 2, 60), 0)
+        self.assertGreater(backend.acquire('a', 2, 60), 0)
+        # 不同 key 互不影响
+        self.assertEqual(backend.acquire('b', 2, 60), 0)
+        self.assertEqual(backend.usage('a', 60), 2)
+
+    def test_decorator_with_backend(self):
+        """测试装饰器使用指定后端"""
+        backend = MemoryBackend()
+
+        @rate_limit(3, backend=backend, key='api')
+        def api():
+            return 1
+
+        for _ in range(3):
+            api()
+        self.assertEqual(backend.usage('api', 60), 3)
+        self.assertGreater(backend.acquire('api', 3, 60), 0)
+
+    def test_limiter_waits(self):
+        """测试超出额度时等待"""
+        limiter = RateLimiter(2, time_window=0.2, backend=MemoryBackend())
+        limiter.acquire()
+        limiter.acquire()
+        self.assertGreater(limiter.acquire(), 0)
+
+    def test_sqlite_backend_shared_between_instances(self):
+        """测试 SQLite 后端在不同实例间共享额度"""
+        first = SqliteBackend(self.db_path)
+        second = SqliteBackend(self.db_path)
+        self.assertEqual(first.acquire('shared', 2, 60), 0)
+        self.assertEqual(second.acquire('shared', 2, 60), 0)
+        self.assertGreater(first.acquire('shared', 2, 60), 0)
+        self.assertEqual(second.usage('shared', 60), 2)
+
+    def test_sqlite_backend_shared_between_processes(self):
+        """测试 SQLite 后端在多个进程间共享额度"""
+        SqliteBackend(self.db_path)
+        ctx = get_context('spawn')
+        queue = ctx.Queue()
+        processes = [ctx.Process(target=_acquire_in_process, args=(self.db_path, 4, queue)) for _ in range(3)]
+        for p in processes:
+            p.start()
+        acquired = sum(queue.get(timeout=60) for _ in processes)
+        for p in processes:
+            p.join()
+        self.assertEqual(acquired, 5)
+
+    def test_remote_backend(self):
+        """测试远程后端"""
+        server = RateLimitServer(MemoryBackend(), port=0).start()
+        try:
+            host, port = server.address
+            remote = backend_from_url(f'http://{host}:{port}')
+            self.assertIsInstance(remote, RemoteBackend)
+            self.assertEqual(remote.acquire('node', 1, 60), 0)
+            self.assertGreater(RemoteBackend(host, port).acquire('node', 1, 60), 0)
+            remote.reset('node')
+            self.assertEqual(remote.usage('node', 60), 0)
+        finally:
+            server.stop()
+
+    def test_priority_preemption(self):
+        """测试高优先级请求优先获得下一个额度"""
+        limiter = RateLimiter(1, time_window=0.2, backend=MemoryBackend())
+        limiter.acquire(RequestPriority.BATCH)
+        order = []
+
+        def request(name, priority):
+            limiter.acquire(priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=request, args=(f'batch{i}', RequestPriority.BATCH)) for i in range(2)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        live = threading.Thread(target=request, args=('live', RequestPriority.LIVE_TRADING))
+        live.start()
+        time.sleep(0.02)
+        self.assertEqual(limiter.lane_metrics()['batch']['queue_depth'], 2)
+        for t in threads + [live]:
+            t.join()
+        self.assertEqual(order[0], 'live')
+        metrics = limiter.lane_metrics()
+        self.assertEqual(metrics['live_trading']['acquired'], 1)
+        self.assertEqual(metrics['batch']['acquired'], 3)
+        self.assertGreater(metrics['batch']['max_wait'], 0)
+
+    def test_reserved_capacity(self):
+        """测试批量请求不能占用预留给交互请求的额度"""
+        backend = MemoryBackend()
+        limiter = RateLimiter(10, backend=backend, key='reserve')
+        # 没有高优先级请求时批量请求可以使用全部额度
+        for _ in range(10):
+            limiter.acquire(RequestPriority.BATCH)
+        backend.reset()
+
+        with request_priority(RequestPriority.INTERACTIVE):
+            limiter.acquire()
+        for _ in range(7):
+            limiter.acquire(RequestPriority.BATCH)
+        self.assertGreater(backend.acquire('reserve', 8, 60), 0)
+        # 交互请求仍然有额度
+        self.assertEqual(backend.acquire('reserve', 10, 60), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+离线数据源测试用例
+
+测试离线数据源的各项功能：
+- 数据可重复
+- 频率限制与随机错误
+- 兼容 tushare 协议的 HTTP 服务
+- 替换 DataSource
+"""
+
+import unittest
+
+from utils.adaptive_throttle import ErrorKind, classify_error
+from utils.global_config import DataSource
+from utils.stub_source import StubDataSource, StubServer, source_from_url, stub_pro_api
+
+
+class TestStubSource(unittest.TestCase):
+    """离线数据源测试类"""
+
+    def test_deterministic(self):
+        """测试相同种子返回相同数据"""
+        first = StubDataSource(seed=1).daily(ts_code='000001.SZ', start_date='20250101', end_date='20250131')
+        second = StubDataSource(seed=1).daily(ts_code='000001.SZ', start_date='20250101', end_date='20250131')
+        self.assertEqual(len(first), 23)
+        self.assertTrue(first.equals(second))
+        # 按交易日取全市场与按股票取的数据一致
+        source = StubDataSource(seed=1, n_symbols=10)
+        row = source.daily(trade_date='20250106').set_index('ts_code').loc['000001.SZ']
+        self.assertEqual(row['close'], first.set_index('trade_date').loc['20250106', 'close'])
+        self.assertEqual(len(source.daily(trade_date='20250106')), 10)
+
+    def test_endpoints(self):
+        """测试各个接口"""
+        source = StubDataSource(n_symbols=6)
+        cal = source.trade_cal(start_date='20250101', end_date='20250107')
+        self.assertEqual(cal['is_open'].sum(), 5)
+        self.assertEqual(len(source.stock_basic(list_status='L')), 6)
+        factor = source.stk_factor_pro(ts_code='600000.SH', start_date='20250101', end_date='20250110')
+        self.assertIn('close_qfq', factor.columns)
+        self.assertEqual(list(source.query('daily', fields='ts_code,close', trade_date='20250106').columns),
+                         ['ts_code', 'close'])
+        with self.assertRaises(Exception):
+            source.query('no_such_api')
+
+    def test_rate_limit_and_errors(self):
+        """测试频率限制和随机错误能被正确分类"""
+        source = StubDataSource(max_calls=2)
+        source.daily(trade_date='20250106')
+        source.daily(trade_date='20250106')
+        with self.assertRaises(Exception) as ctx:
+            source.daily(trade_date='20250106')
+        self.assertEqual(classify_error(ctx.exception), ErrorKind.RATE_LIMIT)
+
+        source = StubDataSource(error_rate=1.0)
+        with self.assertRaises(Exception) as ctx:
+            source.trade_cal()
+        self.assertEqual(classify_error(ctx.exception), ErrorKind.SERVER)
+
+    def test_http_server(self):
+        """测试 tushare 客户端通过 HTTP 访问离线服务"""
+        server = StubServer(StubDataSource(seed=2), port=0).start()
+        try:
+            pro = stub_pro_api(server.url)
+            df = pro.daily(ts_code='000001.SZ', start_date='20250101', end_date='20250110')
+            expected = StubDataSource(seed=2).daily(ts_code='000001.SZ', start_date='20250101', end_date='20250110')
+            self.assertEqual(df['close'].tolist(), expected['close'].tolist())
+            _, akshare = source_from_url(server.url)
+            ticks = akshare.stock_zh_a_tick_tx_js(symbol='sz300001')
+            self.assertEqual(list(ticks.columns)[:2], ['成交时间', '成交价格'])
+            with self.assertRaises(Exception):
+                pro.query('no_such_api')
+        finally:
+            server.stop()
+
+    def test_set_source(self):
+        """测试替换 DataSource"""
+        old = DataSource.set_source(*source_from_url('stub://?n_symbols=3&seed=5'))
+        try:
+            self.assertIsInstance(DataSource.tushare_pro, StubDataSource)
+            self.assertEqual(len(DataSource.tushare_pro.stock_basic()), 3)
+        finally:
+            DataSource.set_source(*old)
+        self.assertIs(DataSource.tushare_pro, old[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
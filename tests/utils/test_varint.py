@@ -0,0 +1,64 @@
+"""
+Varint / ZigZag 批量编解码测试用例
+
+测试批量编解码的各项功能：
+- 与逐个编码的结果一致
+- memoryview 切片解码
+- 差分编码
+"""
+
+import unittest
+
+import numpy as np
+
+from utils.varint import Varint, decode_signed_array, delta_decode, delta_encode, encode_signed_array
+from utils.zig_zag import ZigZag
+
+
+class TestVarint(unittest.TestCase):
+    """批量编解码测试类"""
+
+    def setUp(self):
+        """测试初始化"""
+        edges = [0, 1, 127, 128, 16383, 16384, 2 ** 35, 2 ** 62, 2 ** 63 - 1, -1, -64, -65, -2 ** 63]
+        rng = np.random.default_rng(0)
+        self.values = np.concatenate([edges, rng.integers(-10 ** 9, 10 ** 9, 1000)]).astype(np.int64)
+
+    def test_matches_scalar(self):
+        """测试与逐个编码一致"""
+        zigzag = ZigZag.encode_array(self.values)
+        self.assertEqual(zigzag.tolist(), [ZigZag.encode(int(v)) & (2 ** 64 - 1) for v in self.values])
+        np.testing.assert_array_equal(ZigZag.decode_array(zigzag), self.values)
+
+        data = Varint.encode_array(zigzag)
+        self.assertEqual(data, b''.join(Varint.encode(int(v))[0] for v in zigzag))
+        decoded, consumed = Varint.decode_array(data)
+        self.assertEqual(consumed, len(data))
+        np.testing.assert_array_equal(decoded, zigzag)
+
+    def test_memoryview_and_count(self):
+        """测试从更大缓冲区的 memoryview 切片中解码指定个数"""
+        data = encode_signed_array(self.values)
+        buf = memoryview(b'\x05' + data + b'\x01\x02')
+        values, consumed = decode_signed_array(buf[1:], count=len(self.values))
+        np.testing.assert_array_equal(values, self.values)
+        self.assertEqual(consumed, len(data))
+        with self.assertRaises(EOFError):
+            Varint.decode_array(data[:-1])
+        with self.assertRaises(EOFError):
+            Varint.decode_array(data, count=len(self.values) + 1)
+        self.assertEqual(Varint.decode_array(b'')[0].size, 0)
+
+    def test_delta(self):
+        """测试差分与二阶差分"""
+        times = np.arange(34200, 41400, 3, dtype=np.int64)
+        dod = delta_encode(times, order=2)
+        self.assertEqual(int(np.count_nonzero(dod)), 2)
+        np.testing.assert_array_equal(delta_decode(dod, order=2), times)
+        np.testing.assert_array_equal(delta_decode(delta_encode(self.values), 1), self.values)
+        data = encode_signed_array(times, order=2)
+        np.testing.assert_array_equal(decode_signed_array(data, order=2)[0], times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+自适应限流
+
+在 RateLimiter 外层包装一层控制器：
+- 对上游异常进行分类（限流 / 服务端错误 / 网络错误 / 客户端错误）
+- 可重试的错误按带抖动的指数退避重试
+- AIMD 调整调用频率：成功时线性增加，遇到限流或服务端错误时成倍减少，
+  使实际吞吐量稳定在服务端真实上限之下
+- 每个接口一个熔断器，连续失败后快速失败，冷却后半开试探
+"""
+import time
+import random
+import socket
+import threading
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from utils.global_config import DataSource
+from utils.log_util import logger
+from utils.rate_limit_backend import RateLimitBackend
+from utils.rate_limit_request import RateLimiter
+
+
+class ErrorKind(Enum):
+    """上游错误类型"""
+    RATE_LIMIT = 'rate_limit'   # 触发接口频率限制
+    SERVER = 'server'           # 服务端 5xx 错误
+    NETWORK = 'network'         # 网络连接错误、超时
+    CLIENT = 'client'           # 参数、权限、积分等客户端错误，重试无意义
+    UNKNOWN = 'unknown'         # 无法识别的错误
+
+
+# 可重试的错误类型
+RETRYABLE_ERRORS = {ErrorKind.RATE_LIMIT, ErrorKind.SERVER, ErrorKind.NETWORK}
+
+# tushare 将所有错误都包装成 Exception(msg)，只能按错误信息识别
+_RATE_LIMIT_KEYWORDS = ('每分钟最多访问', '每小时最多访问', '访问频次', '频率超限', '访问过于频繁',
+                        'too many requests', 'rate limit')
+_SERVER_KEYWORDS = ('服务器', '系统内部错误', 'internal server error', 'bad gateway', 'service unavailable',
+                    'gateway timeout')
+_NETWORK_KEYWORDS = ('connection', 'timed out', 'timeout', 'max retries exceeded', 'remote end closed',
+                     '连接', '超时')
+_CLIENT_KEYWORDS = ('权限', '积分', 'token', '参数', '不存在', 'invalid', 'permission')
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """
+    对上游异常进行分类
+
+    Args:
+        error (BaseException): 异常对象
+
+    Returns:
+        ErrorKind: 错误类型
+    """
+    # HTTP 状态码优先：requests.HTTPError 等带有 response 的异常按状态码分类
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429:
+        return ErrorKind.RATE_LIMIT
+    if status is not None and 500 <= status < 600:
+        return ErrorKind.SERVER
+    if status is not None and 400 <= status < 500:
+        return ErrorKind.CLIENT
+
+    if isinstance(error, (ConnectionError, TimeoutError, socket.timeout)):
+        return ErrorKind.NETWORK
+    # 没有响应的 requests 异常（连接失败、超时等），不直接依赖 requests
+    if type(error).__module__.startswith(('requests', 'urllib3')):
+        return ErrorKind.NETWORK
+
+    # 客户端错误的关键字先于 timeout、connection 等通用的网络关键字
+    msg = str(error).lower()
+    if any(k in msg for k in _RATE_LIMIT_KEYWORDS):
+        return ErrorKind.RATE_LIMIT
+    if any(k in msg for k in _SERVER_KEYWORDS):
+        return ErrorKind.SERVER
+    if any(k in msg for k in _CLIENT_KEYWORDS):
+        return ErrorKind.CLIENT
+    if any(k in msg for k in _NETWORK_KEYWORDS):
+        return ErrorKind.NETWORK
+    return ErrorKind.UNKNOWN
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"接口 {endpoint} 已熔断，{retry_after:.1f} 秒后重试")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    closed: 正常放行；连续失败 failure_threshold 次后进入 open
+    open: 直接拒绝；经过 recovery_time 秒后进入 half_open
+    half_open: 只放行一个试探请求，成功则 closed，失败则重新 open
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 60.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold (int): 连续失败多少次后熔断
+            recovery_time (float): 熔断后多少秒进入半开状态
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """当前是否允许请求通过"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.time() - self.opened_at < self.recovery_time:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            # 半开状态只放行一个试探请求
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def retry_after(self) -> float:
+        """距离进入半开状态还需等待的秒数"""
+        return max(self.opened_at + self.recovery_time - time.time(), 0.0)
+
+    def record_success(self) -> None:
+        """记录一次成功"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """记录一次失败"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"熔断器打开: 连续失败 {self.failures} 次")
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+
+class AdaptiveThrottle:
+    """
+    自适应限流控制器
+
+    example:
+        throttle = AdaptiveThrottle(RateLimiter(200))
+        df = throttle.query('moneyflow_ths', trade_date='20250314')
+
+        @adaptive_rate_limit(200)
+        def get_data(...):
+            ...
+    """
+
+    def __init__(self,
+                 limiter: RateLimiter,
+                 min_calls: int = 1,
+                 increase_step: int = 1,
+                 decrease_factor: float = 0.5,
+                 max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0,
+                 failure_threshold: int = 5,
+                 recovery_time: float = 60.0):
+        """
+        初始化自适应限流控制器
+
+        Args:
+            limiter (RateLimiter): 被控制的速率限制器，其 max_calls 作为调用频率上限
+            min_calls (int): 调用频率下限
+            increase_step (int): 每个时间窗口内全部成功后增加的调用次数（加性增）
+            decrease_factor (float): 遇到限流或服务端错误时的调用次数缩放比例（乘性减）
+            max_retries (int): 最大重试次数
+            base_delay (float): 退避基础时长，单位为秒
+            max_delay (float): 退避最大时长，单位为秒
+            failure_threshold (int): 熔断器连续失败阈值
+            recovery_time (float): 熔断器恢复时间，单位为秒
+        """
+        self.limiter = limiter
+        self.ceiling = limiter.max_calls
+        self.min_calls = min_calls
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._successes = 0
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'errors': {kind.value: 0 for kind in ErrorKind}}
+
+    @property
+    def current_rate(self) -> int:
+        """当前时间窗口内允许的调用次数"""
+        return self.limiter.max_calls
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """获取接口对应的熔断器"""
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.recovery_time)
+            return self._breakers[endpoint]
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            # 一个时间窗口的调用全部成功后才加性增，避免增长过快
+            if self._successes >= self.limiter.max_calls and self.limiter.max_calls < self.ceiling:
+                self.limiter.max_calls = min(self.limiter.max_calls + self.increase_step, self.ceiling)
+                self._successes = 0
+                logger.debug(f"调用频率上调至 {self.limiter.max_calls}/{self.limiter.time_window}秒")
+
+    def _on_congestion(self) -> None:
+        with self._lock:
+            self._successes = 0
+            rate = max(int(self.limiter.max_calls * self.decrease_factor), self.min_calls)
+            if rate < self.limiter.max_calls:
+                logger.warning(f"调用频率下调至 {rate}/{self.limiter.time_window}秒")
+            self.limiter.max_calls = rate
+
+    def backoff(self, attempt: int) -> float:
+        """
+        计算第 attempt 次重试前的等待时间（full jitter 指数退避）
+
+        Args:
+            attempt (int): 重试序号，从0开始
+
+        Returns:
+            float: 等待秒数
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, endpoint: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        在限流、重试、熔断保护下调用函数
+
+        Args:
+            endpoint (str): 接口名称，用于区分熔断器
+            func (Callable): 实际调用的函数
+            *args: 函数位置参数
+            **kwargs: 函数关键字参数
+
+        Returns:
+            Any: 函数返回值
+
+        Raises:
+            CircuitOpenError: 接口处于熔断状态
+            Exception: 不可重试的错误或重试次数用尽后的最后一个错误
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(endpoint, breaker.retry_after())
+
+            self.limiter.acquire()
+            with self._lock:
+                self._stats['calls'] += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                with self._lock:
+                    self._stats['errors'][kind.value] += 1
+
+                if kind in (ErrorKind.RATE_LIMIT, ErrorKind.SERVER):
+                    self._on_congestion()
+                if kind in (ErrorKind.SERVER, ErrorKind.NETWORK):
+                    breaker.record_failure()
+                else:
+                    # 限流和客户端错误说明服务本身可用
+                    breaker.record_success()
+
+                if kind not in RETRYABLE_ERRORS or attempt >= self.max_retries:
+                    logger.error(f"接口调用失败: 接口={endpoint}, 类型={kind.value}, 错误={str(e)}")
+                    raise
+
+                delay = self.backoff(attempt)
+                if kind == ErrorKind.RATE_LIMIT:
+                    # 限流时至少等到一个新额度
+                    delay = max(delay, self.limiter.time_window / max(self.limiter.max_calls, 1))
+                logger.warning(f"接口调用失败，{delay:.2f} 秒后第 {attempt + 1} 次重试: "
+                               f"接口={endpoint}, 类型={kind.value}, 错误={str(e)}")
+                with self._lock:
+                    self._stats['retries'] += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            breaker.record_success()
+            self._on_success()
+            return result
+
+    def query(self, api_name: str, fields: str = '', **params) -> Any:
+        """
+        调用 tushare pro 接口
+
+        Args:
+            api_name (str): 接口名称，如 'daily'
+            fields (str): 返回字段
+            **params: 接口参数
+
+        Returns:
+            pd.DataFrame: 接口返回数据
+        """
+        return self.call(api_name, DataSource.tushare_pro.query, api_name, fields=fields, **params)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取运行统计
+
+        Returns:
+            Dict[str, Any]: 当前频率、调用次数、重试次数、各类错误次数、熔断器状态
+        """
+        with self._lock:
+            return {
+                'rate': self.limiter.max_calls,
+                'ceiling': self.ceiling,
+                'calls': self._stats['calls'],
+                'retries': self._stats['retries'],
+                'errors': dict(self._stats['errors']),
+                'breakers': {name: b.state for name, b in self._breakers.items()},
+            }
+
+    def __call__(self, func):
+        """
+        装饰器主体函数，以函数名作为接口名称
+
+        Args:
+            func: 要装饰的函数
+
+        Returns:
+            wrapper: 包装后的函数
+        """
+        if self.limiter.key is None:
+            self.limiter.key = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func.__name__, func, *args, **kwargs)
+
+        wrapper.throttle = self
+        return wrapper
+
+
+def adaptive_rate_limit(max_calls_per_minute, backend: Optional[RateLimitBackend] = None,
+                        key: Optional[str] = None, **kwargs):
+    """
+    自适应限流装饰器，可直接替换 rate_limit
+
+    Args:
+        max_calls_per_minute (int): 每分钟最大调用次数（上限）
+        backend (RateLimitBackend, optional): 速率限制状态存储后端
+        key (str, optional): 额度标识
+        **kwargs: AdaptiveThrottle 的其他参数
+
+    Returns:
+        AdaptiveThrottle: 装饰器
+    """
+    return AdaptiveThrottle(RateLimiter(max_calls_per_minute, backend=backend, key=key), **kwargs)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+asyncio 速率限制器
+
+与 RateLimiter 共用 RateLimitBackend，因此同一个 key 的同步调用和异步调用共享额度。
+等待中的请求按 (优先级, 到达顺序) 排队，额度释放后优先分配给优先级最高的请求，
+额度预留规则和排队统计与 RateLimiter 相同。后端的 acquire 是同步调用，在默认线程池中执行，不阻塞事件循环。
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils.consts import RequestPriority
+from utils.log_util import logger
+from utils.rate_limit_backend import RateLimitBackend, get_default_backend
+from utils.rate_limit_request import DEFAULT_LANE_SHARES, LaneMetrics, current_priority, lane_cap
+
+
+class AsyncRateLimiter:
+    """
+    asyncio 速率限制器
+
+    example:
+        limiter = AsyncRateLimiter(500, key='tushare.daily')
+        await limiter.acquire(RequestPriority.INTERACTIVE)
+        async with limiter:
+            ...
+    """
+
+    def __init__(self, max_calls: int, time_window: float = 60, backend: Optional[RateLimitBackend] = None,
+                 key: Optional[str] = None, lane_shares: Optional[Dict[RequestPriority, float]] = None):
+        """
+        初始化速率限制器
+
+        Args:
+            max_calls (int): 在时间窗口内允许的最大调用次数
+            time_window (float): 时间窗口大小，单位为秒，默认为60秒（1分钟）
+            backend (RateLimitBackend, optional): 状态存储后端，默认使用 get_default_backend()
+            key (str, optional): 额度标识，默认按实例区分
+            lane_shares (dict, optional): 各优先级可使用的额度比例，默认为 DEFAULT_LANE_SHARES
+        """
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self.key = key or f"async_rate_limiter.{id(self)}"
+        self.lane_shares = dict(DEFAULT_LANE_SHARES if lane_shares is None else lane_shares)
+        self.metrics = LaneMetrics()
+        self._backend = backend
+        self._last_seen = {p: float('-inf') for p in RequestPriority}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        """状态存储后端，未指定时在首次使用时取默认后端"""
+        if self._backend is None:
+            self._backend = get_default_backend()
+        return self._backend
+
+    def queue_depth(self, priority: Optional[RequestPriority] = None) -> int:
+        """
+        获取排队中的请求数
+
+        Args:
+            priority (RequestPriority, optional): 只统计指定优先级，为空时统计全部
+
+        Returns:
+            int: 排队请求数
+        """
+        return sum(1 for p, _, fut in self._waiters
+                   if not fut.done() and (priority is None or p == int(priority)))
+
+    def lane_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各优先级队列的排队数和等待时间统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: 见 LaneMetrics.snapshot
+        """
+        return self.metrics.snapshot()
+
+    async def acquire(self, priority: Optional[RequestPriority] = None) -> float:
+        """
+        等待直到获得一次调用额度
+
+        Args:
+            priority (RequestPriority, optional): 请求优先级，默认取 request_priority 上下文
+
+        Returns:
+            float: 本次等待的秒数
+        """
+        if priority is None:
+            priority = current_priority()
+        priority = RequestPriority(priority)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._last_seen[priority] = time.time()
+        self.metrics.enqueue(priority)
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch())
+        start = loop.time()
+        try:
+            await future
+        finally:
+            self.metrics.dequeue(priority, loop.time() - start)
+        return loop.time() - start
+
+    async def _dispatch(self) -> None:
+        """按优先级依次为等待中的请求分配额度"""
+        while self._waiters:
+            # 丢弃已取消的请求
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+
+            priority = RequestPriority(self._waiters[0][0])
+            cap = lane_cap(self.max_calls, priority, self.lane_shares, self._last_seen, self.time_window)
+            # SqliteBackend、RemoteBackend 的 acquire 会阻塞（加锁、HTTP 请求），在线程池中执行，不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            wait_time = await loop.run_in_executor(None, self.backend.acquire, self.key, cap, self.time_window)
+            # 等待后端期间队首请求可能已被取消
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+            if wait_time <= 0:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():
+                    # 分配额度的同时请求被取消，额度只能浪费掉
+                    continue
+                future.set_result(None)
+                continue
+
+            # 等待期间到达的高优先级请求会排到队首，醒来后优先获得额度
+            logger.debug(f"达到接口调用频率限制，等待 {wait_time:.2f} 秒, 排队请求数={len(self._waiters)}")
+            await asyncio.sleep(wait_time)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
@@ -4,27 +4,130 @@
 Created on 27/02/2025.
 @author: Air.Zou
 """
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# 代码前缀 -> (交易所后缀, 板块)，先按两位前缀查找，找不到再按一位前缀查找
+PREFIX_BOARDS = {
+    '00': ('.SZ', '主板'),
+    '30': ('.SZ', '创业板'),
+    '60': ('.SH', '主板'),
+    '68': ('.SH', '科创板'),  # 科创板，上海证券交易所
+    '90': ('.SH', 'B股'),
+    '11': ('.SH', '可转债'),
+    '92': ('.BJ', '北交所'),
+    '4': ('.BJ', '北交所'),  # 北京证券交易所，以 4 开头
+    '8': ('.BJ', '北交所'),  # 北京证券交易所，以 8 开头
+}
+EXCHANGE_SUFFIXES = ('.SZ', '.SH', '.BJ')
+
+# 板块 -> 涨跌幅限制，ST 股票在主板为 5%
+BOARD_PRICE_LIMITS = {
+    '主板': 0.1,
+    '创业板': 0.2,
+    '科创板': 0.2,
+    '北交所': 0.3,
+    'B股': 0.1,
+    '可转债': 0.2,
+}
+ST_PRICE_LIMIT = 0.05
+DEFAULT_PRICE_LIMIT = 0.1
+
+
+def _lookup_prefix(code: str):
+    return PREFIX_BOARDS.get(code[:2]) or PREFIX_BOARDS.get(code[:1])
+
+
 def code_symbol(code):
     if type(code) == int:
         # 填充为6位
         code = str(code).zfill(6)
-    # 定义一个字典，存储不同前缀对应的交易所后缀
-    exchange_suffix = {
-        '00': '.SZ',
-        '30': '.SZ',
-        '60': '.SH',
-        '68': '.SH',  # 科创板，上海证券交易所
-        '90': '.SH',
-        '11': '.SH',
-        '4': '.BJ',  # 北京证券交易所，以 4 开头
-        '8': '.BJ'  # 北京证券交易所，以 8 开头
-    }
     # 如果code已经有后缀，则直接返回
-    if code.endswith(tuple(exchange_suffix.values())):
+    if code.endswith(EXCHANGE_SUFFIXES):
         return code
-    # 遍历字典的键
-    for prefix, suffix in exchange_suffix.items():
-        if code.startswith(prefix):
-            return code + suffix
+    match = _lookup_prefix(code)
     # 如果没有匹配到任何前缀，返回 None
-    return None
+    return code + match[0] if match else None
+
+
+def board_of(code: str) -> Optional[str]:
+    """
+    根据代码前缀判断板块
+
+    Args:
+        code (str): 证券代码，如 '600000' 或 '600000.SH'
+
+    Returns:
+        str: 主板 / 创业板 / 科创板 / 北交所 / B股 / 可转债，无法识别时为 None
+    """
+    match = _lookup_prefix(str(code).zfill(6) if isinstance(code, int) else code)
+    return match[1] if match else None
+
+
+def _as_code_series(codes) -> pd.Series:
+    """统一转换为字符串 Series，整数补齐 6 位"""
+    series = codes if isinstance(codes, pd.Series) else pd.Series(np.asarray(codes))
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(str).str.zfill(6)
+    return series.astype(str)
+
+
+def _prefix_lookup(series: pd.Series, position: int) -> pd.Series:
+    """按两位前缀、一位前缀依次查找 PREFIX_BOARDS，返回 (后缀, 板块) 中的一项"""
+    two = {k: v[position] for k, v in PREFIX_BOARDS.items() if len(k) == 2}
+    one = {k: v[position] for k, v in PREFIX_BOARDS.items() if len(k) == 1}
+    return series.str[:2].map(two).fillna(series.str[:1].map(one))
+
+
+def code_symbols(codes: Union[Sequence, np.ndarray, pd.Series]) -> Union[np.ndarray, pd.Series]:
+    """
+    code_symbol 的向量化版本
+
+    Args:
+        codes: 证券代码序列（字符串或整数），可以已经带有交易所后缀
+
+    Returns:
+        np.ndarray | pd.Series: 带交易所后缀的代码，无法识别的为 None；输入为 Series 时返回同索引的 Series
+    """
+    series = _as_code_series(codes)
+    has_suffix = series.str[-3:].isin(EXCHANGE_SUFFIXES)
+    suffix = _prefix_lookup(series, 0)
+    result = (series + suffix).where(suffix.notna(), None).where(~has_suffix, series)
+    if isinstance(codes, pd.Series):
+        return result
+    return result.to_numpy(dtype=object)
+
+
+def boards_of(codes: Union[Sequence, np.ndarray, pd.Series]) -> np.ndarray:
+    """
+    board_of 的向量化版本
+
+    Args:
+        codes: 证券代码序列
+
+    Returns:
+        np.ndarray: 板块名称，无法识别的为 None
+    """
+    board = _prefix_lookup(_as_code_series(codes), 1)
+    return board.where(board.notna(), None).to_numpy(dtype=object)
+
+
+def price_limits(codes: Union[Sequence, np.ndarray, pd.Series], is_st=None) -> np.ndarray:
+    """
+    按代码前缀批量获取涨跌幅限制
+
+    Args:
+        codes: 证券代码序列
+        is_st (array-like of bool, optional): 是否为 ST 股票，主板 ST 股票为 5%
+
+    Returns:
+        np.ndarray: float64 涨跌幅限制，如 0.1 表示 10%
+    """
+    board = _prefix_lookup(_as_code_series(codes), 1)
+    limits = board.map(BOARD_PRICE_LIMITS).fillna(DEFAULT_PRICE_LIMIT).to_numpy(dtype=np.float64)
+    if is_st is not None:
+        st = np.asarray(is_st, dtype=bool) & (board.to_numpy(dtype=object) == '主板')
+        limits = np.where(st, ST_PRICE_LIMIT, limits)
+    return limits
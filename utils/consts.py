@@ -88,3 +88,10 @@ class AccountType(str, Enum):
     STOCK = "STOCK"      # 股票账户
     FUTURE = "FUTURE"    # 期货账户
     OPTION = "OPTION"    # 期权账户
+
+
+class RequestPriority(IntEnum):
+    """上游接口请求优先级枚举，数值越小越优先获得调用额度"""
+    LIVE_TRADING = 0     # 实盘交易
+    INTERACTIVE = 1      # 交互查询（页面加载等）
+    BATCH = 2            # 批量下载、缓存预热
@@ -4,6 +4,7 @@
 Created on 10/03/2025.
 @author: Air.Zou
 """
+import os
 import tushare as ts
 import logging
 import akshare as ak
@@ -52,4 +53,35 @@ class BaseConfig:
 
 class DataSource(BaseConfig):
     tushare_pro = ts.pro_api(token='2876ea85cb005fb5fa17c809a98174f2d5aae8b1f830110a5ead6211')
-    date_cache_path = './cache/date_cache'
\ No newline at end of file
+    akshare = ak
+    date_cache_path = './cache/date_cache'
+
+    @classmethod
+    def set_source(cls, tushare_pro=None, akshare=None):
+        """
+        替换数据源，例如离线测试时使用 utils.stub_source 中的离线数据源
+        example:
+            old = DataSource.set_source(*source_from_url('stub://?latency=0.02'))
+            ...
+            DataSource.set_source(*old)
+
+        Args:
+            tushare_pro: 与 tushare pro_api 接口一致的对象，为空时不替换
+            akshare: 与 akshare 模块接口一致的对象，为空时不替换
+
+        Returns:
+            tuple: 替换前的 (tushare_pro, akshare)
+        """
+        old = (cls.tushare_pro, cls.akshare)
+        if tushare_pro is not None:
+            cls.tushare_pro = tushare_pro
+        if akshare is not None:
+            cls.akshare = akshare
+        return old
+
+
+# 通过环境变量切换数据源，例如 QUANT_DATA_SOURCE=stub://?latency=0.02 或 http://127.0.0.1:9820
+if os.environ.get('QUANT_DATA_SOURCE'):
+    from utils.stub_source import source_from_url
+
+    DataSource.set_source(*source_from_url(os.environ['QUANT_DATA_SOURCE']))
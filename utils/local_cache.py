@@ -188,6 +188,7 @@ def date_range_cache_with_symbol(symbol_key='symbol'):
     只获取缺失的日期数据，将其存入缓存，并与已有缓存数据合并返回
 
     缓存永久有效，只要数据库中存在就使用缓存，不存在才调用原始函数
+    被装饰的函数带有 cache_table 属性（表名，即函数名），供 save_date_range_frame 的调用方写入同一张表
     """
     def decorator(func):
         @wraps(func)
@@ -330,9 +331,57 @@ def date_range_cache_with_symbol(symbol_key='symbol'):
             # 返回合并后的结果
             return organize_date_results(cached_results, date_range)
 
+        wrapper.cache_table = func.__name__
         return wrapper
     return decorator
 
+def save_date_range_frame(table_name, symbol, df, date_column='trade_date'):
+    """
+    将DataFrame按日期拆分后写入日期范围缓存表
+    表结构与 date_range_cache_with_symbol 一致，写入后被该装饰器修饰的同名函数可以直接命中缓存
+
+    Args:
+        table_name (str): 缓存表名，与被装饰函数的函数名一致
+        symbol (str): 唯一标识（如股票代码）
+        df (pd.DataFrame): 待写入数据
+        date_column (str): 日期列名
+
+    Returns:
+        int: 写入的日期数量
+    """
+    if df is None or df.empty:
+        return 0
+    if date_column != 'date' and date_column in df.columns:
+        df = df.rename(columns={date_column: 'date'})
+    if 'date' not in df.columns:
+        logger.error(f"DataFrame缺少date列: 表={table_name}")
+        return 0
+
+    db_path = ensure_db_exists(table_name)
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        date_key TEXT,
+        symbol TEXT,
+        update_time TIMESTAMP,
+        data_csv TEXT,
+        PRIMARY KEY (date_key, symbol)
+    )
+    ''')
+
+    now = datetime.now()
+    rows = [(str(date_key), symbol, now, group_df.to_csv(index=False))
+            for date_key, group_df in df.groupby('date')]
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO {table_name} (date_key, symbol, update_time, data_csv) VALUES (?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    conn.close()
+    logger.debug(f"缓存写入: 表={table_name}, 标识={symbol}, 日期数量={len(rows)}")
+    return len(rows)
+
 def organize_date_results(cached_results, date_range):
     """
     根据日期范围重新组织缓存结果
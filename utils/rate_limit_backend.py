@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+速率限制状态存储后端
+
+RateLimiter 只负责"等待-重试"，调用记录保存在后端中：
+- MemoryBackend: 进程内存，单进程使用（默认）
+- SqliteBackend: 本地 SQLite 文件，同一台机器上的多个进程共享同一份额度
+- RemoteBackend: 通过 HTTP 访问 RateLimitServer，多台机器共享同一份额度
+
+也可以通过环境变量 RATE_LIMIT_BACKEND 指定默认后端，例如：
+    RATE_LIMIT_BACKEND=sqlite:///./cache/rate_limit.db
+    RATE_LIMIT_BACKEND=http://127.0.0.1:9810
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+import http.client
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from utils.log_util import logger
+
+# SQLite 后端默认数据库文件
+DEFAULT_DB_PATH = './cache/rate_limit.db'
+
+
+class RateLimitBackend:
+    """
+    速率限制后端接口
+
+    子类只需实现 acquire 方法，保证"检查额度 + 记录调用"是原子操作即可
+    """
+
+    def acquire(self, key: str, max_calls: int, time_window: float) -> float:
+        """
+        尝试占用一次调用额度
+
+        Args:
+            key (str): 额度标识，相同 key 的调用共享同一份额度
+            max_calls (int): 时间窗口内允许的最大调用次数
+            time_window (float): 时间窗口大小，单位为秒
+
+        Returns:
+            float: 0 表示已成功占用额度，大于 0 表示需要等待的秒数
+        """
+        raise NotImplementedError
+
+    def usage(self, key: str, time_window: float) -> int:
+        """
+        获取时间窗口内已使用的调用次数
+
+        Args:
+            key (str): 额度标识
+            time_window (float): 时间窗口大小，单位为秒
+
+        Returns:
+            int: 已使用次数
+        """
+        raise NotImplementedError
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """
+        清空调用记录
+
+        Args:
+            key (str, optional): 额度标识，为空时清空全部
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """进程内存后端，与原 RateLimiter 行为一致"""
+
+    def __init__(self):
+        self._calls: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, key: str, time_window: float, now: float) -> deque:
+        calls = self._calls.setdefault(key, deque())
+        while calls and now - calls[0] > time_window:
+            calls.popleft()
+        return calls
+
+    def acquire(self, key: str, max_calls: int, time_window: float) -> float:
+        with self._lock:
+            now = time.time()
+            calls = self._expire(key, time_window, now)
+            if len(calls) >= max_calls:
+                # 额度可能被临时调小，需要等到超出部分全部过期
+                oldest_call = calls[len(calls) - max_calls]
+                return max(oldest_call + time_window - now, 1e-3)
+            calls.append(now)
+            return 0.0
+
+    def usage(self, key: str, time_window: float) -> int:
+        with self._lock:
+            return len(self._expire(key, time_window, time.time()))
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._calls.clear()
+            else:
+                self._calls.pop(key, None)
+
+
+class SqliteBackend(RateLimitBackend):
+    """
+    SQLite 后端
+
+    利用 SQLite 的文件锁（BEGIN IMMEDIATE）串行化所有进程的"检查 + 记录"操作，
+    同一台机器上指向同一个数据库文件的进程共享同一份额度
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, timeout: float = 30.0):
+        """
+        初始化 SQLite 后端
+
+        Args:
+            db_path (str): 数据库文件路径
+            timeout (float): 等待数据库锁的超时时间，单位为秒
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_limit_calls (
+                key TEXT,
+                call_time REAL
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_rate_limit_key_time ON rate_limit_calls (key, call_time)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # fork 之后不能复用父进程的连接
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                         isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conn
+
+    def acquire(self, key: str, max_calls: int, time_window: float) -> float:
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                conn.execute('DELETE FROM rate_limit_calls WHERE key = ? AND call_time < ?',
+                             (key, now - time_window))
+                rows = conn.execute(
+                    'SELECT call_time FROM rate_limit_calls WHERE key = ? ORDER BY call_time DESC LIMIT ?',
+                    (key, max_calls)).fetchall()
+                if len(rows) >= max_calls:
+                    conn.execute('COMMIT')
+                    return max(rows[-1][0] + time_window - now, 1e-3)
+                conn.execute('INSERT INTO rate_limit_calls (key, call_time) VALUES (?, ?)', (key, now))
+                conn.execute('COMMIT')
+                return 0.0
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def usage(self, key: str, time_window: float) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT COUNT(*) FROM rate_limit_calls WHERE key = ? AND call_time >= ?',
+                (key, time.time() - time_window)).fetchone()
+            return row[0]
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            conn = self._connection()
+            if key is None:
+                conn.execute('DELETE FROM rate_limit_calls')
+            else:
+                conn.execute('DELETE FROM rate_limit_calls WHERE key = ?', (key,))
+
+
+class RemoteBackend(RateLimitBackend):
+    """
+    远程后端
+
+    通过 HTTP 访问 RateLimitServer，多台机器使用同一个 token 时共享同一份额度
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9810, timeout: float = 10.0):
+        """
+        初始化远程后端
+
+        Args:
+            host (str): RateLimitServer 地址
+            port (int): RateLimitServer 端口
+            timeout (float): 请求超时时间，单位为秒
+        """
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _post(self, path: str, payload: dict) -> dict:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        body = json.dumps(payload)
+        try:
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            res = conn.getresponse()
+            data = res.read()
+        except (http.client.HTTPException, OSError):
+            # 连接断开后重连一次
+            conn.close()
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            res = conn.getresponse()
+            data = res.read()
+        if res.status != 200:
+            raise RuntimeError(f"速率限制服务返回错误: status={res.status}, body={data[:200]!r}")
+        return json.loads(data)
+
+    def acquire(self, key: str, max_calls: int, time_window: float) -> float:
+        result = self._post('/acquire', {'key': key, 'max_calls': max_calls, 'time_window': time_window})
+        return float(result['wait'])
+
+    def usage(self, key: str, time_window: float) -> int:
+        result = self._post('/usage', {'key': key, 'time_window': time_window})
+        return int(result['usage'])
+
+    def reset(self, key: Optional[str] = None) -> None:
+        self._post('/reset', {'key': key})
+
+
+class RateLimitServer:
+    """
+    速率限制协调服务
+
+    将任意后端通过 HTTP 暴露出去，供其他机器上的 RemoteBackend 使用
+    example:
+        server = RateLimitServer(SqliteBackend(), port=9810)
+        server.start()
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None, host: str = '127.0.0.1', port: int = 9810):
+        """
+        初始化协调服务
+
+        Args:
+            backend (RateLimitBackend, optional): 实际保存状态的后端，默认为 MemoryBackend
+            host (str): 监听地址
+            port (int): 监听端口，0 表示随机端口
+        """
+        self.backend = backend or MemoryBackend()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        """实际监听的 (host, port)"""
+        return self._server.server_address[:2]
+
+    def _handler_class(self):
+        backend = self.backend
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                    if self.path == '/acquire':
+                        result = {'wait': backend.acquire(payload['key'], int(payload['max_calls']),
+                                                          float(payload['time_window']))}
+                    elif self.path == '/usage':
+                        result = {'usage': backend.usage(payload['key'], float(payload['time_window']))}
+                    elif self.path == '/reset':
+                        backend.reset(payload.get('key'))
+                        result = {}
+                    else:
+                        self._reply(404, {'msg': f'unknown path {self.path}'})
+                        return
+                    self._reply(200, result)
+                except Exception as e:
+                    logger.error(f"速率限制服务处理请求失败: {str(e)}")
+                    self._reply(500, {'msg': str(e)})
+
+            def _reply(self, status, result):
+                body = json.dumps(result).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"速率限制服务: {format % args}")
+
+        return Handler
+
+    def start(self) -> 'RateLimitServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"速率限制服务已启动: {self.address[0]}:{self.address[1]}")
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行服务"""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def backend_from_url(url: str) -> RateLimitBackend:
+    """
+    根据 url 创建后端
+
+    Args:
+        url (str): memory / sqlite:///path/to/db / http://host:port
+
+    Returns:
+        RateLimitBackend: 后端实例
+    """
+    if not url or url == 'memory':
+        return MemoryBackend()
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else parsed.path
+        return SqliteBackend(path or DEFAULT_DB_PATH)
+    if parsed.scheme == 'http':
+        return RemoteBackend(parsed.hostname or '127.0.0.1', parsed.port or 9810)
+    raise ValueError(f"不支持的速率限制后端: {url}")
+
+
+_default_backend: Optional[RateLimitBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_default_backend() -> RateLimitBackend:
+    """获取默认后端，首次调用时根据环境变量 RATE_LIMIT_BACKEND 创建"""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = backend_from_url(os.environ.get('RATE_LIMIT_BACKEND', 'memory'))
+        return _default_backend
+
+
+def set_default_backend(backend: RateLimitBackend) -> None:
+    """
+    设置默认后端，之后所有未显式指定后端的 RateLimiter 都会使用它
+
+    Args:
+        backend (RateLimitBackend): 后端实例
+    """
+    global _default_backend
+    with _default_lock:
+        _default_backend = backend
+
+
+if __name__ == '__main__':
+    server = RateLimitServer(SqliteBackend(), port=0).start()
+    host, port = server.address
+    remote = RemoteBackend(host, port)
+    for i in range(5):
+        print(f"请求 {i}: 等待 {remote.acquire('demo', 3, 60):.2f} 秒")
+    server.stop()
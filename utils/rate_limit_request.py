@@ -5,28 +5,229 @@ Created on 10/03/2025.
 @author: Air.Zou
 """
 import time
+import heapq
+import itertools
 import threading
-from functools import wraps
+import contextvars
+from contextlib import contextmanager
 from collections import deque
+from functools import wraps
 from datetime import datetime
+from typing import Dict, Optional
+from utils.consts import RequestPriority
 from utils.log_util import logger
+from utils.rate_limit_backend import RateLimitBackend, get_default_backend
+
+# 各优先级可使用的额度比例，批量任务最多使用80%，剩余额度预留给实盘和交互请求；
+# 最近一个时间窗口内没有更高优先级的请求时，预留额度也可以被低优先级请求使用
+DEFAULT_LANE_SHARES = {
+    RequestPriority.LIVE_TRADING: 1.0,
+    RequestPriority.INTERACTIVE: 1.0,
+    RequestPriority.BATCH: 0.8,
+}
+
+_current_priority = contextvars.ContextVar('request_priority', default=RequestPriority.BATCH)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """
+    在上下文中设置请求优先级，上下文内所有经过 RateLimiter 的调用都使用该优先级
+
+    example:
+        with request_priority(RequestPriority.INTERACTIVE):
+            df = get_daily_data('000001', '20250101', '20251231')
+
+    Args:
+        priority (RequestPriority): 请求优先级
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> RequestPriority:
+    """获取当前上下文的请求优先级，默认为 BATCH"""
+    return _current_priority.get()
+
+
+def lane_cap(max_calls: int, priority: RequestPriority, lane_shares: Dict[RequestPriority, float],
+             last_seen: Optional[Dict[RequestPriority, float]] = None, time_window: float = 60) -> int:
+    """
+    计算指定优先级在时间窗口内可以使用的调用次数
+
+    Args:
+        max_calls (int): 时间窗口内允许的最大调用次数
+        priority (RequestPriority): 请求优先级
+        lane_shares (dict): 各优先级可使用的额度比例
+        last_seen (dict, optional): 各优先级最近一次请求的时间戳，
+            给出时只有最近 time_window 秒内出现过更高优先级请求才保留额度
+        time_window (float): 时间窗口大小，单位为秒
+
+    Returns:
+        int: 可使用的调用次数，至少为1
+    """
+    if last_seen is not None:
+        now = time.time()
+        if not any(now - last_seen[p] <= time_window for p in RequestPriority if p < priority):
+            return max_calls
+    return max(int(max_calls * lane_shares.get(priority, 1.0)), 1)
+
+
+class LaneMetrics:
+    """各优先级队列的排队数和等待时间统计"""
+
+    def __init__(self, history: int = 1000):
+        """
+        初始化统计
+
+        Args:
+            history (int): 用于计算分位数的最近等待时间样本数
+        """
+        self._lock = threading.Lock()
+        self._depth = {p: 0 for p in RequestPriority}
+        self._acquired = {p: 0 for p in RequestPriority}
+        self._total_wait = {p: 0.0 for p in RequestPriority}
+        self._max_wait = {p: 0.0 for p in RequestPriority}
+        self._recent = {p: deque(maxlen=history) for p in RequestPriority}
+
+    def enqueue(self, priority: RequestPriority) -> None:
+        """请求开始排队"""
+        with self._lock:
+            self._depth[priority] += 1
+
+    def dequeue(self, priority: RequestPriority, wait: float) -> None:
+        """请求获得额度（或放弃排队）"""
+        with self._lock:
+            self._depth[priority] -= 1
+            self._acquired[priority] += 1
+            self._total_wait[priority] += wait
+            self._max_wait[priority] = max(self._max_wait[priority], wait)
+            self._recent[priority].append(wait)
+
+    def queue_depth(self, priority: RequestPriority) -> int:
+        """当前排队中的请求数"""
+        with self._lock:
+            return self._depth[priority]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取统计快照
+
+        Returns:
+            Dict[str, Dict[str, float]]: 以优先级名称为键，包含 queue_depth、acquired、
+                avg_wait、max_wait、p95_wait（单位为秒）
+        """
+        result = {}
+        with self._lock:
+            for p in RequestPriority:
+                recent = sorted(self._recent[p])
+                acquired = self._acquired[p]
+                result[p.name.lower()] = {
+                    'queue_depth': self._depth[p],
+                    'acquired': acquired,
+                    'avg_wait': self._total_wait[p] / acquired if acquired else 0.0,
+                    'max_wait': self._max_wait[p],
+                    'p95_wait': recent[min(int(len(recent) * 0.95), len(recent) - 1)] if recent else 0.0,
+                }
+        return result
+
 
 class RateLimiter:
     """
     速率限制器，用于控制接口调用频率
+
+    调用记录保存在 backend 中，默认使用进程内存；
+    指定 SqliteBackend / RemoteBackend 后，多个进程或多台机器共享同一份额度。
+
+    等待中的请求按 (优先级, 到达顺序) 排队，额度释放后优先分配给优先级最高的请求；
+    最近一个时间窗口内出现过高优先级请求时，低优先级请求只能使用 lane_shares 规定比例的额度，
+    剩余额度预留给高优先级请求。
     """
-    def __init__(self, max_calls, time_window=60):
+    def __init__(self, max_calls, time_window=60, backend: Optional[RateLimitBackend] = None,
+                 key: Optional[str] = None, lane_shares: Optional[Dict[RequestPriority, float]] = None):
         """
         初始化速率限制器
 
         Args:
             max_calls (int): 在时间窗口内允许的最大调用次数
             time_window (int): 时间窗口大小，单位为秒，默认为60秒（1分钟）
+            backend (RateLimitBackend, optional): 状态存储后端，默认使用 get_default_backend()
+            key (str, optional): 额度标识，相同 key 共享额度，默认取第一个被装饰函数的模块名+函数名
+            lane_shares (dict, optional): 各优先级可使用的额度比例，默认为 DEFAULT_LANE_SHARES
         """
         self.max_calls = max_calls
         self.time_window = time_window
-        self.calls = deque(maxlen=max_calls)
-        self.lock = threading.Lock()
+        self.key = key
+        self.lane_shares = dict(DEFAULT_LANE_SHARES if lane_shares is None else lane_shares)
+        self.metrics = LaneMetrics()
+        self._backend = backend
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._last_seen = {p: float('-inf') for p in RequestPriority}
+
+    @property
+    def backend(self) -> RateLimitBackend:
+        """状态存储后端，未指定时在首次使用时取默认后端"""
+        if self._backend is None:
+            self._backend = get_default_backend()
+        return self._backend
+
+    def acquire(self, priority: Optional[RequestPriority] = None) -> float:
+        """
+        阻塞直到获得一次调用额度
+
+        Args:
+            priority (RequestPriority, optional): 请求优先级，默认取 request_priority 上下文
+
+        Returns:
+            float: 本次等待的总秒数
+        """
+        if self.key is None:
+            self.key = f"rate_limiter.{id(self)}"
+        if priority is None:
+            priority = current_priority()
+        ticket = (int(priority), next(self._seq))
+        start = time.time()
+        self.metrics.enqueue(priority)
+        with self._cond:
+            self._last_seen[priority] = start
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    # 只有队首（优先级最高、最早到达）的请求可以尝试占用额度
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    cap = self._cap(priority)
+                    wait_time = self.backend.acquire(self.key, cap, self.time_window)
+                    if wait_time <= 0:
+                        break
+                    logger.info(f"达到接口调用频率限制，等待 {wait_time:.2f} 秒, 优先级={priority.name}")
+                    # 等待期间释放锁，新到达的高优先级请求可以排到队首
+                    self._cond.wait(timeout=wait_time)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+        waited = time.time() - start
+        self.metrics.dequeue(priority, waited)
+        return waited
+
+    def _cap(self, priority: RequestPriority) -> int:
+        return lane_cap(self.max_calls, priority, self.lane_shares, self._last_seen, self.time_window)
+
+    def lane_metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各优先级队列的排队数和等待时间统计
+
+        Returns:
+            Dict[str, Dict[str, float]]: 见 LaneMetrics.snapshot
+        """
+        return self.metrics.snapshot()
 
     def __call__(self, func):
         """
@@ -38,29 +239,12 @@ class RateLimiter:
         Returns:
             wrapper: 包装后的函数
         """
+        if self.key is None:
+            self.key = f"{func.__module__}.{func.__qualname__}"
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            with self.lock:
-                # 当前时间
-                current_time = time.time()
-
-                # 清理过期的调用记录
-                while self.calls and current_time - self.calls[0] > self.time_window:
-                    self.calls.popleft()
-
-                # 如果调用次数已达到限制
-                if len(self.calls) >= self.max_calls:
-                    # 计算需要等待的时间
-                    oldest_call = self.calls[0]
-                    wait_time = oldest_call + self.time_window - current_time
-                    if wait_time > 0:
-                        logger.info(f"达到接口调用频率限制，等待 {wait_time:.2f} 秒")
-                        time.sleep(wait_time)
-                        # 更新当前时间
-                        current_time = time.time()
-
-                # 记录本次调用
-                self.calls.append(current_time)
+            self.acquire()
 
             # 调用原始函数
             return func(*args, **kwargs)
@@ -68,17 +252,21 @@ class RateLimiter:
         return wrapper
 
 
-def rate_limit(max_calls_per_minute):
+def rate_limit(max_calls_per_minute, backend: Optional[RateLimitBackend] = None, key: Optional[str] = None,
+               lane_shares: Optional[Dict[RequestPriority, float]] = None):
     """
     限制接口调用频率的装饰器
 
     Args:
         max_calls_per_minute (int): 每分钟最大调用次数
+        backend (RateLimitBackend, optional): 状态存储后端，多进程共享额度时传入 SqliteBackend
+        key (str, optional): 额度标识，多个函数共享同一额度时传入相同的 key
+        lane_shares (dict, optional): 各优先级可使用的额度比例
 
     Returns:
         decorator: 装饰器函数
     """
-    return RateLimiter(max_calls=max_calls_per_minute)
+    return RateLimiter(max_calls=max_calls_per_minute, backend=backend, key=key, lane_shares=lane_shares)
 
 
 # 示例：使用装饰器限制接口调用频率
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on 19/10/2026.
+@author: Air.Zou
+
+离线数据源
+
+在没有网络、不消耗 token 额度的环境下替代 tushare pro 和 akshare，
+用于下载、缓存、回测链路的基准测试和压力测试。
+相同的 seed 总是返回相同的数据；可以配置延迟、错误率和接口频率限制。
+
+支持的接口:
+    tushare: daily, adj_factor, trade_cal, stk_factor_pro, moneyflow_ths, moneyflow_ind_ths, stock_basic,
+             index_weight, fina_indicator, fina_indicator_vip
+    akshare: stock_zh_a_tick_tx_js, index_stock_cons_csindex
+
+使用方式:
+    1. 进程内替换:
+        DataSource.set_source(*source_from_url('stub://?latency=0.02&error_rate=0.01'))
+    2. 环境变量（在导入 utils.global_config 之前设置）:
+        QUANT_DATA_SOURCE=stub://?max_calls=500
+        QUANT_DATA_SOURCE=http://127.0.0.1:9820
+    3. 独立进程中启动兼容 tushare 协议的 HTTP 服务，多个进程共享同一个频率限制:
+        StubServer(StubDataSource(max_calls=500), port=9820).serve_forever()
+"""
+import json
+import time
+import random
+import zlib
+import threading
+import http.client
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl
+
+import numpy as np
+import pandas as pd
+
+from utils.log_util import logger
+from utils.rate_limit_backend import MemoryBackend
+
+DAILY_COLUMNS = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'pre_close', 'change', 'pct_chg',
+                 'vol', 'amount']
+TICK_COLUMNS = ['成交时间', '成交价格', '价格变动', '成交量', '成交金额', '性质']
+INDUSTRIES = ['银行', '证券', '白酒', '半导体', '医药', '汽车', '电力', '软件']
+
+
+def _stable_seed(*parts) -> int:
+    """由字符串计算稳定的随机种子（不受 PYTHONHASHSEED 影响）"""
+    return zlib.crc32('|'.join(str(p) for p in parts).encode('utf-8'))
+
+
+def _filter_dates(df: pd.DataFrame, column: str, start_date: str = '', end_date: str = '',
+                  trade_date: str = '') -> pd.DataFrame:
+    """按日期参数过滤，日期列为 YYYYMMDD 字符串"""
+    if trade_date:
+        return df[df[column] == str(trade_date)]
+    if start_date:
+        df = df[df[column] >= str(start_date)]
+    if end_date:
+        df = df[df[column] <= str(end_date)]
+    return df
+
+
+class StubDataSource:
+    """
+    离线 tushare pro 数据源，接口与 tushare.pro.client.DataApi 一致
+
+    example:
+        pro = StubDataSource(seed=1, latency=0.01)
+        df = pro.daily(ts_code='000001.SZ', start_date='20250101', end_date='20250331')
+        df = pro.query('trade_cal', start_date='20250101', end_date='20250131')
+    """
+
+    def __init__(self,
+                 seed: int = 0,
+                 n_symbols: int = 100,
+                 start_date: str = '20150101',
+                 end_date: str = '20301231',
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 max_calls: Optional[int] = None,
+                 time_window: float = 60):
+        """
+        初始化离线数据源
+
+        Args:
+            seed (int): 随机种子
+            n_symbols (int): 股票数量
+            start_date (str): 数据开始日期
+            end_date (str): 数据结束日期
+            latency (float): 每次调用的平均延迟，单位为秒（在 0.5~1.5 倍之间抖动）
+            error_rate (float): 随机返回服务端错误的概率
+            max_calls (int, optional): 每个接口每个时间窗口的最大调用次数，超出时返回限流错误
+            time_window (float): 频率限制的时间窗口，单位为秒
+        """
+        self.seed = seed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self.calendar = pd.date_range(start_date, end_date, freq='D')
+        self.trade_dates = self.calendar[self.calendar.dayofweek < 5].strftime('%Y%m%d').to_numpy()
+        self.symbols = self._make_symbols(n_symbols)
+        self.calls: Dict[str, int] = {}
+        self._bars: Dict[str, pd.DataFrame] = {}
+        self._limiter = MemoryBackend()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, Callable[..., pd.DataFrame]] = {
+            'daily': self._daily,
+            'adj_factor': self._adj_factor,
+            'trade_cal': self._trade_cal,
+            'stk_factor_pro': self._stk_factor_pro,
+            'moneyflow_ths': self._moneyflow_ths,
+            'moneyflow_ind_ths': self._moneyflow_ind_ths,
+            'stock_basic': self._stock_basic,
+            'hs_const': self._hs_const,
+            'index_weight': self._index_weight,
+            'fina_indicator': self._fina_indicator,
+            'fina_indicator_vip': self._fina_indicator,
+        }
+
+    @staticmethod
+    def _make_symbols(n: int) -> List[str]:
+        """生成股票代码，沪市、深市主板、创业板轮流分配"""
+        boards = [(600000, 'SH'), (1, 'SZ'), (300001, 'SZ')]
+        return sorted(f'{boards[i % 3][0] + i // 3:06d}.{boards[i % 3][1]}' for i in range(n))
+
+    # ------------------------------------------------------------------ 调用入口
+
+    def query(self, api_name: str, fields: str = '', **params) -> pd.DataFrame:
+        """
+        调用接口
+
+        Args:
+            api_name (str): 接口名称
+            fields (str): 返回字段，逗号分隔，为空时返回全部字段
+            **params: 接口参数
+
+        Returns:
+            pd.DataFrame: 接口数据
+        """
+        self._before_call(api_name)
+        handler = self._handlers.get(api_name)
+        if handler is None:
+            raise Exception(f'接口{api_name}不存在')
+        params = {k: v for k, v in params.items() if v is not None and k != 'ts_type_name'}
+        df = handler(**params).reset_index(drop=True)
+        if fields:
+            df = df[[f.strip() for f in fields.split(',') if f.strip() in df.columns]]
+        return df
+
+    def _before_call(self, api_name: str) -> None:
+        """模拟延迟、频率限制和随机错误"""
+        with self._lock:
+            self.calls[api_name] = self.calls.get(api_name, 0) + 1
+            jitter = self._random.uniform(0.5, 1.5)
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if self.latency > 0:
+            time.sleep(self.latency * jitter)
+        if self.max_calls is not None and self._limiter.acquire(api_name, self.max_calls, self.time_window) > 0:
+            raise Exception(f'抱歉，您每分钟最多访问该接口{self.max_calls}次')
+        if failed:
+            raise Exception('服务器内部错误，请稍后重试')
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self.query, name)
+
+    # ------------------------------------------------------------------ 行情数据
+
+    def _symbol_bars(self, ts_code: str) -> pd.DataFrame:
+        """生成单只股票的全部日线（后复权价格随机游走，除权日复权因子上调）"""
+        if ts_code in self._bars:
+            return self._bars[ts_code]
+        rng = np.random.default_rng(_stable_seed(self.seed, ts_code))
+        n = len(self.trade_dates)
+        hfq = 10 * rng.uniform(0.5, 5) * np.exp(np.cumsum(rng.normal(0.0002, 0.02, n)))
+        # 平均每年一次除权
+        factor = np.cumprod(np.where(rng.random(n) < 1 / 250, rng.uniform(1.01, 1.2, n), 1.0))
+        close = np.round(hfq / factor, 2)
+        pre_close = np.round(np.concatenate([[close[0]], hfq[:-1] / factor[1:]]), 2)
+        open_ = np.round(pre_close * (1 + rng.normal(0, 0.005, n)), 2)
+        high = np.round(np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n))), 2)
+        low = np.round(np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n))), 2)
+        vol = np.round(rng.lognormal(11, 0.5, n), 2)
+        df = pd.DataFrame({
+            'ts_code': ts_code,
+            'trade_date': self.trade_dates,
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'pre_close': pre_close,
+            'change': np.round(close - pre_close, 2),
+            'pct_chg': np.round((close / pre_close - 1) * 100, 4),
+            'vol': vol,
+            'amount': np.round(vol * close / 10, 3),
+            'adj_factor': np.round(factor, 6),
+        })
+        with self._lock:
+            self._bars[ts_code] = df
+        return df
+
+    def _select(self, ts_code: str = '', trade_date: str = '', start_date: str = '',
+                end_date: str = '') -> pd.DataFrame:
+        """按代码和日期选出日线，tushare 返回的数据按日期倒序"""
+        codes = [c for c in ts_code.split(',') if c] if ts_code else self.symbols
+        frames = [_filter_dates(self._symbol_bars(c), 'trade_date', start_date, end_date, trade_date)
+                  for c in codes if c in self.symbols]
+        if not frames:
+            return self._symbol_bars(self.symbols[0]).iloc[:0]
+        return pd.concat(frames).sort_values(['trade_date', 'ts_code'], ascending=[False, True])
+
+    def _daily(self, ts_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '',
+               **kwargs) -> pd.DataFrame:
+        return self._select(ts_code, trade_date, start_date, end_date)[DAILY_COLUMNS]
+
+    def _adj_factor(self, ts_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '',
+                    **kwargs) -> pd.DataFrame:
+        return self._select(ts_code, trade_date, start_date, end_date)[['ts_code', 'trade_date', 'adj_factor']]
+
+    def _stk_factor_pro(self, ts_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '',
+                        **kwargs) -> pd.DataFrame:
+        df = self._select(ts_code, trade_date, start_date, end_date)
+        out = df[DAILY_COLUMNS].copy()
+        out['adj_factor'] = df['adj_factor']
+        latest = df.groupby('ts_code')['adj_factor'].transform('first')
+        for f in ['open', 'high', 'low', 'close', 'pre_close']:
+            out[f'{f}_hfq'] = np.round(df[f] * df['adj_factor'], 2)
+            out[f'{f}_qfq'] = np.round(df[f] * df['adj_factor'] / latest, 2)
+        # 均线按日期正序计算
+        asc = out.iloc[::-1]
+        for window in (5, 10, 20):
+            out[f'ma_qfq_{window}'] = asc.groupby('ts_code')['close_qfq'] \
+                .transform(lambda s: s.rolling(window, min_periods=1).mean()).round(3)
+        out['turnover_rate'] = np.round(df['vol'] / 1e5, 4)
+        return out
+
+    def _moneyflow_ths(self, ts_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '',
+                       **kwargs) -> pd.DataFrame:
+        df = self._select(ts_code, trade_date, start_date, end_date)
+        rng = np.random.default_rng(_stable_seed(self.seed, 'moneyflow', len(df), ts_code, trade_date,
+                                                 start_date, end_date))
+        amount = df['amount'].to_numpy() / 10
+        out = pd.DataFrame({
+            'trade_date': df['trade_date'].to_numpy(),
+            'ts_code': df['ts_code'].to_numpy(),
+            'name': [f'股票{c[:6]}' for c in df['ts_code']],
+            'pct_change': df['pct_chg'].to_numpy(),
+            'latest': df['close'].to_numpy(),
+        })
+        for size, share in (('lg', 0.4), ('md', 0.35), ('sm', 0.25)):
+            buy = np.round(amount * share * rng.uniform(0.3, 0.7, len(df)), 2)
+            out[f'buy_{size}_amount'] = buy
+            out[f'buy_{size}_amount_rate'] = np.round(buy / np.maximum(amount, 1e-9) * 100, 2)
+        out['net_amount'] = np.round(out[['buy_lg_amount', 'buy_md_amount', 'buy_sm_amount']].sum(axis=1)
+                                     - amount / 2, 2)
+        out['net_d5_amount'] = np.round(out['net_amount'] * 5, 2)
+        return out
+
+    def _moneyflow_ind_ths(self, trade_date: str = '', start_date: str = '', end_date: str = '',
+                           **kwargs) -> pd.DataFrame:
+        dates = _filter_dates(pd.DataFrame({'d': self.trade_dates}), 'd', start_date, end_date, trade_date)['d']
+        rows = []
+        for d in dates[::-1]:
+            rng = np.random.default_rng(_stable_seed(self.seed, 'industry', d))
+            for i, industry in enumerate(INDUSTRIES):
+                rows.append({'trade_date': d, 'ts_code': f'8811{i:02d}.TI', 'industry': industry,
+                             'lead_stock': f'股票{i:06d}', 'close': round(float(rng.uniform(1000, 5000)), 2),
+                             'pct_change': round(float(rng.normal(0, 1.5)), 2), 'company_num': 20 + i,
+                             'net_buy_amount': round(float(rng.uniform(0, 50)), 2),
+                             'net_sell_amount': round(float(rng.uniform(0, 50)), 2),
+                             'net_amount': round(float(rng.normal(0, 10)), 2)})
+        return pd.DataFrame(rows)
+
+    def _trade_cal(self, exchange: str = '', start_date: str = '', end_date: str = '', is_open=None,
+                   **kwargs) -> pd.DataFrame:
+        days = self.calendar.strftime('%Y%m%d').to_numpy()
+        opens = (self.calendar.dayofweek < 5).astype(int)
+        prev = pd.Series(np.where(opens == 1, days, None)).ffill().shift(1).to_numpy()
+        df = pd.DataFrame({'exchange': exchange or 'SSE', 'cal_date': days, 'is_open': opens,
+                           'pretrade_date': prev})
+        df = _filter_dates(df, 'cal_date', start_date, end_date)
+        if is_open not in (None, ''):
+            df = df[df['is_open'] == int(is_open)]
+        return df.iloc[::-1]
+
+    def _stock_basic(self, exchange: str = '', list_status: str = 'L', ts_code: str = '',
+                     **kwargs) -> pd.DataFrame:
+        if list_status != 'L':
+            return pd.DataFrame(columns=['ts_code', 'symbol', 'name', 'area', 'industry', 'market', 'list_date'])
+        codes = [c for c in ts_code.split(',') if c] if ts_code else self.symbols
+        market = {'6': '主板', '0': '主板', '3': '创业板'}
+        return pd.DataFrame({
+            'ts_code': codes,
+            'symbol': [c[:6] for c in codes],
+            'name': [f'股票{c[:6]}' for c in codes],
+            'area': '深圳',
+            'industry': [INDUSTRIES[_stable_seed(c) % len(INDUSTRIES)] for c in codes],
+            'market': [market[c[0]] for c in codes],
+            'list_date': self.trade_dates[0],
+        })
+
+    def _hs_const(self, hs_type: str = 'SH', is_new: str = '1', **kwargs) -> pd.DataFrame:
+        """约一半的股票为沪深港通标的"""
+        suffix = '.SH' if hs_type == 'SH' else '.SZ'
+        codes = [c for c in self.symbols if c.endswith(suffix) and _stable_seed(c, 'hs') % 2 == 0]
+        return pd.DataFrame({'ts_code': codes, 'hs_type': hs_type, 'in_date': self.trade_dates[0],
+                             'out_date': None, 'is_new': '1'})
+
+    def _index_weight(self, index_code: str = '', trade_date: str = '', start_date: str = '', end_date: str = '',
+                      **kwargs) -> pd.DataFrame:
+        """每月第一个交易日一次快照，每个季度约有 1/4 的成分股调整"""
+        months = pd.Series(self.trade_dates).groupby(pd.Series(self.trade_dates).str[:6]).first()
+        dates = _filter_dates(pd.DataFrame({'d': months.to_numpy()}), 'd', start_date, end_date, trade_date)['d']
+        rows = []
+        for d in dates[::-1]:
+            quarter = f'{d[:4]}Q{(int(d[4:6]) - 1) // 3}'
+            members = [c for c in self.symbols
+                       if _stable_seed(index_code, c) % 4 != 0 or _stable_seed(index_code, c, quarter) % 2 == 0]
+            rows.extend({'index_code': index_code, 'con_code': c, 'trade_date': d,
+                         'weight': round(100 / len(members), 4)} for c in members)
+        return pd.DataFrame(rows, columns=['index_code', 'con_code', 'trade_date', 'weight'])
+
+    def _fina_indicator(self, ts_code: str = '', period: str = '', start_date: str = '', end_date: str = '',
+                        ann_date: str = '', **kwargs) -> pd.DataFrame:
+        """每个季度一期报告，公告日在报告期结束后 20~110 天"""
+        quarter_ends = pd.date_range(self.calendar[0], self.calendar[-1], freq='QE').strftime('%Y%m%d')
+        periods = [period] if period else list(quarter_ends)
+        codes = [c for c in ts_code.split(',') if c] if ts_code else self.symbols
+        rows = []
+        for code in codes:
+            for p in periods:
+                rng = np.random.default_rng(_stable_seed(self.seed, 'fina', code, p))
+                ann = (pd.Timestamp(p) + pd.Timedelta(days=int(rng.integers(20, 111)))).strftime('%Y%m%d')
+                rows.append({'ts_code': code, 'ann_date': ann, 'end_date': p,
+                             'eps': round(float(rng.normal(0.5, 0.3)), 4),
+                             'bps': round(float(rng.uniform(2, 20)), 4),
+                             'grossprofit_margin': round(float(rng.uniform(5, 60)), 4),
+                             'netprofit_margin': round(float(rng.uniform(-5, 30)), 4),
+                             'roe': round(float(rng.normal(8, 5)), 4),
+                             'debt_to_assets': round(float(rng.uniform(10, 80)), 4),
+                             'current_ratio': round(float(rng.uniform(0.5, 3)), 4),
+                             'quick_ratio': round(float(rng.uniform(0.3, 2.5)), 4)})
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        if start_date:
+            df = df[df['ann_date'] >= str(start_date)]
+        if end_date:
+            df = df[df['ann_date'] <= str(end_date)]
+        if ann_date:
+            df = df[df['ann_date'] == str(ann_date)]
+        return df.sort_values(['ts_code', 'end_date'], ascending=[True, False])
+
+    # ------------------------------------------------------------------ 分笔数据
+
+    def ticks(self, symbol: str, trade_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        生成一个交易日的分笔成交，格式与 akshare.stock_zh_a_tick_tx_js 一致
+
+        Args:
+            symbol (str): 'sz300059' 或 '300059.SZ'
+            trade_date (str, optional): 交易日，默认为今天
+
+        Returns:
+            pd.DataFrame: 成交时间、成交价格、价格变动、成交量、成交金额、性质
+        """
+        code = symbol[2:] if symbol[:2].isalpha() else symbol[:6]
+        trade_date = trade_date or time.strftime('%Y%m%d')
+        rng = np.random.default_rng(_stable_seed(self.seed, 'tick', code, trade_date))
+        # 集合竞价一笔，连续竞价每 3 秒一个快照
+        seconds = np.concatenate([[9 * 3600 + 25 * 60],
+                                  np.arange(9 * 3600 + 30 * 60, 11 * 3600 + 30 * 60, 3),
+                                  np.arange(13 * 3600, 15 * 3600, 3)])
+        n = len(seconds)
+        base = round(float(rng.uniform(5, 50)), 2)
+        price = np.round(np.maximum(base + np.cumsum(rng.choice([-0.01, 0, 0.01], n, p=[0.3, 0.4, 0.3])), 0.01), 2)
+        change = np.round(np.diff(price, prepend=price[0]), 2)
+        volume = rng.integers(1, 500, n)
+        side = np.where(change > 0, '买盘', np.where(change < 0, '卖盘', rng.choice(['买盘', '卖盘', '中性盘'], n)))
+        return pd.DataFrame({
+            '成交时间': [f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in seconds],
+            '成交价格': price,
+            '价格变动': change,
+            '成交量': volume,
+            '成交金额': np.round(price * volume * 100).astype(np.int64),
+            '性质': side,
+        })
+
+
+class StubAkshare:
+    """
+    离线 akshare 数据源，只实现项目中用到的函数
+
+    example:
+        ak = StubAkshare(StubDataSource())
+        df = ak.stock_zh_a_tick_tx_js(symbol='sz300059')
+    """
+
+    def __init__(self, source: StubDataSource):
+        """
+        初始化离线 akshare
+
+        Args:
+            source (StubDataSource): 共享数据和延迟、错误配置的离线数据源
+        """
+        self.source = source
+
+    def stock_zh_a_tick_tx_js(self, symbol: str) -> pd.DataFrame:
+        """当日分笔成交"""
+        self.source._before_call('stock_zh_a_tick_tx_js')
+        return self.source.ticks(symbol)
+
+    def index_stock_cons_csindex(self, symbol: str) -> pd.DataFrame:
+        """指数成分股，按指数代码稳定抽取一半股票"""
+        self.source._before_call('index_stock_cons_csindex')
+        codes = [c for c in self.source.symbols if _stable_seed(symbol, c) % 2 == 0]
+        return pd.DataFrame({
+            '日期': time.strftime('%Y-%m-%d'),
+            '指数代码': symbol,
+            '指数名称': f'指数{symbol}',
+            '成分券代码': [c[:6] for c in codes],
+            '成分券名称': [f'股票{c[:6]}' for c in codes],
+            '交易所': ['上海证券交易所' if c.endswith('SH') else '深圳证券交易所' for c in codes],
+        })
+
+
+class RemoteAkshare:
+    """通过 StubServer 调用离线 akshare 函数"""
+
+    def __init__(self, host: str, port: int, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _call(self, func: str, **params) -> pd.DataFrame:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request('POST', f'/akshare/{func}', body=json.dumps({'params': params}),
+                         headers={'Content-Type': 'application/json'})
+            result = json.loads(conn.getresponse().read())
+        finally:
+            conn.close()
+        if result['code'] != 0:
+            raise Exception(result['msg'])
+        return pd.DataFrame(result['data']['items'], columns=result['data']['fields'])
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self._call, name)
+
+
+class StubServer:
+    """
+    兼容 tushare 协议的离线数据服务
+
+    tushare 客户端向 {url}/{api_name} 发送 POST {api_name, token, params, fields}，
+    返回 {code, msg, data: {fields, items}}；akshare 函数通过 /akshare/{func} 调用。
+    example:
+        server = StubServer(StubDataSource(latency=0.05, max_calls=500), port=9820).start()
+        pro = stub_pro_api('http://127.0.0.1:9820')
+    """
+
+    def __init__(self, source: Optional[StubDataSource] = None, host: str = '127.0.0.1', port: int = 9820):
+        """
+        初始化离线数据服务
+
+        Args:
+            source (StubDataSource, optional): 离线数据源，默认参数构造
+            host (str): 监听地址
+            port (int): 监听端口，0 表示随机端口
+        """
+        self.source = source or StubDataSource()
+        self.akshare = StubAkshare(self.source)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """实际监听的 (host, port)"""
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        """服务地址"""
+        return f'http://{self.address[0]}:{self.address[1]}'
+
+    def _handler_class(self):
+        source, akshare = self.source, self.akshare
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                    params = payload.get('params') or {}
+                    if self.path.startswith('/akshare/'):
+                        df = getattr(akshare, self.path.rsplit('/', 1)[-1])(**params)
+                    else:
+                        api_name = payload.get('api_name') or self.path.rstrip('/').rsplit('/', 1)[-1]
+                        df = source.query(api_name, payload.get('fields') or '', **params)
+                    items = df.astype(object).where(df.notna(), None).values.tolist()
+                    result = {'code': 0, 'msg': '', 'data': {'fields': list(df.columns), 'items': items}}
+                except Exception as e:
+                    result = {'code': -1, 'msg': str(e), 'data': None}
+                body = json.dumps(result, ensure_ascii=False, default=str).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"离线数据服务: {format % args}")
+
+        return Handler
+
+    def start(self) -> 'StubServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"离线数据服务已启动: {self.url}")
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程中运行服务"""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def stub_pro_api(url: str, token: str = 'stub', timeout: int = 30):
+    """
+    创建指向离线数据服务的 tushare 客户端，走真实的 tushare 请求和解析流程
+
+    Args:
+        url (str): 服务地址，例如 http://127.0.0.1:9820
+        token (str): token，离线服务不校验
+        timeout (int): 超时时间，单位为秒
+
+    Returns:
+        tushare.pro.client.DataApi: tushare 客户端
+    """
+    from tushare.pro.client import DataApi
+
+    api = DataApi(token, timeout=timeout)
+    # DataApi 的服务地址是私有的类属性，只能这样覆盖
+    api._DataApi__http_url = url.rstrip('/')
+    return api
+
+
+def source_from_url(url: str):
+    """
+    根据地址创建数据源
+
+    Args:
+        url (str): 'stub' / 'stub://?latency=0.02&error_rate=0.01&max_calls=500&seed=1' / 'http://host:port'
+
+    Returns:
+        tuple: (tushare_pro, akshare)
+    """
+    parsed = urlparse(url)
+    if parsed.scheme in ('http', 'https'):
+        return stub_pro_api(url), RemoteAkshare(parsed.hostname, parsed.port or 80)
+    if url == 'stub' or parsed.scheme == 'stub':
+        types = {'seed': int, 'n_symbols': int, 'max_calls': int, 'latency': float, 'error_rate': float,
+                 'time_window': float, 'start_date': str, 'end_date': str}
+        kwargs = {k: types[k](v) for k, v in parse_qsl(parsed.query) if k in types}
+        source = StubDataSource(**kwargs)
+        return source, StubAkshare(source)
+    raise ValueError(f"不支持的数据源地址: {url}")
+
+
+if __name__ == '__main__':
+    from utils.global_config import DataSource
+
+    server = StubServer(StubDataSource(latency=0.01), port=0).start()
+    DataSource.set_source(*source_from_url(server.url))
+    start = time.perf_counter()
+    for code in server.source.symbols[:20]:
+        DataSource.tushare_pro.daily(ts_code=code, start_date='20240101', end_date='20241231')
+    print(f"20 次 daily 调用耗时: {time.perf_counter() - start:.3f} 秒")
+    print(DataSource.tushare_pro.trade_cal(start_date='20250101', end_date='20250110'))
+    print(DataSource.akshare.stock_zh_a_tick_tx_js(symbol='sz300001').head())
+    server.stop()
@@ -7,6 +7,13 @@
 from typing import Optional, Union, Dict, Any, Tuple
 import re
 
+import numpy as np
+
+from utils.code_symbol import BOARD_PRICE_LIMITS, DEFAULT_PRICE_LIMIT, board_of, price_limits
+
+# 价格比较和取整的容差，价格精确到分
+PRICE_EPSILON = 1e-6
+
 
 def format_number(value: float, precision: int = 2) -> str:
     """将数值格式化为指定精度的字符串
@@ -59,22 +66,47 @@ def get_rise_limit_by_stock_code(stock_code: str) -> float:
         stock_code (str): 证券代码，如'600000'
 
     Returns:
-        float: 涨幅限制，如0.1表示10%，0.2表示20%
+        float: 涨幅限制，如0.1表示10%，0.2表示20%，北交所为0.3
+    """
+    board = board_of(stock_code)
+    return BOARD_PRICE_LIMITS.get(board, DEFAULT_PRICE_LIMIT)
+
+
+def get_rise_limits_by_stock_codes(stock_codes, is_st=None) -> np.ndarray:
+    """批量获取涨幅限制（向量化）
+
+    Args:
+        stock_codes: 证券代码序列，如 Series 或数组
+        is_st (array-like of bool, optional): 是否为 ST 股票
+
+    Returns:
+        np.ndarray: 涨幅限制数组
+    """
+    return price_limits(stock_codes, is_st)
+
+
+def get_limit_prices(last_close, stock_codes=None, is_st=None, limits=None) -> Tuple[np.ndarray, np.ndarray]:
+    """批量计算涨停价和跌停价（向量化）
+
+    与交易所规则一致按四舍五入（half-up）到分，如昨收 12.35 的 10% 涨停价为 13.59，
+    不使用 np.round 的银行家舍入
+
+    Args:
+        last_close: 昨收价序列
+        stock_codes: 证券代码序列，指定 limits 时可以省略
+        is_st (array-like of bool, optional): 是否为 ST 股票
+        limits (array-like of float, optional): 涨跌幅限制，指定时不再按代码推断
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (涨停价, 跌停价)，四舍五入到分
     """
-    # 上证主板
-    if stock_code.startswith('60'):
-        return 0.1
-    # 上证科创板
-    if stock_code.startswith('68'):
-        return 0.2
-    # 深证主板
-    if stock_code.startswith('00'):
-        return 0.1
-    # 深证创业板
-    if stock_code.startswith('30'):
-        return 0.2
-    # 默认涨幅限制
-    return 0.1
+    if limits is None:
+        limits = price_limits(stock_codes, is_st)
+    limits = np.asarray(limits, dtype=np.float64)
+    last_close = np.asarray(last_close, dtype=np.float64)
+    up = np.floor(last_close * (1 + limits) * 100 + 0.5 + PRICE_EPSILON) / 100
+    down = np.floor(last_close * (1 - limits) * 100 + 0.5 + PRICE_EPSILON) / 100
+    return up, down
 
 
 def normalize_stock_code(stock_code: str) -> str:
@@ -1,4 +1,10 @@
 from io import BytesIO
+from typing import Tuple, Union
+
+import numpy as np
+
+# uint64 最多需要 10 个字节
+MAX_VARINT_LEN = 10
 
 
 class Varint:
@@ -42,9 +48,175 @@ class Varint:
             raise EOFError("Unexpected EOF while reading bytes")
         return ord(c)
 
+    @staticmethod
+    def encode_array(values: np.ndarray) -> bytes:
+        """
+        批量编码非负整数数组
+
+        Args:
+            values (np.ndarray): 非负整数数组，按 uint64 处理（负数请先 ZigZag.encode_array）
+
+        Returns:
+            bytes: 依次拼接的 varint 字节
+        """
+        v = np.ascontiguousarray(values).astype(np.uint64, copy=False).ravel()
+        if v.size == 0:
+            return b''
+        # 每个数需要的字节数
+        lengths = np.ones(v.size, dtype=np.int64)
+        for k in range(1, MAX_VARINT_LEN):
+            lengths += v >= np.uint64(1 << (7 * k))
+        offsets = np.cumsum(lengths) - lengths
+        out = np.empty(int(lengths.sum()), dtype=np.uint8)
+        for k in range(int(lengths.max())):
+            mask = lengths > k
+            chunk = ((v[mask] >> np.uint64(7 * k)) & np.uint64(0x7f)).astype(np.uint8)
+            # 不是最后一个字节时设置续位
+            chunk |= np.where(lengths[mask] > k + 1, 0x80, 0).astype(np.uint8)
+            out[offsets[mask] + k] = chunk
+        return out.tobytes()
+
+    @staticmethod
+    def decode_array(buf: Union[bytes, bytearray, memoryview], count: int = None) -> Tuple[np.ndarray, int]:
+        """
+        批量解码 varint 字节
+
+        Args:
+            buf (bytes | bytearray | memoryview): 编码数据，可以是更大缓冲区的 memoryview 切片（不复制）
+            count (int, optional): 解码的个数，默认解码全部
+
+        Returns:
+            Tuple[np.ndarray, int]: uint64 数组和消耗的字节数
+        """
+        data = np.frombuffer(buf, dtype=np.uint8)
+        ends = np.flatnonzero(data < 0x80)
+        if count is not None:
+            if len(ends) < count:
+                raise EOFError("Unexpected EOF while reading bytes")
+            ends = ends[:count]
+        elif len(ends) and ends[-1] != len(data) - 1:
+            raise EOFError("Unexpected EOF while reading bytes")
+        if len(ends) == 0:
+            return np.empty(0, dtype=np.uint64), 0
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        lengths = ends - starts + 1
+        result = np.zeros(len(ends), dtype=np.uint64)
+        for k in range(int(lengths.max())):
+            mask = lengths > k
+            result[mask] |= (data[starts[mask] + k] & 0x7f).astype(np.uint64) << np.uint64(7 * k)
+        return result, int(ends[-1]) + 1
+
+
+def delta_encode(values: np.ndarray, order: int = 1) -> np.ndarray:
+    """
+    差分编码，order=2 时为 delta-of-delta（适合等间隔的时间戳）
+
+    Args:
+        values (np.ndarray): 整数数组
+        order (int): 差分阶数
+
+    Returns:
+        np.ndarray: 与输入等长的 int64 数组，第一个元素为原值
+    """
+    values = np.asarray(values, dtype=np.int64)
+    return np.diff(values, n=order, prepend=np.zeros(order, dtype=np.int64))
+
+
+def delta_decode(deltas: np.ndarray, order: int = 1) -> np.ndarray:
+    """
+    delta_encode 的逆过程
+
+    Args:
+        deltas (np.ndarray): 差分数组
+        order (int): 差分阶数
+
+    Returns:
+        np.ndarray: int64 数组
+    """
+    values = np.asarray(deltas, dtype=np.int64)
+    for _ in range(order):
+        values = np.cumsum(values)
+    return values
+
+
+def encode_signed_array(values: np.ndarray, order: int = 0) -> bytes:
+    """
+    有符号整数数组 -> 差分 + ZigZag + Varint
+
+    Args:
+        values (np.ndarray): 整数数组
+        order (int): 差分阶数，0 表示不做差分
+
+    Returns:
+        bytes: 编码数据
+    """
+    from utils.zig_zag import ZigZag
+
+    values = np.asarray(values, dtype=np.int64)
+    if order:
+        values = delta_encode(values, order)
+    return Varint.encode_array(ZigZag.encode_array(values))
+
+
+def decode_signed_array(buf: Union[bytes, bytearray, memoryview], count: int = None,
+                        order: int = 0) -> Tuple[np.ndarray, int]:
+    """
+    encode_signed_array 的逆过程
+
+    Args:
+        buf (bytes | bytearray | memoryview): 编码数据
+        count (int, optional): 解码的个数，默认全部
+        order (int): 差分阶数
+
+    Returns:
+        Tuple[np.ndarray, int]: int64 数组和消耗的字节数
+    """
+    from utils.zig_zag import ZigZag
+
+    encoded, consumed = Varint.decode_array(buf, count)
+    values = ZigZag.decode_array(encoded)
+    if order:
+        values = delta_decode(values, order)
+    return values, consumed
+
 
 if __name__ == '__main__':
+    import time
+    from utils.zig_zag import ZigZag
+
     varint, length = Varint.encode(299)
     print(f'{varint}:{length}')
     result, length = Varint.decode(varint)
     print(f'{result}:{length}')
+
+    # 与逐个编码的性能对比：模拟分笔成交的时间戳和价格
+    rng = np.random.default_rng(0)
+    n = 100_000
+    data = np.cumsum(rng.integers(-50, 50, n)).astype(np.int64)
+
+    start = time.perf_counter()
+    scalar = b''.join(Varint.encode(ZigZag.encode(int(x)))[0] for x in data)
+    encode_scalar = time.perf_counter() - start
+    start = time.perf_counter()
+    offset = 0
+    for _ in range(n):
+        value, size = Varint.decode(scalar[offset:offset + MAX_VARINT_LEN])
+        ZigZag.decode(value)
+        offset += size
+    decode_scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = encode_signed_array(data)
+    encode_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    decoded, _ = decode_signed_array(memoryview(batch))
+    decode_batch = time.perf_counter() - start
+
+    assert batch == scalar and np.array_equal(decoded, data)
+    print(f'{n} 个整数, {len(batch)} 字节')
+    print(f'编码: 逐个 {encode_scalar * 1000:.1f} ms, 批量 {encode_batch * 1000:.1f} ms, '
+          f'提升 {encode_scalar / encode_batch:.0f} 倍')
+    print(f'解码: 逐个 {decode_scalar * 1000:.1f} ms, 批量 {decode_batch * 1000:.1f} ms, '
+          f'提升 {decode_scalar / decode_batch:.0f} 倍')
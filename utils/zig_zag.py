@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class ZigZag(object):
     @staticmethod
     def encode(value) -> int:
@@ -10,3 +13,31 @@ class ZigZag(object):
         if not value & 0x1:
             return value >> 1
         return (value >> 1) ^ (~0)
+
+    @staticmethod
+    def encode_array(values: np.ndarray) -> np.ndarray:
+        """
+        批量 ZigZag 编码
+
+        Args:
+            values (np.ndarray): int64 数组
+
+        Returns:
+            np.ndarray: uint64 数组，0, -1, 1, -2 ... 映射为 0, 1, 2, 3 ...
+        """
+        v = np.asarray(values, dtype=np.int64)
+        return ((v << 1) ^ (v >> 63)).view(np.uint64)
+
+    @staticmethod
+    def decode_array(values: np.ndarray) -> np.ndarray:
+        """
+        批量 ZigZag 解码
+
+        Args:
+            values (np.ndarray): uint64 数组
+
+        Returns:
+            np.ndarray: int64 数组
+        """
+        u = np.asarray(values, dtype=np.uint64)
+        return (u >> np.uint64(1)).view(np.int64) ^ -(u & np.uint64(1)).view(np.int64)